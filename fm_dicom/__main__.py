@@ -40,4 +40,7 @@ def gui(
     launch_gui(path)
 
 if __name__ == "__main__":
+    # Required for the header parsing process pool in frozen builds
+    import multiprocessing
+    multiprocessing.freeze_support()
     app_cli()
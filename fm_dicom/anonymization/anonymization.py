@@ -15,6 +15,9 @@ import re
 from pydicom.uid import generate_uid
 from pydicom.dataelem import DataElement
 
+from fm_dicom.core.dicom_writer import read_for_edit
+from fm_dicom.core.zip_source import ensure_local
+
 class AnonymizationAction:
     """Defines different anonymization actions"""
     REMOVE = "remove"
@@ -261,14 +264,18 @@ class AnonymizationEngine:
     def _anonymize_file(self, file_path: str, template: AnonymizationTemplate, 
                        result: AnonymizationResult):
         """Anonymize a single DICOM file"""
+        # Files still inside a loaded ZIP are written out before being modified
+        ensure_local(file_path)
+
         # Check if file exists and is readable
         if not os.path.exists(file_path):
             result.add_failure(file_path, "File does not exist")
             return
             
         try:
-            # Read DICOM file
-            dataset = pydicom.dcmread(file_path, force=True)
+            # Read DICOM header; pixel data is copied across unchanged on save
+            editable = read_for_edit(file_path, force=True)
+            dataset = editable.dataset
         except Exception as e:
             result.add_failure(file_path, f"Cannot read DICOM file: {str(e)}")
             return
@@ -288,7 +295,7 @@ class AnonymizationEngine:
                 self._remove_overlays(dataset)
                 
             # Save anonymized file
-            dataset.save_as(file_path)
+            editable.save()
             result.add_success(file_path)
             
         except Exception as e:
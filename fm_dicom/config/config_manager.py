@@ -294,10 +294,15 @@ def load_config(config_path_override=None):
             "use_threaded_processing": True,    # Enable multi-threaded DICOM processing
             "thread_threshold": 100,            # Use threads for datasets > 100 files
             "max_worker_threads": 4,            # Number of worker threads
+            "processing_backend": "process",    # Header parsing backend: "process" (multi-core) or "thread"
+            "max_worker_processes": None,       # Header parsing processes (None = one per CPU core)
             "batch_size": 50,                   # Files per processing batch
             "progress_update_frequency": 20,    # Update progress every N files
             "enable_file_prefiltering": True,   # Pre-filter files before DICOM reading
-            "lazy_loading": False               # Future: Enable lazy loading (not implemented yet)
+            "lazy_loading": False,              # Future: Enable lazy loading (not implemented yet)
+            "use_header_index": True,           # Cache parsed headers on disk, keyed by path/size/mtime
+            "header_index_path": None,          # Index location (None = header_index.sqlite3 next to config.yml)
+            "tag_save_workers": None            # Files edited and written concurrently (None = based on CPU count)
         },
 
         # Favorite DICOM tags - shown at top of tag list for easy access
@@ -314,6 +319,29 @@ def load_config(config_path_override=None):
             "(0008,103E)"   # Series Description
         ],
 
+        # DICOM send (Storage SCU) defaults
+        "send": {
+            "max_associations": 4,              # Concurrent associations per send (1 = one file at a time)
+            "stream_from_file": True,           # Send stored bytes as-is when the server accepts their transfer syntax
+            "spool_files": 16,                  # Converted files kept on disk at once while sending
+            "negotiation_cache_ttl": 3600,      # Seconds to reuse a server's accepted transfer syntaxes (0 = probe every send)
+            "journal": True,                    # Record per-file send status; skip acknowledged files and retry failures
+            "journal_path": None,               # Journal location (None = send_journal.sqlite3 next to config.yml)
+            "retry_base_delay": 30,             # Seconds before the first retry, doubled for each further attempt
+            "retry_max_attempts": 5,            # Attempts before a file is left for the operator
+            "retry_check_interval": 30,         # Seconds between checks for files due for retry (0 = no background retry)
+            "metrics_log": None                 # JSON lines file each send's throughput/latency report is appended to
+        },
+
+        # File export defaults
+        "export": {
+            "zip_compression": "auto",          # "auto" = store JPEG/JPEG 2000/RLE members, deflate the rest; or "deflate"/"store"
+            "zip_workers": None,                # Threads compressing ZIP members (None = one per CPU core)
+            "copy_mode": "auto",                # Directory exports: "auto" = reflink, copy_file_range, then copy;
+                                                # "hardlink" = hard link on the same filesystem (shares the file!); "copy"
+            "copy_workers": 4                   # Files copied concurrently by directory exports
+        },
+
         # DICOM receive (Storage SCP) defaults
         "receive": {
             "enabled": True,
@@ -323,7 +351,10 @@ def load_config(config_path_override=None):
             "allowed_ae_titles": [],
             "allowed_hosts": [],
             "receive_dir": os.path.join(default_user_home_dir, app_name, "ingress"),
-            "log_path": os.path.join(default_user_home_dir, app_name, "logs", "receive.log")
+            "log_path": os.path.join(default_user_home_dir, app_name, "logs", "receive.log"),
+            "writer_threads": 4,                # Threads writing received instances to disk
+            "queue_mb": 512,                    # Received data held in memory waiting to be written
+            "queue_timeout": 30                 # Seconds a C-STORE waits for queue room before it is refused
         }
     }
 
@@ -0,0 +1,234 @@
+"""
+Writing edited DICOM files back to disk.
+
+Tag edits only change the header, but a full ``dcmread``/``save_as`` round
+trip decodes and re-encodes the pixel data as well, so editing a 500 MB
+multi-frame file costs 500 MB of reads and writes. ``read_for_edit`` reads
+just the header and remembers where the pixel data starts; ``save`` then
+writes the edited header and copies everything from the pixel data element
+to the end of the file byte for byte, using ``copy_file_range`` or
+``sendfile`` where the platform has them.
+
+Files that cannot be patched this way (no DICOM file meta, deflated
+transfer syntax, elements stored after the pixel data, or edits that land
+after it) are rewritten in full. Either way the new file is written next
+to the original and renamed over it, so a failed save never leaves a
+half-written file behind.
+"""
+
+import os
+import shutil
+import struct
+import logging
+import tempfile
+
+import pydicom
+from pydicom.uid import DeflatedExplicitVRLittleEndian
+
+# (7FE0,0008) Float Pixel Data is the first of the pixel data elements
+FIRST_PIXEL_TAG = 0x7FE00008
+COPY_CHUNK_SIZE = 8 * 1024 * 1024
+UNDEFINED_LENGTH = 0xFFFFFFFF
+# Explicit VRs whose length field is 4 bytes after 2 reserved bytes
+EXTENDED_LENGTH_VRS = {b"OB", b"OD", b"OF", b"OL", b"OV", b"OW", b"SQ", b"SV", b"UC", b"UN", b"UR", b"UT", b"UV"}
+
+
+def _atomic_write(file_path, write):
+    """Call ``write(fileobj)`` on a temporary file and rename it over ``file_path``"""
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(file_path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as fileobj:
+            write(fileobj)
+        try:
+            shutil.copymode(file_path, temp_path)
+        except OSError:
+            pass
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def save_dataset_atomic(ds, file_path, enforce_file_format=False):
+    """Write ``ds`` to ``file_path`` without ever leaving a half-written file.
+
+    The dataset is written to a temporary file in the same directory and
+    renamed over the original, so readers see either the old or the new file.
+    """
+    _atomic_write(file_path, lambda fileobj: ds.save_as(fileobj, enforce_file_format=enforce_file_format))
+
+
+def copy_file_tail(src, dst, offset, count):
+    """Copy ``count`` bytes starting at ``offset`` in ``src`` to the current position of ``dst``.
+
+    Both arguments are open binary files; ``dst`` is flushed first so the
+    copy lands after anything already written through Python's buffer.
+    """
+    dst.flush()
+    src_fd = src.fileno()
+    dst_fd = dst.fileno()
+    remaining = count
+
+    if hasattr(os, "copy_file_range"):
+        try:
+            while remaining > 0:
+                copied = os.copy_file_range(src_fd, dst_fd, min(remaining, COPY_CHUNK_SIZE), offset)
+                if copied == 0:
+                    break
+                offset += copied
+                remaining -= copied
+        except OSError as e:
+            logging.debug(f"copy_file_range unavailable, falling back: {e}")
+
+    if remaining > 0 and hasattr(os, "sendfile"):
+        try:
+            while remaining > 0:
+                copied = os.sendfile(dst_fd, src_fd, offset, min(remaining, COPY_CHUNK_SIZE))
+                if copied == 0:
+                    break
+                offset += copied
+                remaining -= copied
+        except OSError as e:
+            logging.debug(f"sendfile unavailable, falling back: {e}")
+
+    if remaining > 0:
+        # The fd-level copies above move the file position themselves
+        dst.seek(0, os.SEEK_END)
+        src.seek(offset)
+        while remaining > 0:
+            chunk = src.read(min(remaining, COPY_CHUNK_SIZE))
+            if not chunk:
+                break
+            dst.write(chunk)
+            remaining -= len(chunk)
+
+    if remaining > 0:
+        raise OSError(f"Source file ended {remaining} bytes early")
+
+
+class EditableFile:
+    """A DICOM file opened for tag edits.
+
+    ``dataset`` is header-only when the file can be patched in place; in
+    that case ``pixel_offset`` is where the pixel data element starts.
+    Otherwise the whole file has been read and ``pixel_offset`` is None.
+    """
+
+    def __init__(self, file_path, dataset, pixel_offset=None, file_size=None):
+        self.file_path = file_path
+        self.dataset = dataset
+        self.pixel_offset = pixel_offset
+        self.file_size = file_size
+
+    @property
+    def header_only(self):
+        return self.pixel_offset is not None
+
+    def _can_patch(self):
+        """True while the edited header still ends before the pixel data"""
+        if not self.header_only:
+            return False
+        if self.pixel_offset >= self.file_size:
+            # No pixel data: the header is the whole file
+            return True
+        return all(tag < FIRST_PIXEL_TAG for tag in self.dataset.keys())
+
+    def _write_patched(self, fileobj, enforce_file_format=False):
+        self.dataset.save_as(fileobj, enforce_file_format=enforce_file_format)
+        with open(self.file_path, "rb") as src:
+            copy_file_tail(src, fileobj, self.pixel_offset, self.file_size - self.pixel_offset)
+
+    def _full_dataset(self):
+        """Read the whole file and carry the header edits over to it"""
+        full = pydicom.dcmread(self.file_path, force=True)
+        full.file_meta = self.dataset.file_meta
+        for tag in [tag for tag in full.keys() if tag < FIRST_PIXEL_TAG and tag not in self.dataset]:
+            del full[tag]
+        for elem in self.dataset:
+            full[elem.tag] = elem
+        return full
+
+    def save(self, enforce_file_format=False):
+        """Write the edited dataset back to ``file_path`` atomically"""
+        if self._can_patch():
+            _atomic_write(self.file_path, lambda fileobj: self._write_patched(fileobj, enforce_file_format))
+            return
+        dataset = self._full_dataset() if self.header_only else self.dataset
+        save_dataset_atomic(dataset, self.file_path, enforce_file_format)
+
+
+def _is_patchable(ds):
+    """Only Part 10 files with an undeflated dataset can keep their tail bytes"""
+    if getattr(ds, "preamble", None) is None:
+        return False
+    transfer_syntax = getattr(getattr(ds, "file_meta", None), "TransferSyntaxUID", None)
+    if transfer_syntax is None or transfer_syntax == DeflatedExplicitVRLittleEndian:
+        return False
+    try:
+        # The copied pixel data keeps the encoding the file was written with
+        return ds.original_encoding == (transfer_syntax.is_implicit_VR, transfer_syntax.is_little_endian)
+    except ValueError:
+        # Private transfer syntax with unknown encoding
+        return False
+
+
+def _pixel_data_end(fileobj, offset, transfer_syntax):
+    """Return the offset just past the pixel data element that starts at ``offset``.
+
+    Only element and item headers are read; encapsulated fragments are
+    skipped with seeks.
+    """
+    endian = "<" if transfer_syntax.is_little_endian else ">"
+    fileobj.seek(offset)
+    header = fileobj.read(8)
+    if transfer_syntax.is_implicit_VR:
+        length = struct.unpack(f"{endian}L", header[4:8])[0]
+        position = offset + 8
+    elif header[4:6] in EXTENDED_LENGTH_VRS:
+        length = struct.unpack(f"{endian}L", fileobj.read(4))[0]
+        position = offset + 12
+    else:
+        length = struct.unpack(f"{endian}H", header[6:8])[0]
+        position = offset + 8
+
+    if length != UNDEFINED_LENGTH:
+        return position + length
+
+    # Encapsulated pixel data: walk the items up to the sequence delimiter
+    while True:
+        fileobj.seek(position)
+        item = fileobj.read(8)
+        if len(item) < 8:
+            raise ValueError("Pixel data is missing its sequence delimiter")
+        group, element, length = struct.unpack(f"{endian}HHL", item)
+        position += 8
+        if (group, element) == (0xFFFE, 0xE0DD):
+            return position
+        position += length
+
+
+def read_for_edit(file_path, force=False) -> EditableFile:
+    """Open ``file_path`` for tag edits, reading only the header when possible"""
+    with open(file_path, "rb") as fileobj:
+        header = pydicom.dcmread(fileobj, stop_before_pixels=True, force=force)
+        pixel_offset = fileobj.tell()
+        file_size = os.fstat(fileobj.fileno()).st_size
+
+        patchable = _is_patchable(header)
+        if patchable and pixel_offset < file_size:
+            # Elements after the pixel data (private groups, padding) must be
+            # visible to the edits, so such files are read in full
+            try:
+                end = _pixel_data_end(fileobj, pixel_offset, header.file_meta.TransferSyntaxUID)
+                patchable = end == file_size
+            except (struct.error, ValueError) as e:
+                logging.debug(f"Could not locate end of pixel data in {file_path}: {e}")
+                patchable = False
+
+    if patchable:
+        return EditableFile(file_path, header, pixel_offset, file_size)
+    return EditableFile(file_path, pydicom.dcmread(file_path, force=force))
@@ -1,7 +1,75 @@
 import os
+import struct
 import logging
+from collections import namedtuple
+from functools import lru_cache
 import pydicom
+from pydicom.datadict import dictionary_VR, tag_for_keyword
+from pydicom.filebase import DicomFileLike
+from pydicom.filewriter import write_dataset, write_file_meta_info
 from pydicom.uid import generate_uid
+from fm_dicom.core.path_generator import DicomPathGenerator
+
+# Explicit VR Little Endian encodings of the elements written by hand
+_ITEM_HEADER = struct.Struct('<HHI')      # (FFFE,E000) Item / (FFFE,E0DD) Delimiter
+_UL_ELEMENT = struct.Struct('<HH2sHI')
+_US_ELEMENT = struct.Struct('<HH2sHH')
+_SQ_HEADER = struct.Struct('<HH2sHI')
+_SHORT_ELEMENT = struct.Struct('<HH2sH')  # Header of a 2-byte length element (CS, UI, ...)
+_OFFSET = struct.Struct('<I')
+_UNDEFINED_LENGTH = 0xFFFFFFFF
+_UL_VALUE = 8  # Offset of a UL element's value from the element's tag
+
+# Every record starts with Offset of the Next Directory Record (UL),
+# Record In-use Flag (US) and Offset of Referenced Lower-Level Directory
+# Entity (UL), so the next offset sits at a fixed position in the item
+_LINK_ELEMENTS_SIZE = _UL_ELEMENT.size * 2 + _US_ELEMENT.size
+_NEXT_OFFSET = _ITEM_HEADER.size + _UL_VALUE
+
+_ROOT_FIRST_TAG = 0x00041200   # Offset of the First Directory Record of the Root Directory Entity
+_RECORD_SEQUENCE_TAG = 0x00041220
+
+# The values an IMAGE record needs; one per instance in the file set
+_Image = namedtuple('_Image', 'instance_number file_id sop_class_uid sop_instance_uid transfer_syntax_uid')
+
+
+@lru_cache(maxsize=None)
+def _element_header(keyword):
+    """(tag, VR) for a record attribute"""
+    return tag_for_keyword(keyword), dictionary_VR(keyword)
+
+
+def _encode_record(record):
+    """Encode a record's attributes as Explicit VR Little Endian.
+
+    Records only hold short string values, so this is done here instead of
+    building and writing a pydicom Dataset per record, which dominates the
+    time taken for file sets with many images.
+    """
+    elements = sorted(_element_header(keyword) + (value,) for keyword, value in record.items())
+    encoded = []
+    for tag, vr, value in elements:
+        if isinstance(value, (list, tuple)):
+            value = '\\'.join(value)
+        if vr == 'UI':
+            data = value.encode('ascii')
+            pad = b'\x00'
+        else:
+            data = value.encode('latin_1', errors='replace')  # ISO_IR 100
+            pad = b' '
+        if len(data) % 2:
+            data += pad
+        encoded.append(_SHORT_ELEMENT.pack(tag >> 16, tag & 0xFFFF, vr.encode('ascii'), len(data)))
+        encoded.append(data)
+    return b''.join(encoded)
+
+
+def _number_key(value):
+    """Sort IS values numerically, with non-numeric values after the numbers"""
+    try:
+        return 0, int(value), ''
+    except (TypeError, ValueError):
+        return 1, 0, str(value)
 
 
 class DicomdirBuilder:
@@ -12,7 +80,7 @@ class DicomdirBuilder:
         self.patients = {}
         self.studies = {}
         self.series = {}
-        self.images = []
+        self.image_count = 0
 
     def debug_dicomdir_structure(self, file_mapping):
         """Debug the DICOMDIR structure to see what patients/studies/series we have"""
@@ -55,7 +123,7 @@ class DicomdirBuilder:
         
         logging.info(f"  Studies: {len(self.studies)}")
         logging.info(f"  Series: {len(self.series)}")
-        logging.info(f"  Images: {len(self.images)}")
+        logging.info(f"  Images: {self.image_count}")
         
         logging.info("=== END DEBUG ===")
         
@@ -67,77 +135,12 @@ class DicomdirBuilder:
         logging.info(f"Building DICOMDIR structure for {len(file_mapping)} files")
         
         # Reset structures to avoid accumulation from previous calls
-        self.patients = {}
-        self.studies = {}
-        self.series = {}
-        self.images = []
+        self._reset()
         
         for original_path, copied_path in file_mapping.items():
             try:
-                ds = pydicom.dcmread(original_path, stop_before_pixels=True)
-                
-                # Extract metadata with proper defaults
-                patient_id = str(getattr(ds, 'PatientID', 'UNKNOWN'))
-                patient_name = str(getattr(ds, 'PatientName', 'UNKNOWN'))
-                study_uid = str(getattr(ds, 'StudyInstanceUID', generate_uid()))
-                study_desc = str(getattr(ds, 'StudyDescription', ''))
-                study_date = str(getattr(ds, 'StudyDate', ''))
-                study_time = str(getattr(ds, 'StudyTime', ''))
-                study_id = str(getattr(ds, 'StudyID', ''))
-                series_uid = str(getattr(ds, 'SeriesInstanceUID', generate_uid()))
-                series_desc = str(getattr(ds, 'SeriesDescription', ''))
-                series_number = str(getattr(ds, 'SeriesNumber', '1'))
-                modality = str(getattr(ds, 'Modality', 'OT'))
-                sop_class_uid = str(getattr(ds, 'SOPClassUID', ''))
-                sop_instance_uid = str(getattr(ds, 'SOPInstanceUID', generate_uid()))
-                transfer_syntax = str(getattr(ds.file_meta, 'TransferSyntaxUID', '1.2.840.10008.1.2'))
-                instance_number = str(getattr(ds, 'InstanceNumber', '1'))
-                
-                logging.debug(f"Processing file: PatientID='{patient_id}', StudyUID='{study_uid[:8]}...', SeriesUID='{series_uid[:8]}...'")
-                
-                # Store patient info (create if doesn't exist)
-                if patient_id not in self.patients:
-                    self.patients[patient_id] = {
-                        'PatientID': patient_id,
-                        'PatientName': patient_name,
-                        'studies': []
-                    }
-                    logging.debug(f"Created new patient: {patient_id}")
-                
-                # Store study info (create if doesn't exist)
-                study_key = f"{patient_id}#{study_uid}"
-                if study_key not in self.studies:
-                    self.studies[study_key] = {
-                        'StudyInstanceUID': study_uid,
-                        'StudyDescription': study_desc,
-                        'StudyDate': study_date,
-                        'StudyTime': study_time,
-                        'StudyID': study_id,
-                        'PatientID': patient_id,
-                        'series': []
-                    }
-                    # Link study to patient
-                    if study_key not in self.patients[patient_id]['studies']:
-                        self.patients[patient_id]['studies'].append(study_key)
-                    logging.debug(f"Created new study: {study_key}")
-                
-                # Store series info (create if doesn't exist)
-                series_key = f"{study_key}#{series_uid}"
-                if series_key not in self.series:
-                    self.series[series_key] = {
-                        'SeriesInstanceUID': series_uid,
-                        'SeriesDescription': series_desc,
-                        'SeriesNumber': series_number,
-                        'Modality': modality,
-                        'StudyInstanceUID': study_uid,
-                        'PatientID': patient_id,
-                        'images': []
-                    }
-                    # Link series to study
-                    if series_key not in self.studies[study_key]['series']:
-                        self.studies[study_key]['series'].append(series_key)
-                    logging.debug(f"Created new series: {series_key}")
-                
+                metadata = DicomPathGenerator.read_metadata(original_path)
+
                 # Convert file path to DICOMDIR-relative path
                 base_dir = os.path.dirname(copied_path)
                 while not os.path.basename(base_dir) or os.path.basename(base_dir) != 'DICOM':
@@ -145,62 +148,228 @@ class DicomdirBuilder:
                     if parent_dir == base_dir:  # Reached root
                         break
                     base_dir = parent_dir
-                
+
                 # Create relative path from DICOMDIR location to image file
                 dicomdir_base = os.path.dirname(base_dir)  # Parent of DICOM folder
                 rel_path = os.path.relpath(copied_path, dicomdir_base)
-                
-                # Convert to DICOM file ID format (array of path components)
-                path_components = rel_path.replace('\\', '/').split('/')
-                
-                # Store image info
-                image_info = {
-                    'ReferencedFileID': path_components,
-                    'ReferencedSOPClassUIDInFile': sop_class_uid,
-                    'ReferencedSOPInstanceUIDInFile': sop_instance_uid,
-                    'ReferencedTransferSyntaxUIDInFile': transfer_syntax,
-                    'InstanceNumber': instance_number,
-                    'SeriesInstanceUID': series_uid,
-                    'StudyInstanceUID': study_uid,
-                    'PatientID': patient_id,
-                    'copied_path': copied_path
-                }
-                
-                self.images.append(image_info)
-                # Link image to series
-                self.series[series_key]['images'].append(image_info)
-                
+
+                self._add_instance(metadata, rel_path)
+
             except Exception as e:
                 logging.warning(f"Could not process file {original_path} for DICOMDIR: {e}")
                 continue
-        
+
         # Debug the final structure
         self.debug_dicomdir_structure(file_mapping)
         
-        logging.info(f"DICOMDIR structure: {len(self.patients)} patients, {len(self.studies)} studies, {len(self.series)} series, {len(self.images)} images")
+        logging.info(f"DICOMDIR structure: {len(self.patients)} patients, {len(self.studies)} studies, {len(self.series)} series, {self.image_count} images")
     
+    def add_metadata(self, entries):
+        """
+        Build directory structure from already read metadata, without opening any file
+        entries: iterable of (file_id, metadata) where file_id is the member path
+        relative to the DICOMDIR (e.g. "DICOM/PAT00001/STU00001/SER00001/IMG00001")
+        and metadata is a dict from DicomPathGenerator.read_metadata
+        """
+        self._reset()
+
+        for file_id, metadata in entries:
+            try:
+                self._add_instance(metadata, file_id)
+            except Exception as e:
+                logging.warning(f"Could not add {file_id} to DICOMDIR: {e}")
+
+        logging.info(f"DICOMDIR structure: {len(self.patients)} patients, {len(self.studies)} studies, {len(self.series)} series, {self.image_count} images")
+
+    def _reset(self):
+        self.patients = {}
+        self.studies = {}
+        self.series = {}
+        self.image_count = 0
+
+    def _add_instance(self, metadata, rel_path):
+        """Link one instance into the patient/study/series structure.
+
+        Each level keys its children by UID in a dict, so linking is a
+        constant-time lookup however many instances a series holds.
+        """
+        def value(keyword, default):
+            found = metadata.get(keyword)
+            return str(default if found is None else found)
+
+        patient_id = value('PatientID', 'UNKNOWN')
+        study_uid = str(metadata.get('StudyInstanceUID') or generate_uid())
+        series_uid = str(metadata.get('SeriesInstanceUID') or generate_uid())
+
+        # Store patient info (create if doesn't exist)
+        patient = self.patients.get(patient_id)
+        if patient is None:
+            patient = self.patients[patient_id] = {
+                'PatientID': patient_id,
+                'PatientName': value('PatientName', 'UNKNOWN'),
+                'studies': {}
+            }
+            logging.debug(f"Created new patient: {patient_id}")
+
+        # Store study info (create if doesn't exist)
+        study_key = (patient_id, study_uid)
+        study = self.studies.get(study_key)
+        if study is None:
+            study = self.studies[study_key] = {
+                'StudyInstanceUID': study_uid,
+                'StudyDescription': value('StudyDescription', ''),
+                'StudyDate': value('StudyDate', ''),
+                'StudyTime': value('StudyTime', ''),
+                'StudyID': value('StudyID', ''),
+                'PatientID': patient_id,
+                'series': {}
+            }
+            patient['studies'][study_uid] = study
+            logging.debug(f"Created new study: {study_uid}")
+
+        # Store series info (create if doesn't exist)
+        series_key = (patient_id, study_uid, series_uid)
+        series = self.series.get(series_key)
+        if series is None:
+            series = self.series[series_key] = {
+                'SeriesInstanceUID': series_uid,
+                'SeriesDescription': value('SeriesDescription', ''),
+                'SeriesNumber': value('SeriesNumber', '1'),
+                'Modality': value('Modality', 'OT'),
+                'StudyInstanceUID': study_uid,
+                'PatientID': patient_id,
+                'images': []
+            }
+            study['series'][series_uid] = series
+            logging.debug(f"Created new series: {series_uid}")
+
+        # Images are the bulk of a large file set, so only the values their
+        # records need are kept, in a tuple
+        series['images'].append(_Image(
+            value('InstanceNumber', '1'),
+            rel_path.replace('\\', '/'),
+            value('SOPClassUID', ''),
+            str(metadata.get('SOPInstanceUID') or generate_uid()),
+            value('TransferSyntaxUID', '1.2.840.10008.1.2'),
+        ))
+        self.image_count += 1
+
     def generate_dicomdir(self, output_path):
-        """Generate valid DICOMDIR file"""
+        """Generate valid DICOMDIR file (output_path may also be a writable, seekable file-like object)"""
         logging.info(f"Generating DICOMDIR at {output_path}")
         
         try:
-            # Create base DICOMDIR dataset
-            ds = self._create_base_dataset()
-            
-            # Build directory record sequence with proper linking
-            ds.DirectoryRecordSequence = self._build_directory_records()
-            
-            # Set file set information
-            ds.OffsetOfTheFirstDirectoryRecordOfTheRootDirectoryEntity = 0
-            ds.OffsetOfTheLastDirectoryRecordOfTheRootDirectoryEntity = 0
-            
-            # Save DICOMDIR
-            ds.save_as(output_path, enforce_file_format=True)
-            logging.info("DICOMDIR created successfully")
+            if hasattr(output_path, 'write'):
+                record_count = self._write_dicomdir(output_path)
+            else:
+                with open(output_path, 'wb') as fp:
+                    record_count = self._write_dicomdir(fp)
+            logging.info(f"DICOMDIR created successfully with {record_count} directory records")
             
         except Exception as e:
             logging.error(f"Failed to generate DICOMDIR: {e}")
             raise
+
+    def _write_dicomdir(self, fp):
+        """Stream the DICOMDIR to ``fp``, one directory record at a time.
+
+        Records are encoded and written in depth-first order, so the sequence
+        is never held in memory. A record's first child always follows it
+        directly, and an image's next sibling directly follows the image, so
+        those offsets are known when the record is written. Only the "next"
+        offset of patient, study and series records is patched in once the
+        sibling is written, which needs one remembered position per level.
+        Offsets are from the first byte of the file (the preamble).
+        """
+        base = fp.tell()
+        ds = self._create_base_dataset()
+
+        out = DicomFileLike(fp)
+        out.is_little_endian = True
+        out.is_implicit_VR = False
+        out.write(b'\x00' * 128 + b'DICM')
+        write_file_meta_info(out, ds.file_meta, enforce_standard=True)
+        # Elements before the root offsets, e.g. File-set ID
+        write_dataset(out, ds[:_ROOT_FIRST_TAG])
+
+        root_position = fp.tell() - base
+        fp.write(_UL_ELEMENT.pack(0x0004, 0x1200, b'UL', 4, 0))
+        fp.write(_UL_ELEMENT.pack(0x0004, 0x1202, b'UL', 4, 0))
+        fp.write(_US_ELEMENT.pack(0x0004, 0x1212, b'US', 2, ds.FileSetConsistencyFlag))
+        fp.write(_SQ_HEADER.pack(0x0004, 0x1220, b'SQ', 0, _UNDEFINED_LENGTH))
+
+        count = 0
+        first_patient = last_patient = None
+        for patient in sorted(self.patients.values(), key=lambda p: p['PatientID']):
+            offset, _ = self._write_record(fp, base, self._create_patient_record(patient))
+            count += 1
+            if last_patient is None:
+                first_patient = offset
+            else:
+                self._patch(fp, base, last_patient + _NEXT_OFFSET, offset)
+            last_patient = offset
+
+            last_study = None
+            for study in sorted(patient['studies'].values(), key=lambda s: s['StudyDate']):
+                offset, _ = self._write_record(fp, base, self._create_study_record(study))
+                count += 1
+                if last_study is not None:
+                    self._patch(fp, base, last_study + _NEXT_OFFSET, offset)
+                last_study = offset
+
+                last_series = None
+                for series in sorted(study['series'].values(), key=lambda s: _number_key(s['SeriesNumber'])):
+                    offset, _ = self._write_record(fp, base, self._create_series_record(series))
+                    count += 1
+                    if last_series is not None:
+                        self._patch(fp, base, last_series + _NEXT_OFFSET, offset)
+                    last_series = offset
+
+                    images = sorted(series['images'], key=lambda i: _number_key(i.instance_number))
+                    for index, image in enumerate(images):
+                        is_last = index == len(images) - 1
+                        self._write_record(fp, base, self._create_image_record(image), leaf=True, last=is_last)
+                        count += 1
+
+        fp.write(_ITEM_HEADER.pack(0xFFFE, 0xE0DD, 0))  # Sequence Delimitation Item
+
+        # Elements after the record sequence, e.g. Specific Character Set
+        write_dataset(out, ds[_RECORD_SEQUENCE_TAG + 1:])
+
+        if first_patient is not None:
+            self._patch(fp, base, root_position + _UL_VALUE, first_patient)
+            self._patch(fp, base, root_position + _UL_ELEMENT.size + _UL_VALUE, last_patient)
+        return count
+
+    @staticmethod
+    def _write_record(fp, base, record, leaf=False, last=False):
+        """Write one directory record item; returns (offset, end offset).
+
+        A non-leaf record points at the record after it as its first child
+        and leaves its next offset for the caller to patch. A leaf points at
+        the record after it as its next sibling unless it is the last one.
+        """
+        data = _encode_record(record)
+
+        offset = fp.tell() - base
+        end = offset + _ITEM_HEADER.size + _LINK_ELEMENTS_SIZE + len(data)
+        next_offset = end if leaf and not last else 0
+        lower_offset = 0 if leaf else end
+
+        fp.write(_ITEM_HEADER.pack(0xFFFE, 0xE000, _LINK_ELEMENTS_SIZE + len(data)))
+        fp.write(_UL_ELEMENT.pack(0x0004, 0x1400, b'UL', 4, next_offset))
+        fp.write(_US_ELEMENT.pack(0x0004, 0x1410, b'US', 2, 0xFFFF))  # Record in use
+        fp.write(_UL_ELEMENT.pack(0x0004, 0x1420, b'UL', 4, lower_offset))
+        fp.write(data)
+        return offset, end
+
+    @staticmethod
+    def _patch(fp, base, position, value):
+        """Overwrite the 4-byte offset value at ``position`` and return to the end"""
+        end = fp.tell()
+        fp.seek(base + position)
+        fp.write(_OFFSET.pack(value))
+        fp.seek(end)
     
     def _create_base_dataset(self):
         """Create base DICOMDIR dataset with all required elements"""
@@ -263,137 +432,67 @@ class DicomdirBuilder:
         logging.debug(f"Sanitized FileSetID: '{value}' -> '{result}'")
         return result
     
-    def _build_directory_records(self):
-        """Build properly linked directory records"""
-        records = []
-        
-        # Sort patients for consistent ordering
-        sorted_patients = sorted(self.patients.items())
-        
-        logging.info(f"Building directory records for {len(sorted_patients)} patients")
-        
-        for patient_id, patient_info in sorted_patients:
-            logging.debug(f"Processing patient: {patient_id}")
-            
-            # Create PATIENT record
-            patient_record = self._create_patient_record(patient_info)
-            records.append(patient_record)
-            
-            # Get studies for this patient
-            study_keys = patient_info.get('studies', [])
-            logging.debug(f"  Patient {patient_id} has {len(study_keys)} studies")
-            
-            sorted_studies = sorted([(k, self.studies[k]) for k in study_keys], 
-                                key=lambda x: x[1].get('StudyDate', ''))
-            
-            for study_key, study_info in sorted_studies:
-                logging.debug(f"  Processing study: {study_info['StudyInstanceUID'][:8]}...")
-                
-                # Create STUDY record
-                study_record = self._create_study_record(study_info)
-                records.append(study_record)
-                
-                # Get series for this study
-                series_keys = study_info.get('series', [])
-                logging.debug(f"    Study has {len(series_keys)} series")
-                
-                sorted_series = sorted([(k, self.series[k]) for k in series_keys], 
-                                    key=lambda x: int(x[1].get('SeriesNumber', '0')))
-                
-                for series_key, series_info in sorted_series:
-                    logging.debug(f"    Processing series: {series_info['SeriesInstanceUID'][:8]}...")
-                    
-                    # Create SERIES record
-                    series_record = self._create_series_record(series_info)
-                    records.append(series_record)
-                    
-                    # Get images for this series
-                    images = series_info.get('images', [])
-                    logging.debug(f"      Series has {len(images)} images")
-                    
-                    sorted_images = sorted(images, key=lambda x: int(x.get('InstanceNumber', '0')))
-                    
-                    for image_info in sorted_images:
-                        # Create IMAGE record
-                        image_record = self._create_image_record(image_info)
-                        records.append(image_record)
-        
-        logging.info(f"Built {len(records)} directory records total")
-        return records
-    
     def _create_patient_record(self, patient_info):
         """Create PATIENT directory record"""
-        record = pydicom.Dataset()
-        record.OffsetOfTheNextDirectoryRecord = 0
-        record.RecordInUseFlag = 0xFFFF
-        record.OffsetOfReferencedLowerLevelDirectoryEntity = 0
-        record.DirectoryRecordType = "PATIENT"
+        record = {}
+        record['DirectoryRecordType'] = "PATIENT"
         
         # Required PATIENT level attributes
-        record.PatientID = patient_info['PatientID'][:64]  # Limit length
-        record.PatientName = patient_info['PatientName'][:320]  # Limit length
+        record['PatientID'] = patient_info['PatientID'][:64]  # Limit length
+        record['PatientName'] = patient_info['PatientName'][:320]  # Limit length
         
         return record
     
     def _create_study_record(self, study_info):
         """Create STUDY directory record"""
-        record = pydicom.Dataset()
-        record.OffsetOfTheNextDirectoryRecord = 0
-        record.RecordInUseFlag = 0xFFFF
-        record.OffsetOfReferencedLowerLevelDirectoryEntity = 0
-        record.DirectoryRecordType = "STUDY"
+        record = {}
+        record['DirectoryRecordType'] = "STUDY"
         
         # Required STUDY level attributes
-        record.StudyInstanceUID = study_info['StudyInstanceUID']
+        record['StudyInstanceUID'] = study_info['StudyInstanceUID']
         
         # Optional but recommended STUDY attributes
         if study_info.get('StudyDate'):
-            record.StudyDate = study_info['StudyDate'][:8]  # YYYYMMDD format
+            record['StudyDate'] = study_info['StudyDate'][:8]  # YYYYMMDD format
         if study_info.get('StudyTime'):
-            record.StudyTime = study_info['StudyTime'][:16]  # HHMMSS.FFFFFF format
+            record['StudyTime'] = study_info['StudyTime'][:16]  # HHMMSS.FFFFFF format
         if study_info.get('StudyDescription'):
-            record.StudyDescription = study_info['StudyDescription'][:64]
+            record['StudyDescription'] = study_info['StudyDescription'][:64]
         if study_info.get('StudyID'):
-            record.StudyID = study_info['StudyID'][:16]
+            record['StudyID'] = study_info['StudyID'][:16]
         
         return record
     
     def _create_series_record(self, series_info):
         """Create SERIES directory record"""
-        record = pydicom.Dataset()
-        record.OffsetOfTheNextDirectoryRecord = 0
-        record.RecordInUseFlag = 0xFFFF
-        record.OffsetOfReferencedLowerLevelDirectoryEntity = 0
-        record.DirectoryRecordType = "SERIES"
+        record = {}
+        record['DirectoryRecordType'] = "SERIES"
         
         # Required SERIES level attributes
-        record.SeriesInstanceUID = series_info['SeriesInstanceUID']
-        record.Modality = series_info['Modality'][:16]  # Limit length
+        record['SeriesInstanceUID'] = series_info['SeriesInstanceUID']
+        record['Modality'] = series_info['Modality'][:16]  # Limit length
         
         # Optional but recommended SERIES attributes
         if series_info.get('SeriesNumber'):
-            record.SeriesNumber = series_info['SeriesNumber'][:12]
+            record['SeriesNumber'] = series_info['SeriesNumber'][:12]
         if series_info.get('SeriesDescription'):
-            record.SeriesDescription = series_info['SeriesDescription'][:64]
+            record['SeriesDescription'] = series_info['SeriesDescription'][:64]
         
         return record
     
-    def _create_image_record(self, image_info):
+    def _create_image_record(self, image):
         """Create IMAGE directory record"""
-        record = pydicom.Dataset()
-        record.OffsetOfTheNextDirectoryRecord = 0
-        record.RecordInUseFlag = 0xFFFF
-        record.OffsetOfReferencedLowerLevelDirectoryEntity = 0
-        record.DirectoryRecordType = "IMAGE"
+        record = {}
+        record['DirectoryRecordType'] = "IMAGE"
         
         # Required IMAGE level attributes
-        record.ReferencedFileID = image_info['ReferencedFileID']
-        record.ReferencedSOPClassUIDInFile = image_info['ReferencedSOPClassUIDInFile']
-        record.ReferencedSOPInstanceUIDInFile = image_info['ReferencedSOPInstanceUIDInFile']
-        record.ReferencedTransferSyntaxUIDInFile = image_info['ReferencedTransferSyntaxUIDInFile']
+        record['ReferencedFileID'] = image.file_id.split('/')
+        record['ReferencedSOPClassUIDInFile'] = image.sop_class_uid
+        record['ReferencedSOPInstanceUIDInFile'] = image.sop_instance_uid
+        record['ReferencedTransferSyntaxUIDInFile'] = image.transfer_syntax_uid
         
         # Optional but recommended IMAGE attributes
-        if image_info.get('InstanceNumber'):
-            record.InstanceNumber = image_info['InstanceNumber'][:12]
+        if image.instance_number:
+            record['InstanceNumber'] = image.instance_number[:12]
         
         return record
\ No newline at end of file
@@ -1,6 +1,120 @@
 import os
 import logging
+from collections import defaultdict
 import pydicom
+from pydicom.charset import convert_encodings, decode_bytes
+from pydicom.datadict import tag_for_keyword
+from pydicom.valuerep import PN_DELIMS, TEXT_VR_DELIMS
+from fm_dicom.core.instance_record import InstanceRecord
+
+# Values taken from each directory record type, as (record keyword,
+# instance keyword). IMAGE records name the SOP values "...InFile".
+_RECORD_VALUES = {
+    'PATIENT': (('PatientID', 'PatientID'), ('PatientName', 'PatientName')),
+    'STUDY': (
+        ('StudyInstanceUID', 'StudyInstanceUID'),
+        ('StudyDescription', 'StudyDescription'),
+        ('StudyDate', 'StudyDate'),
+    ),
+    'SERIES': (
+        ('SeriesInstanceUID', 'SeriesInstanceUID'),
+        ('SeriesDescription', 'SeriesDescription'),
+        ('SeriesNumber', 'SeriesNumber'),
+        ('Modality', 'Modality'),
+    ),
+    'IMAGE': (
+        ('ReferencedSOPInstanceUIDInFile', 'SOPInstanceUID'),
+        ('ReferencedSOPClassUIDInFile', 'SOPClassUID'),
+        ('InstanceNumber', 'InstanceNumber'),
+    ),
+}
+_LEVELS = {'PATIENT': 0, 'STUDY': 1, 'SERIES': 2}
+_LEVEL_OF = {
+    keyword: _LEVELS[record_type]
+    for record_type in _LEVELS
+    for _, keyword in _RECORD_VALUES[record_type]
+}
+
+
+_RECORD_TYPE = tag_for_keyword('DirectoryRecordType')
+_CHARACTER_SET = tag_for_keyword('SpecificCharacterSet')
+_PERSON_NAMES = {tag_for_keyword('PatientName')}
+_TRANSFER_SYNTAX = tag_for_keyword('ReferencedTransferSyntaxUIDInFile')
+_RECORD_TAGS = {
+    record_type: tuple((tag_for_keyword(record_keyword), keyword) for record_keyword, keyword in pairs)
+    for record_type, pairs in _RECORD_VALUES.items()
+}
+
+
+def _string_value(record, tag, encodings=None):
+    """A text element's value, decoded straight from the raw element.
+
+    Records hold tens of thousands of elements in a large DICOMDIR; leaving
+    them raw avoids pydicom's per-element value conversion. Non-ASCII
+    values are decoded with ``encodings`` (Python codec names from the
+    Specific Character Set), defaulting to the DICOM default repertoire.
+    """
+    element = record.get_item(tag)
+    if element is None:
+        return None
+    value = element.value
+    if isinstance(value, bytes):
+        if encodings is None or value.isascii():
+            text = value.decode('latin_1')
+        else:
+            delimiters = PN_DELIMS if tag in _PERSON_NAMES else TEXT_VR_DELIMS
+            text = decode_bytes(value, encodings, delimiters)
+        return text.rstrip(' \x00')
+    return None if value is None else str(value)
+
+
+def _encodings(dataset, default=None):
+    """Python codecs for a dataset's or record's Specific Character Set, or ``default``"""
+    character_set = _string_value(dataset, _CHARACTER_SET)
+    if not character_set:
+        return default
+    return convert_encodings([term.strip() for term in character_set.split('\\')])
+
+
+def _record_values(record, record_type, inherited, encodings=None):
+    """``inherited`` plus the instance values a directory record carries"""
+    values = dict(inherited)
+    # A record may name its own character set (PS3.10 F.3)
+    encodings = _encodings(record, encodings)
+    for tag, keyword in _RECORD_TAGS.get(record_type, ()):
+        value = _string_value(record, tag, encodings)
+        if value:
+            values[keyword] = value
+    return values
+
+
+def _existing_files(file_paths):
+    """The subset of ``file_paths`` that exist, listing each directory once.
+
+    Names are compared with ``os.path.normcase``, so on Windows a file whose
+    on-disk case differs from the (usually upper case) file ID still
+    matches. Names the listing does not match, e.g. on case-insensitive
+    macOS volumes, are checked individually with ``os.path.exists``.
+    """
+    by_directory = defaultdict(set)
+    for file_path in file_paths:
+        by_directory[os.path.dirname(file_path)].add(os.path.basename(file_path))
+
+    existing = set()
+    for directory, names in by_directory.items():
+        wanted = {os.path.normcase(name): name for name in names}
+        found = set()
+        try:
+            with os.scandir(directory or '.') as entries:
+                for entry in entries:
+                    name = wanted.get(os.path.normcase(entry.name))
+                    if name is not None:
+                        found.add(name)
+        except OSError:
+            pass
+        found.update(name for name in names - found if os.path.exists(os.path.join(directory, name)))
+        existing.update(os.path.join(directory, name) for name in found)
+    return existing
 
 
 class DicomdirReader:
@@ -22,60 +136,114 @@ class DicomdirReader:
                     
         return dicomdir_files
         
-    def read_dicomdir(self, dicomdir_path):
-        """Read DICOMDIR and extract file references"""
+    def read_dicomdir(self, dicomdir_path, records=False):
+        """Read DICOMDIR and extract file references.
+
+        With ``records=True`` returns ``(file_path, InstanceRecord)`` pairs
+        instead of paths. Patient, study, series and instance values come
+        from the directory records, so the referenced images are never
+        opened. Only files that exist are returned; existence is checked
+        with one directory listing per directory rather than a stat per file.
+        """
         try:
             self.dicomdir_path = dicomdir_path
             self.base_directory = os.path.dirname(dicomdir_path)
             
             # Read the DICOMDIR file
-            ds = pydicom.dcmread(dicomdir_path)
+            ds = pydicom.dcmread(dicomdir_path, force=True)
             
             # Extract file references from directory records
-            file_paths = []
+            entries = []
             
             if hasattr(ds, 'DirectoryRecordSequence'):
-                for record in ds.DirectoryRecordSequence:
+                for record, values in self._image_records(ds):
                     file_path = self._extract_file_path(record)
                     if file_path:
-                        file_paths.append(file_path)
+                        entries.append((file_path, values, _string_value(record, _TRANSFER_SYNTAX)))
                         
+            existing = _existing_files(file_path for file_path, _, _ in entries)
+            file_paths = []
+            for file_path, values, transfer_syntax in entries:
+                if file_path not in existing:
+                    logging.warning(f"DICOMDIR references missing file: {file_path}")
+                elif records:
+                    file_paths.append((file_path, InstanceRecord(
+                        file_path, values, transfer_syntax_uid=transfer_syntax or None
+                    )))
+                else:
+                    file_paths.append(file_path)
             return file_paths
             
         except Exception as e:
             logging.error(f"Failed to read DICOMDIR {dicomdir_path}: {e}")
             return []
+
+    def _image_records(self, ds):
+        """Yield ``(IMAGE record, hierarchy values)`` for each image in the DICOMDIR.
+
+        Records are walked through their next/lower-level offsets, so each
+        image inherits the values of the patient, study and series records
+        above it. DICOMDIRs whose offsets are missing or broken are read in
+        sequence order instead, which is how they are normally laid out.
+        """
+        records = ds.DirectoryRecordSequence
+        encodings = _encodings(ds)
+        by_offset = {record.seq_item_tell: record for record in records}
+        root = ds.get('OffsetOfTheFirstDirectoryRecordOfTheRootDirectoryEntity')
+        if root in by_offset:
+            stack = [(root, {})]
+            visited = set()
+            while stack:
+                offset, inherited = stack.pop()
+                if not offset or offset in visited or offset not in by_offset:
+                    continue
+                visited.add(offset)
+                record = by_offset[offset]
+                # Siblings share the parent's values; children add this record's
+                stack.append((record.get('OffsetOfTheNextDirectoryRecord'), inherited))
+                record_type = _string_value(record, _RECORD_TYPE)
+                values = _record_values(record, record_type, inherited, encodings)
+                if record_type == 'IMAGE':
+                    yield record, values
+                stack.append((record.get('OffsetOfReferencedLowerLevelDirectoryEntity'), values))
+            if visited:
+                return
+
+        inherited = {}
+        for record in records:
+            record_type = _string_value(record, _RECORD_TYPE)
+            level = _LEVELS.get(record_type)
+            if level is not None:
+                # A new patient/study/series replaces that level and those below it
+                inherited = {k: v for k, v in inherited.items() if _LEVEL_OF[k] < level}
+            values = _record_values(record, record_type, inherited, encodings)
+            if record_type == 'IMAGE':
+                yield record, values
+            elif level is not None:
+                inherited = values
             
     def _extract_file_path(self, record):
         """Extract file path from a directory record"""
         try:
-            # Check if this is an IMAGE record (actual DICOM file)
-            if hasattr(record, 'DirectoryRecordType') and record.DirectoryRecordType == 'IMAGE':
-                # Get the referenced file ID
-                if hasattr(record, 'ReferencedFileID'):
-                    file_id = record.ReferencedFileID
-                    
-                    # Convert file ID to actual path
-                    # DICOM file IDs are typically arrays of path components
-                    # Handle both regular lists/tuples AND pydicom MultiValue objects
-                    if hasattr(file_id, '__iter__') and not isinstance(file_id, str):
-                        # Join the path components (works for lists, tuples, and MultiValue)
-                        relative_path = os.path.join(*file_id)
-                    else:
-                        relative_path = str(file_id)
-
-                    # Convert to absolute path
-                    full_path = os.path.join(self.base_directory, relative_path)
-
-                    # Normalize path separators for current OS
-                    full_path = os.path.normpath(full_path)
-                    
-                    # Check if file exists
-                    if os.path.exists(full_path):
-                        return full_path
-                    else:
-                        logging.warning(f"DICOMDIR references missing file: {full_path}")
-                        
+            # Get the referenced file ID
+            if hasattr(record, 'ReferencedFileID'):
+                file_id = record.ReferencedFileID
+                
+                # Convert file ID to actual path
+                # DICOM file IDs are typically arrays of path components
+                # Handle both regular lists/tuples AND pydicom MultiValue objects
+                if hasattr(file_id, '__iter__') and not isinstance(file_id, str):
+                    # Join the path components (works for lists, tuples, and MultiValue)
+                    relative_path = os.path.join(*file_id)
+                else:
+                    relative_path = str(file_id)
+
+                # Convert to absolute path
+                full_path = os.path.join(self.base_directory, relative_path)
+
+                # Normalize path separators for current OS
+                return os.path.normpath(full_path)
+
         except Exception as e:
             logging.warning(f"Failed to extract file path from directory record: {e}")
             
@@ -0,0 +1,273 @@
+"""
+Persistent on-disk index of DICOM header values.
+
+Reopening a folder used to re-parse every file with
+``pydicom.dcmread(..., stop_before_pixels=True)``. The header index stores the
+tags needed to build the patient/study/series/instance hierarchy in a small
+SQLite database next to the configuration file, keyed by path, size and
+modification time. Files that have not changed since they were indexed are
+served straight from the database without being opened.
+"""
+
+import os
+import sqlite3
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import pydicom
+
+from fm_dicom.config.config_manager import get_config_path
+from fm_dicom.core.instance_record import InstanceRecord, RECORD_TAGS
+
+# Tags stored for every indexed file: the same set an InstanceRecord holds
+INDEXED_TAGS = RECORD_TAGS
+
+# Bump when the table layout or the meaning of a column changes
+SCHEMA_VERSION = 1
+
+# Marker returned for files that are known not to be readable as DICOM
+NOT_DICOM = object()
+
+
+class HeaderIndex:
+    """SQLite-backed cache of DICOM header values keyed by path, size and mtime"""
+
+    def __init__(self, db_path, flush_every=500):
+        self.db_path = db_path
+        self.flush_every = flush_every
+        self._lock = threading.Lock()
+        self._pending = []
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._ensure_schema()
+
+    def _ensure_schema(self):
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            if version:
+                logging.info(f"Header index schema changed ({version} -> {SCHEMA_VERSION}), rebuilding {self.db_path}")
+            self._conn.execute("DROP TABLE IF EXISTS headers")
+
+        tag_columns = ", ".join(f"{keyword} TEXT" for keyword in INDEXED_TAGS)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS headers ("
+            "path TEXT PRIMARY KEY, "
+            "size INTEGER NOT NULL, "
+            "mtime_ns INTEGER NOT NULL, "
+            "is_dicom INTEGER NOT NULL, "
+            "transfer_syntax TEXT, "
+            f"{tag_columns})"
+        )
+        self._conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        self._conn.commit()
+
+    def lookup_many(self, file_paths: Iterable[str]) -> Dict[str, object]:
+        """Return index entries that are still valid for the given paths.
+
+        The result maps each up-to-date path to an ``InstanceRecord`` or to
+        ``NOT_DICOM``. Paths that are missing from the index, or whose size or
+        modification time changed since indexing, are left out.
+        """
+        file_paths = list(file_paths)
+        rows = {}
+        columns = ", ".join(("path", "size", "mtime_ns", "is_dicom", "transfer_syntax") + INDEXED_TAGS)
+
+        with self._lock:
+            self._flush_locked()
+            # Stay well below SQLite's host parameter limit
+            for start in range(0, len(file_paths), 500):
+                chunk = file_paths[start:start + 500]
+                placeholders = ", ".join("?" * len(chunk))
+                cursor = self._conn.execute(
+                    f"SELECT {columns} FROM headers WHERE path IN ({placeholders})", chunk
+                )
+                for row in cursor:
+                    rows[row[0]] = row
+
+        results = {}
+        for path, row in rows.items():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if stat.st_size != row[1] or stat.st_mtime_ns != row[2]:
+                continue
+            if not row[3]:
+                results[path] = NOT_DICOM
+                continue
+            values = dict(zip(INDEXED_TAGS, row[5:]))
+            results[path] = InstanceRecord(path, values, transfer_syntax_uid=row[4], file_size=row[1])
+
+        return results
+
+    def lookup(self, file_path):
+        """Return the valid index entry for a single path, or None"""
+        return self.lookup_many([file_path]).get(file_path)
+
+    def read_header(self, file_path):
+        """Read a file's header from disk, record it in the index and return it.
+
+        Files that cannot be parsed are remembered as non-DICOM so later scans
+        skip them until they change; the read error is re-raised.
+        """
+        stat = os.stat(file_path)
+        try:
+            ds = pydicom.dcmread(file_path, stop_before_pixels=True)
+        except Exception:
+            self.mark_not_dicom(file_path, stat.st_size, stat.st_mtime_ns)
+            raise
+        record = InstanceRecord.from_dataset(file_path, ds, file_size=stat.st_size)
+        self.store_record(record, stat.st_mtime_ns)
+        return record
+
+    def store(self, file_path, ds):
+        """Record an already-read dataset for a file in the index"""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return
+        record = InstanceRecord.from_dataset(file_path, ds, file_size=stat.st_size)
+        self.store_record(record, stat.st_mtime_ns)
+
+    def store_record(self, record, mtime_ns):
+        """Record an InstanceRecord whose file_size matches the file at ``mtime_ns``"""
+        self.store_values(record.file_path, record.file_size, mtime_ns, record.values(), record.transfer_syntax_uid)
+
+    def store_values(self, file_path, size, mtime_ns, values, transfer_syntax_uid=None):
+        """Record header values parsed elsewhere (e.g. in a worker process).
+
+        ``size`` and ``mtime_ns`` must have been taken before the file was
+        read. Indexed tags missing from ``values`` are recorded as absent.
+        """
+        row = (file_path, size, mtime_ns, 1, transfer_syntax_uid) + tuple(
+            None if values.get(keyword) is None else str(values[keyword]) for keyword in INDEXED_TAGS
+        )
+        self._queue_row(row)
+
+    def mark_not_dicom(self, file_path, size, mtime_ns):
+        """Record that a file could not be read as DICOM at this size/mtime"""
+        self._queue_row((file_path, size, mtime_ns, 0, None) + (None,) * len(INDEXED_TAGS))
+
+    def remove(self, file_paths: Iterable[str]):
+        """Drop index entries for the given paths"""
+        with self._lock:
+            self._flush_locked()
+            self._conn.executemany("DELETE FROM headers WHERE path = ?", [(p,) for p in file_paths])
+            self._conn.commit()
+
+    def flush(self):
+        """Write pending entries to the database"""
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        with self._lock:
+            self._flush_locked()
+            self._conn.close()
+
+    def _queue_row(self, row):
+        with self._lock:
+            self._pending.append(row)
+            if len(self._pending) >= self.flush_every:
+                self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        columns = ("path", "size", "mtime_ns", "is_dicom", "transfer_syntax") + INDEXED_TAGS
+        placeholders = ", ".join("?" * len(columns))
+        try:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO headers ({', '.join(columns)}) VALUES ({placeholders})",
+                self._pending,
+            )
+            self._conn.commit()
+        except sqlite3.Error as e:
+            logging.warning(f"Failed to update header index {self.db_path}: {e}")
+        self._pending = []
+
+
+_indexes: Dict[str, HeaderIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_header_index_path(config) -> str:
+    """Return the configured header index location (next to config.yml by default)"""
+    perf_config = (config or {}).get("performance", {}) or {}
+    configured = perf_config.get("header_index_path")
+    if configured:
+        return os.path.expanduser(str(configured))
+    return os.path.join(os.path.dirname(get_config_path()), "header_index.sqlite3")
+
+
+def get_header_index(config) -> Optional[HeaderIndex]:
+    """Return the shared header index, or None when disabled or unavailable"""
+    perf_config = (config or {}).get("performance", {}) or {}
+    if not perf_config.get("use_header_index", True):
+        return None
+
+    db_path = get_header_index_path(config)
+    with _indexes_lock:
+        index = _indexes.get(db_path)
+        if index is None:
+            try:
+                index = HeaderIndex(db_path)
+            except (sqlite3.Error, OSError) as e:
+                logging.warning(f"Header index unavailable at {db_path}: {e}")
+                return None
+            _indexes[db_path] = index
+            logging.info(f"Using header index at {db_path}")
+        return index
+
+
+def load_header(file_path, index=None, cached=None):
+    """Return the InstanceRecord for one file, or None when it is not readable DICOM.
+
+    ``cached`` is an optional result of ``HeaderIndex.lookup_many`` covering
+    this path, so callers looping over many files only query the index once.
+    """
+    if cached is not None:
+        header = cached.get(file_path)
+    elif index is not None:
+        header = index.lookup(file_path)
+    else:
+        header = None
+
+    if header is NOT_DICOM:
+        return None
+    if header is not None:
+        return header
+
+    try:
+        if index is not None:
+            return index.read_header(file_path)
+        ds = pydicom.dcmread(file_path, stop_before_pixels=True)
+        return InstanceRecord.from_dataset(file_path, ds, file_size=os.path.getsize(file_path))
+    except Exception as e:
+        logging.debug(f"Failed to read as DICOM: {file_path} - {e}")
+        return None
+
+
+def read_headers(file_paths: List[str], index: Optional[HeaderIndex]):
+    """Return ``(path, header)`` pairs for readable DICOM files.
+
+    Non-DICOM and unreadable files are skipped. Headers come back as
+    ``InstanceRecord`` objects whether they were served from the index or
+    parsed from disk.
+    """
+    cached = index.lookup_many(file_paths) if index is not None else {}
+    headers = []
+    for file_path in file_paths:
+        header = load_header(file_path, index, cached)
+        if header is not None:
+            headers.append((file_path, header))
+    if index is not None:
+        index.flush()
+    return headers
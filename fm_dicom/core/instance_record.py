@@ -0,0 +1,77 @@
+"""
+Compact per-instance header records.
+
+The tree keeps one record per loaded instance instead of the header
+``Dataset`` pydicom returns. A record only holds the values needed to label,
+sort and group instances, so a session with hundreds of thousands of
+instances stays small. Full datasets are read from disk on demand, e.g. when
+the tag table shows a file.
+"""
+
+import sys
+
+# DICOM keywords kept per instance. Records expose them as attributes under
+# the same names, so code written against a Dataset keeps working.
+RECORD_TAGS = (
+    "PatientID",
+    "PatientName",
+    "StudyInstanceUID",
+    "StudyDescription",
+    "StudyDate",
+    "SeriesInstanceUID",
+    "SeriesDescription",
+    "SeriesNumber",
+    "SOPInstanceUID",
+    "SOPClassUID",
+    "InstanceNumber",
+    "Modality",
+)
+
+# Values shared by many instances (patients, studies, series, classes) are
+# interned so each distinct string is stored once per session
+_SHARED_TAGS = frozenset(RECORD_TAGS) - {"SOPInstanceUID", "InstanceNumber"}
+
+
+class InstanceRecord:
+    """Header values of one DICOM instance.
+
+    Tags that were absent from the file are left unset, so
+    ``getattr(record, "StudyDescription", default)`` falls back to the default
+    just as it would on a Dataset.
+    """
+
+    __slots__ = ("file_path", "file_size", "transfer_syntax_uid") + RECORD_TAGS
+
+    def __init__(self, file_path, values=None, transfer_syntax_uid=None, file_size=None):
+        self.file_path = file_path
+        self.file_size = file_size
+        self.transfer_syntax_uid = sys.intern(transfer_syntax_uid) if transfer_syntax_uid else transfer_syntax_uid
+        if values:
+            for keyword in RECORD_TAGS:
+                value = values.get(keyword)
+                if value is not None:
+                    value = str(value)
+                    setattr(self, keyword, sys.intern(value) if keyword in _SHARED_TAGS else value)
+
+    @classmethod
+    def from_dataset(cls, file_path, ds, file_size=None):
+        """Build a record from a pydicom Dataset (or return an existing record)"""
+        if isinstance(ds, cls):
+            return ds
+
+        values = {keyword: getattr(ds, keyword, None) for keyword in RECORD_TAGS}
+        file_meta = getattr(ds, "file_meta", None)
+        transfer_syntax = getattr(file_meta, "TransferSyntaxUID", None) if file_meta is not None else None
+        return cls(
+            file_path,
+            values,
+            transfer_syntax_uid=str(transfer_syntax) if transfer_syntax is not None else None,
+            file_size=file_size
+        )
+
+    def values(self):
+        """Return the recorded tag values, with None for absent tags"""
+        return {keyword: getattr(self, keyword, None) for keyword in RECORD_TAGS}
+
+    def __repr__(self):
+        return f"InstanceRecord({self.file_path!r})"
@@ -0,0 +1,85 @@
+"""
+Remembered presentation context negotiation results per remote AE.
+
+Before every send the worker opens an extra association just to learn which
+transfer syntaxes the server accepts. Operators who push many small studies
+to the same PACS get the same answer each time, so the outcome for every
+(host, port, AE title, SOP class, transfer syntax) is kept for a while and
+the probe is skipped while all the pairs a send needs are still fresh.
+Entries for a remote are dropped as soon as a send sees a context rejected,
+so the next send probes again.
+"""
+
+import time
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+DEFAULT_TTL = 3600  # seconds
+
+
+class NegotiationCache:
+    """Thread-safe accepted/rejected outcomes of presentation contexts with expiry"""
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        # (host, port, ae_title, sop_class, transfer_syntax) -> (accepted, expires_at)
+        self._entries: Dict[Tuple, Tuple[bool, float]] = {}
+
+    @staticmethod
+    def _remote(host, port, ae_title):
+        return (str(host).lower(), int(port), str(ae_title).strip())
+
+    def lookup(self, host, port, ae_title, sop_class, transfer_syntax) -> Optional[bool]:
+        """Return the cached outcome for one context, or None when unknown or expired"""
+        key = self._remote(host, port, ae_title) + (str(sop_class), str(transfer_syntax))
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None:
+                return None
+            accepted, expires_at = cached
+            if self._clock() >= expires_at:
+                del self._entries[key]
+                return None
+            return accepted
+
+    def lookup_all(self, host, port, ae_title, pairs: Iterable[Tuple[str, str]]) -> Optional[Dict[Tuple[str, str], bool]]:
+        """Return outcomes for every ``(sop_class, transfer_syntax)`` pair, or None if any is missing"""
+        outcomes = {}
+        for sop_class, transfer_syntax in pairs:
+            accepted = self.lookup(host, port, ae_title, sop_class, transfer_syntax)
+            if accepted is None:
+                return None
+            outcomes[(sop_class, transfer_syntax)] = accepted
+        return outcomes
+
+    def store(self, host, port, ae_title, sop_class, transfer_syntax, accepted, ttl=DEFAULT_TTL):
+        """Remember whether a context was accepted for ``ttl`` seconds"""
+        if not ttl or ttl <= 0:
+            return
+        key = self._remote(host, port, ae_title) + (str(sop_class), str(transfer_syntax))
+        with self._lock:
+            self._entries[key] = (bool(accepted), self._clock() + ttl)
+
+    def invalidate(self, host, port, ae_title):
+        """Forget everything known about one remote AE"""
+        remote = self._remote(host, port, ae_title)
+        with self._lock:
+            for key in [key for key in self._entries if key[:3] == remote]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+_negotiation_cache = NegotiationCache()
+
+
+def get_negotiation_cache() -> NegotiationCache:
+    """Return the cache shared by every send in this session"""
+    return _negotiation_cache
@@ -1,34 +1,86 @@
+import os
 import logging
 import pydicom
 
+# Header elements needed to lay out an export and to build its DICOMDIR
+EXPORT_TAGS = (
+    'PatientID',
+    'PatientName',
+    'StudyInstanceUID',
+    'StudyDescription',
+    'StudyDate',
+    'StudyTime',
+    'StudyID',
+    'SeriesInstanceUID',
+    'SeriesDescription',
+    'SeriesNumber',
+    'Modality',
+    'SOPClassUID',
+    'SOPInstanceUID',
+    'InstanceNumber',
+)
+
+
+def _value(metadata, keyword, default='UNKNOWN'):
+    value = metadata.get(keyword)
+    return default if value is None else value
+
 
 class DicomPathGenerator:
     """Generate DICOM standard file paths and structure"""
-    
+
+    @staticmethod
+    def read_metadata(filepath):
+        """
+        Read the export metadata of one file
+        Returns: dict of EXPORT_TAGS values (None when absent) plus
+        'TransferSyntaxUID' and 'file_size'
+        """
+        ds = pydicom.dcmread(filepath, stop_before_pixels=True, specific_tags=list(EXPORT_TAGS))
+        metadata = {keyword: getattr(ds, keyword, None) for keyword in EXPORT_TAGS}
+        file_meta = getattr(ds, 'file_meta', None)
+        metadata['TransferSyntaxUID'] = getattr(file_meta, 'TransferSyntaxUID', None) if file_meta is not None else None
+        metadata['file_size'] = os.path.getsize(filepath)
+        return metadata
+
     @staticmethod
     def generate_paths(filepaths):
         """
         Generate DICOM standard file paths from input files
         Returns: dict mapping {original_path: "DICOM/PAT00001/STU00001/SER00001/IMG00001"}
         """
-        logging.info(f"Generating DICOM standard paths for {len(filepaths)} files")
-        
+        entries = []
+        for filepath in filepaths:
+            try:
+                entries.append((filepath, DicomPathGenerator.read_metadata(filepath)))
+            except Exception as e:
+                logging.warning(f"Could not read DICOM file {filepath}: {e}")
+        return DicomPathGenerator.generate_paths_from_metadata(entries)
+
+    @staticmethod
+    def generate_paths_from_metadata(entries):
+        """
+        Generate DICOM standard file paths from already read metadata
+        entries: iterable of (original_path, metadata dict from read_metadata)
+        Returns: dict mapping {original_path: "DICOM/PAT00001/STU00001/SER00001/IMG00001"}
+        """
+        entries = list(entries)
+        logging.info(f"Generating DICOM standard paths for {len(entries)} files")
+
         # Analyze files to build hierarchy
         hierarchy = {}
-        
-        for filepath in filepaths:
+
+        for filepath, metadata in entries:
             try:
-                ds = pydicom.dcmread(filepath, stop_before_pixels=True)
-                
-                patient_id = str(getattr(ds, 'PatientID', 'UNKNOWN'))
-                patient_name = str(getattr(ds, 'PatientName', 'UNKNOWN'))
-                study_uid = str(getattr(ds, 'StudyInstanceUID', 'UNKNOWN'))
-                study_desc = str(getattr(ds, 'StudyDescription', 'UNKNOWN'))
-                series_uid = str(getattr(ds, 'SeriesInstanceUID', 'UNKNOWN'))
-                series_desc = str(getattr(ds, 'SeriesDescription', 'UNKNOWN'))
-                instance_uid = str(getattr(ds, 'SOPInstanceUID', 'UNKNOWN'))
-                instance_number = getattr(ds, 'InstanceNumber', 1)
-                
+                patient_id = str(_value(metadata, 'PatientID'))
+                patient_name = str(_value(metadata, 'PatientName'))
+                study_uid = str(_value(metadata, 'StudyInstanceUID'))
+                study_desc = str(_value(metadata, 'StudyDescription'))
+                series_uid = str(_value(metadata, 'SeriesInstanceUID'))
+                series_desc = str(_value(metadata, 'SeriesDescription'))
+                instance_uid = str(_value(metadata, 'SOPInstanceUID'))
+                instance_number = _value(metadata, 'InstanceNumber', 1)
+
                 # Create hierarchy key
                 patient_key = f"{patient_id}^{patient_name}"
                 study_key = f"{study_uid}^{study_desc}"
@@ -49,7 +101,7 @@ class DicomPathGenerator:
                 })
                 
             except Exception as e:
-                logging.warning(f"Could not read DICOM file {filepath}: {e}")
+                logging.warning(f"Could not lay out DICOM file {filepath}: {e}")
                 continue
         
         # Generate sequential IDs and paths
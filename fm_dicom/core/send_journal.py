@@ -0,0 +1,308 @@
+"""
+Persistent per-instance record of DICOM sends.
+
+When an association dropped half way through a send, every remaining file
+was reported as failed and the operator had to pick the study again and
+resend all of it. The send journal is a small SQLite database next to the
+configuration file that records, per destination and file, whether the
+server acknowledged it. A resumed send of the same files skips the ones
+already acknowledged (as long as they have not changed on disk), and files that
+failed for a transient reason are retried in the background with
+exponential backoff.
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fm_dicom.config.config_manager import get_config_path
+
+# Bump when the table layout or the meaning of a column changes
+SCHEMA_VERSION = 1
+
+STATUS_PENDING = "pending"      # Queued for sending, not yet acknowledged
+STATUS_SENT = "sent"            # Acknowledged by the server (success or warning status)
+STATUS_FAILED = "failed"        # Transient failure, retried after a delay
+STATUS_REJECTED = "rejected"    # Refused by the server; retrying will not help
+STATUS_CANCELLED = "cancelled"  # Left unsent because the operator cancelled
+
+DEFAULT_BASE_DELAY = 30     # seconds before the first retry
+DEFAULT_MAX_DELAY = 3600
+DEFAULT_MAX_ATTEMPTS = 5
+# Acknowledgements are committed in batches; a crash loses at most a few
+COMMIT_EVERY = 50
+
+
+def destination_key(remote_ae, host, port):
+    """Journal key of a remote Storage SCP"""
+    return f"{str(remote_ae).strip()}@{str(host).lower()}:{int(port)}"
+
+
+def backoff_delay(attempts, base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY):
+    """Seconds to wait before retry number ``attempts`` (1-based)"""
+    return min(max_delay, base_delay * (2 ** max(0, attempts - 1)))
+
+
+def _file_stamp(file_path):
+    try:
+        stat = os.stat(file_path)
+        return stat.st_size, stat.st_mtime_ns
+    except OSError:
+        return None, None
+
+
+class SendJournal:
+    """SQLite-backed status of every file sent to every destination"""
+
+    def __init__(self, db_path, base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY,
+                 max_attempts=DEFAULT_MAX_ATTEMPTS, clock=time.time):
+        self.db_path = db_path
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._uncommitted = 0
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._ensure_schema()
+
+    def _ensure_schema(self):
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            if version:
+                logging.info(f"Send journal schema changed ({version} -> {SCHEMA_VERSION}), rebuilding {self.db_path}")
+            self._conn.execute("DROP TABLE IF EXISTS destinations")
+            self._conn.execute("DROP TABLE IF EXISTS instances")
+
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS destinations ("
+            "destination TEXT PRIMARY KEY, "
+            "calling_ae TEXT NOT NULL, "
+            "remote_ae TEXT NOT NULL, "
+            "host TEXT NOT NULL, "
+            "port INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS instances ("
+            "destination TEXT NOT NULL, "
+            "path TEXT NOT NULL, "
+            "size INTEGER, "
+            "mtime_ns INTEGER, "
+            "status TEXT NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, "
+            "next_attempt REAL NOT NULL DEFAULT 0, "
+            "last_error TEXT, "
+            "updated REAL NOT NULL, "
+            "PRIMARY KEY (destination, path))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS instances_status ON instances (status, next_attempt)")
+        self._conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        self._conn.commit()
+
+    def begin(self, send_params, file_paths: Iterable[str], reset_attempts=True,
+              skip_acknowledged=True) -> Tuple[List[str], List[str]]:
+        """Register a send and return ``(to_send, already_acknowledged)``.
+
+        With ``skip_acknowledged``, files the destination acknowledged before,
+        and that still have the size and modification time they had then,
+        are not sent again (a resumed send or a background retry). Without
+        it every file is sent, e.g. when the operator resends a study the
+        server has since purged. Files to send are marked pending. A send
+        started by the operator resets the retry counters; background
+        retries keep counting.
+        """
+        calling_ae, remote_ae, host, port = send_params
+        destination = destination_key(remote_ae, host, port)
+        file_paths = list(file_paths)
+        now = self._clock()
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO destinations (destination, calling_ae, remote_ae, host, port) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (destination, calling_ae, remote_ae, host, int(port)),
+            )
+            acknowledged = set(self._acknowledged_locked(destination, file_paths)) if skip_acknowledged else set()
+
+            to_send, skipped, rows = [], [], []
+            for file_path in file_paths:
+                if file_path in acknowledged:
+                    skipped.append(file_path)
+                    continue
+                stamp = _file_stamp(file_path)
+                to_send.append(file_path)
+                rows.append((destination, file_path, stamp[0], stamp[1], STATUS_PENDING, now))
+            reset = ", attempts = 0, next_attempt = 0, last_error = NULL" if reset_attempts else ""
+            self._conn.executemany(
+                "INSERT INTO instances (destination, path, size, mtime_ns, status, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (destination, path) DO UPDATE SET size = excluded.size, "
+                f"mtime_ns = excluded.mtime_ns, status = excluded.status, updated = excluded.updated{reset}",
+                rows,
+            )
+            self._conn.commit()
+        return to_send, skipped
+
+    def acknowledged(self, send_params, file_paths: Iterable[str]) -> List[str]:
+        """Files in ``file_paths`` the destination acknowledged and that are unchanged since"""
+        _, remote_ae, host, port = send_params
+        with self._lock:
+            return self._acknowledged_locked(destination_key(remote_ae, host, port), list(file_paths))
+
+    def _acknowledged_locked(self, destination, file_paths):
+        stamps = {}
+        for start in range(0, len(file_paths), 500):
+            chunk = file_paths[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for path, size, mtime_ns in self._conn.execute(
+                f"SELECT path, size, mtime_ns FROM instances "
+                f"WHERE destination = ? AND status = ? AND path IN ({placeholders})",
+                [destination, STATUS_SENT] + chunk,
+            ):
+                stamps[path] = (size, mtime_ns)
+        return [path for path in file_paths if path in stamps and stamps[path] == _file_stamp(path)]
+
+    def mark_sent(self, send_params, file_path):
+        """Record that the destination acknowledged ``file_path``"""
+        _, remote_ae, host, port = send_params
+        with self._lock:
+            self._conn.execute(
+                "UPDATE instances SET status = ?, last_error = NULL, updated = ? WHERE destination = ? AND path = ?",
+                (STATUS_SENT, self._clock(), destination_key(remote_ae, host, port), file_path),
+            )
+            self._commit_batch_locked()
+
+    def mark_failed(self, send_params, file_paths, error=None, retryable=True):
+        """Record a failed send; retryable failures are scheduled with backoff"""
+        _, remote_ae, host, port = send_params
+        destination = destination_key(remote_ae, host, port)
+        now = self._clock()
+        with self._lock:
+            for file_path in file_paths:
+                row = self._conn.execute(
+                    "SELECT attempts FROM instances WHERE destination = ? AND path = ?",
+                    (destination, file_path),
+                ).fetchone()
+                attempts = (row[0] if row else 0) + 1
+                if retryable and attempts < self.max_attempts:
+                    status = STATUS_FAILED
+                    next_attempt = now + backoff_delay(attempts, self.base_delay, self.max_delay)
+                else:
+                    # Out of attempts, or the server said no: wait for the operator
+                    status = STATUS_REJECTED
+                    next_attempt = 0
+                # Files acknowledged earlier in the same send keep their status
+                self._conn.execute(
+                    "UPDATE instances SET status = ?, attempts = ?, next_attempt = ?, last_error = ?, updated = ? "
+                    "WHERE destination = ? AND path = ? AND status != ?",
+                    (status, attempts, next_attempt, error, now, destination, file_path, STATUS_SENT),
+                )
+            self._commit_batch_locked(force=True)
+
+    def mark_cancelled(self, send_params, file_paths):
+        """Record files left unsent by a cancelled send; they are not retried automatically"""
+        _, remote_ae, host, port = send_params
+        destination = destination_key(remote_ae, host, port)
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE instances SET status = ?, updated = ? WHERE destination = ? AND path = ? AND status = ?",
+                [(STATUS_CANCELLED, self._clock(), destination, path, STATUS_PENDING) for path in file_paths],
+            )
+            self._commit_batch_locked(force=True)
+
+    def due_retries(self) -> Dict[Tuple[str, str, str, int], List[str]]:
+        """Return files due for another attempt, grouped by ``send_params``.
+
+        Pending files belong to a send that never finished (the application
+        quit or crashed) and are due straight away.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT d.calling_ae, d.remote_ae, d.host, d.port, i.path FROM instances i "
+                "JOIN destinations d ON d.destination = i.destination "
+                "WHERE i.status IN (?, ?) AND i.next_attempt <= ? ORDER BY i.destination, i.rowid",
+                (STATUS_PENDING, STATUS_FAILED, self._clock()),
+            ).fetchall()
+        due = {}
+        for calling_ae, remote_ae, host, port, path in rows:
+            due.setdefault((calling_ae, remote_ae, host, port), []).append(path)
+        return due
+
+    def status(self, send_params, file_path) -> Optional[str]:
+        _, remote_ae, host, port = send_params
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status FROM instances WHERE destination = ? AND path = ?",
+                (destination_key(remote_ae, host, port), file_path),
+            ).fetchone()
+        return row[0] if row else None
+
+    def prune(self, older_than_days=30):
+        """Forget acknowledged files older than ``older_than_days``"""
+        cutoff = self._clock() - older_than_days * 86400
+        with self._lock:
+            self._conn.execute("DELETE FROM instances WHERE status = ? AND updated < ?", (STATUS_SENT, cutoff))
+            self._conn.commit()
+
+    def flush(self):
+        with self._lock:
+            self._commit_batch_locked(force=True)
+
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+    def _commit_batch_locked(self, force=False):
+        self._uncommitted += 1
+        if force or self._uncommitted >= COMMIT_EVERY:
+            self._conn.commit()
+            self._uncommitted = 0
+
+
+_journals: Dict[str, SendJournal] = {}
+_journals_lock = threading.Lock()
+
+
+def get_send_journal_path(config) -> str:
+    """Return the configured send journal location (next to config.yml by default)"""
+    send_config = (config or {}).get("send", {}) or {}
+    configured = send_config.get("journal_path")
+    if configured:
+        return os.path.expanduser(str(configured))
+    return os.path.join(os.path.dirname(get_config_path()), "send_journal.sqlite3")
+
+
+def get_send_journal(config) -> Optional[SendJournal]:
+    """Return the shared send journal, or None when disabled or unavailable"""
+    send_config = (config or {}).get("send", {}) or {}
+    if not send_config.get("journal", True):
+        return None
+
+    db_path = get_send_journal_path(config)
+    with _journals_lock:
+        journal = _journals.get(db_path)
+        if journal is None:
+            try:
+                journal = SendJournal(
+                    db_path,
+                    base_delay=send_config.get("retry_base_delay", DEFAULT_BASE_DELAY),
+                    max_attempts=send_config.get("retry_max_attempts", DEFAULT_MAX_ATTEMPTS),
+                )
+                journal.prune()
+            except (sqlite3.Error, OSError) as e:
+                logging.warning(f"Send journal unavailable at {db_path}: {e}")
+                return None
+            _journals[db_path] = journal
+            logging.info(f"Using send journal at {db_path}")
+        return journal
@@ -0,0 +1,164 @@
+"""
+Per-file facts the DICOM send pipeline needs, gathered once.
+
+Sending used to parse every header three or four times before the first
+C-STORE: once for the SOP classes, once for the transfer syntaxes, once more
+to pick the files needing conversion. A ``SendManifest`` is built in a
+single pass, preferably from the InstanceRecords the tree already holds, so
+files loaded into the tree are not opened at all before they are sent.
+"""
+
+import os
+import logging
+from typing import Callable, Dict, Iterable, List, Optional
+
+from pydicom.filereader import read_file_meta_info
+
+from fm_dicom.core.zip_source import is_unmaterialised, read_dataset, source_for
+
+# Transfer syntax assumed for files without file meta information
+DEFAULT_TRANSFER_SYNTAX = "1.2.840.10008.1.2"
+
+
+class SendManifestEntry:
+    """SOP class, transfer syntax and size of one file to send"""
+
+    __slots__ = ("file_path", "sop_class_uid", "transfer_syntax_uid", "file_size")
+
+    def __init__(self, file_path, sop_class_uid, transfer_syntax_uid, file_size=None):
+        self.file_path = file_path
+        self.sop_class_uid = sop_class_uid
+        self.transfer_syntax_uid = transfer_syntax_uid or DEFAULT_TRANSFER_SYNTAX
+        self.file_size = file_size
+
+    def __repr__(self):
+        return f"SendManifestEntry({self.file_path!r}, {self.sop_class_uid!r}, {self.transfer_syntax_uid!r})"
+
+
+class SendManifest:
+    """Manifest entries of a send, in send order.
+
+    Files whose header could not be read have no entry; the send reports
+    them when it reaches them.
+    """
+
+    def __init__(self, entries: Iterable[SendManifestEntry] = ()):
+        self._entries: Dict[str, SendManifestEntry] = {}
+        for entry in entries:
+            self._entries[entry.file_path] = entry
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, file_path):
+        return file_path in self._entries
+
+    def get(self, file_path) -> Optional[SendManifestEntry]:
+        return self._entries.get(file_path)
+
+    @property
+    def entries(self) -> List[SendManifestEntry]:
+        return list(self._entries.values())
+
+    def unique_sop_classes(self) -> List[str]:
+        return list(dict.fromkeys(entry.sop_class_uid for entry in self._entries.values() if entry.sop_class_uid))
+
+    def unique_transfer_syntaxes(self) -> List[str]:
+        return list(dict.fromkeys(entry.transfer_syntax_uid for entry in self._entries.values()))
+
+    def files_with_transfer_syntax(self, transfer_syntaxes) -> List[str]:
+        """Return the files whose transfer syntax is one of ``transfer_syntaxes``"""
+        wanted = set(transfer_syntaxes)
+        return [path for path, entry in self._entries.items() if entry.transfer_syntax_uid in wanted]
+
+    def total_bytes(self) -> int:
+        return sum(entry.file_size or 0 for entry in self._entries.values())
+
+
+def _file_size(file_path):
+    source = source_for(file_path)
+    if source is not None and not os.path.exists(file_path):
+        return source.member_size(file_path)
+    try:
+        return os.path.getsize(file_path)
+    except OSError:
+        return None
+
+
+def _file_transfer_syntax(file_path):
+    """Transfer syntax from the file meta of ``file_path``, or None when it has none"""
+    try:
+        if is_unmaterialised(file_path):
+            file_meta = read_dataset(file_path, stop_before_pixels=True, specific_tags=[]).file_meta
+        else:
+            file_meta = read_file_meta_info(file_path)
+    except Exception as e:
+        logging.debug(f"Could not read file meta of {os.path.basename(file_path)}: {e}")
+        return None
+    transfer_syntax = file_meta.get("TransferSyntaxUID")
+    return str(transfer_syntax) if transfer_syntax else None
+
+
+def _entry_from_record(file_path, record) -> Optional[SendManifestEntry]:
+    sop_class_uid = getattr(record, "SOPClassUID", None)
+    if not sop_class_uid:
+        return None
+    transfer_syntax = getattr(record, "transfer_syntax_uid", None)
+    if not transfer_syntax:
+        # Header Datasets carry it in their file meta; otherwise read it from
+        # the file rather than assuming the default
+        file_meta = getattr(record, "file_meta", None)
+        transfer_syntax = file_meta.get("TransferSyntaxUID") if file_meta is not None else None
+        transfer_syntax = str(transfer_syntax) if transfer_syntax else _file_transfer_syntax(file_path)
+    file_size = getattr(record, "file_size", None)
+    return SendManifestEntry(
+        file_path,
+        sop_class_uid,
+        transfer_syntax,
+        file_size if file_size is not None else _file_size(file_path),
+    )
+
+
+def _entry_from_header(file_path) -> Optional[SendManifestEntry]:
+    ds = read_dataset(file_path, stop_before_pixels=True)
+    file_meta = getattr(ds, "file_meta", None)
+    transfer_syntax = getattr(file_meta, "TransferSyntaxUID", None) if file_meta is not None else None
+    return SendManifestEntry(
+        file_path,
+        str(getattr(ds, "SOPClassUID", "")) or None,
+        str(transfer_syntax) if transfer_syntax else None,
+        _file_size(file_path),
+    )
+
+
+def build_send_manifest(
+    filepaths: Iterable[str],
+    record_lookup: Optional[Callable[[str], object]] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> SendManifest:
+    """Build a manifest for ``filepaths`` in one pass.
+
+    ``record_lookup(path)`` may return an InstanceRecord (or header Dataset)
+    already in memory; files it does not know are read header-only.
+    """
+    entries = []
+    from_records = 0
+    for file_path in filepaths:
+        if should_stop and should_stop():
+            break
+        entry = None
+        if record_lookup is not None:
+            record = record_lookup(file_path)
+            if record is not None:
+                entry = _entry_from_record(file_path, record)
+                from_records += entry is not None
+        if entry is None:
+            try:
+                entry = _entry_from_header(file_path)
+            except Exception as e:
+                logging.warning(f"Could not read header of {os.path.basename(file_path)}: {e}")
+                continue
+        entries.append(entry)
+
+    logging.info(f"Send manifest: {len(entries)} files, {from_records} from loaded headers")
+    return SendManifest(entries)
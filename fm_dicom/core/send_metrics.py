@@ -0,0 +1,155 @@
+"""
+Throughput and latency measurements for DICOM sends.
+
+``timing_info`` only said how long each phase took, which cannot tell a slow
+PACS from slow parsing or conversion on our side. ``SendMetrics`` records
+every association setup and every C-STORE (bytes and round-trip time) from
+the association threads and summarises them into a report: overall and
+rolling MB/s and latency percentiles. Reports can be appended to a JSON
+lines log for comparing sends over time.
+"""
+
+import os
+import json
+import math
+import time
+import logging
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+
+ROLLING_WINDOW = 5.0  # seconds of recent C-STOREs used for the rolling rate
+MB = 1024 * 1024
+
+
+def percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of already sorted values"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class SendMetrics:
+    """Thread-safe per-instance and per-association measurements of one send"""
+
+    def __init__(self, clock=time.monotonic, rolling_window=ROLLING_WINDOW):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.rolling_window = rolling_window
+        self.started = clock()
+        self.instances = []  # (file name, bytes, latency seconds, outcome)
+        self.association_setups = []  # seconds per established association
+        self.association_failures = 0
+        self._recent = deque()  # (finished at, bytes)
+
+    def record_association(self, seconds, established=True):
+        with self._lock:
+            if established:
+                self.association_setups.append(seconds)
+            else:
+                self.association_failures += 1
+
+    def record_store(self, file_path, size, latency, outcome):
+        """Record one C-STORE round trip of ``size`` bytes"""
+        now = self._clock()
+        size = size or 0
+        with self._lock:
+            self.instances.append((os.path.basename(file_path), size, latency, outcome))
+            self._recent.append((now, size))
+            self._trim_locked(now)
+
+    def _trim_locked(self, now):
+        while self._recent and now - self._recent[0][0] > self.rolling_window:
+            self._recent.popleft()
+
+    def rolling_mb_per_s(self) -> float:
+        """Throughput over the last ``rolling_window`` seconds"""
+        now = self._clock()
+        with self._lock:
+            self._trim_locked(now)
+            if not self._recent:
+                return 0.0
+            # Early in a send the window is only as long as the send itself
+            span = max(min(self.rolling_window, now - self.started), 1e-6)
+            return sum(size for _, size in self._recent) / MB / span
+
+    def report(self, phase_times: Optional[Dict[str, float]] = None) -> Dict:
+        """Summary of the send so far, suitable for JSON"""
+        elapsed = self._clock() - self.started
+        with self._lock:
+            latencies = sorted(latency for _, _, latency, _ in self.instances)
+            total_bytes = sum(size for _, size, _, _ in self.instances)
+            setups = list(self.association_setups)
+            association_failures = self.association_failures
+            instance_count = len(self.instances)
+        store_time = sum(latencies)
+
+        report = {
+            "instances": instance_count,
+            "bytes": total_bytes,
+            "elapsed_s": elapsed,
+            "mb_per_s": total_bytes / MB / elapsed if elapsed > 0 else 0.0,
+            "rolling_mb_per_s": self.rolling_mb_per_s(),
+            # Time spent waiting on the server, summed over all associations
+            "store_time_s": store_time,
+            "latency_s": {
+                "p50": percentile(latencies, 0.50),
+                "p95": percentile(latencies, 0.95),
+                "p99": percentile(latencies, 0.99),
+                "max": latencies[-1] if latencies else None,
+            },
+            "associations": {
+                "established": len(setups),
+                "failed": association_failures,
+                "setup_mean_s": sum(setups) / len(setups) if setups else None,
+                "setup_max_s": max(setups) if setups else None,
+            },
+        }
+        if phase_times:
+            report["phases_s"] = {
+                name: value for name, value in phase_times.items() if isinstance(value, (int, float))
+            }
+        return report
+
+    def per_instance(self) -> List[Dict]:
+        with self._lock:
+            return [
+                {"file": name, "bytes": size, "latency_s": latency, "outcome": outcome}
+                for name, size, latency, outcome in self.instances
+            ]
+
+
+def append_metrics_log(log_path, report, destination=None, instances=None):
+    """Append one send report as a JSON line to ``log_path``"""
+    entry = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "destination": destination}
+    entry.update(report)
+    if instances is not None:
+        entry["per_instance"] = instances
+    try:
+        log_path = os.path.expanduser(str(log_path))
+        log_dir = os.path.dirname(log_path)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+        with open(log_path, "a", encoding="utf-8") as log_file:
+            log_file.write(json.dumps(entry) + "\n")
+    except OSError as e:
+        logging.warning(f"Could not write send metrics to {log_path}: {e}")
+
+
+def format_report(report) -> str:
+    """Short human-readable lines for the send completion message"""
+    lines = [f"Throughput: {report['mb_per_s']:.1f} MB/s ({report['bytes'] / MB:.1f} MB)"]
+    latency = report["latency_s"]
+    if latency["p50"] is not None:
+        lines.append(
+            f"C-STORE latency p50/p95/p99: {latency['p50'] * 1000:.0f}/"
+            f"{latency['p95'] * 1000:.0f}/{latency['p99'] * 1000:.0f} ms"
+        )
+    associations = report["associations"]
+    if associations["setup_mean_s"] is not None:
+        lines.append(
+            f"Association setup: {associations['setup_mean_s'] * 1000:.0f} ms avg "
+            f"over {associations['established']}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,83 @@
+"""
+Decompressing DICOM files for servers that do not accept their encoding.
+
+``transcode_to_explicit_vr`` is a plain module-level function so it can run
+in a worker process: the send pipeline submits one call per file to the
+shared process pool while earlier files are already on the wire. The decoded
+dataset is checked in memory before it is written, so the output never has
+to be read back to know it is usable.
+"""
+
+import os
+import logging
+
+import pydicom
+from pydicom.uid import ExplicitVRLittleEndian
+
+# Encapsulated transfer syntaxes the send pipeline decompresses
+COMPRESSED_TRANSFER_SYNTAXES = frozenset({
+    '1.2.840.10008.1.2.4.90',  # JPEG 2000 Lossless
+    '1.2.840.10008.1.2.4.91',  # JPEG 2000
+    '1.2.840.10008.1.2.4.50',  # JPEG Baseline
+    '1.2.840.10008.1.2.4.51',  # JPEG Extended
+    '1.2.840.10008.1.2.4.57',  # JPEG Lossless
+    '1.2.840.10008.1.2.4.70',  # JPEG Lossless SV1
+    '1.2.840.10008.1.2.4.80',  # JPEG-LS Lossless
+    '1.2.840.10008.1.2.4.81',  # JPEG-LS Lossy
+    '1.2.840.10008.1.2.5',     # RLE Lossless
+})
+
+
+def expected_pixel_bytes(ds):
+    """Size in bytes of the native pixel data described by ``ds``'s image attributes"""
+    frames = int(getattr(ds, "NumberOfFrames", 1) or 1)
+    samples = int(getattr(ds, "SamplesPerPixel", 1) or 1)
+    bits = int(ds.BitsAllocated)
+    pixels = int(ds.Rows) * int(ds.Columns) * samples * frames
+    if bits == 1:
+        return (pixels + 7) // 8
+    return pixels * (bits // 8)
+
+
+def _check_decoded(ds):
+    """Return why a decompressed dataset is unusable, or None if it is good"""
+    if ds.file_meta.TransferSyntaxUID != ExplicitVRLittleEndian:
+        return f"unexpected transfer syntax {ds.file_meta.TransferSyntaxUID}"
+    if "PixelData" not in ds:
+        return "no pixel data after decoding"
+    expected = expected_pixel_bytes(ds)
+    actual = len(ds.PixelData)
+    # Odd-length pixel data is padded to an even length
+    if actual not in (expected, expected + (expected % 2)):
+        return f"decoded {actual} bytes of pixel data, expected {expected}"
+    return None
+
+
+def transcode_to_explicit_vr(src_path, dst_path):
+    """Write ``src_path`` decompressed to Explicit VR Little Endian at ``dst_path``.
+
+    Returns ``(src_path, dst_path, None)`` on success. When the file does not
+    need or cannot survive conversion, nothing is written and
+    ``(src_path, None, reason)`` is returned so the caller sends the original.
+    """
+    try:
+        ds = pydicom.dcmread(src_path)
+        transfer_syntax = str(ds.file_meta.TransferSyntaxUID)
+        if transfer_syntax not in COMPRESSED_TRANSFER_SYNTAXES:
+            return src_path, None, f"not compressed ({transfer_syntax})"
+
+        # Keep the SOP Instance UID: the server must see the same instance
+        ds.decompress(generate_instance_uid=False)
+        problem = _check_decoded(ds)
+        if problem:
+            return src_path, None, problem
+
+        ds.save_as(dst_path, enforce_file_format=True)
+        return src_path, dst_path, None
+    except Exception as e:
+        logging.debug(f"Could not transcode {os.path.basename(src_path)}: {e}")
+        try:
+            os.remove(dst_path)
+        except OSError:
+            pass
+        return src_path, None, str(e)
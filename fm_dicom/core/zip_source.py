@@ -0,0 +1,188 @@
+"""
+ZIP archives as a read-only source of DICOM instances.
+
+Opening a ZIP used to extract every member to a temporary directory and then
+re-read each extracted file to find the DICOM content. A ``ZipArchiveSource``
+parses headers straight from the member streams instead. Every member gets a
+path inside an (initially empty) staging directory, and the tree works with
+those paths as usual. A member is only written to its path when something
+needs a real file: editing, sending, exporting or moving it.
+
+Callers that only read a dataset use ``read_dataset``. Callers that modify,
+copy or send files call ``ensure_local``/``ensure_local_files`` first. Both
+are no-ops for ordinary files.
+"""
+
+import os
+import shutil
+import logging
+import threading
+import zipfile
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+import pydicom
+
+from fm_dicom.core.instance_record import InstanceRecord
+
+
+class ZipArchiveSource:
+    """DICOM members of one ZIP archive, addressed by paths in a staging directory"""
+
+    def __init__(self, zip_path, staging_dir):
+        self.zip_path = zip_path
+        self.staging_dir = os.path.abspath(staging_dir)
+        self._zip = zipfile.ZipFile(zip_path, "r")
+        self._lock = threading.Lock()
+        self._members: Dict[str, zipfile.ZipInfo] = {}
+
+        for info in self._zip.infolist():
+            if info.is_dir():
+                continue
+            member_path = self._member_path(info.filename)
+            if member_path is None:
+                logging.warning(f"Skipping ZIP member outside the archive root: {info.filename}")
+                continue
+            self._members[member_path] = info
+
+    def _member_path(self, name):
+        """Return the staging path for a member name, or None if it escapes the staging dir"""
+        target = os.path.normpath(os.path.join(self.staging_dir, name))
+        if os.path.commonpath([self.staging_dir, target]) != self.staging_dir or target == self.staging_dir:
+            return None
+        return target
+
+    @property
+    def member_paths(self):
+        return list(self._members)
+
+    def __contains__(self, path):
+        return path in self._members
+
+    def member_size(self, path):
+        return self._members[path].file_size
+
+    def open_member(self, path):
+        """Open a member for reading, from disk if it has been materialised"""
+        if os.path.exists(path):
+            return open(path, "rb")
+        return self._zip.open(self._members[path])
+
+    def read_dataset(self, path, **kwargs):
+        """Parse a member with ``pydicom.dcmread``; kwargs are passed through"""
+        with self.open_member(path) as fileobj:
+            return pydicom.dcmread(fileobj, **kwargs)
+
+    def read_header(self, path) -> InstanceRecord:
+        """Parse a member's header (no pixel data) into an InstanceRecord"""
+        ds = self.read_dataset(path, stop_before_pixels=True)
+        size = os.path.getsize(path) if os.path.exists(path) else self.member_size(path)
+        return InstanceRecord.from_dataset(path, ds, file_size=size)
+
+    def iter_headers(self, should_stop=None) -> Iterator[Tuple[str, Optional[InstanceRecord]]]:
+        """Yield ``(path, record)`` for every member; record is None for non-DICOM members.
+
+        DICOMDIR members are skipped: their referenced files are members
+        of the same archive and are read directly.
+        """
+        for path, info in self._members.items():
+            if should_stop and should_stop():
+                return
+            if os.path.basename(info.filename).upper() == "DICOMDIR":
+                continue
+            try:
+                yield path, self.read_header(path)
+            except Exception as e:
+                logging.debug(f"ZIP member is not DICOM: {info.filename} - {e}")
+                yield path, None
+
+    def materialize(self, path):
+        """Write a member to its staging path if it is not there yet"""
+        with self._lock:
+            if os.path.exists(path):
+                return path
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            partial = f"{path}.partial"
+            try:
+                with self._zip.open(self._members[path]) as src, open(partial, "wb") as dst:
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
+                os.replace(partial, path)
+            except BaseException:
+                try:
+                    os.unlink(partial)
+                except OSError:
+                    pass
+                raise
+            logging.debug(f"Materialised ZIP member {path}")
+            return path
+
+    def close(self):
+        with self._lock:
+            self._zip.close()
+
+
+_sources: Dict[str, ZipArchiveSource] = {}
+_sources_lock = threading.Lock()
+
+
+def register_source(source: ZipArchiveSource):
+    """Make a source's member paths resolvable through this module"""
+    with _sources_lock:
+        _sources[source.staging_dir] = source
+
+
+def unregister_source(staging_dir):
+    """Forget and close the source for a staging directory, if any"""
+    with _sources_lock:
+        source = _sources.pop(os.path.abspath(staging_dir), None)
+    if source is not None:
+        source.close()
+
+
+def source_for(path) -> Optional[ZipArchiveSource]:
+    """Return the source owning a member path, or None for ordinary files"""
+    if not _sources or not path:
+        return None
+    with _sources_lock:
+        sources = list(_sources.values())
+    for source in sources:
+        if path in source:
+            return source
+    return None
+
+
+def is_unmaterialised(path) -> bool:
+    """True for ZIP member paths that have not been written to disk"""
+    return source_for(path) is not None and not os.path.exists(path)
+
+
+def ensure_local(path):
+    """Return ``path`` after making sure the file exists on disk"""
+    source = source_for(path)
+    if source is not None:
+        source.materialize(path)
+    return path
+
+
+def ensure_local_files(paths: Iterable[str]):
+    """Materialise every ZIP member among ``paths``; returns the paths as a list"""
+    paths = list(paths)
+    if _sources:
+        for path in paths:
+            ensure_local(path)
+    return paths
+
+
+def read_dataset(path, **kwargs):
+    """``pydicom.dcmread`` that also reads ZIP members without materialising them"""
+    source = source_for(path)
+    if source is not None:
+        return source.read_dataset(path, **kwargs)
+    return pydicom.dcmread(path, **kwargs)
+
+
+def read_member_header(path) -> Optional[InstanceRecord]:
+    """Return the header of an unmaterialised ZIP member, or None for other paths"""
+    source = source_for(path)
+    if source is None or os.path.exists(path):
+        return None
+    return source.read_header(path)
@@ -0,0 +1,175 @@
+"""
+Parallel ZIP writing for exports.
+
+``zipfile`` compresses each member inside the writer, so an export deflates
+one file at a time on one core. Deflating JPEG/JPEG 2000 encapsulated pixel
+data is also wasted work: it gains next to nothing. ``ParallelZipWriter``
+decides per member whether to store or deflate it, based on the file's
+transfer syntax. Deflation runs on a thread pool (zlib releases the GIL).
+The compressed members are appended to the archive in submission order, so
+the archive is the same as a serial export.
+"""
+
+import os
+import zlib
+import logging
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from pydicom.filereader import read_file_meta_info
+from pydicom.uid import UID
+
+COMPRESSION_AUTO = "auto"        # Store compressed transfer syntaxes, deflate the rest
+COMPRESSION_DEFLATE = "deflate"  # Deflate every member
+COMPRESSION_STORE = "store"      # Store every member uncompressed
+
+DEFAULT_LEVEL = 6
+# Members larger than this are streamed by zipfile on the writer thread
+# instead of being compressed in memory on the pool
+MAX_BUFFERED_MEMBER = 256 * 1024 * 1024
+# Upper bound on the source bytes of members read or compressed but not yet
+# written; one member over the bound is still let through on its own
+MAX_BUFFERED_BYTES = 512 * 1024 * 1024
+
+
+def transfer_syntax_of(file_path):
+    """Transfer syntax from a file's meta header, or None when it has none"""
+    try:
+        return read_file_meta_info(file_path).get("TransferSyntaxUID")
+    except Exception:
+        return None
+
+
+def member_compression(transfer_syntax, mode=COMPRESSION_AUTO):
+    """ZIP compress type for a member with ``transfer_syntax`` under ``mode``"""
+    if mode == COMPRESSION_STORE:
+        return zipfile.ZIP_STORED
+    if mode == COMPRESSION_DEFLATE or not transfer_syntax:
+        return zipfile.ZIP_DEFLATED
+    # Encapsulated (JPEG, JPEG 2000, RLE, ...) and deflated datasets barely shrink
+    return zipfile.ZIP_STORED if UID(str(transfer_syntax)).is_compressed else zipfile.ZIP_DEFLATED
+
+
+def _compress_member(file_path, compress_type, level):
+    """Read and (optionally) deflate one file; returns (data, crc, file_size, compress_type)"""
+    with open(file_path, "rb") as f:
+        raw = f.read()
+    crc = zlib.crc32(raw)
+    if compress_type == zipfile.ZIP_DEFLATED:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+        data = compressor.compress(raw) + compressor.flush()
+        if len(data) < len(raw):
+            return data, crc, len(raw), zipfile.ZIP_DEFLATED
+    return raw, crc, len(raw), zipfile.ZIP_STORED
+
+
+class ParallelZipWriter:
+    """Append files to an open ``ZipFile``, compressing them on a thread pool.
+
+    Use ``add`` for each member, in order, and ``finish`` before closing the
+    archive. ``add`` returns the members whose writes completed since the
+    previous call, as ``(arcname, error or None, compress_type)``. At most
+    ``2 * workers`` members, and at most ``max_buffered`` bytes of them, are
+    held in memory at once.
+    """
+
+    def __init__(self, zipf, compression=COMPRESSION_AUTO, workers=None, level=DEFAULT_LEVEL,
+                 max_buffered=MAX_BUFFERED_BYTES):
+        self.zipf = zipf
+        self.compression = compression or COMPRESSION_AUTO
+        self.workers = max(1, int(workers or os.cpu_count() or 1))
+        self.level = level
+        self.max_buffered = max_buffered
+        self.stored = 0
+        self.deflated = 0
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="zip-export")
+        self._pending = deque()  # (file_path, arcname, compress_type, future or None, buffered bytes)
+        self._buffered = 0
+
+    def add(self, file_path, arcname, transfer_syntax=None):
+        """Queue ``file_path`` as ``arcname``; ``transfer_syntax`` is read from the file when not given"""
+        if self.compression == COMPRESSION_AUTO and transfer_syntax is None:
+            transfer_syntax = transfer_syntax_of(file_path)
+        compress_type = member_compression(transfer_syntax, self.compression)
+        try:
+            size = os.path.getsize(file_path)
+        except OSError:
+            size = 0
+        done = []
+        if size > MAX_BUFFERED_MEMBER:
+            future, size = None, 0
+        else:
+            # Make room before reading, so large members cannot pile up in memory
+            while self._pending and self._buffered + size > self.max_buffered:
+                done.append(self._write_next())
+            future = self._pool.submit(_compress_member, file_path, compress_type, self.level)
+        self._pending.append((file_path, arcname, compress_type, future, size))
+        self._buffered += size
+
+        while len(self._pending) > 2 * self.workers or (self._pending and self._pending[0][3] is None):
+            done.append(self._write_next())
+        return done
+
+    def finish(self):
+        """Write every queued member; returns them as ``add`` does"""
+        try:
+            return [self._write_next() for _ in range(len(self._pending))]
+        finally:
+            self._pool.shutdown(wait=True)
+
+    def cancel(self):
+        """Drop queued members that have not been written"""
+        for _, _, _, future, _ in self._pending:
+            if future is not None:
+                future.cancel()
+        self._pending.clear()
+        self._buffered = 0
+        self._pool.shutdown(wait=True)
+
+    def _write_next(self):
+        file_path, arcname, compress_type, future, size = self._pending.popleft()
+        self._buffered -= size
+        try:
+            if future is None:
+                self.zipf.write(file_path, arcname, compress_type=compress_type)
+            else:
+                data, crc, file_size, compress_type = future.result()
+                info = zipfile.ZipInfo.from_file(file_path, arcname)
+                self._write_compressed(info, data, crc, file_size, compress_type)
+        except Exception as e:
+            logging.error(f"Failed to add to ZIP {file_path}: {e}")
+            return arcname, e, compress_type
+        if compress_type == zipfile.ZIP_DEFLATED:
+            self.deflated += 1
+        else:
+            self.stored += 1
+        return arcname, None, compress_type
+
+    def _write_compressed(self, info, data, crc, file_size, compress_type):
+        """Append a member whose data was already compressed.
+
+        ``ZipFile`` has no public call for this, so the local header and
+        data are written the way ``ZipFile.writestr`` does it. This relies
+        on private ``ZipFile`` attributes (``_lock``, ``_seekable``,
+        ``_writecheck``, ``_didModify``, ``start_dir``), checked against
+        CPython 3.12; ``tests/test_zip_writer.py`` round-trips stored and
+        deflated members through ``testzip`` to catch changes to them.
+        """
+        zipf = self.zipf
+        info.compress_type = compress_type
+        info.file_size = file_size
+        info.compress_size = len(data)
+        info.CRC = crc
+        zip64 = file_size > zipfile.ZIP64_LIMIT or len(data) > zipfile.ZIP64_LIMIT
+        with zipf._lock:
+            if zipf._seekable:
+                zipf.fp.seek(zipf.start_dir)
+            info.header_offset = zipf.fp.tell()
+            zipf._writecheck(info)
+            zipf._didModify = True
+            zipf.fp.write(info.FileHeader(zip64))
+            zipf.fp.write(data)
+            zipf.filelist.append(info)
+            zipf.NameToInfo[info.filename] = info
+            zipf.start_dir = zipf.fp.tell()
@@ -7,7 +7,6 @@ with hierarchical organization and selection capabilities.
 
 import os
 import logging
-import pydicom
 from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton,
     QTreeWidgetItem, QProgressDialog, QApplication
@@ -19,6 +18,7 @@ from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer
 
 from fm_dicom.widgets.checkbox_tree import OptimizedCheckboxTreeWidget
 from fm_dicom.widgets.selection_summary import LazySelectionSummaryWidget
+from fm_dicom.core.zip_source import read_dataset
 
 
 class AsyncTreePopulator(QThread):
@@ -118,7 +118,7 @@ class AsyncTreePopulator(QThread):
                 break
                 
             try:
-                ds = pydicom.dcmread(file_path, stop_before_pixels=True)
+                ds = read_dataset(file_path, stop_before_pixels=True)
                 
                 patient_id = getattr(ds, "PatientID", "Unknown ID")
                 patient_name = getattr(ds, "PatientName", "Unknown Name")
@@ -543,7 +543,7 @@ class DicomSendSelectionDialog(QDialog):
         
         for file_path in file_paths:
             try:
-                ds = pydicom.dcmread(file_path, stop_before_pixels=True)
+                ds = read_dataset(file_path, stop_before_pixels=True)
                 
                 patient_id = getattr(ds, "PatientID", "Unknown ID")
                 patient_name = getattr(ds, "PatientName", "Unknown Name")
@@ -832,6 +832,11 @@ class DicomSendSelectionDialog(QDialog):
     
     def _collect_instance_filepaths_from_item(self, tree_item):
         """Collect file paths from a tree item (reuse MainWindow logic)"""
+        tree_manager = getattr(self.parent(), "tree_manager", None)
+        if tree_manager is not None:
+            # Main tree series only create instance rows once expanded
+            return tree_manager._collect_instance_filepaths(tree_item)
+
         filepaths = []
         
         def collect(item):
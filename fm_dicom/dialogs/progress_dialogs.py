@@ -1,7 +1,8 @@
 """
 Progress dialog classes for DICOM file operations.
 
-This module contains progress dialogs for ZIP extraction and DICOMDIR scanning operations.
+This module contains progress dialogs for ZIP reading, ZIP extraction, DICOMDIR scanning
+and tag save operations.
 """
 
 from PyQt6.QtWidgets import QProgressDialog, QApplication
@@ -10,8 +11,10 @@ import os
 import tempfile
 import shutil
 
-from fm_dicom.workers.zip_worker import ZipExtractionWorker
+from fm_dicom.workers.zip_worker import ZipExtractionWorker, ZipHeaderScanWorker
+from fm_dicom.core.zip_source import ZipArchiveSource, register_source
 from fm_dicom.workers.dicom_worker import DicomdirScanWorker
+from fm_dicom.workers.tag_save_worker import TagSaveWorker
 from fm_dicom.widgets.focus_aware import FocusAwareMessageBox, FocusAwareProgressDialog
 
 
@@ -80,6 +83,97 @@ class ZipExtractionDialog(FocusAwareProgressDialog):
         self.reject()
 
 
+class ZipScanDialog(FocusAwareProgressDialog):
+    """Progress dialog for reading DICOM headers directly from a ZIP archive.
+
+    Nothing is extracted: ``temp_dir`` is an empty staging directory in which
+    members are only written when they are edited, sent or exported.
+    """
+
+    def __init__(self, zip_path, parent=None):
+        super().__init__("Reading ZIP archive...", "Cancel", 0, 100, parent, fixed_width=550)
+        self.setWindowTitle("Reading ZIP Archive")
+        self.setMinimumDuration(0)
+        self.setAutoClose(False)
+        self.setAutoReset(False)
+
+        self.zip_path = zip_path
+        self.temp_dir = tempfile.mkdtemp()
+        self.dicom_files = []
+        self.success = False
+        self.error_message = None
+
+        try:
+            self.source = ZipArchiveSource(zip_path, self.temp_dir)
+        except Exception as e:
+            self.source = None
+            self.worker = None
+            self.error_message = f"Failed to open ZIP file: {str(e)}"
+            return
+
+        # Read headers in worker thread
+        self.worker = ZipHeaderScanWorker(self.source)
+        self.worker.progress_updated.connect(self.update_progress)
+        self.worker.scan_complete.connect(self.scan_finished)
+        self.worker.scan_failed.connect(self.scan_error)
+        self.worker.start()
+
+        # Cancel handling
+        self.canceled.connect(self.cancel_scan)
+
+    def exec(self):
+        if self.worker is None:
+            FocusAwareMessageBox.critical(self.parent(), "ZIP Error", self.error_message)
+            self._remove_staging_dir()
+            return 0
+        return super().exec()
+
+    def update_progress(self, current, total, filename):
+        if total > 0:
+            progress_value = int((current / total) * 100)
+            self.setValue(progress_value)
+        progress_text = f"Reading ({current}/{total}): {os.path.basename(filename)}"
+        self.setLabelText(progress_text)
+
+    def scan_finished(self, dicom_files):
+        if self.wasCanceled():
+            return
+        self.dicom_files = dicom_files
+        self.success = True
+        # Member paths resolve through the source from now on
+        register_source(self.source)
+        self.setValue(100)
+        self.setLabelText(f"Found {len(dicom_files)} DICOM files")
+        self.accept()
+
+    def scan_error(self, error_message):
+        self.success = False
+        self.error_message = error_message
+        self.source.close()
+        self._remove_staging_dir()
+        FocusAwareMessageBox.critical(self, "ZIP Error", error_message)
+        self.reject()
+
+    def cancel_scan(self):
+        if self.worker.isRunning():
+            self.worker.requestInterruption()
+            self.worker.wait(3000)
+            if self.worker.isRunning():
+                self.worker.terminate()
+                self.worker.wait()
+        self.source.close()
+        self._remove_staging_dir()
+        self.reject()
+
+    def _remove_staging_dir(self):
+        if self.temp_dir and os.path.exists(self.temp_dir):
+            try:
+                shutil.rmtree(self.temp_dir)
+            except Exception as e:
+                import logging
+                logging.warning(f"Could not remove temp directory {self.temp_dir}: {e}")
+
+
 class DicomdirScanDialog(FocusAwareProgressDialog):
     """Progress dialog for DICOM file scanning"""
 
@@ -132,4 +226,62 @@ class DicomdirScanDialog(FocusAwareProgressDialog):
             if self.worker.isRunning():
                 self.worker.terminate()
                 self.worker.wait()
-        self.reject()
\ No newline at end of file
+        self.reject()
+
+class TagSaveDialog(FocusAwareProgressDialog):
+    """Progress dialog that runs a TagSaveWorker.
+
+    After ``exec()`` returns, ``save_result`` holds the worker result (also
+    when the save was cancelled part way) or None if the worker failed.
+    """
+
+    def __init__(self, filepaths, apply_edits, label_text, title, parent=None,
+                 max_workers=None, enforce_file_format=False):
+        super().__init__(label_text, "Cancel", 0, max(1, len(filepaths)), parent, fixed_width=550)
+        self.setWindowTitle(title)
+        self.setMinimumDuration(0)
+        self.setAutoClose(False)
+        self.setAutoReset(False)
+        self.setValue(0)
+
+        self.save_result = None
+        self.error_message = None
+
+        self.worker = TagSaveWorker(
+            filepaths, apply_edits, max_workers=max_workers, enforce_file_format=enforce_file_format
+        )
+        self.worker.progress_updated.connect(self.update_progress)
+        self.worker.save_complete.connect(self.save_finished)
+        self.worker.save_failed.connect(self.save_error)
+        self.worker.start()
+
+        # Cancel handling
+        self.canceled.connect(self.cancel_save)
+
+    def update_progress(self, current, total, filename):
+        self.setValue(current)
+        self.setLabelText(f"Saving ({current}/{total}): {os.path.basename(filename)}")
+
+    def save_finished(self, result):
+        self.save_result = result
+        self.setValue(self.maximum())
+        self.accept()
+
+    def save_error(self, error_message):
+        self.error_message = error_message
+        self.reject()
+
+    def cancel_save(self):
+        # Files already being written are finished so none is left half-edited
+        self.worker.cancel()
+        self.worker.wait()
+        self.save_result = self.worker.result
+        self.reject()
+
+    def exec(self):
+        result = super().exec()
+        if self.worker.isRunning():
+            self.worker.wait()
+        if self.save_result is None:
+            self.save_result = self.worker.result
+        return result
@@ -1,9 +1,13 @@
 import sys
+import multiprocessing
 from PyQt6.QtWidgets import QApplication
 from fm_dicom.main_window import MainWindow
 from fm_dicom.utils.environment_check import check_environment_on_startup
 
 def main():
+    # Frozen builds start header parsing pool workers by re-running this
+    # entry point; freeze_support runs the worker instead of a second GUI
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
 
     # Check environment configuration on startup
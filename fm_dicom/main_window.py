@@ -31,6 +31,8 @@ from fm_dicom.ui.layout_mixin import LayoutMixin
 # Manager classes
 from fm_dicom.managers.file_manager import FileManager
 from fm_dicom.managers.tree_manager import TreeManager, TREE_PATH_ROLE
+from fm_dicom.core.dicom_writer import read_for_edit
+from fm_dicom.core.zip_source import ensure_local, read_dataset
 from fm_dicom.managers.dicom_manager import DicomManager
 from fm_dicom.managers.audit_manager import AuditLogManager
 from fm_dicom.managers.staging_manager import StagingManager
@@ -211,7 +213,19 @@ class MainWindow(QMainWindow, LayoutMixin):
         self.receive_service.study_failed.connect(
             lambda info, msg: self.tree_manager.mark_inbound_failed(info, msg)
         )
+        self.receive_service.stats_updated.connect(self._on_receive_stats)
         self.receive_service.start()
+
+    def _on_receive_stats(self, stats):
+        """Show receive throughput in the status bar while senders are connected."""
+        if not hasattr(self, 'status_bar') or not stats.get("active_associations"):
+            return
+        self.status_bar.showMessage(
+            f"Receiving: {stats['active_associations']} association(s), "
+            f"{stats['instances_per_s']:.0f} instances/s, {stats['mb_per_s']:.1f} MB/s, "
+            f"{stats['queue_depth']} queued",
+            2000,
+        )
     
     # Event handlers and coordination methods
     def _on_tree_selection_changed(self, file_paths):
@@ -778,8 +792,8 @@ class MainWindow(QMainWindow, LayoutMixin):
         
         menu.addSeparator()
         
-        # Tree navigation
-        if item.childCount() > 0:
+        # Tree navigation; series rows create their instance rows on expansion
+        if item.childCount() > 0 or self.tree_manager._has_pending_children(item):
             expand_action = QAction("🔍 Expand All Children", self)
             expand_action.triggered.connect(lambda: self._expand_item_recursively(item))
             menu.addAction(expand_action)
@@ -793,6 +807,7 @@ class MainWindow(QMainWindow, LayoutMixin):
     
     def _expand_item_recursively(self, item):
         """Expand item and all its children recursively"""
+        self.tree_manager._fetch_instances(item)
         item.setExpanded(True)
         for i in range(item.childCount()):
             self._expand_item_recursively(item.child(i))
@@ -1189,7 +1204,7 @@ class MainWindow(QMainWindow, LayoutMixin):
             
         try:
             import pydicom
-            ds_primary = pydicom.dcmread(primary_fp_sample, stop_before_pixels=True)
+            ds_primary = read_dataset(primary_fp_sample, stop_before_pixels=True)
             primary_id_val = str(ds_primary.PatientID)
             primary_name_val = str(ds_primary.PatientName)
         except Exception as e:
@@ -1265,7 +1280,7 @@ class MainWindow(QMainWindow, LayoutMixin):
         
         try:
             import pydicom
-            ds_primary = pydicom.dcmread(primary_fp_sample, stop_before_pixels=True)
+            ds_primary = read_dataset(primary_fp_sample, stop_before_pixels=True)
             primary_study_uid = str(ds_primary.StudyInstanceUID)
             primary_study_desc = str(getattr(ds_primary, 'StudyDescription', ''))
         except Exception as e:
@@ -1340,7 +1355,7 @@ class MainWindow(QMainWindow, LayoutMixin):
         
         try:
             import pydicom
-            ds_primary = pydicom.dcmread(primary_fp_sample, stop_before_pixels=True)
+            ds_primary = read_dataset(primary_fp_sample, stop_before_pixels=True)
             primary_series_uid = str(ds_primary.SeriesInstanceUID)
             primary_series_desc = str(getattr(ds_primary, 'SeriesDescription', ''))
         except Exception as e:
@@ -1395,10 +1410,11 @@ class MainWindow(QMainWindow, LayoutMixin):
             QApplication.processEvents()
             
             try:
-                ds = pydicom.dcmread(filepath)
+                editable = read_for_edit(ensure_local(filepath))
+                ds = editable.dataset
                 ds.PatientID = primary_id_val
                 ds.PatientName = primary_name_val
-                ds.save_as(filepath)
+                editable.save()
                 updated_count += 1
             except Exception as e:
                 failed_files.append(f"{os.path.basename(filepath)}: {str(e)}")
@@ -1413,7 +1429,7 @@ class MainWindow(QMainWindow, LayoutMixin):
         FocusAwareMessageBox.information(self, "Merge Patients Complete", msg)
 
         # Refresh the tree to show merged data
-        self._refresh_tree_after_merge()
+        self._refresh_tree_after_merge(files_to_update)
     
     def _perform_study_merge(self, files_to_update, primary_study_uid, primary_study_desc):
         """Perform the actual study merge operation"""
@@ -1436,11 +1452,12 @@ class MainWindow(QMainWindow, LayoutMixin):
             QApplication.processEvents()
             
             try:
-                ds = pydicom.dcmread(filepath)
+                editable = read_for_edit(ensure_local(filepath))
+                ds = editable.dataset
                 ds.StudyInstanceUID = primary_study_uid
                 if primary_study_desc:
                     ds.StudyDescription = primary_study_desc
-                ds.save_as(filepath)
+                editable.save()
                 updated_count += 1
             except Exception as e:
                 failed_files.append(f"{os.path.basename(filepath)}: {str(e)}")
@@ -1455,7 +1472,7 @@ class MainWindow(QMainWindow, LayoutMixin):
         FocusAwareMessageBox.information(self, "Merge Studies Complete", msg)
 
         # Refresh the tree to show merged data
-        self._refresh_tree_after_merge()
+        self._refresh_tree_after_merge(files_to_update)
     
     def _perform_series_merge(self, files_to_update, primary_series_uid, primary_series_desc):
         """Perform the actual series merge operation"""
@@ -1478,11 +1495,12 @@ class MainWindow(QMainWindow, LayoutMixin):
             QApplication.processEvents()
             
             try:
-                ds = pydicom.dcmread(filepath)
+                editable = read_for_edit(ensure_local(filepath))
+                ds = editable.dataset
                 ds.SeriesInstanceUID = primary_series_uid
                 if primary_series_desc:
                     ds.SeriesDescription = primary_series_desc
-                ds.save_as(filepath)
+                editable.save()
                 updated_count += 1
             except Exception as e:
                 failed_files.append(f"{os.path.basename(filepath)}: {str(e)}")
@@ -1497,11 +1515,15 @@ class MainWindow(QMainWindow, LayoutMixin):
         FocusAwareMessageBox.information(self, "Merge Series Complete", msg)
 
         # Refresh the tree to show merged data
-        self._refresh_tree_after_merge()
+        self._refresh_tree_after_merge(files_to_update)
     
-    def _refresh_tree_after_merge(self):
+    def _refresh_tree_after_merge(self, merged_files=None):
         """Refresh tree after patient merge to show updated hierarchy"""
         if hasattr(self, 'tree_manager') and self.tree_manager:
+            if merged_files is not None:
+                # Only the merged files changed; move their nodes in place
+                self.tree_manager.update_files(merged_files)
+                return
             if hasattr(self, "prepare_for_tree_refresh"):
                 self.prepare_for_tree_refresh()
             self.tree_manager.refresh_tree()
@@ -1602,7 +1624,6 @@ class MainWindow(QMainWindow, LayoutMixin):
     def _start_export_worker(self, filepaths, export_type, output_path):
         """Start the export worker thread"""
         from PyQt6.QtWidgets import QProgressDialog
-        import tempfile
         
         # Create progress dialog
         self.export_progress = FocusAwareProgressDialog("Preparing export...", "Cancel", 0, 100, self)
@@ -1611,14 +1632,16 @@ class MainWindow(QMainWindow, LayoutMixin):
         self.export_progress.setValue(0)
         self.export_progress.canceled.connect(self._cancel_export)
         
-        # Create temporary directory for DICOMDIR exports
-        temp_dir = None
-        if export_type == "dicomdir_zip":
-            temp_dir = tempfile.mkdtemp()
-        
-        # Create and start worker
+        # Create and start worker (DICOMDIR exports stream into the ZIP, no temp tree)
         from fm_dicom.workers.export_worker import ExportWorker
-        self.export_worker = ExportWorker(filepaths, export_type, output_path, temp_dir)
+        export_config = self.config.get("export", {}) or {}
+        self.export_worker = ExportWorker(
+            filepaths, export_type, output_path,
+            zip_compression=export_config.get("zip_compression", "auto"),
+            zip_workers=export_config.get("zip_workers"),
+            copy_mode=export_config.get("copy_mode", "auto"),
+            copy_workers=export_config.get("copy_workers", 4),
+        )
         self.export_worker.progress_updated.connect(self._on_export_progress)
         self.export_worker.stage_changed.connect(self._on_export_stage_changed)
         self.export_worker.export_complete.connect(self._on_export_complete)
@@ -1639,15 +1662,15 @@ class MainWindow(QMainWindow, LayoutMixin):
         if hasattr(self, 'export_progress'):
             self.export_progress.setLabelText(stage_text)
     
-    def _on_export_complete(self, output_path):
+    def _on_export_complete(self, output_path, stats=None):
         """Handle export completion"""
         if hasattr(self, 'export_progress'):
             self.export_progress.close()
-        
-        FocusAwareMessageBox.information(
-            self, "Export Complete",
-            f"Export completed successfully:\n{output_path}"
-        )
+
+        message = f"Export completed successfully:\n{output_path}"
+        if stats and stats.get('copy_strategy'):
+            message += f"\n\nCopy method: {stats['copy_strategy']}"
+        FocusAwareMessageBox.information(self, "Export Complete", message)
     
     def _on_export_error(self, error_message):
         """Handle export errors"""
@@ -1724,7 +1747,7 @@ class MainWindow(QMainWindow, LayoutMixin):
             
             try:
                 import pydicom
-                ds = pydicom.dcmread(filepath)
+                ds = read_dataset(filepath)
                 
                 # Extract detailed info
                 transfer_syntax = str(getattr(ds.file_meta, 'TransferSyntaxUID', 'Unknown'))
@@ -1829,7 +1852,7 @@ class MainWindow(QMainWindow, LayoutMixin):
                 import pydicom
                 # Test loading time
                 start_time = time.time()
-                ds = pydicom.dcmread(filepath)
+                ds = read_dataset(filepath)
                 load_time = time.time() - start_time
                 
                 # Test pixel access time
@@ -1905,6 +1928,9 @@ class MainWindow(QMainWindow, LayoutMixin):
                 event.ignore()
                 return
         
+        # Unacknowledged sends are picked up again on the next start
+        self.dicom_manager.stop_background_sends()
+        
         # Cleanup temporary files
         self.file_manager.cleanup_temp_dirs()
         
@@ -15,7 +15,7 @@ from typing import Dict, List, Optional, Tuple
 import pydicom
 from pydicom.datadict import dictionary_VR
 from PyQt6.QtWidgets import QTableWidgetItem, QApplication
-from PyQt6.QtCore import QObject, pyqtSignal, Qt
+from PyQt6.QtCore import QObject, pyqtSignal, Qt, QTimer
 from PyQt6.QtGui import QPixmap, QImage, QFont, QColor, QBrush
 
 from fm_dicom.widgets.focus_aware import FocusAwareMessageBox, FocusAwareProgressDialog
@@ -24,8 +24,13 @@ from fm_dicom.anonymization.anonymization_ui import run_anonymization
 from fm_dicom.tag_browser.tag_browser import TagSearchDialog, ValueEntryDialog
 from fm_dicom.dialogs.dicom_send_selection import DicomSendSelectionDialog
 from fm_dicom.dialogs.selection_dialogs import DicomSendDialog
+from fm_dicom.dialogs.progress_dialogs import TagSaveDialog
 from fm_dicom.config.config_manager import get_favorite_tags
 from fm_dicom.managers.tree_manager import TREE_PATH_ROLE
+from fm_dicom.core.send_journal import get_send_journal
+from fm_dicom.core.send_manifest import build_send_manifest
+from fm_dicom.core.send_metrics import format_report
+from fm_dicom.core.zip_source import is_unmaterialised, read_dataset
 from fm_dicom.managers.staging_manager import StagedChange
 
 
@@ -72,6 +77,7 @@ class DicomManager(QObject):
 
         # Load favorite tags from config
         self._load_favorite_tags()
+        self._setup_send_retry()
 
         # Connect signals
         self.tag_table.itemChanged.connect(self._on_tag_changed)
@@ -93,14 +99,14 @@ class DicomManager(QObject):
                     ds = self.main_window.tree_manager.memory_items[file_path]
                     logging.info(f"Loading memory item: {file_path}")
                 else:
-                    # Try to read from disk
-                    if os.path.exists(file_path):
-                        ds = pydicom.dcmread(file_path)
+                    # Try to read from disk (or straight from a loaded ZIP)
+                    if os.path.exists(file_path) or is_unmaterialised(file_path):
+                        ds = read_dataset(file_path)
                         logging.info(f"Loading disk file: {file_path}")
             else:
                 # Fallback to disk read
-                if os.path.exists(file_path):
-                    ds = pydicom.dcmread(file_path)
+                if os.path.exists(file_path) or is_unmaterialised(file_path):
+                    ds = read_dataset(file_path)
 
             # If we couldn't get a dataset, clear and return
             if ds is None:
@@ -672,108 +678,19 @@ class DicomManager(QObject):
     
     def _perform_level_tag_save(self, filepaths, edits, level, *, show_summary=True, summary_title="Changes Saved"):
         """Perform tag saves across multiple files at the specified level"""
-        import pydicom
-        from PyQt6.QtWidgets import QProgressDialog, QApplication
-        import os
-        
-        updated_count = 0
-        failed_files = []
-        
-        progress = FocusAwareProgressDialog(f"Saving changes to {level}...", "Cancel", 0, len(filepaths), self.main_window)
-        progress.setWindowTitle("Saving Tag Changes")
-        progress.setMinimumDuration(0)
-        progress.setValue(0)
-
-        for idx, fp in enumerate(filepaths):
-            progress.setValue(idx)
-            if progress.wasCanceled():
-                break
-            QApplication.processEvents()
-            
-            try:
-                ds = pydicom.dcmread(fp)
-                file_updated = False
-                labels = self._get_dataset_labels(ds)
-                
-                for edit_info in edits:
-                    tag = edit_info['tag']
-                    new_val_str = edit_info['value_str']
-                    original_elem_ref = edit_info['original_elem']
-
-                    if tag in ds:  # Modify existing tag
-                        target_elem = ds[tag]
-                        old_value_fmt = self._format_audit_value(target_elem.value)
-                        try:
-                            # Convert value based on VR
-                            converted_value = self._convert_value_by_vr_advanced(new_val_str, original_elem_ref, target_elem)
-                            target_elem.value = converted_value
-                            file_updated = True
-                            self._record_audit_entry(
-                                fp,
-                                level,
-                                edit_info,
-                                labels,
-                                old_value_fmt,
-                                self._format_audit_value(converted_value),
-                            )
-                        except Exception as e_conv:
-                            logging.warning(f"Could not convert value '{new_val_str}' for tag {tag} in {fp}. Error: {e_conv}. Saving as string.")
-                            target_elem.value = new_val_str  # Fallback to string
-                            file_updated = True
-                            self._record_audit_entry(
-                                fp,
-                                level,
-                                edit_info,
-                                labels,
-                                old_value_fmt,
-                                new_val_str,
-                            )
-                    else:  # Add new tag
-                        try:
-                            # Get VR from original element reference
-                            vr = original_elem_ref.VR if hasattr(original_elem_ref, 'VR') else 'LO'
-                            # Convert value based on VR
-                            converted_value = self._convert_value_by_vr(new_val_str, vr)
-                            # Add new tag to dataset
-                            ds.add_new(tag, vr, converted_value)
-                            file_updated = True
-                            logging.info(f"Added new tag {tag} with VR {vr} and value '{new_val_str}' to {fp}")
-                            self._record_audit_entry(
-                                fp,
-                                level,
-                                edit_info,
-                                labels,
-                                "",
-                                self._format_audit_value(converted_value),
-                            )
-                        except Exception as e_add:
-                            logging.warning(f"Could not add new tag {tag} to {fp}. Error: {e_add}. Trying with string value.")
-                            try:
-                                # Fallback to string value with LO VR
-                                ds.add_new(tag, 'LO', new_val_str)
-                                file_updated = True
-                                self._record_audit_entry(
-                                    fp,
-                                    level,
-                                    edit_info,
-                                    labels,
-                                    "",
-                                    new_val_str,
-                                )
-                            except Exception as e_fallback:
-                                logging.error(f"Failed to add new tag {tag} to {fp}: {e_fallback}")
-                                continue
-                
-                if file_updated:
-                    ds.save_as(fp, write_like_original=False)
-                    updated_count += 1
-                    
-            except Exception as e_file:
-                logging.error(f"Failed to process file {fp}: {e_file}", exc_info=True)
-                failed_files.append(f"{os.path.basename(fp)}: {str(e_file)}")
-                
-        progress.setValue(len(filepaths))
-        
+        def apply_edits(fp, ds):
+            return self._apply_level_edits(fp, ds, edits, level)
+
+        save_result = self._run_tag_save(
+            filepaths,
+            apply_edits,
+            f"Saving changes to {level}...",
+            "Saving Tag Changes",
+            enforce_file_format=True,
+        )
+        updated_count = save_result["updated"]
+        failed_files = save_result["failed_files"]
+
         result = {
             "level": level,
             "total_files": len(filepaths),
@@ -794,14 +711,124 @@ class DicomManager(QObject):
         if self.current_file in filepaths:
             self.load_dicom_tags(self.current_file)
             
-        # Refresh tree to show updated patient names and other hierarchy changes
+        # Update the saved files' tree nodes to show new patient names and other hierarchy changes
         if hasattr(self.main_window, 'tree_manager') and self.main_window.tree_manager:
-            if hasattr(self.main_window, "prepare_for_tree_refresh"):
-                self.main_window.prepare_for_tree_refresh()
-            self.main_window.tree_manager.refresh_tree()
-            logging.info("Tree refreshed after tag save")
+            self.main_window.tree_manager.update_files(filepaths)
+            logging.info("Tree updated after tag save")
         
         return result
+
+    def _run_tag_save(self, filepaths, apply_edits, label_text, title, enforce_file_format=False):
+        """Run ``apply_edits`` over ``filepaths`` in the background save engine.
+
+        Audit entries produced on the pool threads are recorded here, on the
+        GUI thread. Returns the worker result, with empty counts if it failed.
+        """
+        max_workers = self.config.get("performance", {}).get("tag_save_workers")
+        dialog = TagSaveDialog(
+            filepaths,
+            apply_edits,
+            label_text,
+            title,
+            self.main_window,
+            max_workers=max_workers,
+            enforce_file_format=enforce_file_format,
+        )
+        dialog.exec()
+
+        save_result = dialog.save_result
+        if save_result is None:
+            error = dialog.error_message or "Unknown error"
+            FocusAwareMessageBox.critical(self.main_window, title, f"Saving failed: {error}")
+            return {"total_files": len(filepaths), "updated": 0, "updated_files": [],
+                    "failed_files": [], "audit_entries": [], "cancelled": False}
+
+        for audit_args in save_result["audit_entries"]:
+            self._record_audit_entry(*audit_args)
+        if save_result["cancelled"]:
+            logging.info(f"Tag save cancelled after updating {save_result['updated']} files")
+        return save_result
+
+    def _apply_level_edits(self, fp, ds, edits, level):
+        """Apply staged edits to one dataset; runs on a save pool thread.
+
+        Returns ``(file_updated, audit_entries)`` where each audit entry holds
+        the arguments for ``_record_audit_entry``.
+        """
+        file_updated = False
+        audit_entries = []
+        labels = self._get_dataset_labels(ds)
+
+        for edit_info in edits:
+            tag = edit_info['tag']
+            new_val_str = edit_info['value_str']
+            original_elem_ref = edit_info['original_elem']
+
+            if tag in ds:  # Modify existing tag
+                target_elem = ds[tag]
+                old_value_fmt = self._format_audit_value(target_elem.value)
+                try:
+                    # Convert value based on VR
+                    converted_value = self._convert_value_by_vr_advanced(new_val_str, original_elem_ref, target_elem)
+                    target_elem.value = converted_value
+                    file_updated = True
+                    audit_entries.append((
+                        fp,
+                        level,
+                        edit_info,
+                        labels,
+                        old_value_fmt,
+                        self._format_audit_value(converted_value),
+                    ))
+                except Exception as e_conv:
+                    logging.warning(f"Could not convert value '{new_val_str}' for tag {tag} in {fp}. Error: {e_conv}. Saving as string.")
+                    target_elem.value = new_val_str  # Fallback to string
+                    file_updated = True
+                    audit_entries.append((
+                        fp,
+                        level,
+                        edit_info,
+                        labels,
+                        old_value_fmt,
+                        new_val_str,
+                    ))
+            else:  # Add new tag
+                try:
+                    # Get VR from original element reference
+                    vr = original_elem_ref.VR if hasattr(original_elem_ref, 'VR') else 'LO'
+                    # Convert value based on VR
+                    converted_value = self._convert_value_by_vr(new_val_str, vr)
+                    # Add new tag to dataset
+                    ds.add_new(tag, vr, converted_value)
+                    file_updated = True
+                    logging.info(f"Added new tag {tag} with VR {vr} and value '{new_val_str}' to {fp}")
+                    audit_entries.append((
+                        fp,
+                        level,
+                        edit_info,
+                        labels,
+                        "",
+                        self._format_audit_value(converted_value),
+                    ))
+                except Exception as e_add:
+                    logging.warning(f"Could not add new tag {tag} to {fp}. Error: {e_add}. Trying with string value.")
+                    try:
+                        # Fallback to string value with LO VR
+                        ds.add_new(tag, 'LO', new_val_str)
+                        file_updated = True
+                        audit_entries.append((
+                            fp,
+                            level,
+                            edit_info,
+                            labels,
+                            "",
+                            new_val_str,
+                        ))
+                    except Exception as e_fallback:
+                        logging.error(f"Failed to add new tag {tag} to {fp}: {e_fallback}")
+                        continue
+        
+        return file_updated, audit_entries
     
     def _convert_value_by_vr_advanced(self, new_val_str, original_elem_ref, target_elem):
         """Advanced value conversion based on VR and original element"""
@@ -1017,10 +1044,8 @@ class DicomManager(QObject):
             # Refresh tree to show updated patient names and other changes
             if result is not None:  # Anonymization completed successfully
                 if hasattr(self.main_window, 'tree_manager') and self.main_window.tree_manager:
-                    if hasattr(self.main_window, "prepare_for_tree_refresh"):
-                        self.main_window.prepare_for_tree_refresh()
-                    self.main_window.tree_manager.refresh_tree()
-                    logging.info("Tree refreshed after anonymization")
+                    self.main_window.tree_manager.update_files(file_paths)
+                    logging.info("Tree updated after anonymization")
         except Exception as e:
             logging.error(f"Anonymization error: {e}", exc_info=True)
             FocusAwareMessageBox.critical(
@@ -1233,15 +1258,13 @@ class DicomManager(QObject):
     def _start_dicom_send(self, selected_files, send_params):
         """Start DICOM send worker with selected files and parameters"""
         try:
-            # Analyze files to get unique SOP classes
-            unique_sop_classes = set()
-            for filepath in selected_files:
-                try:
-                    ds = pydicom.dcmread(filepath, stop_before_pixels=True)
-                    if hasattr(ds, 'SOPClassUID'):
-                        unique_sop_classes.add(ds.SOPClassUID)
-                except Exception as e:
-                    logging.warning(f"Could not read SOP class from {filepath}: {e}")
+            # Gather SOP class, transfer syntax and size once, from the loaded headers where possible
+            tree_manager = getattr(self.main_window, 'tree_manager', None)
+            manifest = build_send_manifest(
+                selected_files,
+                record_lookup=tree_manager.get_instance_record if tree_manager else None
+            )
+            unique_sop_classes = manifest.unique_sop_classes()
             
             if not unique_sop_classes:
                 FocusAwareMessageBox.warning(
@@ -1250,6 +1273,10 @@ class DicomManager(QObject):
                     "No valid DICOM files found for sending."
                 )
                 return
+
+            resume = self._ask_resume_send(selected_files, send_params)
+            if resume is None:
+                return
             
             # Create progress dialog
             from PyQt6.QtWidgets import QProgressDialog
@@ -1262,8 +1289,9 @@ class DicomManager(QObject):
             self.send_total_files = len(selected_files)
             
             # Create and start worker
-            from fm_dicom.workers.dicom_send_worker import DicomSendWorker
-            self.send_worker = DicomSendWorker(selected_files, send_params, list(unique_sop_classes))
+            self.send_worker = self._create_send_worker(
+                selected_files, send_params, unique_sop_classes, manifest, resume=resume
+            )
             
             # Connect signals
             self.send_worker.progress_updated.connect(self._on_send_progress)
@@ -1271,6 +1299,8 @@ class DicomManager(QObject):
             self.send_worker.send_failed.connect(self._on_send_failed)
             self.send_worker.association_status.connect(self._on_send_status)
             self.send_worker.conversion_progress.connect(self._on_conversion_progress)
+            self.send_worker.throughput_updated.connect(self._on_send_throughput)
+            self.send_rate = None
             self.send_progress.canceled.connect(self.send_worker.cancel)
             
             # Start worker
@@ -1287,6 +1317,115 @@ class DicomManager(QObject):
                 f"Failed to start DICOM send:\n{str(e)}"
             )
     
+    def _ask_resume_send(self, selected_files, send_params):
+        """Ask whether to skip files the destination already acknowledged.
+
+        Returns True to send only the rest, False to send everything, or
+        None when the operator cancelled. No question is asked when the
+        journal is off or nothing was acknowledged before.
+        """
+        journal = get_send_journal(self.config)
+        if journal is None:
+            return False
+        acknowledged = journal.acknowledged(send_params, selected_files)
+        if not acknowledged:
+            return False
+
+        reply = FocusAwareMessageBox.question(
+            self.main_window, "Resume DICOM Send",
+            f"{len(acknowledged)} of {len(selected_files)} files were already received by "
+            f"{send_params[1]}.\n\n"
+            "Yes: send only the remaining files\n"
+            "No: send all files again",
+            FocusAwareMessageBox.StandardButton.Yes | FocusAwareMessageBox.StandardButton.No
+            | FocusAwareMessageBox.StandardButton.Cancel,
+            FocusAwareMessageBox.StandardButton.Yes
+        )
+        if reply == FocusAwareMessageBox.StandardButton.Cancel:
+            return None
+        return reply == FocusAwareMessageBox.StandardButton.Yes
+
+    def _create_send_worker(self, filepaths, send_params, unique_sop_classes, manifest=None, is_retry=False,
+                            resume=False):
+        """Build a DicomSendWorker configured from the send settings"""
+        from fm_dicom.workers.dicom_send_worker import DicomSendWorker
+        send_config = self.config.get("send", {})
+        perf_config = self.config.get("performance", {})
+        return DicomSendWorker(
+            filepaths,
+            send_params,
+            unique_sop_classes,
+            manifest=manifest,
+            max_associations=send_config.get("max_associations", 4),
+            stream_from_file=send_config.get("stream_from_file", True),
+            # Same worker count as header parsing, so the shared process pool is reused
+            transcode_workers=perf_config.get("max_worker_processes"),
+            spool_limit=send_config.get("spool_files", 16),
+            negotiation_ttl=send_config.get("negotiation_cache_ttl", 3600),
+            journal=get_send_journal(self.config),
+            is_retry=is_retry,
+            resume=resume,
+            metrics_log=send_config.get("metrics_log")
+        )
+    
+    def _setup_send_retry(self):
+        """Periodically resend journalled files that failed or were left unsent"""
+        self._retry_worker = None
+        self._send_retry_timer = None
+        if get_send_journal(self.config) is None:
+            return
+        interval = self.config.get("send", {}).get("retry_check_interval", 30)
+        if not interval or interval <= 0:
+            return
+        self._send_retry_timer = QTimer(self)
+        self._send_retry_timer.setInterval(int(interval * 1000))
+        self._send_retry_timer.timeout.connect(self._retry_due_sends)
+        self._send_retry_timer.start()
+    
+    def _sends_running(self):
+        for worker in (getattr(self, 'send_worker', None), self._retry_worker):
+            if worker is not None and worker.isRunning():
+                return True
+        return False
+    
+    def _retry_due_sends(self):
+        """Start a background resend for one destination with files due for retry"""
+        if self._sends_running():
+            return
+        journal = get_send_journal(self.config)
+        if journal is None:
+            return
+        due = journal.due_retries()
+        if not due:
+            return
+        
+        send_params, filepaths = next(iter(due.items()))
+        missing = [fp for fp in filepaths if not os.path.exists(fp)]
+        if missing:
+            journal.mark_failed(send_params, missing, "File no longer exists", retryable=False)
+            filepaths = [fp for fp in filepaths if fp not in set(missing)]
+        if not filepaths:
+            return
+        
+        logging.info(f"Retrying send of {len(filepaths)} files to {send_params[1]}@{send_params[2]}:{send_params[3]}")
+        self._retry_worker = self._create_send_worker(filepaths, send_params, None, is_retry=True)
+        self._retry_worker.send_complete.connect(self._on_retry_complete)
+        self._retry_worker.send_failed.connect(
+            lambda message: logging.warning(f"Background send retry failed: {message}")
+        )
+        self._retry_worker.start()
+    
+    def _on_retry_complete(self, success, warnings, failed, error_details, converted_count, timing_info=None):
+        logging.info(f"Background send retry complete: {success} success, {warnings} warnings, {failed} failed")
+    
+    def stop_background_sends(self):
+        """Stop retrying; files not yet acknowledged stay journalled for the next session"""
+        if self._send_retry_timer is not None:
+            self._send_retry_timer.stop()
+        if self._retry_worker is not None and self._retry_worker.isRunning():
+            self._retry_worker.cancel()
+            self._retry_worker.wait(5000)
+    
     def _on_send_progress(self, current, success, warnings, failed, current_file):
         """Handle DICOM send progress updates"""
         import logging
@@ -1304,13 +1443,20 @@ class DicomManager(QObject):
                 actual_filename = current_file.replace("Testing ", "")
                 self.send_progress.setLabelText(f"Checking compatibility: {actual_filename} ({current}/{self.send_total_files})")
             else:
-                self.send_progress.setLabelText(f"Sending: {current_file} ({current}/{self.send_total_files})")
+                label = f"Sending: {current_file} ({current}/{self.send_total_files})"
+                if getattr(self, 'send_rate', None):
+                    label += f" - {self.send_rate:.1f} MB/s"
+                self.send_progress.setLabelText(label)
             
             # Make sure the dialog is visible after conversion phase
             if not self.send_progress.isVisible():
                 logging.warning("DicomManager: Progress dialog was hidden, showing it again")
                 self.send_progress.show()
     
+    def _on_send_throughput(self, mb_per_s):
+        """Remember the rolling send rate for the progress label"""
+        self.send_rate = mb_per_s
+    
     def _on_send_status(self, status):
         """Handle DICOM send status updates"""
         if hasattr(self, 'send_progress'):
@@ -1326,10 +1472,7 @@ class DicomManager(QObject):
         logging.debug(f"DicomManager: Conversion progress: {current}/{total} - {message}")
         
         if hasattr(self, 'send_progress'):
-            # Update progress bar based on conversion progress
-            if total > 0:
-                progress_percent = int((current / total) * 100)
-                self.send_progress.setValue(progress_percent)
+            # Conversion runs alongside sending, so the bar keeps tracking sent files
             self.send_progress.setLabelText(message)
             
             # Make sure the dialog is visible and not closed
@@ -1362,6 +1505,8 @@ class DicomManager(QObject):
                 msg += f"\nSending: {timing_info['send_time']:.1f}s"
             if timing_info.get('total_time', 0) > 0:
                 msg += f"\nTotal: {timing_info['total_time']:.1f}s"
+            if timing_info.get('metrics', {}).get('instances'):
+                msg += "\n\n" + format_report(timing_info['metrics'])
         
         logging.info(f"DicomManager: About to show completion dialog with message: {msg}")
         
@@ -1453,7 +1598,7 @@ class DicomManager(QObject):
         current_value = ""
         try:
             import pydicom
-            ds_sample = pydicom.dcmread(file_paths[0], stop_before_pixels=True)
+            ds_sample = read_dataset(file_paths[0], stop_before_pixels=True)
             if tag in ds_sample:
                 current_value = str(ds_sample[tag].value)
             else:
@@ -1488,48 +1633,31 @@ class DicomManager(QObject):
     
     def _perform_batch_edit(self, file_paths, tag, tag_info, new_value):
         """Perform the actual batch edit operation"""
-        updated_count = 0
-        failed_files = []
-        
-        from PyQt6.QtWidgets import QProgressDialog
-        progress = FocusAwareProgressDialog(f"Batch editing {tag_info['name']}...", "Cancel", 0, len(file_paths), self.main_window)
-        progress.setWindowTitle("Batch Tag Edit")
-        progress.setMinimumDuration(0)
-        progress.setValue(0)
-
-        for idx, filepath in enumerate(file_paths):
-            progress.setValue(idx)
-            if progress.wasCanceled():
-                break
-            QApplication.processEvents()
-            
-            try:
-                import pydicom
-                ds = pydicom.dcmread(filepath)
-                
-                # Determine VR
-                if tag in ds:
-                    vr = ds[tag].VR
-                else:
-                    vr = tag_info.get('vr', 'LO')
-                    
-                # Convert value
-                converted_value = self._convert_value_by_vr(new_value, vr)
-                
-                # Update or add tag
-                if tag in ds:
-                    ds[tag].value = converted_value
-                else:
-                    ds.add_new(tag, vr, converted_value)
-                    
-                ds.save_as(filepath)
-                updated_count += 1
-                
-            except Exception as e:
-                failed_files.append(f"{os.path.basename(filepath)}: {str(e)}")
-                logging.error(f"Failed to update {filepath}: {e}")
+        def apply_edit(filepath, ds):
+            # Determine VR
+            if tag in ds:
+                vr = ds[tag].VR
+            else:
+                vr = tag_info.get('vr', 'LO')
                 
-        progress.setValue(len(file_paths))
+            # Convert value
+            converted_value = self._convert_value_by_vr(new_value, vr)
+            
+            # Update or add tag
+            if tag in ds:
+                ds[tag].value = converted_value
+            else:
+                ds.add_new(tag, vr, converted_value)
+            return True, []
+
+        save_result = self._run_tag_save(
+            file_paths,
+            apply_edit,
+            f"Batch editing {tag_info['name']}...",
+            "Batch Tag Edit",
+        )
+        updated_count = save_result["updated"]
+        failed_files = save_result["failed_files"]
         
         # Show results
         msg = f"Batch edit complete.\nUpdated {updated_count} of {len(file_paths)} files."
@@ -1542,12 +1670,10 @@ class DicomManager(QObject):
         if hasattr(self, 'current_file') and self.current_file in file_paths:
             self.load_dicom_tags(self.current_file)
             
-        # Refresh tree to show updated patient names and other hierarchy changes
+        # Update the edited files' tree nodes to show new patient names and other hierarchy changes
         if hasattr(self.main_window, 'tree_manager') and self.main_window.tree_manager:
-            if hasattr(self.main_window, "prepare_for_tree_refresh"):
-                self.main_window.prepare_for_tree_refresh()
-            self.main_window.tree_manager.refresh_tree()
-            logging.info("Tree refreshed after batch edit")
+            self.main_window.tree_manager.update_files(file_paths)
+            logging.info("Tree updated after batch edit")
     
     def _convert_value_by_vr(self, value, vr):
         """Convert string value to appropriate type based on VR"""
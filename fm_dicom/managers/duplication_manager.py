@@ -17,6 +17,8 @@ from dataclasses import dataclass
 import pydicom
 from PyQt6.QtCore import QObject, pyqtSignal
 
+from fm_dicom.core.zip_source import is_unmaterialised, read_dataset
+
 
 class UIDHandlingMode(Enum):
     """Modes for handling UIDs during duplication"""
@@ -170,9 +172,9 @@ class DuplicationManager(QObject):
                 return self.main_window.tree_manager.memory_items[file_path]
 
             # Otherwise, try to read from disk
-            elif os.path.exists(file_path):
+            elif os.path.exists(file_path) or is_unmaterialised(file_path):
                 logging.debug(f"Loading dataset from disk: {file_path}")
-                return pydicom.dcmread(file_path, force=True)
+                return read_dataset(file_path, force=True)
 
             else:
                 raise FileNotFoundError(f"Dataset not found in memory or on disk: {file_path}")
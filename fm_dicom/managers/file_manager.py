@@ -13,8 +13,10 @@ from PyQt6.QtWidgets import QFileDialog, QApplication
 from PyQt6.QtCore import QObject, pyqtSignal
 
 from fm_dicom.widgets.focus_aware import FocusAwareMessageBox, FocusAwareProgressDialog
-from fm_dicom.dialogs.progress_dialogs import ZipExtractionDialog, DicomdirScanDialog
+from fm_dicom.dialogs.progress_dialogs import ZipScanDialog
 from fm_dicom.core.dicomdir_reader import DicomdirReader
+from fm_dicom.core.header_index import get_header_index, load_header, read_headers
+from fm_dicom.core.zip_source import unregister_source
 from fm_dicom.utils.file_dialogs import get_file_dialog_manager
 # Temporarily commented out for testing - from fm_dicom.utils.threaded_processor import FastDicomScanner
 
@@ -285,46 +287,31 @@ class FileManager(QObject):
         """Load DICOM files from a ZIP archive"""
         logging.info(f"Loading ZIP file: {zip_path}")
         
-        # Extract ZIP with progress dialog
-        extraction_dialog = ZipExtractionDialog(zip_path, self.main_window)
-        if extraction_dialog.exec() and extraction_dialog.success:
-            temp_dir = extraction_dialog.temp_dir
-            extracted_files = extraction_dialog.extracted_files
-            
-            # Track temp directory for cleanup
-            self.temp_dirs.append(temp_dir)
-            
-            logging.info(f"Extracted {len(extracted_files)} files to {temp_dir}")
-            
-            # Scan for DICOM files with progress
-            scan_dialog = DicomdirScanDialog(extracted_files, self.main_window)
-            if scan_dialog.exec() and scan_dialog.success:
-                dicom_files = scan_dialog.dicom_files
-                logging.info(f"Found {len(dicom_files)} DICOM files")
-                
-                if dicom_files:
-                    self.files_loaded.emit(dicom_files)
-                else:
-                    FocusAwareMessageBox.information(
-                        self.main_window,
-                        "No DICOM Files",
-                        "No DICOM files found in the ZIP archive."
-                    )
+        # Read headers straight from the archive; members are extracted on demand
+        scan_dialog = ZipScanDialog(zip_path, self.main_window)
+        if scan_dialog.exec() and scan_dialog.success:
+            # Track staging directory for cleanup
+            self.temp_dirs.append(scan_dialog.temp_dir)
+
+            dicom_files = scan_dialog.dicom_files
+            logging.info(f"Found {len(dicom_files)} DICOM files in {zip_path}")
+
+            if dicom_files:
+                self.files_loaded.emit(dicom_files)
             else:
-                if hasattr(scan_dialog, 'error_message'):
-                    FocusAwareMessageBox.critical(
-                        self.main_window,
-                        "Scan Error",
-                        f"Error scanning for DICOM files:\\n{scan_dialog.error_message}"
-                    )
+                FocusAwareMessageBox.information(
+                    self.main_window,
+                    "No DICOM Files",
+                    "No DICOM files found in the ZIP archive."
+                )
         else:
-            logging.warning("ZIP extraction failed or was cancelled")
+            logging.warning("ZIP reading failed or was cancelled")
     
     def _load_from_dicomdir(self, dicomdir_path, base_dir):
         """Load files using DICOMDIR"""
         try:
             dicomdir_reader = DicomdirReader()
-            dicom_files = dicomdir_reader.read_dicomdir(dicomdir_path)
+            dicom_files = dicomdir_reader.read_dicomdir(dicomdir_path, records=True)
             
             if dicom_files:
                 logging.info(f"DICOMDIR loaded {len(dicom_files)} files")
@@ -347,8 +334,6 @@ class FileManager(QObject):
     
     def _scan_directory_recursive(self, dir_path):
         """Recursively scan directory for DICOM files with optimized processing"""
-        import pydicom
-
         dicom_files = []
 
         # First pass: collect all file paths
@@ -396,6 +381,12 @@ class FileManager(QObject):
         progress.setMinimumDuration(0)
         progress.show()
 
+        # Unchanged files are served from the header index without being opened
+        header_index = get_header_index(self.config)
+        cached_headers = header_index.lookup_many(potential_dicom_files) if header_index else {}
+        if cached_headers:
+            logging.info(f"Header index has {len(cached_headers)} of {len(potential_dicom_files)} files up to date")
+
         # Process potential DICOM files with better progress updates
         processed = 0
         successful_files = 0
@@ -404,21 +395,15 @@ class FileManager(QObject):
             if progress.wasCanceled():
                 logging.info(f"Directory scan cancelled after processing {processed} files")
                 progress.close()
+                if header_index:
+                    header_index.flush()
                 return
 
-            try:
-                # Try to read as DICOM
-                ds = pydicom.dcmread(file_path, stop_before_pixels=True)
-                dicom_files.append((file_path, ds))
-                successful_files += 1
-
-            except Exception as e:
-                # Not a valid DICOM file, skip silently
-                if processed < 5:  # Log first few errors for debugging
-                    logging.debug(f"Failed to read as DICOM: {file_path} - {e}")
-                continue
-
+            header = load_header(file_path, header_index, cached_headers)
             processed += 1
+            if header is not None:
+                dicom_files.append((file_path, header))
+                successful_files += 1
 
             # Update progress more frequently for responsiveness
             if processed % 10 == 0 or processed == len(potential_dicom_files):
@@ -426,6 +411,9 @@ class FileManager(QObject):
                 progress.setLabelText(f"Processed {successful_files} DICOM files\n({processed}/{len(potential_dicom_files)} files checked)")
                 QApplication.processEvents()
 
+        if header_index:
+            header_index.flush()
+
         progress.close()
 
         if dicom_files:
@@ -473,7 +461,7 @@ class FileManager(QObject):
                 
                 try:
                     dicomdir_reader = DicomdirReader()
-                    dicom_files = dicomdir_reader.read_dicomdir(dicomdir_path)
+                    dicom_files = dicomdir_reader.read_dicomdir(dicomdir_path, records=True)
                     if dicom_files:
                         all_dicom_files.extend(dicom_files)
                         logging.info(f"DICOMDIR loaded {len(dicom_files)} files")
@@ -522,24 +510,14 @@ class FileManager(QObject):
     def _process_zip_file_for_comprehensive_scan(self, zip_path):
         """Process a ZIP file during comprehensive scan"""
         try:
-            # Extract ZIP with progress dialog
-            extraction_dialog = ZipExtractionDialog(zip_path, self.main_window)
-            if extraction_dialog.exec() and extraction_dialog.success:
-                temp_dir = extraction_dialog.temp_dir
-                extracted_files = extraction_dialog.extracted_files
-                
-                # Track temp directory for cleanup
-                self.temp_dirs.append(temp_dir)
-                
-                # Scan extracted files for DICOM content
-                scan_dialog = DicomdirScanDialog(extracted_files, self.main_window)
-                if scan_dialog.exec() and scan_dialog.success:
-                    return scan_dialog.dicom_files
-                else:
-                    logging.warning(f"Failed to scan extracted files from {zip_path}")
-                    return []
+            # Read headers straight from the archive; members are extracted on demand
+            scan_dialog = ZipScanDialog(zip_path, self.main_window)
+            if scan_dialog.exec() and scan_dialog.success:
+                # Track staging directory for cleanup
+                self.temp_dirs.append(scan_dialog.temp_dir)
+                return scan_dialog.dicom_files
             else:
-                logging.warning(f"Failed to extract ZIP file {zip_path}")
+                logging.warning(f"Failed to read ZIP file {zip_path}")
                 return []
         except Exception as e:
             logging.error(f"Error processing ZIP file {zip_path}: {e}")
@@ -547,9 +525,7 @@ class FileManager(QObject):
     
     def _scan_for_individual_dicom_files(self, dir_path, exclude_zip_files):
         """Scan for individual DICOM files, excluding ZIP files"""
-        import pydicom
-        
-        dicom_files = []
+        candidate_paths = []
         exclude_paths = set(exclude_zip_files)
         
         for root, dirs, files in os.walk(dir_path):
@@ -564,15 +540,10 @@ class FileManager(QObject):
                 if file.upper() == 'DICOMDIR':
                     continue
                 
-                try:
-                    # Try to read as DICOM
-                    ds = pydicom.dcmread(file_path, stop_before_pixels=True)
-                    dicom_files.append((file_path, ds))
-                except Exception:
-                    # Not a DICOM file, skip silently
-                    continue
+                candidate_paths.append(file_path)
         
-        return dicom_files
+        # Non-DICOM files are skipped silently; unchanged files come from the header index
+        return read_headers(candidate_paths, get_header_index(self.config))
 
     # Additive loading methods (append to existing files instead of replacing)
 
@@ -608,40 +579,25 @@ class FileManager(QObject):
         """Load DICOM files from a ZIP archive for append operation"""
         logging.info(f"Loading ZIP file for append: {zip_path}")
 
-        # Extract ZIP with progress dialog
-        extraction_dialog = ZipExtractionDialog(zip_path, self.main_window)
-        if extraction_dialog.exec() and extraction_dialog.success:
-            temp_dir = extraction_dialog.temp_dir
-            extracted_files = extraction_dialog.extracted_files
-
-            # Track temp directory for cleanup
-            self.temp_dirs.append(temp_dir)
+        # Read headers straight from the archive; members are extracted on demand
+        scan_dialog = ZipScanDialog(zip_path, self.main_window)
+        if scan_dialog.exec() and scan_dialog.success:
+            # Track staging directory for cleanup
+            self.temp_dirs.append(scan_dialog.temp_dir)
 
-            logging.info(f"Extracted {len(extracted_files)} files to {temp_dir}")
-
-            # Scan for DICOM files with progress
-            scan_dialog = DicomdirScanDialog(extracted_files, self.main_window)
-            if scan_dialog.exec() and scan_dialog.success:
-                dicom_files = scan_dialog.dicom_files
-                logging.info(f"Found {len(dicom_files)} DICOM files for append")
+            dicom_files = scan_dialog.dicom_files
+            logging.info(f"Found {len(dicom_files)} DICOM files in {zip_path} for append")
 
-                if dicom_files:
-                    self.files_to_append.emit(dicom_files)
-                else:
-                    FocusAwareMessageBox.information(
-                        self.main_window,
-                        "No DICOM Files",
-                        "No DICOM files found in the ZIP archive."
-                    )
+            if dicom_files:
+                self.files_to_append.emit(dicom_files)
             else:
-                if hasattr(scan_dialog, 'error_message'):
-                    FocusAwareMessageBox.critical(
-                        self.main_window,
-                        "Scan Error",
-                        f"Error scanning for DICOM files:\\n{scan_dialog.error_message}"
-                    )
+                FocusAwareMessageBox.information(
+                    self.main_window,
+                    "No DICOM Files",
+                    "No DICOM files found in the ZIP archive."
+                )
         else:
-            logging.warning("ZIP extraction failed or was cancelled")
+            logging.warning("ZIP reading failed or was cancelled")
 
     def _scan_directory_comprehensive_additive(self, dir_path):
         """Comprehensively scan directory for DICOM content for append operation"""
@@ -675,7 +631,7 @@ class FileManager(QObject):
 
                 try:
                     dicomdir_reader = DicomdirReader()
-                    dicom_files = dicomdir_reader.read_dicomdir(dicomdir_path)
+                    dicom_files = dicomdir_reader.read_dicomdir(dicomdir_path, records=True)
                     if dicom_files:
                         all_dicom_files.extend(dicom_files)
                         logging.info(f"DICOMDIR loaded {len(dicom_files)} files")
@@ -724,6 +680,8 @@ class FileManager(QObject):
     def cleanup_temp_dirs(self):
         """Clean up temporary directories"""
         for temp_dir in self.temp_dirs:
+            # Close the archive backing a ZIP staging directory, if any
+            unregister_source(temp_dir)
             if os.path.exists(temp_dir):
                 try:
                     shutil.rmtree(temp_dir)
@@ -6,6 +6,7 @@ selection handling, and hierarchy management.
 """
 
 import os
+import bisect
 import logging
 import pydicom
 from PyQt6.QtWidgets import QTreeWidgetItem, QProgressDialog, QApplication, QMenu, QDialog
@@ -13,12 +14,35 @@ from PyQt6.QtCore import QObject, pyqtSignal, Qt, QPoint
 from PyQt6.QtGui import QIcon, QAction, QBrush, QColor
 
 from fm_dicom.widgets.focus_aware import FocusAwareMessageBox, FocusAwareProgressDialog
-from fm_dicom.utils.threaded_processor import ThreadedDicomProcessor, DicomProcessingResult, FastDicomScanner
+from fm_dicom.utils.threaded_processor import (
+    ThreadedDicomProcessor, DicomProcessingResult, FastDicomScanner, BACKEND_PROCESS
+)
+from fm_dicom.core.header_index import get_header_index, read_headers, NOT_DICOM
+from fm_dicom.core.instance_record import InstanceRecord
+from fm_dicom.core.zip_source import ensure_local, is_unmaterialised, read_member_header
 from fm_dicom.managers.duplication_manager import DuplicationManager, UIDConfiguration
 from fm_dicom.dialogs.uid_configuration_dialog import UIDConfigurationDialog
 from fm_dicom.dialogs.move_item_dialog import MoveItemDialog
 
 TREE_PATH_ROLE = Qt.ItemDataRole.UserRole + 1
+# Set on series items whose instance rows have not been created yet
+PENDING_CHILDREN_ROLE = Qt.ItemDataRole.UserRole + 2
+
+
+class _ChildSortKeys:
+    """Read-only sequence of a series item's instance sort keys, for bisect"""
+
+    def __init__(self, series_item, instances):
+        self.series_item = series_item
+        self.instances = instances
+
+    def __len__(self):
+        return self.series_item.childCount()
+
+    def __getitem__(self, index):
+        label = self.series_item.child(index).data(0, TREE_PATH_ROLE)[3]
+        entry = self.instances.get(label)
+        return entry['sort_key'] if entry else float('-inf')
 
 
 class TreeManager(QObject):
@@ -36,6 +60,7 @@ class TreeManager(QObject):
         self.memory_items = {}   # In-memory duplicated items (survive refresh)
         self.loaded_files = []
         self.hierarchy = {}  # Store hierarchy data for performance
+        self._items = {}  # TREE_PATH_ROLE tuple -> QTreeWidgetItem for hierarchy rows
         self._inbound_root = None
         self._inbound_nodes = {}
         self._inbound_brush = QBrush(QColor("#7f8c8d"))
@@ -47,6 +72,8 @@ class TreeManager(QObject):
         self.max_workers = perf_config.get('max_worker_threads', 4)
         self.batch_size = perf_config.get('batch_size', 50)
         self.progress_frequency = perf_config.get('progress_update_frequency', 20)
+        self.processing_backend = perf_config.get('processing_backend', BACKEND_PROCESS)
+        self.max_worker_processes = perf_config.get('max_worker_processes') or os.cpu_count() or 4
 
         # Threaded processor
         self.threaded_processor = None
@@ -72,6 +99,7 @@ class TreeManager(QObject):
 
         # Connect tree signals
         self.tree.itemSelectionChanged.connect(self._on_selection_changed)
+        self.tree.itemExpanded.connect(self._on_item_expanded)
 
     def _on_selection_changed(self):
         """Handle tree selection change - load DICOM data for selected item"""
@@ -157,7 +185,10 @@ class TreeManager(QObject):
         if not file_path:
             return False
 
-        target = self._find_item_by(lambda item: item.data(0, Qt.ItemDataRole.UserRole) == file_path)
+        labels = self.file_metadata.get(file_path)
+        target = self._item_for_labels(labels) if labels else None
+        if target is None or target.data(0, Qt.ItemDataRole.UserRole) != file_path:
+            target = self._find_item_by(lambda item: item.data(0, Qt.ItemDataRole.UserRole) == file_path)
         if target:
             self._focus_on_item(target)
             return True
@@ -168,7 +199,7 @@ class TreeManager(QObject):
         if not path_tuple:
             return False
 
-        target = self._find_item_by(lambda item: item.data(0, TREE_PATH_ROLE) == tuple(path_tuple))
+        target = self._item_for_labels(tuple(path_tuple))
         if target:
             self._focus_on_item(target)
             return True
@@ -215,14 +246,19 @@ class TreeManager(QObject):
     
     def populate_tree(self, files, append=False):
         """Populate tree with DICOM file hierarchy using optimized processing"""
+        # Hold compact records rather than header Datasets for loaded files
+        files = self._compact_files(files)
+
         if append:
             logging.info(f"Appending {len(files)} files to existing tree ({len(self.loaded_files)} already loaded)")
         else:
             logging.info(f"Starting tree population with {len(files)} files")
             self.loaded_files = []
+            # Appends keep the labels of files already loaded; the merged
+            # hierarchy still holds them
+            self.file_metadata = {}
 
-        self.tree.clear()
-        self.file_metadata = {}
+        self._clear_items()
 
         if append:
             # Extend without duplicates
@@ -238,8 +274,11 @@ class TreeManager(QObject):
         # Extract file paths from mixed input formats
         file_paths = self._extract_file_paths(files)
 
-        # Decide whether to use threaded processing based on config and dataset size
-        if (self.use_threaded_processing and
+        # Decide whether to use threaded processing based on config and dataset size.
+        # Entries that already carry headers (from the file scan or the header
+        # index) are never re-parsed.
+        needs_header_reading = any(not isinstance(f, tuple) for f in files)
+        if (self.use_threaded_processing and needs_header_reading and
             len(file_paths) > self.thread_threshold):
             logging.info(f"Using threaded processing for {len(file_paths)} files (threshold: {self.thread_threshold})")
             self._append_mode = append  # Store for threaded processing completion
@@ -267,6 +306,16 @@ class TreeManager(QObject):
 
             logging.info(f"Tree populated with {total_files} files")
 
+    def _compact_files(self, files):
+        """Replace Datasets in (path, dataset) entries with InstanceRecords"""
+        compact = []
+        for entry in files:
+            if isinstance(entry, tuple) and entry[0] not in self.memory_items:
+                file_path, ds = entry
+                entry = (file_path, InstanceRecord.from_dataset(file_path, ds))
+            compact.append(entry)
+        return compact
+
     def _extract_file_paths(self, files):
         """Extract file paths from mixed input formats (paths, tuples)"""
         file_paths = []
@@ -288,10 +337,13 @@ class TreeManager(QObject):
         if len(filtered_paths) != len(file_paths):
             logging.info(f"Pre-filtered {len(file_paths)} files to {len(filtered_paths)} potential DICOM files")
 
-        # Create threaded processor
+        # Create threaded processor (header parsing runs in a process pool by default)
+        use_processes = self.processing_backend == BACKEND_PROCESS
         self.threaded_processor = ThreadedDicomProcessor(
-            max_workers=self.max_workers,
-            batch_size=self.batch_size
+            max_workers=self.max_worker_processes if use_processes else self.max_workers,
+            batch_size=self.batch_size,
+            backend=self.processing_backend,
+            header_index=get_header_index(self.main_window.config)
         )
 
         # Connect signals for progressive updates
@@ -370,9 +422,9 @@ class TreeManager(QObject):
                 for series_data in study_data.values():
                     for instance_data in series_data.values():
                         filepath = instance_data['filepath']
-                        dataset = instance_data.get('dataset')
-                        if dataset:
-                            new_files.append((filepath, dataset))
+                        record = instance_data.get('record')
+                        if record is not None:
+                            new_files.append((filepath, record))
                         else:
                             new_files.append(filepath)
 
@@ -412,7 +464,11 @@ class TreeManager(QObject):
             return
 
         metadata = result.metadata
-        dataset = result.dataset
+        # Keep only a compact record; the parsed Dataset is released here
+        record = InstanceRecord.from_dataset(
+            result.file_path, result.dataset if result.dataset is not None else InstanceRecord(result.file_path, metadata),
+            file_size=metadata.get('file_size')
+        )
 
         # Extract hierarchy information from metadata
         patient_id = metadata.get('PatientID', 'Unknown ID')
@@ -453,7 +509,7 @@ class TreeManager(QObject):
             'filepath': result.file_path,
             'sort_key': instance_sort_key,
             'instance_number': instance_number,
-            'dataset': dataset
+            'record': record
         }
 
     def _update_tree_structure_progressive(self, hierarchy):
@@ -485,7 +541,7 @@ class TreeManager(QObject):
             progress.setLabelText("Clearing current tree...")
             QApplication.processEvents()
             
-            self.tree.clear()
+            self._clear_items()
             self.file_metadata = {}  # Clear disk-based items only
             # Keep memory_items - these are duplicated items that should survive refresh
             
@@ -544,16 +600,15 @@ class TreeManager(QObject):
                     for series_data in study_data.values():
                         for instance_data in series_data.values():
                             filepath = instance_data['filepath']
-                            dataset = instance_data['dataset']
-                            fresh_loaded.append((filepath, dataset))
+                            fresh_loaded.append((filepath, instance_data['record']))
 
-            # Keep original order of combined paths, but update datasets
-            refreshed_paths = {path: ds for path, ds in fresh_loaded}
+            # Keep original order of combined paths, but update records
+            refreshed_paths = {path: record for path, record in fresh_loaded}
             ordered_refreshed = []
             for path in file_paths:
-                ds = refreshed_paths.get(path)
-                if ds is not None:
-                    ordered_refreshed.append((path, ds))
+                record = refreshed_paths.get(path)
+                if record is not None:
+                    ordered_refreshed.append((path, record))
 
             fresh_loaded_files = ordered_refreshed
             
@@ -578,7 +633,348 @@ class TreeManager(QObject):
             
         finally:
             progress.close()
-    
+
+    def update_files(self, file_paths):
+        """Re-read rewritten files and update only their nodes in the tree.
+
+        Saves, merges, moves and anonymization rewrite files in place. Rather
+        than rebuilding the whole tree, each touched file is re-read and its
+        instance node is relabelled or moved under its new patient/study/series,
+        creating and pruning parent nodes as needed. All other nodes keep their
+        expansion and selection state.
+        """
+        if not self.hierarchy:
+            # Nothing to update incrementally (e.g. tree built by an older load path)
+            self.refresh_tree()
+            return
+
+        unique_paths = [p for p in dict.fromkeys(file_paths) if p]
+        if not unique_paths:
+            return
+
+        header_index = get_header_index(self.main_window.config)
+        selected_files = {
+            item.data(0, Qt.ItemDataRole.UserRole) for item in self.tree.selectedItems()
+        }
+        records = {}
+        reselect = []
+
+        self.tree.setUpdatesEnabled(False)
+        try:
+            for file_path in unique_paths:
+                try:
+                    # Always read from disk: a file rewritten within the same
+                    # mtime tick could still match its old index entry
+                    if file_path in self.memory_items:
+                        record = InstanceRecord.from_dataset(file_path, self.memory_items[file_path])
+                    elif is_unmaterialised(file_path):
+                        record = read_member_header(file_path)
+                    elif header_index:
+                        record = header_index.read_header(file_path)
+                    else:
+                        ds = pydicom.dcmread(file_path, stop_before_pixels=True)
+                        record = InstanceRecord.from_dataset(file_path, ds, file_size=os.path.getsize(file_path))
+                except Exception as e:
+                    logging.warning(f"Could not re-read {file_path}, removing it from the tree: {e}")
+                    record = None
+
+                old_labels = self.file_metadata.get(file_path)
+                if record is None:
+                    self._detach_instance(file_path, old_labels)
+                    self.file_metadata.pop(file_path, None)
+                    records[file_path] = None
+                    continue
+
+                labels = self._hierarchy_labels(file_path, record)
+                new_labels, sort_key = labels[:4], labels[4]
+                entry = {
+                    'filepath': file_path,
+                    'sort_key': sort_key,
+                    'instance_number': getattr(record, "InstanceNumber", None),
+                    'record': record
+                }
+                if file_path not in self.memory_items:
+                    records[file_path] = record
+
+                if old_labels == new_labels and self._hierarchy_entry(new_labels, file_path):
+                    # Hierarchy position unchanged - only the cached header is stale
+                    self._set_hierarchy_entry(new_labels, entry)
+                    continue
+
+                was_expanded = self._detach_instance(file_path, old_labels)
+                item = self._attach_instance(
+                    new_labels, entry, expand=was_expanded, create_row=file_path in selected_files
+                )
+                self.file_metadata[file_path] = new_labels
+                if item is not None and file_path in selected_files:
+                    reselect.append(item)
+        finally:
+            self.tree.setUpdatesEnabled(True)
+
+        if header_index:
+            header_index.flush()
+
+        # Keep loaded_files in its original order with the fresh records
+        updated_files = []
+        for file_info in self.loaded_files:
+            path = file_info[0] if isinstance(file_info, tuple) else file_info
+            if path in records:
+                record = records.pop(path)
+                if record is not None:
+                    updated_files.append((path, record))
+            else:
+                updated_files.append(file_info)
+        updated_files.extend((path, record) for path, record in records.items() if record is not None)
+        self.loaded_files = updated_files
+
+        for item in reselect:
+            item.setSelected(True)
+
+        logging.info(f"Tree updated in place for {len(unique_paths)} files")
+        self._update_stats_display(self.hierarchy)
+        self.tree_populated.emit(len(self.loaded_files))
+
+    def insert_files(self, files):
+        """Add newly arrived files to the tree without rebuilding it.
+
+        ``files`` holds paths or ``(path, record)`` pairs. Each new instance
+        is attached under its patient/study/series, creating only the nodes
+        that are missing; files that are already loaded are re-read through
+        ``update_files``. Used for studies arriving from the receive service.
+        """
+        if self.loaded_files and not self.hierarchy:
+            # Tree built by a path that keeps no hierarchy; fall back to a rebuild
+            self.populate_tree(list(files), append=True)
+            return
+
+        entries = {}
+        for entry in files:
+            path = entry[0] if isinstance(entry, tuple) else entry
+            if path:
+                entries[path] = entry
+        known_paths = [path for path in entries if path in self.file_metadata]
+        new_entries = [entry for path, entry in entries.items() if path not in self.file_metadata]
+        if not new_entries and not known_paths:
+            return
+
+        unread = [entry for entry in new_entries if not isinstance(entry, tuple)]
+        headers = dict(read_headers(unread, get_header_index(self.main_window.config))) if unread else {}
+        added = []
+
+        self.tree.setUpdatesEnabled(False)
+        try:
+            for entry in new_entries:
+                if isinstance(entry, tuple):
+                    file_path, record = entry
+                else:
+                    file_path, record = entry, headers.get(entry)
+                    if record is None:
+                        logging.warning(f"Skipping unreadable received file {file_path}")
+                        continue
+                labels = self._hierarchy_labels(file_path, record)
+                self._attach_instance(labels[:4], {
+                    'filepath': file_path,
+                    'sort_key': labels[4],
+                    'instance_number': getattr(record, "InstanceNumber", None),
+                    'record': record
+                })
+                self.file_metadata[file_path] = labels[:4]
+                added.append((file_path, record))
+        finally:
+            self.tree.setUpdatesEnabled(True)
+
+        self.loaded_files.extend(added)
+        logging.info(f"Inserted {len(added)} files into the tree")
+        if known_paths:
+            # Emits its own stats and tree_populated updates
+            self.update_files(known_paths)
+            return
+        self._update_stats_display(self.hierarchy)
+        self.tree_populated.emit(len(self.loaded_files))
+
+    def _clear_items(self):
+        """Remove every row from the tree widget and the item index"""
+        self.tree.clear()
+        self._items.clear()
+
+    def _register_item(self, item):
+        """Index a hierarchy row by its label path"""
+        self._items[item.data(0, TREE_PATH_ROLE)] = item
+
+    def _forget_item(self, item):
+        """Drop a row and its descendants from the item index"""
+        stack = [item]
+        while stack:
+            current = stack.pop()
+            path = current.data(0, TREE_PATH_ROLE)
+            if self._items.get(path) is current:
+                del self._items[path]
+            stack.extend(current.child(i) for i in range(current.childCount()))
+
+    def _item_for_labels(self, labels):
+        """Return the item for a label tuple, creating pending instance rows first"""
+        labels = tuple(labels)
+        if len(labels) == 4:
+            series_item = self._items.get(labels[:3])
+            if series_item is None:
+                return None
+            self._fetch_instances(series_item)
+        return self._items.get(labels)
+
+    def _hierarchy_entry(self, labels, file_path):
+        """Return the hierarchy entry stored for ``file_path`` under ``labels``, if any"""
+        patient_label, study_label, series_label, instance_label = labels
+        entry = self.hierarchy.get(patient_label, {}).get(study_label, {}).get(series_label, {}).get(instance_label)
+        if entry and entry.get('filepath') == file_path:
+            return entry
+        return None
+
+    def _set_hierarchy_entry(self, labels, entry):
+        """Store a hierarchy entry under its label tuple"""
+        patient_label, study_label, series_label, instance_label = labels
+        self.hierarchy.setdefault(patient_label, {}).setdefault(
+            study_label, {}
+        ).setdefault(series_label, {})[instance_label] = entry
+
+    def _detach_instance(self, file_path, labels):
+        """Remove one instance from the hierarchy and tree, pruning empty parents.
+
+        Returns True when the instance was visible (its series node expanded).
+        """
+        if not labels:
+            self._remove_file_from_hierarchy(file_path)
+            item = self._find_item_by(lambda item: item.data(0, Qt.ItemDataRole.UserRole) == file_path)
+        else:
+            if self._hierarchy_entry(labels, file_path):
+                patient_label, study_label, series_label, instance_label = labels
+                studies = self.hierarchy[patient_label]
+                series_map = studies[study_label]
+                instances = series_map[series_label]
+                instances.pop(instance_label)
+                if not instances:
+                    series_map.pop(series_label)
+                if not series_map:
+                    studies.pop(study_label)
+                if not studies:
+                    self.hierarchy.pop(patient_label)
+            series_item = self._items.get(tuple(labels[:3]))
+            if series_item is not None and self._has_pending_children(series_item):
+                # No instance row exists yet; drop the series row once it is empty
+                if not self._pending_instances(series_item):
+                    self._remove_item_and_prune(series_item)
+                return False
+            item = self._items.get(tuple(labels)) if series_item is not None else None
+            if item is not None and item.data(0, Qt.ItemDataRole.UserRole) != file_path:
+                item = None
+
+        if item is None:
+            return False
+
+        was_expanded = bool(item.parent() and item.parent().isExpanded())
+        self._remove_item_and_prune(item)
+        return was_expanded
+
+    def _remove_item_and_prune(self, item):
+        """Remove a tree item and any parents it leaves without children"""
+        while item is not None:
+            self._forget_item(item)
+            parent = item.parent()
+            if parent is not None:
+                parent.removeChild(item)
+            else:
+                self.tree.takeTopLevelItem(self.tree.indexOfTopLevelItem(item))
+            if parent is None or parent.childCount() > 0:
+                break
+            item = parent
+
+    def _attach_instance(self, labels, entry, expand=False, create_row=False):
+        """Insert one instance into the hierarchy and tree, creating parent nodes as needed.
+
+        Series whose rows are still pending only get the hierarchy entry unless
+        ``expand`` or ``create_row`` asks for the instance row. Returns the
+        instance item, or None when no row was created.
+        """
+        instances = self.hierarchy.setdefault(labels[0], {}).setdefault(
+            labels[1], {}
+        ).setdefault(labels[2], {})
+
+        parent = None
+        for depth, icon in enumerate((self.patient_icon, self.study_icon, self.series_icon), start=1):
+            path = tuple(labels[:depth])
+            item = self._items.get(path)
+            if item is None:
+                item = QTreeWidgetItem(list(path) + [""] * (4 - depth))
+                item.setIcon(0, icon)
+                item.setData(0, Qt.ItemDataRole.UserRole, None)
+                item.setData(0, TREE_PATH_ROLE, path)
+                self._register_item(item)
+                if depth == 3:
+                    self._mark_pending(item)
+                if parent is None:
+                    self.tree.addTopLevelItem(item)
+                else:
+                    parent.addChild(item)
+            parent = item
+
+        if self._has_pending_children(parent):
+            instances[labels[3]] = entry
+            if not (expand or create_row):
+                return None
+            self._fetch_instances(parent)
+            instance_item = self._items.get(tuple(labels))
+        else:
+            # Another file with the same label is replaced, as a full rebuild would
+            existing = self._items.get(tuple(labels))
+            if existing is not None:
+                self._forget_item(existing)
+                parent.removeChild(existing)
+            instances[labels[3]] = entry
+
+            instance_item = QTreeWidgetItem(list(labels))
+            instance_item.setData(0, Qt.ItemDataRole.UserRole, entry['filepath'])
+            instance_item.setData(0, TREE_PATH_ROLE, tuple(labels))
+            self._register_item(instance_item)
+
+            # Keep instances ordered by instance number within the series
+            position = bisect.bisect_right(_ChildSortKeys(parent, instances), entry['sort_key'])
+            parent.insertChild(position, instance_item)
+
+        if expand:
+            while parent is not None:
+                parent.setExpanded(True)
+                parent = parent.parent()
+        return instance_item
+
+    def _hierarchy_labels(self, file_path, record):
+        """Return (patient, study, series, instance) labels and the sort key for a record"""
+        patient_id = getattr(record, "PatientID", "Unknown ID")
+        patient_name = getattr(record, "PatientName", "Unknown Name")
+        patient_label = f"{patient_name} ({patient_id})"
+
+        study_uid = getattr(record, "StudyInstanceUID", "Unknown StudyUID")
+        study_desc = getattr(record, "StudyDescription", "No Study Description")
+        study_label = f"{study_desc} [{study_uid}]"
+
+        series_uid = getattr(record, "SeriesInstanceUID", "Unknown SeriesUID")
+        series_desc = getattr(record, "SeriesDescription", "No Series Description")
+        series_label = f"{series_desc} [{series_uid}]"
+
+        instance_number = getattr(record, "InstanceNumber", None)
+        sop_uid = getattr(record, "SOPInstanceUID", os.path.basename(file_path))
+
+        # Create instance label with sorting info
+        if instance_number is not None:
+            instance_label = f"Instance {instance_number} [{sop_uid}]"
+            try:
+                instance_sort_key = int(instance_number)
+            except (ValueError, TypeError):
+                instance_sort_key = 999999
+        else:
+            instance_label = f"{os.path.basename(file_path)} [{sop_uid}]"
+            instance_sort_key = 999999
+
+        return patient_label, study_label, series_label, instance_label, instance_sort_key
+
     def _build_hierarchy(self, files, progress_dialog=None, start_progress=0, end_progress=100):
         """Build hierarchy from file list with optional progress updates"""
         hierarchy = {}
@@ -598,6 +994,14 @@ class TreeManager(QObject):
             # Use provided progress dialog or no dialog
             progress = progress_dialog
         
+        # Serve unchanged files from the header index instead of re-parsing them
+        header_index = get_header_index(self.main_window.config) if needs_header_reading else None
+        cached_headers = {}
+        if header_index:
+            cached_headers = header_index.lookup_many(
+                f for f in files if not isinstance(f, tuple) and f not in self.memory_items
+            )
+
         for idx, file_info in enumerate(files):
             if progress and progress.wasCanceled():
                 logging.warning(f"Progress dialog cancelled at index {idx}")
@@ -614,45 +1018,31 @@ class TreeManager(QObject):
                         ds = self.memory_items[file_path]
                         logging.debug(f"Loading duplicated item from memory: {file_path}")
                     else:
-                        ds = pydicom.dcmread(file_path, stop_before_pixels=True)
-                
-                # Extract hierarchy information
-                patient_id = getattr(ds, "PatientID", "Unknown ID")
-                patient_name = getattr(ds, "PatientName", "Unknown Name")
-                patient_label = f"{patient_name} ({patient_id})"
-                
-                study_uid = getattr(ds, "StudyInstanceUID", "Unknown StudyUID")
-                study_desc = getattr(ds, "StudyDescription", "No Study Description")
-                study_label = f"{study_desc} [{study_uid}]"
-                
-                series_uid = getattr(ds, "SeriesInstanceUID", "Unknown SeriesUID")
-                series_desc = getattr(ds, "SeriesDescription", "No Series Description")
-                series_label = f"{series_desc} [{series_uid}]"
+                        # Members of a loaded ZIP are read in place until extracted
+                        ds = cached_headers.get(file_path) or read_member_header(file_path)
+                        if ds is NOT_DICOM:
+                            raise pydicom.errors.InvalidDicomError("File is not a readable DICOM file")
+                        if ds is None:
+                            if header_index:
+                                ds = header_index.read_header(file_path)
+                            else:
+                                ds = pydicom.dcmread(file_path, stop_before_pixels=True)
                 
+                # Keep a compact record in the tree instead of the Dataset
+                record = InstanceRecord.from_dataset(file_path, ds)
+
+                patient_label, study_label, series_label, instance_label, instance_sort_key = \
+                    self._hierarchy_labels(file_path, record)
+                instance_number = getattr(record, "InstanceNumber", None)
+
                 # Debug logging for first few files and memory items
                 if idx < 3 or file_path in self.memory_items:
                     item_type = "MEMORY" if file_path in self.memory_items else "DISK"
                     logging.debug(f"File {idx} ({item_type}): Patient={patient_label}, Study={study_label}, Series={series_label}")
                     if file_path in self.memory_items:
                         logging.debug(f"  Memory item path: {file_path}")
-                        logging.debug(f"  Study UID: {study_uid}")
-                        logging.debug(f"  Series UID: {series_uid}")
-                
-                instance_number = getattr(ds, "InstanceNumber", None)
-                sop_uid = getattr(ds, "SOPInstanceUID", os.path.basename(file_path))
-                
-                # Create instance label with sorting info
-                if instance_number is not None:
-                    instance_label = f"Instance {instance_number} [{sop_uid}]"
-                    try:
-                        instance_sort_key = int(instance_number)
-                    except (ValueError, TypeError):
-                        instance_sort_key = 999999
-                else:
-                    instance_label = f"{os.path.basename(file_path)} [{sop_uid}]"
-                    instance_sort_key = 999999
                 
-                modality = getattr(ds, "Modality", None)
+                modality = getattr(record, "Modality", None)
                 if modality:
                     modalities.add(str(modality))
                 
@@ -668,7 +1058,7 @@ class TreeManager(QObject):
                     'filepath': file_path,
                     'sort_key': instance_sort_key,
                     'instance_number': instance_number,
-                    'dataset': ds
+                    'record': record
                 }
                 
             except Exception as e:
@@ -688,6 +1078,9 @@ class TreeManager(QObject):
             if idx % update_frequency == 0:
                 QApplication.processEvents()
         
+        if header_index:
+            header_index.flush()
+
         # Check for cancellation before closing progress dialog
         was_cancelled = False
         if progress and progress_dialog is None:  # Only close if we created it
@@ -747,70 +1140,111 @@ class TreeManager(QObject):
         """Build the actual tree structure from hierarchy data"""
         logging.debug(f"Building tree structure with {len(hierarchy)} patients")
         
-        # Calculate statistics
-        total_patients = len(hierarchy)
-        total_studies = 0
-        total_series = 0
-        total_instances = 0
-        total_size_bytes = 0
-        
         for patient, studies in hierarchy.items():
             logging.debug(f"Patient: {patient} has {len(studies)} studies")
             patient_item = QTreeWidgetItem([patient, "", "", ""])
             patient_item.setIcon(0, self.patient_icon)
             patient_item.setData(0, Qt.ItemDataRole.UserRole, None)  # No file for patient
             patient_item.setData(0, TREE_PATH_ROLE, (patient,))
+            self._register_item(patient_item)
             self.tree.addTopLevelItem(patient_item)
             
-            total_studies += len(studies)
-            
             for study, series_dict in studies.items():
                 logging.debug(f"  Study: {study} has {len(series_dict)} series")
                 study_item = QTreeWidgetItem([patient, study, "", ""])
                 study_item.setIcon(0, self.study_icon)
                 study_item.setData(0, Qt.ItemDataRole.UserRole, None)  # No file for study
                 study_item.setData(0, TREE_PATH_ROLE, (patient, study))
+                self._register_item(study_item)
                 patient_item.addChild(study_item)
                 
-                total_series += len(series_dict)
-                
                 for series, instances in series_dict.items():
                     logging.debug(f"    Series: {series} has {len(instances)} instances")
                     series_item = QTreeWidgetItem([patient, study, series, ""])
                     series_item.setIcon(0, self.series_icon)
                     series_item.setData(0, Qt.ItemDataRole.UserRole, None)  # No file for series
                     series_item.setData(0, TREE_PATH_ROLE, (patient, study, series))
+                    self._register_item(series_item)
+                    # Instance rows are created when the series is first expanded
+                    self._mark_pending(series_item)
                     study_item.addChild(series_item)
-                    
+
+        # Expand first level on initial load only
+        if not getattr(self.main_window, "_pending_ui_state", None):
+            for i in range(self.tree.topLevelItemCount()):
+                self.tree.topLevelItem(i).setExpanded(True)
+        
+        self._update_stats_display(hierarchy)
+
+    def _mark_pending(self, series_item):
+        """Defer creating a series' instance rows until it is expanded"""
+        series_item.setData(0, PENDING_CHILDREN_ROLE, True)
+        series_item.setChildIndicatorPolicy(QTreeWidgetItem.ChildIndicatorPolicy.ShowIndicator)
+
+    def _has_pending_children(self, item):
+        return bool(item.data(0, PENDING_CHILDREN_ROLE))
+
+    def _pending_instances(self, series_item):
+        """Return the hierarchy instances of a series item"""
+        patient, study, series = series_item.data(0, TREE_PATH_ROLE)
+        return self.hierarchy.get(patient, {}).get(study, {}).get(series, {})
+
+    def _fetch_instances(self, series_item):
+        """Create the instance rows of a series item, sorted by instance number"""
+        if not self._has_pending_children(series_item):
+            return
+        series_item.setData(0, PENDING_CHILDREN_ROLE, None)
+        series_item.setChildIndicatorPolicy(
+            QTreeWidgetItem.ChildIndicatorPolicy.DontShowIndicatorWhenChildless
+        )
+
+        patient, study, series = series_item.data(0, TREE_PATH_ROLE)
+        sorted_instances = sorted(
+            self._pending_instances(series_item).items(),
+            key=lambda x: x[1]['sort_key']
+        )
+        instance_items = []
+        for instance_label, instance_data in sorted_instances:
+            instance_item = QTreeWidgetItem([patient, study, series, instance_label])
+            instance_item.setData(0, Qt.ItemDataRole.UserRole, instance_data['filepath'])
+            instance_item.setData(0, TREE_PATH_ROLE, (patient, study, series, instance_label))
+            self._register_item(instance_item)
+            instance_items.append(instance_item)
+        series_item.addChildren(instance_items)
+
+    def _on_item_expanded(self, item):
+        """Populate a series' instance rows on first expansion"""
+        if self._has_pending_children(item):
+            self._fetch_instances(item)
+
+    def _update_stats_display(self, hierarchy):
+        """Recalculate patient/study/series/instance counts and sizes for the status display"""
+        total_patients = len(hierarchy)
+        total_studies = 0
+        total_series = 0
+        total_instances = 0
+        total_size_bytes = 0
+
+        for studies in hierarchy.values():
+            total_studies += len(studies)
+            for series_dict in studies.values():
+                total_series += len(series_dict)
+                for instances in series_dict.values():
                     total_instances += len(instances)
-                    
-                    # Sort instances by instance number
-                    sorted_instances = sorted(
-                        instances.items(),
-                        key=lambda x: x[1]['sort_key']
-                    )
-                    
-                    for instance_label, instance_data in sorted_instances:
-                        instance_item = QTreeWidgetItem([patient, study, series, instance_label])
-                        instance_item.setData(0, Qt.ItemDataRole.UserRole, instance_data['filepath'])
-                        instance_item.setData(0, TREE_PATH_ROLE, (patient, study, series, instance_label))
-                        series_item.addChild(instance_item)
-                        
+                    for instance_data in instances.values():
                         # Calculate file size (skip for virtual/memory items)
                         try:
                             filepath = instance_data['filepath']
                             # Only calculate size for files that exist on disk (not memory items)
                             if filepath not in self.memory_items:
-                                file_size = os.path.getsize(filepath)
+                                record = instance_data.get('record')
+                                file_size = getattr(record, 'file_size', None)
+                                if file_size is None:
+                                    file_size = os.path.getsize(filepath)
                                 total_size_bytes += file_size
                         except (OSError, KeyError):
                             pass  # Skip if file not accessible
-        
-        # Expand first level on initial load only
-        if not getattr(self.main_window, "_pending_ui_state", None):
-            for i in range(self.tree.topLevelItemCount()):
-                self.tree.topLevelItem(i).setExpanded(True)
-        
+
         # Update statistics display
         total_size_gb = total_size_bytes / (1024**3)  # Convert to GB
         self.main_window.update_stats_display(
@@ -869,6 +1303,12 @@ class TreeManager(QObject):
         file_path = item.data(0, Qt.ItemDataRole.UserRole)
         if file_path:
             filepaths.append(file_path)
+
+        # Unexpanded series: read the paths from the hierarchy without creating rows
+        if self._has_pending_children(item):
+            sorted_instances = sorted(self._pending_instances(item).values(), key=lambda x: x['sort_key'])
+            filepaths.extend(instance_data['filepath'] for instance_data in sorted_instances)
+            return filepaths
         
         # Recursively check children
         for i in range(item.childCount()):
@@ -931,6 +1371,7 @@ class TreeManager(QObject):
         node = self._inbound_nodes.get(study_uid)
         label = info.get("patient_label", "Inbound")
         study_desc = info.get("study_description", "Study")
+        # Updates arrive batched (a few per second), so counts jump in steps
         text = f"{info.get('instance_count', 0)} instance(s) receiving"
 
         if node is None:
@@ -957,9 +1398,25 @@ class TreeManager(QObject):
         if node and node.parent():
             node.parent().removeChild(node)
 
-        study_dir = info.get("study_dir")
-        if study_dir and os.path.isdir(study_dir):
-            self.main_window.file_manager.load_path_additive(study_dir)
+        records = info.get("records")
+        if records:
+            # The receive service already parsed these headers; nothing is re-read
+            self.insert_files([(record.file_path, record) for record in records])
+            self._index_received_records(records)
+        elif info.get("file_paths"):
+            self.insert_files(info["file_paths"])
+
+    def _index_received_records(self, records):
+        """Record received headers in the header index so later loads skip parsing"""
+        header_index = get_header_index(self.main_window.config)
+        if not header_index:
+            return
+        for record in records:
+            try:
+                header_index.store_record(record, os.stat(record.file_path).st_mtime_ns)
+            except OSError:
+                continue
+        header_index.flush()
 
     def mark_inbound_failed(self, info: dict, message: str):
         """Remove placeholder and show error tooltip for failed transfers."""
@@ -1015,7 +1472,7 @@ class TreeManager(QObject):
         """Return the tree item matching the provided path tuple."""
         if not path_tuple:
             return None
-        return self._find_item_by(lambda item: item.data(0, TREE_PATH_ROLE) == tuple(path_tuple))
+        return self._item_for_labels(tuple(path_tuple))
 
     def _extract_target_info(self, source_level: str, target_item):
         """Gather metadata from the destination required to perform the move."""
@@ -1057,6 +1514,8 @@ class TreeManager(QObject):
         """Load dataset from memory items or disk."""
         if file_path in self.memory_items:
             return self.memory_items[file_path]
+        # Moving rewrites the file, so members of a loaded ZIP are written out first
+        ensure_local(file_path)
         if os.path.exists(file_path):
             return pydicom.dcmread(file_path, force=True)
         return None
@@ -1068,16 +1527,6 @@ class TreeManager(QObject):
         else:
             dataset.save_as(file_path, write_like_original=False)
 
-    def _extract_uids(self, dataset):
-        """Extract core UIDs from a dataset."""
-        fields = [
-            "PatientID",
-            "StudyInstanceUID",
-            "SeriesInstanceUID",
-            "SOPInstanceUID",
-        ]
-        return {field: str(getattr(dataset, field)) for field in fields if hasattr(dataset, field)}
-
     def _apply_move_metadata(self, dataset, source_level: str, target_info: dict):
         """Update dataset fields to reflect the new parent hierarchy."""
         target_level = target_info.get("level")
@@ -1135,14 +1584,6 @@ class TreeManager(QObject):
             try:
                 self._apply_move_metadata(dataset, source_level, target_info)
                 self._save_dataset_after_move(path, dataset)
-
-                # Update cached metadata so immediate operations use the new parents
-                uids = self._extract_uids(dataset)
-                patient_label = f"{getattr(dataset, 'PatientName', 'Unknown')} ({uids.get('PatientID', 'Unknown ID')})"
-                study_label = f"{getattr(dataset, 'StudyDescription', 'Study')} [{uids.get('StudyInstanceUID', '')}]"
-                series_label = f"{getattr(dataset, 'SeriesDescription', 'Series')} [{uids.get('SeriesInstanceUID', '')}]"
-                instance_label = f"{os.path.basename(path)} [{uids.get('SOPInstanceUID', '')}]"
-                self.file_metadata[path] = (patient_label, study_label, series_label, instance_label)
                 success += 1
             except Exception as exc:
                 failures.append((path, str(exc)))
@@ -1159,6 +1600,12 @@ class TreeManager(QObject):
             for col in range(item.columnCount()):
                 if text in item.text(col).lower():
                     return True
+
+            # Instance rows of unexpanded series only exist in the hierarchy
+            if self._has_pending_children(item):
+                if not any(text in label.lower() for label in self._pending_instances(item)):
+                    return False
+                self._fetch_instances(item)
             
             # Check children
             for i in range(item.childCount()):
@@ -1237,6 +1684,7 @@ class TreeManager(QObject):
         
         # Remove items from tree
         for item in selected_items:
+            self._forget_item(item)
             parent = item.parent()
             if parent:
                 parent.removeChild(item)
@@ -1276,7 +1724,7 @@ class TreeManager(QObject):
     
     def clear_tree(self):
         """Clear all tree contents"""
-        self.tree.clear()
+        self._clear_items()
         self.file_metadata.clear()
         self.memory_items.clear()  # Also clear memory items
         self.loaded_files.clear()
@@ -1284,7 +1732,18 @@ class TreeManager(QObject):
         
     def expand_all(self):
         """Expand all tree items"""
+        # expandAll() does not emit itemExpanded, so create pending rows first
+        self._fetch_all_instances()
         self.tree.expandAll()
+
+    def _fetch_all_instances(self):
+        """Create the instance rows of every series that has not been expanded yet"""
+        for i in range(self.tree.topLevelItemCount()):
+            patient_item = self.tree.topLevelItem(i)
+            for j in range(patient_item.childCount()):
+                study_item = patient_item.child(j)
+                for k in range(study_item.childCount()):
+                    self._fetch_instances(study_item.child(k))
     
     def collapse_all(self):
         """Collapse all tree items"""
@@ -1306,7 +1765,15 @@ class TreeManager(QObject):
 
         # Then check disk-based file metadata
         return self.file_metadata.get(file_path)
-    
+
+    def get_instance_record(self, file_path):
+        """Get the loaded header record of a disk file, or None if it is not in the tree"""
+        labels = self.file_metadata.get(file_path)
+        if not labels:
+            return None
+        entry = self._hierarchy_entry(labels, file_path)
+        return entry.get('record') if entry else None
+
     def get_loaded_files(self):
         """Get list of all loaded files"""
         return self.loaded_files.copy()
@@ -1610,17 +2077,8 @@ class TreeManager(QObject):
 
             success, failures = self._perform_move(all_paths, source_level, target_info)
 
-            # Ensure moved files remain tracked
-            seen = {f[0] if isinstance(f, tuple) else f for f in self.loaded_files}
-            for path in all_paths:
-                if path not in seen:
-                    self.loaded_files.append(path)
-                    seen.add(path)
-
-            if hasattr(self.main_window, "prepare_for_tree_refresh"):
-                self.main_window._pending_ui_state = None
-
-            self.refresh_tree()
+            # Relocate only the moved instances; the rest of the tree is untouched
+            self.update_files(all_paths)
 
             message = f"Moved {success} file(s) to the new location."
             if failures:
@@ -0,0 +1,220 @@
+"""
+Background writer for instances received by the Storage SCP.
+
+Writing inside the pynetdicom C-STORE handler ties the sender's pace to the
+speed of the receive disk, and a slow flush during a burst from a modality
+can run into the sender's DIMSE timeout. The handler instead hands the
+encoded bytes to an ``IngestWriter``; a small pool of threads moves them to
+their final place. The queue is bounded by bytes, so when the disk falls
+behind the handler waits for room (backpressure on the association) rather
+than buffering without limit.
+
+Modalities may purge a study once it has been acknowledged, so with a
+``spool_dir`` nothing is queued before it is on disk: ``submit`` appends
+the bytes to a new spool file and fsyncs it, and the writer threads only
+rename spool files into place. Spool files left by a crash are complete
+instances that the caller can recover on the next start.
+"""
+
+from __future__ import annotations
+
+import os
+import uuid
+import queue
+import logging
+import threading
+from typing import Callable, Optional, Sequence, Union
+
+DEFAULT_WRITER_THREADS = 4
+DEFAULT_QUEUE_BYTES = 512 * 1024 * 1024
+DEFAULT_QUEUE_TIMEOUT = 30.0  # seconds a handler waits for room before refusing
+
+# Called with (file_path, error or None) once an instance is on disk or has failed
+WriteCallback = Callable[[str, Optional[Exception]], None]
+# One buffer, or several written back to back (e.g. file meta header + dataset)
+WriteData = Union[bytes, memoryview, Sequence[Union[bytes, memoryview]]]
+
+# Spool files are renamed to this suffix once their data is synced; ".part"
+# files were never acknowledged
+SPOOL_SUFFIX = ".spool"
+
+_STOP = object()
+
+
+def _chunks(data: WriteData):
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return (data,)
+    return data
+
+
+def _size(data: WriteData) -> int:
+    return sum(len(chunk) for chunk in _chunks(data))
+
+
+def write_file_atomic(file_path: str, data: WriteData):
+    """Write ``data`` to ``file_path`` through a temporary file in the same directory"""
+    directory = os.path.dirname(file_path)
+    os.makedirs(directory, exist_ok=True)
+    # One temporary name per writer thread, created with the normal umask
+    temp_path = os.path.join(directory, f".{os.path.basename(file_path)}.{threading.get_ident()}.part")
+    try:
+        with open(temp_path, "wb") as f:
+            for chunk in _chunks(data):
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _fsync_directory(directory: str):
+    """Make renames in ``directory`` durable; a no-op where directories cannot be opened"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def spool_file(spool_dir: str, data: WriteData) -> str:
+    """Durably write ``data`` to a new file in ``spool_dir``; returns its path"""
+    name = uuid.uuid4().hex
+    temp_path = os.path.join(spool_dir, f"{name}.part")
+    spool_path = os.path.join(spool_dir, f"{name}{SPOOL_SUFFIX}")
+    try:
+        with open(temp_path, "wb") as f:
+            for chunk in _chunks(data):
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, spool_path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+    _fsync_directory(spool_dir)
+    return spool_path
+
+
+def move_spooled(spool_path: str, file_path: str):
+    """Rename a spool file to ``file_path``; both must be on the same filesystem"""
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    os.replace(spool_path, file_path)
+
+
+class IngestWriter:
+    """Bounded queue of received instances drained by a pool of writer threads"""
+
+    def __init__(
+        self,
+        writer_threads: int = DEFAULT_WRITER_THREADS,
+        max_queue_bytes: int = DEFAULT_QUEUE_BYTES,
+        queue_timeout: float = DEFAULT_QUEUE_TIMEOUT,
+        logger: logging.Logger | None = None,
+        spool_dir: str | None = None,
+    ):
+        self.writer_threads = max(1, int(writer_threads or DEFAULT_WRITER_THREADS))
+        self.max_queue_bytes = max(1, int(max_queue_bytes or DEFAULT_QUEUE_BYTES))
+        self.queue_timeout = queue_timeout
+        self.spool_dir = spool_dir  # None: queued data is held in memory
+        self._logger = logger or logging.getLogger("fm_dicom.receive")
+        self._queue: queue.Queue = queue.Queue()
+        self._room = threading.Condition()
+        self._queued_bytes = 0
+        self._threads: list[threading.Thread] = []
+
+    def start(self):
+        if self._threads:
+            return
+        for index in range(self.writer_threads):
+            thread = threading.Thread(target=self._write_loop, name=f"dicom-ingest-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 10.0):
+        """Write out everything already queued, then stop the threads"""
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+
+    @property
+    def depth(self) -> int:
+        """Instances waiting to be written"""
+        return self._queue.qsize()
+
+    @property
+    def queued_bytes(self) -> int:
+        with self._room:
+            return self._queued_bytes
+
+    def submit(self, file_path: str, data: WriteData, on_done: WriteCallback | None = None) -> bool:
+        """Queue ``data`` for writing to ``file_path``.
+
+        Blocks while the queue is full. Returns False if no room became
+        free within ``queue_timeout``, or if the data could not be spooled;
+        the caller should then refuse the instance so the sender retries
+        it. An instance larger than the whole queue is admitted once the
+        queue is empty. With a ``spool_dir`` the data is synced to disk
+        before this returns True.
+        """
+        size = _size(data)
+        with self._room:
+            fits = lambda: self._queued_bytes == 0 or self._queued_bytes + size <= self.max_queue_bytes
+            if not self._room.wait_for(fits, timeout=self.queue_timeout):
+                self._logger.warning(
+                    "Ingest queue full (%d instances, %d bytes); refusing %s",
+                    self.depth, self._queued_bytes, os.path.basename(file_path),
+                )
+                return False
+            self._queued_bytes += size
+        if self.spool_dir is not None:
+            try:
+                data = spool_file(self.spool_dir, data)
+            except OSError as exc:
+                self._logger.error("Could not spool %s: %s", os.path.basename(file_path), exc)
+                self._release(size)
+                return False
+        self._queue.put((file_path, data, size, on_done))
+        return True
+
+    def _release(self, size: int):
+        with self._room:
+            self._queued_bytes -= size
+            self._room.notify_all()
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            file_path, data, size, on_done = item
+            error = None
+            try:
+                if self.spool_dir is not None:
+                    move_spooled(data, file_path)
+                else:
+                    write_file_atomic(file_path, data)
+            except Exception as exc:  # pragma: no cover - disk errors
+                error = exc
+                self._logger.error("Failed to write received instance %s: %s", file_path, exc)
+            finally:
+                self._release(size)
+            if on_done is not None:
+                try:
+                    on_done(file_path, error)
+                except Exception as exc:  # pragma: no cover - callback bugs
+                    self._logger.error("Ingest write callback failed: %s", exc, exc_info=True)
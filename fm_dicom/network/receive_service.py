@@ -5,18 +5,79 @@ Background DICOM Storage SCP service for receiving studies.
 from __future__ import annotations
 
 import os
+import time
 import threading
 import logging
+from collections import deque
 from pathlib import Path
 from typing import Dict
 
+from pydicom.filereader import dcmread, read_dataset
+from pydicom.tag import Tag
+from pydicom.uid import UID, DeflatedExplicitVRLittleEndian
 from PyQt6.QtCore import QObject, pyqtSignal
 
+from fm_dicom.core.instance_record import InstanceRecord, RECORD_TAGS
+from fm_dicom.network.ingest_writer import (
+    DEFAULT_QUEUE_BYTES,
+    DEFAULT_QUEUE_TIMEOUT,
+    DEFAULT_WRITER_THREADS,
+    SPOOL_SUFFIX,
+    IngestWriter,
+    move_spooled,
+)
+
 try:
     from pynetdicom import AE, evt, StoragePresentationContexts
+    from pynetdicom.dsutils import encode_file_meta
 except ImportError:  # pragma: no cover - optional dependency
     AE = None  # type: ignore
 
+# The only elements the handler decodes: enough to route the instance and to
+# build its InstanceRecord, so the tree never has to re-read received files.
+# The rest of the dataset is stored as received.
+ROUTING_TAGS = sorted(Tag(keyword) for keyword in RECORD_TAGS)
+_LAST_ROUTING_TAG = max(ROUTING_TAGS)
+_PREAMBLE = b"\x00" * 128 + b"DICM"
+# Acknowledged instances wait here, synced to disk, until they are moved into
+# place; kept inside receive_dir so the move is a rename
+SPOOL_DIRNAME = ".incoming"
+
+STATS_WINDOW = 5.0  # seconds of recent instances used for the ingest rates
+STATS_INTERVAL = 1.0  # seconds between stats_updated emissions while receiving
+# Progress is batched per study: at most one study_progress per interval
+PROGRESS_INTERVAL = 0.1
+
+
+def read_routing_header(raw, transfer_syntax):
+    """Decode just ``ROUTING_TAGS`` from an encoded C-STORE dataset.
+
+    ``raw`` is the request's ``DataSet`` stream. Parsing stops after the
+    last routing tag (Instance Number), so pixel data is never touched. Returns None for deflated
+    datasets, which cannot be read in place.
+    """
+    transfer_syntax = UID(transfer_syntax)
+    if transfer_syntax == DeflatedExplicitVRLittleEndian:
+        return None
+    raw.seek(0)
+    try:
+        return read_dataset(
+            raw,
+            transfer_syntax.is_implicit_VR,
+            transfer_syntax.is_little_endian,
+            stop_when=lambda tag, vr, length: tag > _LAST_ROUTING_TAG,
+            specific_tags=ROUTING_TAGS,
+        )
+    finally:
+        raw.seek(0)
+
+
+def _ae_title(value) -> str:
+    """AE titles are bytes in pynetdicom 1.x and str from 2.0"""
+    if isinstance(value, bytes):
+        value = value.decode("ascii", errors="replace")
+    return str(value).strip()
+
 
 class DicomReceiveService(QObject):
     """Listens for inbound C-STORE requests and stores them to disk."""
@@ -24,6 +85,7 @@ class DicomReceiveService(QObject):
     study_progress = pyqtSignal(dict)
     study_completed = pyqtSignal(dict)
     study_failed = pyqtSignal(dict, str)
+    stats_updated = pyqtSignal(dict)
 
     def __init__(self, config: dict, logger: logging.Logger | None = None):
         super().__init__()
@@ -32,13 +94,33 @@ class DicomReceiveService(QObject):
         self._ae = None
         self._thread: threading.Thread | None = None
         self._stop_event = threading.Event()
+        # Both tables are mutated from pynetdicom's association threads and
+        # the writer threads, always under _studies_lock. A study completes
+        # once every association that sent part of it has closed and its
+        # writes have landed, so concurrent senders of one study share it.
         self._studies: Dict[str, dict] = {}
+        self._associations: Dict[int, dict] = {}
+        self._studies_lock = threading.Lock()
+        self._recent = deque()  # (queued at, bytes) within STATS_WINDOW
+        self._total_instances = 0
+        self._total_bytes = 0
         self._logger = logger or logging.getLogger("fm_dicom.receive")
         self._configure_logger()
 
         receive_dir = Path(self.config.get("receive_dir", ".")).expanduser()
         receive_dir.mkdir(parents=True, exist_ok=True)
         self.receive_dir = receive_dir
+        self.spool_dir = receive_dir / SPOOL_DIRNAME
+        self.spool_dir.mkdir(exist_ok=True)
+
+        queue_mb = self.config.get("queue_mb")
+        self._writer = IngestWriter(
+            writer_threads=self.config.get("writer_threads", DEFAULT_WRITER_THREADS),
+            max_queue_bytes=queue_mb * 1024 * 1024 if queue_mb else DEFAULT_QUEUE_BYTES,
+            queue_timeout=self.config.get("queue_timeout", DEFAULT_QUEUE_TIMEOUT),
+            logger=self._logger,
+            spool_dir=str(self.spool_dir),
+        )
 
         self.enabled = bool(self.config.get("enabled", True)) and AE is not None
         if AE is None:
@@ -62,6 +144,8 @@ class DicomReceiveService(QObject):
         if not self.enabled or self._thread:
             return
         self._stop_event.clear()
+        self.recover_spool()
+        self._writer.start()
         self._thread = threading.Thread(target=self._run_server, daemon=True)
         self._thread.start()
 
@@ -73,13 +157,15 @@ class DicomReceiveService(QObject):
         if self._thread:
             self._thread.join(timeout=2)
             self._thread = None
+        # Instances already acknowledged are written before the service stops
+        self._writer.stop()
 
     # pylint: disable=too-many-locals
     def _run_server(self):
         try:
-            ae = AE(ae_title=str(self.config.get("ae_title", "FM_DICOM")).encode("utf-8"))
+            ae = AE(ae_title=str(self.config.get("ae_title", "FM_DICOM")))
             for context in StoragePresentationContexts:
-                ae.add_supported_context(context.abstract_syntax, context.transfer_syntaxes)
+                ae.add_supported_context(context.abstract_syntax, context.transfer_syntax)
 
             handlers = [
                 (evt.EVT_C_STORE, self._handle_store),
@@ -96,33 +182,184 @@ class DicomReceiveService(QObject):
                 evt_handlers=handlers,
             )
             self._ae = ae
-            while not self._stop_event.is_set():
-                self._stop_event.wait(0.25)
+            was_busy = False
+            next_stats = time.monotonic() + STATS_INTERVAL
+            while not self._stop_event.wait(PROGRESS_INTERVAL):
+                self._flush_progress()
+                if time.monotonic() < next_stats:
+                    continue
+                next_stats = time.monotonic() + STATS_INTERVAL
+                stats = self.stats()
+                busy = bool(stats["active_associations"] or stats["queue_depth"])
+                # One last update after a burst so listeners see the idle state
+                if busy or was_busy:
+                    self.stats_updated.emit(stats)
+                was_busy = busy
         except Exception as exc:  # pragma: no cover - background service
             self._logger.error("Receive service failed: %s", exc, exc_info=True)
             self.study_failed.emit({}, str(exc))
 
+    def recover_spool(self) -> int:
+        """Move instances acknowledged before an unclean shutdown into ``receive_dir``.
+
+        Returns the number of instances recovered. They are not announced
+        as completed studies; they appear when the receive folder is loaded.
+        """
+        recovered = 0
+        for entry in os.scandir(self.spool_dir):
+            if entry.name.endswith(".part"):
+                # Never synced, so never acknowledged; the sender still has it
+                try:
+                    os.unlink(entry.path)
+                except OSError:
+                    pass
+                continue
+            if not entry.name.endswith(SPOOL_SUFFIX):
+                continue
+            try:
+                ds = dcmread(entry.path, stop_before_pixels=True, specific_tags=ROUTING_TAGS)
+                _, file_path = self._destination(ds, None)
+                move_spooled(entry.path, str(file_path))
+                recovered += 1
+            except Exception as exc:
+                self._logger.error("Could not recover spooled instance %s: %s", entry.path, exc)
+        if recovered:
+            self._logger.warning(
+                "Recovered %d instances received before the last shutdown into %s", recovered, self.receive_dir
+            )
+        return recovered
+
+    def _destination(self, ds, sop_instance_uid):
+        """Return ``(study_dir, file_path)`` of a received instance"""
+        study_dir = self.receive_dir / ds.StudyInstanceUID
+        series_dir = study_dir / getattr(ds, "SeriesInstanceUID", "unknown_series")
+        sop_instance_uid = getattr(ds, "SOPInstanceUID", None) or sop_instance_uid
+        return study_dir, series_dir / f"{sop_instance_uid or 'unknown'}.dcm"
+
+    def stats(self) -> dict:
+        """Current ingest rates, open associations and writer backlog"""
+        now = time.monotonic()
+        with self._studies_lock:
+            self._trim_recent_locked(now)
+            window = min(STATS_WINDOW, now - self._recent[0][0]) if self._recent else 0.0
+            window = max(window, 1.0)
+            recent_bytes = sum(size for _, size in self._recent)
+            stats = {
+                "instances_per_s": len(self._recent) / window,
+                "mb_per_s": recent_bytes / (1024 * 1024) / window,
+                "active_associations": len(self._associations),
+                "active_studies": len(self._studies),
+                "instances_total": self._total_instances,
+                "bytes_total": self._total_bytes,
+            }
+        stats["queue_depth"] = self._writer.depth
+        stats["queued_bytes"] = self._writer.queued_bytes
+        return stats
+
+    def _flush_progress(self):
+        """Emit one aggregated study_progress for each study that grew since the last flush.
+
+        The C-STORE handler only counts instances; a CT arriving at hundreds
+        of instances per second would otherwise queue a GUI update for each.
+        """
+        with self._studies_lock:
+            # Emitted under the lock so a study's last progress update is
+            # always queued before its completion
+            for study_uid, info in self._studies.items():
+                new_instances = info["instance_count"] - info["reported_count"]
+                if new_instances <= 0:
+                    continue
+                info["reported_count"] = info["instance_count"]
+                self.study_progress.emit({
+                    "study_uid": study_uid,
+                    "patient_label": info["patient_label"],
+                    "study_description": info["study_description"],
+                    "instance_count": info["instance_count"],
+                    "written_count": len(info["files"]),
+                    "new_instances": new_instances,
+                })
+
+    def _trim_recent_locked(self, now):
+        while self._recent and now - self._recent[0][0] > STATS_WINDOW:
+            self._recent.popleft()
+
+    def _association_locked(self, assoc) -> dict:
+        """Tracking record of one open association; created on first use"""
+        record = self._associations.get(id(assoc))
+        if record is None:
+            record = self._associations[id(assoc)] = {
+                "address": assoc.requestor.address,
+                "ae_title": _ae_title(assoc.requestor.ae_title),
+                "instances": 0,
+                "bytes": 0,
+                "studies": set(),
+            }
+        return record
+
     def _handle_conn_open(self, event):
-        self._logger.info("Association opened from %s (AE: %s)", event.address, event.assoc.requestor.ae_title.decode().strip())
+        with self._studies_lock:
+            self._association_locked(event.assoc)
+        self._logger.info("Association opened from %s (AE: %s)", event.address, _ae_title(event.assoc.requestor.ae_title))
 
     def _handle_conn_close(self, event):
         assoc_id = id(event.assoc)
-        closing = [uid for uid, info in self._studies.items() if info.get("assoc_id") == assoc_id]
-        for study_uid in closing:
-            info = self._studies.pop(study_uid, None)
-            if not info:
-                continue
+        finished = []
+        with self._studies_lock:
+            record = self._associations.pop(assoc_id, None)
+            if record is None:
+                return
+            for study_uid in record["studies"]:
+                info = self._studies.get(study_uid)
+                if info is None:
+                    continue
+                info["associations"].discard(assoc_id)
+                # Studies with writes still queued complete when the last one lands
+                if not info["associations"] and info["pending_writes"] == 0:
+                    finished.append((study_uid, self._studies.pop(study_uid)))
+        if record["instances"]:
             self._logger.info(
-                "Study %s completed (%s instances)", study_uid, info["instance_count"]
+                "Association from %s (AE: %s) closed after %s instances",
+                record["address"], record["ae_title"], record["instances"],
             )
-            payload = {
-                "study_uid": study_uid,
-                "patient_label": info["patient_label"],
-                "study_description": info["study_description"],
-                "study_dir": str(info["study_dir"]),
-                "file_paths": info["files"],
-            }
-            self.study_completed.emit(payload)
+        for study_uid, info in finished:
+            self._emit_completed(study_uid, info)
+
+    def _emit_completed(self, study_uid, info):
+        if not info["instance_count"]:
+            return  # Every instance was refused; nothing reached the disk
+        self._logger.info(
+            "Study %s completed (%s instances)", study_uid, info["instance_count"]
+        )
+        if info["failed_writes"]:
+            self._logger.error("Study %s: %s instances could not be written", study_uid, info["failed_writes"])
+        payload = {
+            "study_uid": study_uid,
+            "patient_label": info["patient_label"],
+            "study_description": info["study_description"],
+            "study_dir": str(info["study_dir"]),
+            "file_paths": info["files"],
+            # Header values captured while receiving, one per file in file_paths
+            "records": info["records"],
+        }
+        self.study_completed.emit(payload)
+
+    def _on_instance_written(self, study_uid, record, file_path, error):
+        """Writer thread callback: account for one finished write"""
+        finished = None
+        with self._studies_lock:
+            info = self._studies.get(study_uid)
+            if info is None:
+                return
+            info["pending_writes"] -= 1
+            if error is None:
+                info["files"].append(file_path)
+                info["records"].append(record)
+            else:
+                info["failed_writes"] += 1
+            if not info["associations"] and info["pending_writes"] == 0:
+                finished = self._studies.pop(study_uid)
+        if finished is not None:
+            self._emit_completed(study_uid, finished)
 
     def _is_authorized(self, event) -> bool:
         allowed_hosts = self.config.get("allowed_hosts") or []
@@ -130,9 +367,9 @@ class DicomReceiveService(QObject):
         host_ok = True
         ae_ok = True
         if allowed_hosts:
-            host_ok = event.requestor.address in allowed_hosts
+            host_ok = event.assoc.requestor.address in allowed_hosts
         if allowed_aes:
-            ae_title = event.requestor.ae_title.decode().strip()
+            ae_title = _ae_title(event.assoc.requestor.ae_title)
             ae_ok = ae_title in allowed_aes
         return host_ok and ae_ok
 
@@ -141,13 +378,15 @@ class DicomReceiveService(QObject):
         if not self._is_authorized(event):
             self._logger.warning(
                 "Rejected C-STORE from %s (AE: %s)",
-                event.requestor.address,
-                event.requestor.ae_title.decode().strip(),
+                event.assoc.requestor.address,
+                _ae_title(event.assoc.requestor.ae_title),
             )
             return 0xA700
 
-        ds = event.dataset
-        ds.file_meta = event.file_meta
+        raw = event.request.DataSet
+        ds = read_routing_header(raw, event.context.transfer_syntax)
+        if ds is None:
+            ds = event.dataset
         study_uid = getattr(ds, "StudyInstanceUID", None)
         if not study_uid:
             self._logger.warning("Incoming instance missing StudyInstanceUID; rejected")
@@ -157,33 +396,57 @@ class DicomReceiveService(QObject):
         patient_id = getattr(ds, "PatientID", "Unknown ID")
         study_desc = getattr(ds, "StudyDescription", "Study")
 
-        study_dir = self.receive_dir / study_uid
-        series_dir = study_dir / getattr(ds, "SeriesInstanceUID", "unknown_series")
-        series_dir.mkdir(parents=True, exist_ok=True)
-        filename = f"{getattr(ds, 'SOPInstanceUID', 'unknown')}.dcm"
-        file_path = series_dir / filename
-        ds.save_as(file_path, write_like_original=False)
+        study_dir, file_path = self._destination(ds, event.request.AffectedSOPInstanceUID)
 
         assoc_id = id(event.assoc)
-        info = self._studies.setdefault(
-            study_uid,
-            {
-                "assoc_id": assoc_id,
-                "patient_label": f"{patient_name} ({patient_id})",
-                "study_description": study_desc,
-                "study_dir": study_dir,
-                "files": [],
-                "instance_count": 0,
-            },
-        )
-        info["files"].append(str(file_path))
-        info["instance_count"] += 1
+        with self._studies_lock:
+            association = self._association_locked(event.assoc)
+            association["studies"].add(study_uid)
+            info = self._studies.setdefault(
+                study_uid,
+                {
+                    "associations": set(),
+                    "patient_label": f"{patient_name} ({patient_id})",
+                    "study_description": study_desc,
+                    "study_dir": study_dir,
+                    "files": [],
+                    "records": [],
+                    "instance_count": 0,
+                    "reported_count": 0,
+                    "pending_writes": 0,
+                    "failed_writes": 0,
+                },
+            )
+            info["associations"].add(assoc_id)
+            info["pending_writes"] += 1
 
-        payload = {
-            "study_uid": study_uid,
-            "patient_label": info["patient_label"],
-            "study_description": study_desc,
-            "instance_count": info["instance_count"],
-        }
-        self.study_progress.emit(payload)
+        # The bytes go to disk exactly as the sender encoded them. Success is
+        # only returned once they are synced to the spool; a writer thread
+        # then renames them into place. This handler also waits if the ingest
+        # queue is full. The dataset buffer is passed as a view, not copied.
+        chunks = [_PREAMBLE + encode_file_meta(event.file_meta), raw.getbuffer()]
+        size = sum(len(chunk) for chunk in chunks)
+        record = InstanceRecord(
+            str(file_path),
+            {keyword: getattr(ds, keyword, None) for keyword in RECORD_TAGS},
+            transfer_syntax_uid=str(event.context.transfer_syntax),
+            file_size=size,
+        )
+        queued = self._writer.submit(
+            str(file_path),
+            chunks,
+            lambda path, error: self._on_instance_written(study_uid, record, path, error),
+        )
+        with self._studies_lock:
+            if not queued:
+                info["pending_writes"] -= 1
+                return 0xA700  # Out of resources: the sender may retry
+            info["instance_count"] += 1
+            association["instances"] += 1
+            association["bytes"] += size
+            self._total_instances += 1
+            self._total_bytes += size
+            now = time.monotonic()
+            self._recent.append((now, size))
+            self._trim_recent_locked(now)
         return 0x0000
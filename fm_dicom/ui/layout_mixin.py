@@ -290,7 +290,9 @@ class LayoutMixin:
     # Utility methods that were in original
     def tree_expand_all(self):
         """Expand all tree items"""
-        if hasattr(self, 'tree'):
+        if hasattr(self, 'tree_manager'):
+            self.tree_manager.expand_all()
+        elif hasattr(self, 'tree'):
             self.tree.expandAll()
     
     def tree_collapse_all(self):
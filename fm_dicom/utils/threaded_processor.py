@@ -6,15 +6,21 @@ efficiently, reducing loading time and maintaining UI responsiveness.
 """
 
 import os
+import atexit
 import logging
 import queue
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from typing import List, Tuple, Optional, Callable, Dict, Any
 
 import pydicom
 from PyQt6.QtCore import QObject, pyqtSignal, QTimer, QMutex, QMutexLocker
 
+from fm_dicom.core.header_index import INDEXED_TAGS, NOT_DICOM
+from fm_dicom.core.instance_record import InstanceRecord
+
 
 class DicomProcessingResult:
     """Container for DICOM processing results"""
@@ -26,6 +32,94 @@ class DicomProcessingResult:
         self.metadata = metadata or {}
 
 
+# Processing backends selectable via performance.processing_backend
+BACKEND_THREAD = "thread"
+BACKEND_PROCESS = "process"
+
+_process_pool = None
+_process_pool_workers = 0
+_process_pool_lock = threading.Lock()
+
+
+def get_process_pool(max_workers: int) -> ProcessPoolExecutor:
+    """Return the shared long-lived header parsing process pool.
+
+    The pool is created on first use and reused by every load, so worker
+    start-up is paid once per session. It is rebuilt only when a different
+    worker count is requested.
+    """
+    global _process_pool, _process_pool_workers
+    with _process_pool_lock:
+        if _process_pool is not None and _process_pool_workers != max_workers:
+            _process_pool.shutdown(wait=False, cancel_futures=True)
+            _process_pool = None
+        if _process_pool is None:
+            # spawn avoids forking a process that has Qt threads running
+            _process_pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            _process_pool_workers = max_workers
+            logging.info(f"Started DICOM header process pool with {max_workers} workers")
+        return _process_pool
+
+
+def shutdown_process_pool():
+    """Stop the shared process pool if it was started"""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False, cancel_futures=True)
+            _process_pool = None
+
+
+atexit.register(shutdown_process_pool)
+
+
+def read_header_metadata(file_path: str, required_tags: List[str]) -> Tuple[str, bool, Optional[Dict[str, Any]], Optional[str]]:
+    """Parse a file header and return picklable metadata.
+
+    Runs inside pool worker processes, so it returns plain values rather than
+    a pydicom Dataset: ``(file_path, success, metadata, error)``. The file's
+    size and mtime are taken before reading so the result can be recorded in
+    the header index.
+    """
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return file_path, False, None, "File not found"
+
+    if stat.st_size < 128:  # DICOM files should be at least 128 bytes
+        return file_path, False, None, "File too small to be DICOM"
+
+    try:
+        ds = pydicom.dcmread(file_path, stop_before_pixels=True)
+    except pydicom.errors.InvalidDicomError:
+        return file_path, False, {'file_size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}, "Not a valid DICOM file"
+    except Exception as e:
+        return file_path, False, {'file_size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}, str(e)
+
+    metadata = {}
+    for tag in required_tags:
+        value = getattr(ds, tag, None)
+        if value is not None:
+            metadata[tag] = str(value)
+
+    file_meta = getattr(ds, 'file_meta', None)
+    transfer_syntax = getattr(file_meta, 'TransferSyntaxUID', None) if file_meta is not None else None
+    metadata['TransferSyntaxUID'] = str(transfer_syntax) if transfer_syntax is not None else None
+    metadata['file_size'] = stat.st_size
+    metadata['mtime_ns'] = stat.st_mtime_ns
+    metadata['file_path'] = file_path
+
+    return file_path, True, metadata, None
+
+
+def read_header_batch(file_paths: List[str], required_tags: List[str]) -> List[Tuple]:
+    """Parse a chunk of files in one worker call to amortise IPC overhead"""
+    return [read_header_metadata(file_path, required_tags) for file_path in file_paths]
+
+
 class ThreadedDicomProcessor(QObject):
     """Multi-threaded DICOM file processor with Qt signal integration"""
 
@@ -36,10 +130,14 @@ class ThreadedDicomProcessor(QObject):
     processing_finished = pyqtSignal()   # All processing complete
     processing_error = pyqtSignal(str)   # Error message
 
-    def __init__(self, max_workers: int = 4, batch_size: int = 50):
+    def __init__(self, max_workers: int = 4, batch_size: int = 50,
+                 backend: str = BACKEND_THREAD, header_index=None):
         super().__init__()
         self.max_workers = max_workers
         self.batch_size = batch_size
+        self.backend = backend if backend in (BACKEND_THREAD, BACKEND_PROCESS) else BACKEND_THREAD
+        self.header_index = header_index
+        self._executor = None
         self.is_cancelled = False
         self.processed_count = 0
         self.total_files = 0
@@ -96,21 +194,26 @@ class ThreadedDicomProcessor(QObject):
     def _process_files_threaded(self, file_paths: List[str], read_pixels: bool, required_tags: List[str]):
         """Background thread processing method"""
         try:
-            # Split files into batches for progressive updates
-            batches = [file_paths[i:i + self.batch_size] for i in range(0, len(file_paths), self.batch_size)]
-
-            for batch_idx, batch in enumerate(batches):
-                if self.is_cancelled:
-                    logging.info("Processing cancelled during batch processing")
-                    return
-
-                # Process batch with thread pool
-                batch_results = self._process_batch(batch, read_pixels, required_tags)
-
-                # Queue results for UI thread processing
-                self.results_queue.put(('batch', batch_results))
-
-                logging.debug(f"Completed batch {batch_idx + 1}/{len(batches)}")
+            if self.header_index is not None:
+                # Index entries must carry every indexed tag, not just the requested ones
+                required_tags = list(dict.fromkeys(list(required_tags) + list(INDEXED_TAGS)))
+                if not read_pixels:
+                    file_paths = self._process_indexed_files(file_paths, required_tags)
+
+            if self.backend == BACKEND_PROCESS and not read_pixels:
+                remaining = self._process_with_process_pool(file_paths, required_tags)
+                if remaining and not self.is_cancelled:
+                    logging.warning(f"Reading {len(remaining)} remaining files on threads")
+                    self._process_with_thread_pool(remaining, read_pixels, required_tags)
+            else:
+                self._process_with_thread_pool(file_paths, read_pixels, required_tags)
+
+            if self.header_index is not None:
+                self.header_index.flush()
+
+            if self.is_cancelled:
+                logging.info("Processing cancelled during batch processing")
+                return
 
             # Signal completion
             self.results_queue.put(('complete', None))
@@ -119,38 +222,193 @@ class ThreadedDicomProcessor(QObject):
             logging.error(f"Error in threaded processing: {e}", exc_info=True)
             self.results_queue.put(('error', str(e)))
 
-    def _process_batch(self, file_paths: List[str], read_pixels: bool, required_tags: List[str]) -> List[DicomProcessingResult]:
-        """Process a batch of files using thread pool"""
-        results = []
+    def _process_with_thread_pool(self, file_paths: List[str], read_pixels: bool, required_tags: List[str]):
+        """Parse files in batches on one thread pool kept for the whole run"""
+        # Split files into batches for progressive updates
+        batches = [file_paths[i:i + self.batch_size] for i in range(0, len(file_paths), self.batch_size)]
 
         with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            # Submit all files in batch
-            future_to_path = {
-                executor.submit(self._process_single_file, path, read_pixels, required_tags): path
-                for path in file_paths
+            self._executor = executor
+            try:
+                for batch_idx, batch in enumerate(batches):
+                    if self.is_cancelled:
+                        return
+
+                    # Process batch with thread pool
+                    batch_results = self._process_batch(batch, read_pixels, required_tags)
+
+                    # Queue results for UI thread processing
+                    self.results_queue.put(('batch', batch_results))
+
+                    logging.debug(f"Completed batch {batch_idx + 1}/{len(batches)}")
+            finally:
+                self._executor = None
+
+    def _process_with_process_pool(self, file_paths: List[str], required_tags: List[str]) -> List[str]:
+        """Parse headers in the shared process pool, bypassing the GIL.
+
+        All chunks are submitted up front so every worker stays busy; results
+        are regrouped into ``batch_size`` batches for progressive updates.
+        Returns the paths left unparsed because the pool could not start or
+        broke (e.g. a worker was killed), for the caller to read on threads.
+        """
+        if not file_paths:
+            return []
+
+        # Several chunks per worker keeps the load balanced while amortising IPC
+        chunk_size = max(1, min(self.batch_size, len(file_paths) // (self.max_workers * 4)))
+        chunks = [file_paths[i:i + chunk_size] for i in range(0, len(file_paths), chunk_size)]
+        try:
+            pool = get_process_pool(self.max_workers)
+            future_to_chunk = {
+                pool.submit(read_header_batch, chunk, required_tags): chunk
+                for chunk in chunks
             }
+        except Exception as e:
+            logging.error(f"Header process pool unavailable: {e}")
+            shutdown_process_pool()
+            return file_paths
+
+        pending = set(future_to_chunk)
+        batch_results = []
+        for future in as_completed(future_to_chunk):
+            if self.is_cancelled:
+                for waiting in future_to_chunk:
+                    waiting.cancel()
+                return []
+
+            try:
+                records = future.result()
+            except BrokenProcessPool as e:
+                logging.error(f"Header process pool failed: {e}")
+                # Drop the broken pool so the next load starts a fresh one
+                shutdown_process_pool()
+                if batch_results:
+                    self.results_queue.put(('batch', batch_results))
+                return [path for waiting in pending for path in future_to_chunk[waiting]]
+            except Exception as e:
+                records = [(path, False, None, str(e)) for path in future_to_chunk[future]]
+            pending.discard(future)
+
+            for record in records:
+                result = self._result_from_record(record)
+                batch_results.append(result)
+
+                with QMutexLocker(self.mutex):
+                    self.processed_count += 1
+
+                self.results_queue.put(('file', result))
+
+            if len(batch_results) >= self.batch_size:
+                self.results_queue.put(('batch', batch_results))
+                batch_results = []
+
+        if batch_results:
+            self.results_queue.put(('batch', batch_results))
+        return []
+
+    def _result_from_record(self, record) -> DicomProcessingResult:
+        """Turn a worker process record into a processing result"""
+        file_path, success, metadata, error = record
+
+        if not success:
+            if self.header_index is not None and metadata:
+                self.header_index.mark_not_dicom(file_path, metadata['file_size'], metadata['mtime_ns'])
+            return DicomProcessingResult(file_path, False, error=error)
+
+        if self.header_index is not None:
+            self.header_index.store_values(
+                file_path, metadata['file_size'], metadata['mtime_ns'],
+                metadata, metadata.get('TransferSyntaxUID')
+            )
+
+        # Attribute access like a Dataset, without holding one
+        header = InstanceRecord(
+            file_path,
+            {tag: metadata.get(tag) for tag in INDEXED_TAGS},
+            transfer_syntax_uid=metadata.get('TransferSyntaxUID'),
+            file_size=metadata['file_size']
+        )
+        return DicomProcessingResult(file_path, True, dataset=header, metadata=metadata)
+
+    def _process_indexed_files(self, file_paths: List[str], required_tags: List[str]) -> List[str]:
+        """Emit results for files served by the header index; return the rest"""
+        cached = self.header_index.lookup_many(file_paths)
+        if not cached:
+            return file_paths
+
+        logging.info(f"Header index has {len(cached)} of {len(file_paths)} files up to date")
+
+        remaining = []
+        batch_results = []
+        for file_path in file_paths:
+            header = cached.get(file_path)
+            if header is None:
+                remaining.append(file_path)
+                continue
+
+            if header is NOT_DICOM:
+                result = DicomProcessingResult(file_path, False, error="Not a valid DICOM file")
+            else:
+                metadata = {tag: getattr(header, tag) for tag in required_tags if hasattr(header, tag)}
+                metadata['TransferSyntaxUID'] = header.transfer_syntax_uid
+                metadata['file_size'] = header.file_size
+                metadata['file_path'] = file_path
+                result = DicomProcessingResult(file_path, True, dataset=header, metadata=metadata)
+
+            batch_results.append(result)
+            with QMutexLocker(self.mutex):
+                self.processed_count += 1
+            self.results_queue.put(('file', result))
+
+            if len(batch_results) >= self.batch_size:
+                self.results_queue.put(('batch', batch_results))
+                batch_results = []
 
-            # Collect results as they complete
-            for future in as_completed(future_to_path):
-                if self.is_cancelled:
-                    break
+        if batch_results:
+            self.results_queue.put(('batch', batch_results))
+
+        return remaining
 
-                file_path = future_to_path[future]
+    def _process_batch(self, file_paths: List[str], read_pixels: bool, required_tags: List[str]) -> List[DicomProcessingResult]:
+        """Process a batch of files using thread pool"""
+        if self._executor is None:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                self._executor = executor
                 try:
-                    result = future.result()
-                    results.append(result)
+                    return self._process_batch(file_paths, read_pixels, required_tags)
+                finally:
+                    self._executor = None
 
-                    # Update progress
-                    with QMutexLocker(self.mutex):
-                        self.processed_count += 1
+        results = []
 
-                    # Queue individual result for immediate UI feedback
-                    self.results_queue.put(('file', result))
+        # Submit all files in batch
+        future_to_path = {
+            self._executor.submit(self._process_single_file, path, read_pixels, required_tags): path
+            for path in file_paths
+        }
 
-                except Exception as e:
-                    error_result = DicomProcessingResult(file_path, False, error=str(e))
-                    results.append(error_result)
-                    logging.warning(f"Error processing {file_path}: {e}")
+        # Collect results as they complete
+        for future in as_completed(future_to_path):
+            if self.is_cancelled:
+                break
+
+            file_path = future_to_path[future]
+            try:
+                result = future.result()
+                results.append(result)
+
+                # Update progress
+                with QMutexLocker(self.mutex):
+                    self.processed_count += 1
+
+                # Queue individual result for immediate UI feedback
+                self.results_queue.put(('file', result))
+
+            except Exception as e:
+                error_result = DicomProcessingResult(file_path, False, error=str(e))
+                results.append(error_result)
+                logging.warning(f"Error processing {file_path}: {e}")
 
         return results
 
@@ -178,6 +436,9 @@ class ThreadedDicomProcessor(QObject):
             metadata['file_size'] = file_size
             metadata['file_path'] = file_path
 
+            if self.header_index is not None:
+                self.header_index.store(file_path, ds)
+
             return DicomProcessingResult(file_path, True, dataset=ds, metadata=metadata)
 
         except pydicom.errors.InvalidDicomError:
@@ -187,6 +448,10 @@ class ThreadedDicomProcessor(QObject):
 
     def _process_queued_results(self):
         """Process results from the queue in UI thread"""
+        # Progress is reported once per drain rather than once per file, so
+        # fast backends do not flood the UI thread with progress updates
+        progress_count = 0
+        current_file = None
         try:
             while True:
                 try:
@@ -195,8 +460,8 @@ class ThreadedDicomProcessor(QObject):
                     if result_type == 'file':
                         # Single file processed
                         self.file_processed.emit(data)
+                        progress_count += 1
                         current_file = os.path.basename(data.file_path) if data.success else "Error"
-                        self.progress_updated.emit(self.processed_count, self.total_files, current_file)
 
                     elif result_type == 'batch':
                         # Batch completed
@@ -204,6 +469,9 @@ class ThreadedDicomProcessor(QObject):
 
                     elif result_type == 'complete':
                         # All processing complete
+                        if progress_count:
+                            self.progress_updated.emit(self.processed_count, self.total_files, current_file)
+                            progress_count = 0
                         self.result_timer.stop()
                         self.processing_finished.emit()
                         logging.info(f"Threaded processing completed: {self.processed_count}/{self.total_files} files")
@@ -218,6 +486,9 @@ class ThreadedDicomProcessor(QObject):
                 except queue.Empty:
                     break
 
+            if progress_count:
+                self.progress_updated.emit(self.processed_count, self.total_files, current_file)
+
         except Exception as e:
             logging.error(f"Error processing queued results: {e}", exc_info=True)
 
@@ -11,6 +11,8 @@ from collections import defaultdict, Counter
 from typing import List, Dict, Any, Optional, Tuple
 import re
 
+from fm_dicom.core.zip_source import is_unmaterialised, read_dataset
+
 class ValidationSeverity:
     ERROR = "Error"
     WARNING = "Warning" 
@@ -138,14 +140,14 @@ class DicomValidator:
         result = ValidationResult(file_path)
         
         # Check if file exists
-        if not os.path.exists(file_path):
+        if not os.path.exists(file_path) and not is_unmaterialised(file_path):
             result.add_issue(ValidationSeverity.ERROR, "File System", 
                         f"File does not exist: {file_path}")
             return result
             
         # Try to read as DICOM
         try:
-            dataset = pydicom.dcmread(file_path, force=True)
+            dataset = read_dataset(file_path, force=True)
             result.dataset = dataset
         except Exception as e:
             result.is_valid_dicom = False
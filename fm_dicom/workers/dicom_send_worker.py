@@ -7,21 +7,90 @@ with auto-conversion capabilities for incompatible formats.
 
 import os
 import time
-import tempfile
+import queue
+import shutil
 import logging
+import tempfile
+import threading
+from concurrent.futures import FIRST_COMPLETED, wait
 
-import numpy as np
 import pydicom
-from pydicom.uid import generate_uid
+from pydicom.errors import InvalidDicomError
+from pydicom.filereader import read_file_meta_info
 
 from PyQt6.QtCore import QThread, pyqtSignal
 
 from pynetdicom import AE, AllStoragePresentationContexts
+from pynetdicom import _config as _pynetdicom_config
 from pynetdicom.sop_class import Verification
 
+from fm_dicom.core.negotiation_cache import DEFAULT_TTL as DEFAULT_NEGOTIATION_TTL, get_negotiation_cache
+from fm_dicom.core.send_manifest import DEFAULT_TRANSFER_SYNTAX, build_send_manifest
+from fm_dicom.core.send_metrics import SendMetrics, append_metrics_log
+from fm_dicom.core.transcode import transcode_to_explicit_vr
+from fm_dicom.core.zip_source import ensure_local_files
+from fm_dicom.utils.threaded_processor import get_process_pool
+
 # Constants
 VERIFICATION_SOP_CLASS = Verification
 STORAGE_CONTEXTS = AllStoragePresentationContexts
+MAX_PRESENTATION_CONTEXTS = 128
+DEFAULT_SPOOL_LIMIT = 16
+
+# Tells an association thread that no more files are coming
+_END_OF_QUEUE = None
+
+# File paths passed to send_c_store are streamed from disk in their stored
+# encoding instead of being decoded with dcmread first
+_pynetdicom_config.STORE_SEND_CHUNKED_DATASET = True
+
+
+class _SendTally:
+    """Per-send counters shared by the association threads"""
+
+    def __init__(self, worker, total):
+        self._worker = worker
+        self._lock = threading.Lock()
+        self.total = total
+        self.completed = 0
+        self.sent_ok = 0
+        self.sent_warning = 0
+        self.failed = 0
+        self.details = []
+        self._last_rate_emit = 0.0
+
+    def record(self, file_path, outcome, message=None):
+        """Count one finished file and report aggregated progress"""
+        with self._lock:
+            self.completed += 1
+            if outcome == 'ok':
+                self.sent_ok += 1
+            elif outcome == 'warning':
+                self.sent_warning += 1
+            else:
+                self.failed += 1
+            if message:
+                self.details.append(message)
+
+            # Emitted under the lock so the GUI sees counts in order
+            self._worker.progress_updated.emit(
+                self.completed, self.sent_ok, self.sent_warning, self.failed, os.path.basename(file_path)
+            )
+            now = time.monotonic()
+            if now - self._last_rate_emit >= 1.0:
+                self._last_rate_emit = now
+                self._worker.throughput_updated.emit(self._worker.metrics.rolling_mb_per_s())
+
+    def fail_unsent(self, file_paths):
+        """Count files that never got onto an association"""
+        with self._lock:
+            self.completed += len(file_paths)
+            self.failed += len(file_paths)
+            self.details.append(f"Association failed for {len(file_paths)} of {self.total} files")
+
+    def result(self):
+        with self._lock:
+            return self.sent_ok, self.sent_warning, self.failed, list(self.details)
 
 
 class DicomSendWorker(QThread):
@@ -31,27 +100,72 @@ class DicomSendWorker(QThread):
     send_failed = pyqtSignal(str)  # error message
     association_status = pyqtSignal(str)  # status messages
     conversion_progress = pyqtSignal(int, int, str)  # current, total, filename
+    throughput_updated = pyqtSignal(float)  # rolling MB/s, at most once a second
     
-    def __init__(self, filepaths, send_params, unique_sop_classes):
+    def __init__(self, filepaths, send_params, unique_sop_classes, manifest=None, max_associations=1,
+                 stream_from_file=True, transcode_workers=None, spool_limit=DEFAULT_SPOOL_LIMIT,
+                 negotiation_cache=None, negotiation_ttl=DEFAULT_NEGOTIATION_TTL, journal=None, is_retry=False,
+                 resume=False, metrics_log=None):
         super().__init__()
         self.filepaths = filepaths
+        self.send_params = tuple(send_params)
         self.calling_ae, self.remote_ae, self.host, self.port = send_params
-        self.unique_sop_classes = unique_sop_classes
+        self.unique_sop_classes = unique_sop_classes  # None: taken from the manifest
+        self.journal = journal  # SendJournal recording per-file outcomes, or None
+        self.is_retry = is_retry  # Background retry of journalled files; keeps their attempt counts
+        self.resume = resume  # Skip files this destination already acknowledged (always on for retries)
+        self.skipped_files = []  # Acknowledged by this destination in an earlier send
+        self.manifest = manifest  # SendManifest; built on first use when not supplied
+        self.max_associations = max(1, int(max_associations or 1))  # Concurrent C-STORE associations
+        self.stream_from_file = stream_from_file  # Send encoded bytes from disk when the syntax matches
+        self.streamed_files = []
+        self.transcode_workers = transcode_workers or os.cpu_count() or 4  # Conversion processes
+        self.spool_limit = max(1, int(spool_limit or DEFAULT_SPOOL_LIMIT))  # Converted files on disk at once
+        self._spool_dir = None
+        self._spool_slots = threading.Semaphore(self.spool_limit)
+        self._spool_lock = threading.Lock()
+        self._spooled = {}  # spool path -> original path
+        self._sender_count = 1
+        self.negotiation_cache = negotiation_cache if negotiation_cache is not None else get_negotiation_cache()
+        self.negotiation_ttl = negotiation_ttl  # Seconds a probe result is trusted; 0 always probes
+        self.negotiation_cached = False  # Compatibility came from the cache, no probe was made
+        self._negotiation_invalidated = False
         self.cancelled = False
         self.temp_files = []  # Track temp files for cleanup
         self.converted_count = 0
         self.timing_info = {}  # Track timing for each step
+        self.metrics = SendMetrics()  # Per-instance bytes/latency and association setup times
+        self.metrics_log = metrics_log  # JSON lines file each send report is appended to, or None
         
     def run(self):
         try:
             import time
             start_time = time.time()
+            self.metrics = SendMetrics()
             logging.info("DicomSendWorker: Starting run() method")
+
+            # Members of a loaded ZIP are written out before they are sent
+            ensure_local_files(self.filepaths)
+            
+            if self.journal is not None:
+                self.filepaths, self.skipped_files = self.journal.begin(
+                    self.send_params, self.filepaths, reset_attempts=not self.is_retry,
+                    skip_acknowledged=self.is_retry or self.resume
+                )
+                if self.skipped_files:
+                    logging.info(f"DicomSendWorker: Skipping {len(self.skipped_files)} files already acknowledged by {self.remote_ae}")
+                self.timing_info['skipped_acknowledged'] = len(self.skipped_files)
+                if not self.filepaths:
+                    self.timing_info['total_time'] = time.time() - start_time
+                    self.send_complete.emit(len(self.skipped_files), 0, 0, [self._skipped_message()], 0, self.timing_info)
+                    return
             
             # First, extract unique transfer syntaxes from selected files for optimized compatibility checking
             self.association_status.emit("Analyzing file transfer syntaxes...")
             analysis_start = time.time()
             unique_transfer_syntaxes = self._extract_unique_transfer_syntaxes(self.filepaths)
+            if self.unique_sop_classes is None:
+                self.unique_sop_classes = self._get_manifest().unique_sop_classes()
             self.timing_info['analysis_time'] = time.time() - analysis_start
             logging.info(f"DicomSendWorker: Found {len(unique_transfer_syntaxes)} unique transfer syntaxes")
             
@@ -62,6 +176,7 @@ class DicomSendWorker(QThread):
             compatibility_start = time.time()
             incompatible_transfer_syntaxes = self._test_transfer_syntax_compatibility(unique_transfer_syntaxes)
             self.timing_info['compatibility_check_time'] = time.time() - compatibility_start
+            self.timing_info['negotiation_cached'] = self.negotiation_cached
             logging.info(f"DicomSendWorker: {len(incompatible_transfer_syntaxes)} incompatible transfer syntaxes found")
             
             # Identify which files need conversion based on compatibility results
@@ -70,42 +185,31 @@ class DicomSendWorker(QThread):
                 files_needing_conversion = self._identify_files_needing_conversion(self.filepaths, incompatible_transfer_syntaxes)
                 logging.info(f"DicomSendWorker: {len(files_needing_conversion)} files need conversion")
             
-            # Convert incompatible files if needed
-            files_to_send = self.filepaths.copy()
+            # Compatible files go out straight away; incompatible ones are
+            # converted in the process pool and sent as each one finishes
+            self.timing_info['conversion_time'] = 0
+            needing_conversion = set(files_needing_conversion)
+            files_to_send = [fp for fp in self.filepaths if fp not in needing_conversion]
             if files_needing_conversion:
-                logging.info(f"DicomSendWorker: Converting {len(files_needing_conversion)} incompatible files")
-                self.association_status.emit(f"Converting {len(files_needing_conversion)} incompatible files...")
-                
-                conversion_start = time.time()
-                converted_files = self._convert_incompatible_files(files_needing_conversion)
-                self.timing_info['conversion_time'] = time.time() - conversion_start
-                logging.info(f"DicomSendWorker: Conversion complete, got {len(converted_files)} converted files")
-                
-                # Replace original files with converted ones in the send list
-                if converted_files:
-                    for i, original_file in enumerate(files_to_send):
-                        if original_file in files_needing_conversion:
-                            converted_index = files_needing_conversion.index(original_file)
-                            if converted_index < len(converted_files):
-                                files_to_send[i] = converted_files[converted_index]
+                logging.info(f"DicomSendWorker: Converting {len(files_needing_conversion)} incompatible files while sending")
+                self.association_status.emit(f"Converting {len(files_needing_conversion)} incompatible files while sending...")
             else:
-                self.timing_info['conversion_time'] = 0
+                self.association_status.emit("Sending files to server...")
             
-            # Now send all files (original + converted)
-            self.association_status.emit("Sending files to server...")
             send_start = time.time()
-            result = self._attempt_send_with_formats(files_to_send, test_mode=False)
+            result = self._attempt_send_with_formats(files_to_send, to_convert=files_needing_conversion)
             self.timing_info['send_time'] = time.time() - send_start
             
-            if result is None:  # Cancelled
-                logging.info("DicomSendWorker: Send was cancelled")
-                return
-                
-            success, warnings, failed, error_details, _ = result
+            success, warnings, failed, error_details = result
+            if self.skipped_files:
+                success += len(self.skipped_files)
+                error_details.insert(0, self._skipped_message())
             logging.info(f"DicomSendWorker: Send complete - Success: {success}, Warnings: {warnings}, Failed: {failed}")
             
             # Calculate total time
             self.timing_info['total_time'] = time.time() - start_time
+            self.timing_info['streamed_files'] = len(self.streamed_files)
+            self._report_metrics()
             
             logging.info("DicomSendWorker: About to emit send_complete signal")
             # Send completion signal with timing info
@@ -114,161 +218,317 @@ class DicomSendWorker(QThread):
             
         except Exception as e:
             logging.error(f"DicomSendWorker: Exception in run(): {e}", exc_info=True)
+            if self.journal is not None:
+                # Whatever was not acknowledged is retried later
+                self.journal.mark_failed(self.send_params, self.filepaths, str(e))
             self.send_failed.emit(f"DICOM send failed: {str(e)}")
         finally:
+            if self.journal is not None:
+                self.journal.flush()
             logging.info("DicomSendWorker: Cleaning up temp files")
             # Cleanup temp files
             self._cleanup_temp_files()
             logging.info("DicomSendWorker: run() method complete")
     
-    def _attempt_send_with_formats(self, filepaths, test_mode=False):
-        """Attempt to send files and identify format incompatibilities"""
+    def _attempt_send_with_formats(self, filepaths, to_convert=()):
+        """Send files over up to ``max_associations`` concurrent associations.
+
+        Each association runs in its own thread and takes files from a shared
+        queue, so a slow C-STORE response on one association does not stall
+        the others. Files in ``to_convert`` are decompressed by a feeder
+        thread and join the queue as they are ready. Returns
+        ``(sent_ok, warnings, failed, details)``.
+        """
         try:
-            logging.info(f"DicomSendWorker: _attempt_send_with_formats called with {len(filepaths)} files, test_mode={test_mode}")
-            
-            # Create AE instance
-            ae_instance = AE(ae_title=self.calling_ae)
-            logging.info("DicomSendWorker: Created AE instance")
-            
-            # Add presentation contexts
-            for sop_uid in self.unique_sop_classes:
-                ae_instance.add_requested_context(sop_uid)
-            ae_instance.add_requested_context(VERIFICATION_SOP_CLASS)
-            logging.info(f"DicomSendWorker: Added {len(self.unique_sop_classes)} presentation contexts")
-            
-            # Establish association
-            if test_mode:
-                self.association_status.emit("Testing server compatibility...")
+            total = len(filepaths) + len(to_convert)
+            logging.info(f"DicomSendWorker: _attempt_send_with_formats called with {total} files")
+            
+            work_queue = queue.Queue()
+            for fp_send in filepaths:
+                work_queue.put(fp_send)
+            tally = _SendTally(self, total)
+            
+            association_count = max(1, min(self.max_associations, total))
+            self._sender_count = association_count
+            stop_feeding = threading.Event()
+            feeder = None
+            if to_convert:
+                self._spool_dir = tempfile.mkdtemp(prefix="fm_dicom_send_")
+                feeder = threading.Thread(
+                    target=self._feed_conversions,
+                    args=(list(to_convert), work_queue, stop_feeding),
+                    name="dicom-send-transcode",
+                    daemon=True,
+                )
+                feeder.start()
             else:
-                self.association_status.emit("Sending files to server...")
-            
-            logging.info(f"DicomSendWorker: Attempting association to {self.host}:{self.port}")
-            assoc = ae_instance.associate(self.host, self.port, ae_title=self.remote_ae)
-            
-            if not assoc.is_established:
-                logging.error(f"DicomSendWorker: Association failed: {assoc}")
-                if test_mode:
-                    self.send_failed.emit(f"Failed to establish association with {self.host}:{self.port}")
-                    return None
-                else:
-                    return 0, 0, len(filepaths), [f"Association failed for all {len(filepaths)} files"], []
+                for _ in range(association_count):
+                    work_queue.put(_END_OF_QUEUE)
             
-            logging.info("DicomSendWorker: Association established successfully")
+            logging.info(f"DicomSendWorker: Sending over {association_count} association(s)")
+            if association_count == 1:
+                self._association_sender(0, work_queue, tally)
+            else:
+                threads = [
+                    threading.Thread(
+                        target=self._association_sender,
+                        args=(worker_id, work_queue, tally),
+                        name=f"dicom-send-{worker_id}",
+                        daemon=True,
+                    )
+                    for worker_id in range(association_count)
+                ]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+            
+            # With every association gone the feeder must not wait for spool slots
+            stop_feeding.set()
+            if feeder is not None:
+                feeder.join()
+            
+            # Files left over when no association could be established (or kept up)
+            unsent = []
+            while True:
+                try:
+                    fp_left = work_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if fp_left is not _END_OF_QUEUE:
+                    unsent.append(self._release_spooled(fp_left))
+            if unsent and not self.cancelled:
+                tally.fail_unsent(unsent)
+                if self.journal is not None:
+                    self.journal.mark_failed(self.send_params, unsent, "Association failed")
+            elif unsent and self.journal is not None:
+                self.journal.mark_cancelled(self.send_params, unsent)
             
-            # Set timeout
-            assoc.dimse_timeout = 120
+            return tally.result()
             
-            # C-ECHO verification
-            logging.info("DicomSendWorker: Performing C-ECHO")
+        except Exception as e:
+            logging.error(f"DicomSendWorker: Exception in _attempt_send_with_formats: {e}", exc_info=True)
+            raise
+    
+    def _associate(self, ae_instance, worker_id):
+        """Establish one association, or return None if the server refused it"""
+        logging.info(f"DicomSendWorker[{worker_id}]: Attempting association to {self.host}:{self.port}")
+        setup_start = time.perf_counter()
+        assoc = ae_instance.associate(self.host, self.port, ae_title=self.remote_ae)
+        self.metrics.record_association(time.perf_counter() - setup_start, assoc.is_established)
+        if not assoc.is_established:
+            logging.error(f"DicomSendWorker[{worker_id}]: Association failed: {assoc}")
+            return None
+        assoc.dimse_timeout = 120
+        return assoc
+    
+    def _association_sender(self, worker_id, work_queue, tally):
+        """Send files from ``work_queue`` over one association until the end marker"""
+        # Each association gets its own AE; AE instances are not shared between threads
+        ae_instance = AE(ae_title=self.calling_ae)
+        for sop_uid, transfer_syntaxes in self._requested_contexts():
+            ae_instance.add_requested_context(sop_uid, transfer_syntaxes)
+        ae_instance.add_requested_context(VERIFICATION_SOP_CLASS)
+        
+        assoc = self._associate(ae_instance, worker_id)
+        if assoc is None:
+            return
+        
+        if worker_id == 0 and not self.negotiation_cached:
+            # C-ECHO verification; skipped when this server answered recently
             echo_status = assoc.send_c_echo()
             if echo_status and getattr(echo_status, 'Status', None) == 0x0000:
                 logging.info("DicomSendWorker: C-ECHO verification successful.")
             else:
                 logging.warning(f"DicomSendWorker: C-ECHO failed or status not 0x0000. Status: {echo_status}")
-            
-            # Send files
-            logging.info(f"DicomSendWorker: Starting to send {len(filepaths)} files")
-            sent_ok = 0
-            sent_warning = 0
-            failed_send = 0
-            failed_details_list = []
-            incompatible_files = []
-            
-            for idx, fp_send in enumerate(filepaths):
-                if self.cancelled:
+        
+        try:
+            while not self.cancelled:
+                fp_send = work_queue.get()
+                if fp_send is _END_OF_QUEUE:
                     break
                 
+                # Re-associate if this association dropped
+                if not assoc.is_established:
+                    assoc = self._associate(ae_instance, worker_id)
+                    if assoc is None:
+                        original = self._release_spooled(fp_send)
+                        message = f"{os.path.basename(original)}: Could not re-establish association"
+                        tally.record(original, 'failed', message)
+                        self._journal_outcome(original, 'failed', message, retryable=True)
+                        # Leave the rest to associations that are still up
+                        return
+                
+                # A failure status means the server refused the file; exceptions are transient
+                retryable = False
                 try:
-                    # Check association
-                    if not assoc.is_established:
-                        assoc = ae_instance.associate(self.host, self.port, ae_title=self.remote_ae)
-                        if not assoc.is_established:
-                            failed_details_list.append(f"{os.path.basename(fp_send)}: Could not re-establish association")
-                            failed_send += 1
-                            continue
-                        assoc.dimse_timeout = 120
-                    
-                    # Read file
-                    ds_send = pydicom.dcmread(fp_send)
-                    
-                    # Check SOP class support
-                    if not any(ctx.abstract_syntax == ds_send.SOPClassUID and ctx.result == 0x00 for ctx in assoc.accepted_contexts):
-                        err_msg = f"{os.path.basename(fp_send)}: SOP Class not accepted"
-                        failed_details_list.append(err_msg)
-                        failed_send += 1
-                        
-                        # This might be a format issue - add to incompatible list
-                        if test_mode:
-                            incompatible_files.append(fp_send)
-                        
-                        # UPDATE PROGRESS EVEN IN TEST MODE
-                        if test_mode:
-                            self.progress_updated.emit(idx + 1, sent_ok, sent_warning, failed_send, f"Testing {os.path.basename(fp_send)}")
-                        else:
-                            self.progress_updated.emit(idx + 1, sent_ok, sent_warning, failed_send, os.path.basename(fp_send))
-                        continue
-                    
-                    # Send C-STORE
-                    status = assoc.send_c_store(ds_send)
-                    
-                    # Process result
-                    if status:
-                        status_code = getattr(status, "Status", -1)
-                        if status_code == 0x0000:
-                            sent_ok += 1
-                            logging.info(f"Successfully sent {os.path.basename(fp_send)}")
-                        elif status_code in [0xB000, 0xB006, 0xB007]:
-                            sent_warning += 1
-                            warn_msg = f"{os.path.basename(fp_send)}: Warning 0x{status_code:04X}"
-                            failed_details_list.append(warn_msg)
-                        else:
-                            failed_send += 1
-                            err_msg = f"{os.path.basename(fp_send)}: Failed 0x{status_code:04X}"
-                            failed_details_list.append(err_msg)
-                            
-                            # Check if this is a format-related failure
-                            if test_mode and self._is_format_error(status_code):
-                                incompatible_files.append(fp_send)
-                    else:
-                        failed_send += 1
-                        failed_details_list.append(f"{os.path.basename(fp_send)}: No status returned")
-                        if test_mode:
-                            incompatible_files.append(fp_send)
-                    
-                    # UPDATE PROGRESS FOR BOTH TEST AND NORMAL MODE
-                    if test_mode:
-                        self.progress_updated.emit(idx + 1, sent_ok, sent_warning, failed_send, f"Testing {os.path.basename(fp_send)}")
-                    else:
-                        self.progress_updated.emit(idx + 1, sent_ok, sent_warning, failed_send, os.path.basename(fp_send))
-                    
+                    outcome, message = self._store_file(assoc, fp_send)
                 except Exception as e:
+                    retryable = True
                     error_str = str(e)
-                    failed_send += 1
-                    err_msg = f"{os.path.basename(fp_send)}: {error_str}"
-                    failed_details_list.append(err_msg)
-                    
+                    outcome, message = 'failed', f"{os.path.basename(fp_send)}: {error_str}"
                     # Check if this is a format/compression error
-                    if test_mode and self._is_format_exception(error_str):
-                        incompatible_files.append(fp_send)
-                        logging.info(f"Detected format incompatibility for {os.path.basename(fp_send)}: {error_str}")
-                    
-                    # UPDATE PROGRESS FOR BOTH TEST AND NORMAL MODE
-                    if test_mode:
-                        self.progress_updated.emit(idx + 1, sent_ok, sent_warning, failed_send, f"Testing {os.path.basename(fp_send)}")
-                    else:
-                        self.progress_updated.emit(idx + 1, sent_ok, sent_warning, failed_send, os.path.basename(fp_send))
-            
-            # Close association
+                    if self._is_format_exception(error_str):
+                        self._note_context_rejection()
+                # Converted copies are deleted as soon as they are sent
+                original = self._release_spooled(fp_send)
+                tally.record(original, outcome, message)
+                self._journal_outcome(original, outcome, message, retryable)
+        finally:
+            if assoc is not None:
+                try:
+                    assoc.release()
+                except Exception as e:
+                    logging.warning(f"Error releasing association: {e}")
+    
+    def _report_metrics(self):
+        """Add the throughput/latency report to ``timing_info`` and the metrics log"""
+        phases = {name: value for name, value in self.timing_info.items() if name.endswith('_time')}
+        report = self.metrics.report(phases)
+        self.timing_info['metrics'] = report
+        latency = report['latency_s']
+        if latency['p50'] is not None:
+            logging.info(
+                f"DicomSendWorker: {report['instances']} instances, {report['mb_per_s']:.1f} MB/s, "
+                f"C-STORE p50/p95/p99 {latency['p50']:.3f}/{latency['p95']:.3f}/{latency['p99']:.3f}s"
+            )
+        if self.metrics_log:
+            append_metrics_log(
+                self.metrics_log, report,
+                destination=f"{self.remote_ae}@{self.host}:{self.port}",
+                instances=self.metrics.per_instance(),
+            )
+    
+    def _journal_outcome(self, file_path, outcome, message, retryable):
+        """Record one file's result in the send journal"""
+        if self.journal is None:
+            return
+        if outcome in ('ok', 'warning'):
+            self.journal.mark_sent(self.send_params, file_path)
+        else:
+            self.journal.mark_failed(self.send_params, [file_path], message, retryable=retryable)
+    
+    def _skipped_message(self):
+        return f"{len(self.skipped_files)} files already acknowledged by {self.remote_ae}, not sent again"
+    
+    def _requested_contexts(self):
+        """Presentation contexts to propose: ``(abstract syntax, transfer syntaxes or None)``.
+
+        When streaming, every SOP class also gets one context per transfer
+        syntax its files use, so the server can accept the files' own
+        encoding. The context with pynetdicom's default (uncompressed)
+        syntaxes stays as the fallback for files that must be re-encoded.
+        """
+        contexts = [(sop_uid, None) for sop_uid in self.unique_sop_classes]
+        if not self.stream_from_file or self.manifest is None:
+            return contexts
+        
+        syntaxes_by_class = {}
+        for entry in self.manifest.entries:
+            syntaxes_by_class.setdefault(entry.sop_class_uid, set()).add(entry.transfer_syntax_uid)
+        exact = [
+            (sop_uid, [transfer_syntax])
+            for sop_uid in self.unique_sop_classes
+            for transfer_syntax in sorted(syntaxes_by_class.get(sop_uid, ()))
+        ]
+        # One context is kept for Verification
+        if len(exact) + len(contexts) < MAX_PRESENTATION_CONTEXTS:
+            return exact + contexts
+        logging.info("DicomSendWorker: Too many SOP class/transfer syntax pairs to propose each one")
+        return contexts
+    
+    def _file_syntaxes(self, fp_send, entry):
+        """Return ``(sop_class_uid, transfer_syntax_uid)`` of a file without reading its dataset"""
+        if entry is not None and entry.sop_class_uid:
+            return entry.sop_class_uid, entry.transfer_syntax_uid
+        # Converted temp files are not in the manifest; their file meta is enough
+        try:
+            file_meta = read_file_meta_info(fp_send)
+            return file_meta.MediaStorageSOPClassUID, file_meta.TransferSyntaxUID
+        except Exception:
+            return None, None
+    
+    def _store_file(self, assoc, fp_send):
+        """C-STORE one file; returns ``(outcome, detail_message)``"""
+        # Check SOP class support before reading the whole file
+        entry = self.manifest.get(fp_send) if self.manifest is not None else None
+        sop_class_uid, transfer_syntax = self._file_syntaxes(fp_send, entry)
+        ds_send = None
+        if not sop_class_uid:
+            ds_send = pydicom.dcmread(fp_send)
+            sop_class_uid = ds_send.SOPClassUID
+        
+        accepted = [ctx for ctx in assoc.accepted_contexts if ctx.abstract_syntax == sop_class_uid and ctx.result == 0x00]
+        if not accepted:
+            # This might be a format issue
+            self._note_context_rejection()
+            return 'failed', f"{os.path.basename(fp_send)}: SOP Class not accepted"
+        
+        # Send C-STORE: straight from the file when the server accepted the
+        # file's own transfer syntax, otherwise decoded and re-encoded
+        status = None
+        latency = 0.0
+        if (
+            ds_send is None
+            and self.stream_from_file
+            and any(ctx.transfer_syntax[0] == transfer_syntax for ctx in accepted)
+        ):
             try:
-                assoc.release()
-            except Exception as e:
-                logging.warning(f"Error releasing association: {e}")
-            
-            return sent_ok, sent_warning, failed_send, failed_details_list, incompatible_files
-            
-        except Exception as e:
-            logging.error(f"DicomSendWorker: Exception in _attempt_send_with_formats: {e}", exc_info=True)
-            raise
+                store_start = time.perf_counter()
+                status = assoc.send_c_store(fp_send)
+                latency = time.perf_counter() - store_start
+                self.streamed_files.append(fp_send)
+            except (AttributeError, ValueError, InvalidDicomError) as e:
+                # Raised before anything is sent, e.g. for files without file meta
+                logging.debug(f"Cannot stream {os.path.basename(fp_send)}, sending decoded dataset: {e}")
+        if status is None:
+            if ds_send is None:
+                ds_send = pydicom.dcmread(fp_send)
+            store_start = time.perf_counter()
+            status = assoc.send_c_store(ds_send)
+            latency = time.perf_counter() - store_start
+        
+        outcome, message = self._store_outcome(fp_send, status)
+        self.metrics.record_store(fp_send, self._file_size(fp_send, entry), latency, outcome)
+        return outcome, message
+    
+    def _file_size(self, fp_send, entry):
+        if entry is not None and entry.file_size is not None:
+            return entry.file_size
+        try:
+            return os.path.getsize(fp_send)
+        except OSError:
+            return 0
+    
+    def _store_outcome(self, fp_send, status):
+        """Turn a C-STORE response into ``(outcome, detail_message)``"""
+        if not status:
+            return 'failed', f"{os.path.basename(fp_send)}: No status returned"
+        
+        status_code = getattr(status, "Status", -1)
+        if status_code == 0x0000:
+            logging.info(f"Successfully sent {os.path.basename(fp_send)}")
+            return 'ok', None
+        if status_code in [0xB000, 0xB006, 0xB007]:
+            return 'warning', f"{os.path.basename(fp_send)}: Warning 0x{status_code:04X}"
+        # Check if this is a format-related failure
+        if self._is_format_error(status_code):
+            self._note_context_rejection()
+        return 'failed', f"{os.path.basename(fp_send)}: Failed 0x{status_code:04X}"
+    
+    def _note_context_rejection(self):
+        """Forget cached negotiation results for this server after a rejection"""
+        if self._negotiation_invalidated:
+            return
+        self._negotiation_invalidated = True
+        logging.info(f"DicomSendWorker: Context rejected, clearing cached negotiation for {self.remote_ae}@{self.host}:{self.port}")
+        self.negotiation_cache.invalidate(self.host, self.port, self.remote_ae)
+    
+    def _get_manifest(self):
+        """Return the send manifest, reading headers once if none was supplied"""
+        if self.manifest is None:
+            self.manifest = build_send_manifest(self.filepaths, should_stop=lambda: self.cancelled)
+        return self.manifest
     
     def _is_format_error(self, status_code):
         """Check if status code indicates a format/transfer syntax error"""
@@ -299,28 +559,16 @@ class DicomSendWorker(QThread):
     
     def _extract_unique_transfer_syntaxes(self, filepaths):
         """Extract unique transfer syntaxes from the selected files"""
+        manifest = self._get_manifest()
         unique_syntaxes = set()
         
         for filepath in filepaths:
-            if self.cancelled:
-                break
-                
-            try:
-                # Read DICOM file header to get transfer syntax
-                ds = pydicom.dcmread(filepath, stop_before_pixels=True)
-                if hasattr(ds, 'file_meta') and hasattr(ds.file_meta, 'TransferSyntaxUID'):
-                    transfer_syntax = str(ds.file_meta.TransferSyntaxUID)
-                    unique_syntaxes.add(transfer_syntax)
-                    logging.debug(f"File {os.path.basename(filepath)}: Transfer syntax {transfer_syntax}")
-                else:
-                    # Default to Implicit VR Little Endian if not specified
-                    unique_syntaxes.add('1.2.840.10008.1.2')
-                    logging.debug(f"File {os.path.basename(filepath)}: No transfer syntax found, assuming Implicit VR Little Endian")
-                    
-            except Exception as e:
-                logging.warning(f"Could not read transfer syntax from {os.path.basename(filepath)}: {e}")
-                # Assume default transfer syntax
-                unique_syntaxes.add('1.2.840.10008.1.2')
+            entry = manifest.get(filepath)
+            if entry is not None:
+                unique_syntaxes.add(entry.transfer_syntax_uid)
+            else:
+                # Unreadable files are assumed to use Implicit VR Little Endian
+                unique_syntaxes.add(DEFAULT_TRANSFER_SYNTAX)
         
         # Convert to list and log the results
         syntax_list = list(unique_syntaxes)
@@ -328,8 +576,25 @@ class DicomSendWorker(QThread):
         return syntax_list
     
     def _test_transfer_syntax_compatibility(self, transfer_syntaxes):
-        """Test which transfer syntaxes are not supported by the server"""
+        """Test which transfer syntaxes are not supported by the server.
+
+        Outcomes are cached per remote AE; when every SOP class/transfer
+        syntax pair was probed within ``negotiation_ttl`` no association is made.
+        """
         incompatible_syntaxes = []
+        pairs = [(sop_uid, ts) for sop_uid in self.unique_sop_classes for ts in transfer_syntaxes]
+        cached = None
+        if pairs and self.negotiation_ttl:
+            cached = self.negotiation_cache.lookup_all(self.host, self.port, self.remote_ae, pairs)
+        if cached is not None:
+            self.negotiation_cached = True
+            incompatible_syntaxes = [
+                ts for ts in transfer_syntaxes
+                if not any(cached[(sop_uid, ts)] for sop_uid in self.unique_sop_classes)
+            ]
+            logging.info(f"Using cached negotiation for {self.remote_ae}@{self.host}:{self.port}: "
+                         f"{len(incompatible_syntaxes)} incompatible transfer syntaxes")
+            return incompatible_syntaxes
         
         try:
             # Create AE instance
@@ -353,6 +618,14 @@ class DicomSendWorker(QThread):
                 # If we can't establish association, assume all syntaxes are incompatible
                 return transfer_syntaxes
             
+            for sop_uid, ts in pairs:
+                accepted = any(
+                    ctx.abstract_syntax == sop_uid and ctx.transfer_syntax[0] == ts and ctx.result == 0x00
+                    for ctx in assoc.accepted_contexts
+                )
+                self.negotiation_cache.store(self.host, self.port, self.remote_ae, sop_uid, ts, accepted,
+                                             ttl=self.negotiation_ttl)
+            
             # Check which transfer syntaxes were rejected
             for ts in transfer_syntaxes:
                 ts_supported = False
@@ -386,216 +659,107 @@ class DicomSendWorker(QThread):
     
     def _identify_files_needing_conversion(self, filepaths, incompatible_syntaxes):
         """Identify which files need conversion based on incompatible transfer syntaxes"""
+        manifest = self._get_manifest()
         files_needing_conversion = []
         
         for filepath in filepaths:
-            if self.cancelled:
-                break
-                
-            try:
-                # Read DICOM file header to get transfer syntax
-                ds = pydicom.dcmread(filepath, stop_before_pixels=True)
-                if hasattr(ds, 'file_meta') and hasattr(ds.file_meta, 'TransferSyntaxUID'):
-                    transfer_syntax = str(ds.file_meta.TransferSyntaxUID)
-                else:
-                    # Default to Implicit VR Little Endian if not specified
-                    transfer_syntax = '1.2.840.10008.1.2'
-                
-                # Check if this file's transfer syntax is incompatible
-                if transfer_syntax in incompatible_syntaxes:
-                    files_needing_conversion.append(filepath)
-                    logging.info(f"File {os.path.basename(filepath)} needs conversion (transfer syntax: {transfer_syntax})")
-                    
-            except Exception as e:
-                logging.warning(f"Could not check transfer syntax for {os.path.basename(filepath)}: {e}")
+            entry = manifest.get(filepath)
+            if entry is None:
                 # If we can't read the file, assume it needs conversion
                 files_needing_conversion.append(filepath)
+            elif entry.transfer_syntax_uid in incompatible_syntaxes:
+                files_needing_conversion.append(filepath)
+                logging.info(f"File {os.path.basename(filepath)} needs conversion (transfer syntax: {entry.transfer_syntax_uid})")
         
         return files_needing_conversion
     
-    def _convert_incompatible_files(self, filepaths):
-        """Convert incompatible files to standard uncompressed format with validation"""
-        converted_files = []
-        total_files = len(filepaths)
-        
-        for idx, filepath in enumerate(filepaths):
-            if self.cancelled:
-                break
-            
-            # Emit conversion progress with detailed status
-            self.conversion_progress.emit(idx + 1, total_files, f"Converting {os.path.basename(filepath)} ({idx + 1}/{total_files})")
-            
-            try:
-                # Read original file
-                ds_original = pydicom.dcmread(filepath)
-                original_ts = str(ds_original.file_meta.TransferSyntaxUID)
-                
-                # Check if conversion is needed
-                compressed_syntaxes = [
-                    '1.2.840.10008.1.2.4.90',  # JPEG 2000 Lossless
-                    '1.2.840.10008.1.2.4.91',  # JPEG 2000
-                    '1.2.840.10008.1.2.4.50',  # JPEG Baseline
-                    '1.2.840.10008.1.2.4.51',  # JPEG Extended
-                    '1.2.840.10008.1.2.4.57',  # JPEG Lossless
-                    '1.2.840.10008.1.2.4.70',  # JPEG Lossless SV1
-                    '1.2.840.10008.1.2.4.80',  # JPEG-LS Lossless
-                    '1.2.840.10008.1.2.4.81',  # JPEG-LS Lossy
-                ]
-                
-                if original_ts not in compressed_syntaxes:
-                    # No conversion needed
-                    logging.info(f"No conversion needed for {os.path.basename(filepath)}: {original_ts}")
-                    converted_files.append(filepath)
-                    continue
-                
-                logging.info(f"Converting {os.path.basename(filepath)} from {original_ts}")
-                
-                # Update progress with conversion details
-                self.conversion_progress.emit(idx + 1, total_files, f"Converting {os.path.basename(filepath)} - decompressing ({idx + 1}/{total_files})")
-                
-                # Create new dataset for conversion
-                ds_converted = pydicom.Dataset()
-                
-                # Copy all non-pixel data elements
-                for elem in ds_original:
-                    if elem.tag != (0x7fe0, 0x0010):  # Skip PixelData for now
-                        ds_converted[elem.tag] = elem
-                
-                # Handle pixel data conversion
-                try:
-                    # Update progress for pixel data processing
-                    self.conversion_progress.emit(idx + 1, total_files, f"Converting {os.path.basename(filepath)} - processing pixels ({idx + 1}/{total_files})")
-                    
-                    # Force decompression by accessing pixel_array
-                    pixel_array = ds_original.pixel_array
-                    logging.info(f"Pixel array shape: {pixel_array.shape}, dtype: {pixel_array.dtype}")
-                    
-                    # Convert pixel array back to bytes in the correct format
-                    if pixel_array.dtype != np.uint16 and ds_original.BitsAllocated == 16:
-                        # Convert to uint16 if needed
-                        pixel_array = pixel_array.astype(np.uint16)
-                    elif pixel_array.dtype != np.uint8 and ds_original.BitsAllocated == 8:
-                        # Convert to uint8 if needed
-                        pixel_array = pixel_array.astype(np.uint8)
-                    
-                    # Convert back to bytes
-                    pixel_bytes = pixel_array.tobytes()
-                    
-                    # Set the uncompressed pixel data
-                    ds_converted.PixelData = pixel_bytes
-                    
-                    logging.info(f"Converted pixel data: {len(pixel_bytes)} bytes")
-                    
-                except Exception as e:
-                    logging.error(f"Failed to convert pixel data for {filepath}: {e}")
-                    converted_files.append(filepath)  # Use original
+    def _feed_conversions(self, filepaths, work_queue, stop_feeding):
+        """Decompress ``filepaths`` in the process pool and queue the results for sending.
+
+        Runs alongside the association threads, so files are converted while
+        earlier ones are on the wire. Each file holds a spool slot from the
+        moment it is submitted until its converted copy has been sent and
+        deleted, which bounds the disk space the spool can use.
+        """
+        conversion_start = time.time()
+        total = len(filepaths)
+        position = 0
+        completed = 0
+        in_flight = {}
+        try:
+            pool = get_process_pool(self.transcode_workers)
+        except Exception as e:
+            logging.error(f"DicomSendWorker: Could not start conversion processes, sending originals: {e}")
+            pool = None
+            position = total
+
+        try:
+            while position < total or in_flight:
+                stopping = self.cancelled or stop_feeding.is_set()
+                if stopping and not in_flight:
+                    break
+
+                # Wait for a free slot only when nothing is converting
+                while (
+                    not stopping
+                    and position < total
+                    and self._spool_slots.acquire(timeout=0 if in_flight else 0.2)
+                ):
+                    src_path = filepaths[position]
+                    spool_path = os.path.join(self._spool_dir, f"{position:06d}_{os.path.basename(src_path)}")
+                    position += 1
+                    try:
+                        future = pool.submit(transcode_to_explicit_vr, src_path, spool_path)
+                    except Exception as e:
+                        logging.error(f"DicomSendWorker: Could not submit {os.path.basename(src_path)} for conversion: {e}")
+                        self._spool_slots.release()
+                        work_queue.put(src_path)
+                        continue
+                    in_flight[future] = src_path
+                if not in_flight:
                     continue
-                
-                # Create proper file meta information for uncompressed format
-                file_meta = pydicom.Dataset()
-                
-                # Copy essential file meta elements
-                if hasattr(ds_original, 'file_meta'):
-                    for elem in ds_original.file_meta:
-                        if elem.tag != (0x0002, 0x0010):  # Skip TransferSyntaxUID
-                            file_meta[elem.tag] = elem
-                
-                # Set transfer syntax to Explicit VR Little Endian (most compatible)
-                file_meta.TransferSyntaxUID = pydicom.uid.ExplicitVRLittleEndian
-                file_meta.MediaStorageSOPClassUID = ds_converted.SOPClassUID
-                file_meta.MediaStorageSOPInstanceUID = ds_converted.SOPInstanceUID
-                
-                # Ensure required file meta elements
-                if not hasattr(file_meta, 'FileMetaInformationVersion'):
-                    file_meta.FileMetaInformationVersion = b'\x00\x01'
-                if not hasattr(file_meta, 'ImplementationClassUID'):
-                    file_meta.ImplementationClassUID = pydicom.uid.PYDICOM_IMPLEMENTATION_UID
-                if not hasattr(file_meta, 'ImplementationVersionName'):
-                    file_meta.ImplementationVersionName = 'PYDICOM ' + pydicom.__version__
-                
-                # Assign file meta to dataset
-                ds_converted.file_meta = file_meta
-                
-                # Update transfer syntax related elements in main dataset
-                ds_converted.file_meta.TransferSyntaxUID = pydicom.uid.ExplicitVRLittleEndian
-                
-                # Create temp file
-                temp_filepath = filepath + "_converted_explicit_vr.dcm"
-                
-                # Update progress for saving
-                self.conversion_progress.emit(idx + 1, total_files, f"Converting {os.path.basename(filepath)} - saving ({idx + 1}/{total_files})")
-                
-                # Save the converted file
-                ds_converted.save_as(temp_filepath, enforce_file_format=True)
-                
-                # Validate the converted file
-                if self._validate_converted_file(temp_filepath, filepath):
-                    converted_files.append(temp_filepath)
-                    self.temp_files.append(temp_filepath)
-                    self.converted_count += 1
-                    logging.info(f"Successfully converted and validated {os.path.basename(filepath)}")
-                else:
-                    logging.warning(f"Converted file failed validation: {os.path.basename(filepath)}")
-                    # Clean up failed conversion
+
+                done, _ = wait(in_flight, timeout=0.2, return_when=FIRST_COMPLETED)
+                for future in done:
+                    src_path = in_flight.pop(future)
                     try:
-                        os.remove(temp_filepath)
+                        _, converted_path, error = future.result()
                     except Exception as e:
-                        logging.warning(f"Could not remove failed conversion file {temp_filepath}: {e}")
-                    converted_files.append(filepath)  # Use original
-                    
-            except Exception as e:
-                logging.error(f"Failed to convert {filepath}: {e}", exc_info=True)
-                converted_files.append(filepath)  # Use original
-        
-        # Signal conversion complete
-        self.conversion_progress.emit(total_files, total_files, "Conversion complete")
-        
-        return converted_files
+                        converted_path, error = None, str(e)
+                    completed += 1
+                    if converted_path:
+                        with self._spool_lock:
+                            self._spooled[converted_path] = src_path
+                        self.converted_count += 1
+                        work_queue.put(converted_path)
+                    else:
+                        self._spool_slots.release()
+                        logging.warning(f"Sending {os.path.basename(src_path)} unconverted: {error}")
+                        work_queue.put(src_path)
+                    self.conversion_progress.emit(
+                        completed, total, f"Converted {os.path.basename(src_path)} ({completed}/{total})"
+                    )
+        finally:
+            # Files never submitted still go out as they are (or are counted as unsent)
+            for src_path in filepaths[position:]:
+                work_queue.put(src_path)
+            for _ in range(self._sender_count):
+                work_queue.put(_END_OF_QUEUE)
+            self.timing_info['conversion_time'] = time.time() - conversion_start
 
-    def _validate_converted_file(self, converted_path, original_path):
-        """Validate that the converted file is readable and has correct pixel data"""
+    def _release_spooled(self, file_path):
+        """Delete a sent spool file and free its slot; returns the original path"""
+        with self._spool_lock:
+            original = self._spooled.pop(file_path, None)
+        if original is None:
+            return file_path
         try:
-            # Read the converted file
-            ds_converted = pydicom.dcmread(converted_path)
-            ds_original = pydicom.dcmread(original_path)
-            
-            # Check basic DICOM validity
-            if not hasattr(ds_converted, 'SOPInstanceUID'):
-                logging.error("Converted file missing SOPInstanceUID")
-                return False
-            
-            # Check transfer syntax
-            converted_ts = str(ds_converted.file_meta.TransferSyntaxUID)
-            if converted_ts != pydicom.uid.ExplicitVRLittleEndian:
-                logging.error(f"Converted file has wrong transfer syntax: {converted_ts}")
-                return False
-            
-            # Check pixel data accessibility
-            try:
-                pixel_array_converted = ds_converted.pixel_array
-                pixel_array_original = ds_original.pixel_array
-                
-                # Check dimensions match
-                if pixel_array_converted.shape != pixel_array_original.shape:
-                    logging.error(f"Pixel array shapes don't match: {pixel_array_converted.shape} vs {pixel_array_original.shape}")
-                    return False
-                
-                # Check data types are reasonable
-                if pixel_array_converted.dtype not in [np.uint8, np.uint16, np.int16]:
-                    logging.error(f"Unexpected pixel data type: {pixel_array_converted.dtype}")
-                    return False
-                
-                logging.info(f"Validation passed: {pixel_array_converted.shape}, {pixel_array_converted.dtype}")
-                return True
-                
-            except Exception as e:
-                logging.error(f"Cannot access pixel data in converted file: {e}")
-                return False
-                
-        except Exception as e:
-            logging.error(f"Cannot read converted file {converted_path}: {e}")
-            return False
-    
+            os.remove(file_path)
+        except OSError as e:
+            logging.warning(f"Could not remove spool file {file_path}: {e}")
+        self._spool_slots.release()
+        return original
+
     def _cleanup_temp_files(self):
         """Clean up temporary files"""
         for temp_file in self.temp_files:
@@ -604,6 +768,9 @@ class DicomSendWorker(QThread):
                 logging.info(f"Cleaned up temp file: {os.path.basename(temp_file)}")
             except Exception as e:
                 logging.warning(f"Could not remove temp file {temp_file}: {e}")
+        if self._spool_dir:
+            shutil.rmtree(self._spool_dir, ignore_errors=True)
+            self._spool_dir = None
     
     def cancel(self):
         """Cancel the sending operation"""
@@ -7,7 +7,7 @@ from fm_dicom.core.dicomdir_reader import DicomdirReader
 class DicomdirScanWorker(QThread):
     """Worker thread for scanning DICOMDIR files"""
     progress_updated = pyqtSignal(int, int, str)  # current, total, current_file
-    scan_complete = pyqtSignal(list)  # list of DICOM file paths
+    scan_complete = pyqtSignal(list)  # list of (file_path, header) pairs
     scan_failed = pyqtSignal(str)  # error message
     
     def __init__(self, extracted_files):
@@ -31,19 +31,22 @@ class DicomdirScanWorker(QThread):
                     self.progress_updated.emit(idx + 1, len(dicomdir_files), 
                                              f"Reading {os.path.basename(dicomdir_path)}")
                     
-                    file_paths = reader.read_dicomdir(dicomdir_path)
-                    all_dicom_files.extend(file_paths)
+                    # Headers come from the directory records, and only
+                    # files that exist are returned
+                    entries = reader.read_dicomdir(dicomdir_path, records=True)
+                    all_dicom_files.extend(entries)
                     
                     if self.isInterruptionRequested():
                         break
                         
-                # Remove duplicates and verify files exist
+                # Remove files referenced by more than one DICOMDIR
                 unique_files = []
                 seen_files = set()
                 
-                for file_path in all_dicom_files:
-                    if file_path not in seen_files and os.path.exists(file_path):
-                        unique_files.append(file_path)
+                for entry in all_dicom_files:
+                    file_path = entry[0] if isinstance(entry, tuple) else entry
+                    if file_path not in seen_files:
+                        unique_files.append(entry)
                         seen_files.add(file_path)
                         
                 self.scan_complete.emit(unique_files)
@@ -2,10 +2,16 @@ import os
 import shutil
 import zipfile
 import logging
-import pydicom
+import tempfile
 from PyQt6.QtCore import QThread, pyqtSignal
 from fm_dicom.core.path_generator import DicomPathGenerator
 from fm_dicom.core.dicomdir_builder import DicomdirBuilder
+from fm_dicom.core.zip_source import ensure_local_files
+from fm_dicom.core.zip_writer import ParallelZipWriter, COMPRESSION_AUTO
+from fm_dicom.core.file_copy import FileCopier, copy_files, MODE_AUTO, DEFAULT_COPY_WORKERS
+
+# DICOMDIRs larger than this are spooled to a temporary file while generated
+DICOMDIR_SPOOL_BYTES = 16 * 1024 * 1024
 
 
 class ExportWorker(QThread):
@@ -15,16 +21,25 @@ class ExportWorker(QThread):
     export_complete = pyqtSignal(str, dict)  # output_path, statistics
     export_failed = pyqtSignal(str)  # error_message
     
-    def __init__(self, filepaths, export_type, output_path, temp_dir=None):
+    def __init__(self, filepaths, export_type, output_path, temp_dir=None,
+                 zip_compression=COMPRESSION_AUTO, zip_workers=None,
+                 copy_mode=MODE_AUTO, copy_workers=DEFAULT_COPY_WORKERS):
         super().__init__()
         self.filepaths = filepaths
         self.export_type = export_type  # "directory", "zip", "dicomdir_zip"
         self.output_path = output_path
         self.temp_dir = temp_dir
+        self.zip_compression = zip_compression  # "auto", "deflate" or "store"
+        self.zip_workers = zip_workers  # Compression threads (None = one per CPU core)
+        self.copy_mode = copy_mode  # "auto", "hardlink" or "copy" for directory exports
+        self.copy_workers = copy_workers
         self.cancelled = False
         
     def run(self):
         try:
+            # Members of a loaded ZIP are written out before they are copied
+            ensure_local_files(self.filepaths)
+
             if self.export_type == "directory":
                 self._export_directory()
             elif self.export_type == "zip":
@@ -49,33 +64,57 @@ class ExportWorker(QThread):
         exported_count = 0
         errors = []
         total_files = len(self.filepaths)
-        
-        for idx, fp in enumerate(self.filepaths):
-            if self.cancelled:
-                return
-                
-            try:
-                out_path = os.path.join(self.output_path, os.path.basename(fp))
-                shutil.copy2(fp, out_path)
+        os.makedirs(self.output_path, exist_ok=True)
+
+        # Reflinks/hard links where the filesystem allows, copied on a pool otherwise
+        copier = FileCopier(self.copy_mode)
+        pairs = self._directory_pairs()
+        finished = 0
+        for fp, _, strategy, error in copy_files(pairs, copier, self.copy_workers, lambda: self.cancelled):
+            finished += 1
+            if error is None:
                 exported_count += 1
-                
-                # Emit progress
-                self.progress_updated.emit(idx + 1, total_files, f"Copying {os.path.basename(fp)}")
-                
-            except Exception as e:
-                errors.append(f"Failed to export {os.path.basename(fp)}: {e}")
-                logging.error(f"Failed to copy {fp}: {e}")
+            else:
+                errors.append(f"Failed to export {os.path.basename(fp)}: {error}")
+                logging.error(f"Failed to copy {fp}: {error}")
+
+            # Emit progress
+            self.progress_updated.emit(finished, total_files, f"Copying {os.path.basename(fp)}")
+
+        if self.cancelled:
+            return
         
         # Calculate statistics
         stats = {
             'exported_count': exported_count,
             'total_files': total_files,
             'errors': errors,
+            'copy_strategy': copier.summary(),
+            'copy_strategies': dict(copier.counts),
             'export_type': 'Directory'
         }
         
         self.export_complete.emit(self.output_path, stats)
         
+    def _directory_pairs(self):
+        """(source, destination) pairs with a unique file name per source.
+
+        Files from different series often share a name (e.g. IM0001), so a
+        repeated name gets a numbered suffix instead of overwriting.
+        """
+        pairs = []
+        taken = set()
+        for fp in self.filepaths:
+            name = os.path.basename(fp)
+            stem, ext = os.path.splitext(name)
+            suffix = 1
+            while os.path.normcase(name) in taken:
+                name = f"{stem}_{suffix}{ext}"
+                suffix += 1
+            taken.add(os.path.normcase(name))
+            pairs.append((fp, os.path.join(self.output_path, name)))
+        return pairs
+
     def _export_zip(self):
         """Export files to ZIP archive"""
         self.stage_changed.emit("Creating ZIP archive...")
@@ -86,20 +125,26 @@ class ExportWorker(QThread):
         
         try:
             with zipfile.ZipFile(self.output_path, 'w', compression=zipfile.ZIP_DEFLATED) as zipf:
-                for idx, fp in enumerate(self.filepaths):
+                writer = ParallelZipWriter(zipf, self.zip_compression, self.zip_workers)
+                finished = 0
+
+                def record(done):
+                    nonlocal zipped_count, finished
+                    for arcname, error, _ in done:
+                        finished += 1
+                        if error is None:
+                            zipped_count += 1
+                        else:
+                            errors.append(f"Failed to add {arcname}: {error}")
+                        # Emit progress
+                        self.progress_updated.emit(finished, total_files, f"Adding {arcname}")
+
+                for fp in self.filepaths:
                     if self.cancelled:
+                        writer.cancel()
                         return
-                        
-                    try:
-                        zipf.write(fp, arcname=os.path.basename(fp))
-                        zipped_count += 1
-                        
-                        # Emit progress
-                        self.progress_updated.emit(idx + 1, total_files, f"Adding {os.path.basename(fp)}")
-                        
-                    except Exception as e:
-                        errors.append(f"Failed to add {os.path.basename(fp)}: {e}")
-                        logging.error(f"Failed to add to ZIP {fp}: {e}")
+                    record(writer.add(fp, os.path.basename(fp)))
+                record(writer.finish())
                         
         except Exception as e:
             self.export_failed.emit(f"Failed to create ZIP: {e}")
@@ -110,127 +155,114 @@ class ExportWorker(QThread):
             'exported_count': zipped_count,
             'total_files': total_files,
             'errors': errors,
+            'stored_count': writer.stored,
+            'deflated_count': writer.deflated,
             'export_type': 'ZIP'
         }
         
         self.export_complete.emit(self.output_path, stats)
         
     def _export_dicomdir_zip(self):
-        """Export files as ZIP with DICOMDIR"""
+        """Export files as ZIP with DICOMDIR.
+
+        Each header is read once; the archive layout and the DICOMDIR are
+        built from that metadata and the files are written straight into the
+        ZIP under their DICOM paths, so nothing is copied to a temporary tree.
+        """
         try:
-            # Step 1: Analyze files (10%)
+            # Step 1: Read headers once (0-20%)
             self.stage_changed.emit("Analyzing DICOM files...")
-            self.progress_updated.emit(10, 100, "Analyzing file structure...")
-            
+            metadata = self._read_export_metadata()
+
             if self.cancelled:
                 return
-                
-            path_generator = DicomPathGenerator()
-            file_mapping = path_generator.generate_paths(self.filepaths)
-            
+
+            file_mapping = DicomPathGenerator.generate_paths_from_metadata(metadata.items())
             if not file_mapping:
                 raise Exception("No valid DICOM files found for export")
-            
-            # Step 2: Copy files to structure (20-70%)
-            self.stage_changed.emit("Creating DICOM directory structure...")
-            copied_mapping = self._copy_files_to_dicom_structure(file_mapping)
-            
-            if self.cancelled:
-                return
-            
-            # Step 3: Generate DICOMDIR (70-80%)
-            self.stage_changed.emit("Generating DICOMDIR...")
-            self.progress_updated.emit(75, 100, "Creating DICOMDIR file...")
-            
-            builder = DicomdirBuilder("DICOM_EXPORT")
-            builder.add_dicom_files(copied_mapping)
-            dicomdir_path = os.path.join(self.temp_dir, "DICOMDIR")
-            builder.generate_dicomdir(dicomdir_path)
-            
+
+            # Step 2: Stream files into the archive (20-95%)
+            self.stage_changed.emit("Creating ZIP archive...")
+            errors = []
+            written = []
+            total_files = len(file_mapping)
+            members = {dicom_path: original_path for original_path, dicom_path in file_mapping.items()}
+            with zipfile.ZipFile(self.output_path, 'w', compression=zipfile.ZIP_DEFLATED) as zipf:
+                writer = ParallelZipWriter(zipf, self.zip_compression, self.zip_workers)
+
+                def record(done):
+                    for dicom_path, error, _ in done:
+                        original_path = members[dicom_path]
+                        if error is None:
+                            written.append((dicom_path, metadata[original_path]))
+                        else:
+                            errors.append(f"Failed to add {os.path.basename(original_path)}: {error}")
+                        zip_progress = 20 + int((len(written) + len(errors)) / total_files * 75)
+                        self.progress_updated.emit(zip_progress, 100, f"Adding {os.path.basename(original_path)} to ZIP")
+
+                for original_path, dicom_path in file_mapping.items():
+                    if self.cancelled:
+                        writer.cancel()
+                        break
+                    record(writer.add(
+                        original_path, dicom_path,
+                        transfer_syntax=metadata[original_path].get('TransferSyntaxUID')
+                    ))
+                if not self.cancelled:
+                    record(writer.finish())
+
+                if not self.cancelled:
+                    # Step 3: Generate DICOMDIR for the members written (95-100%)
+                    self.stage_changed.emit("Generating DICOMDIR...")
+                    self.progress_updated.emit(95, 100, "Creating DICOMDIR file...")
+                    builder = DicomdirBuilder("DICOM_EXPORT")
+                    builder.add_metadata(written)
+                    # The builder seeks back to link records, so spool it
+                    # (in memory unless it is large) before adding it
+                    with tempfile.SpooledTemporaryFile(max_size=DICOMDIR_SPOOL_BYTES) as dicomdir:
+                        builder.generate_dicomdir(dicomdir)
+                        dicomdir.seek(0)
+                        with zipf.open("DICOMDIR", 'w') as member:
+                            shutil.copyfileobj(dicomdir, member)
+
             if self.cancelled:
+                self._remove_partial_output()
                 return
-            
-            # Step 4: Create ZIP (80-100%)
-            self.stage_changed.emit("Creating ZIP archive...")
-            self._create_zip_from_temp_directory()
-            
+
             # Calculate statistics
-            total_size = sum(os.path.getsize(f) for f in self.filepaths if os.path.exists(f))
+            total_size = sum(values['file_size'] for _, values in written)
             stats = {
-                'exported_count': len(file_mapping),
+                'exported_count': len(written),
                 'total_files': len(self.filepaths),
                 'total_size_mb': total_size / (1024 * 1024),
-                'patients': len(set(self._extract_patient_ids())),
-                'errors': [],
+                'patients': len({str(values.get('PatientID') or 'UNKNOWN') for _, values in written}),
+                'errors': errors,
+                'stored_count': writer.stored,
+                'deflated_count': writer.deflated,
                 'export_type': 'DICOMDIR ZIP'
             }
-            
+
             self.export_complete.emit(self.output_path, stats)
-            
+
         except Exception as e:
             self.export_failed.emit(f"DICOMDIR ZIP export failed: {e}")
-    
-    def _copy_files_to_dicom_structure(self, file_mapping):
-        """Copy files to DICOM standard structure with progress updates"""
-        copied_mapping = {}
-        total_files = len(file_mapping)
-        
-        for idx, (original_path, dicom_path) in enumerate(file_mapping.items()):
+
+    def _read_export_metadata(self):
+        """Read the export metadata of every file once, in file order"""
+        metadata = {}
+        total_files = len(self.filepaths)
+        for idx, fp in enumerate(self.filepaths):
             if self.cancelled:
                 break
-                
-            full_target_path = os.path.join(self.temp_dir, dicom_path)
-            
             try:
-                # Create directory structure
-                os.makedirs(os.path.dirname(full_target_path), exist_ok=True)
-                
-                # Copy file
-                shutil.copy2(original_path, full_target_path)
-                copied_mapping[original_path] = full_target_path
-                
+                metadata[fp] = DicomPathGenerator.read_metadata(fp)
             except Exception as e:
-                logging.error(f"Failed to copy {original_path}: {e}")
-                continue
-            
-            # Update progress (20% to 70% range)
-            file_progress = 20 + int((idx + 1) / total_files * 50)
-            self.progress_updated.emit(file_progress, 100, f"Copying {os.path.basename(original_path)}")
-        
-        return copied_mapping
-    
-    def _create_zip_from_temp_directory(self):
-        """Create ZIP from temporary directory with progress"""
-        # Get all files in temp directory
-        all_files = []
-        for root, dirs, files in os.walk(self.temp_dir):
-            for file in files:
-                all_files.append(os.path.join(root, file))
-        
-        total_files = len(all_files)
-        
-        with zipfile.ZipFile(self.output_path, 'w', compression=zipfile.ZIP_DEFLATED) as zipf:
-            for idx, file_path in enumerate(all_files):
-                if self.cancelled:
-                    break
-                    
-                arcname = os.path.relpath(file_path, self.temp_dir)
-                zipf.write(file_path, arcname)
-                
-                # Update progress (80% to 100% range)
-                zip_progress = 80 + int((idx + 1) / total_files * 20)
-                self.progress_updated.emit(zip_progress, 100, f"Adding {os.path.basename(file_path)} to ZIP")
-    
-    def _extract_patient_ids(self):
-        """Extract unique patient IDs from file list"""
-        patient_ids = []
-        for fp in self.filepaths:
-            try:
-                ds = pydicom.dcmread(fp, stop_before_pixels=True)
-                patient_id = str(getattr(ds, 'PatientID', 'UNKNOWN'))
-                patient_ids.append(patient_id)
-            except Exception as e:
-                import logging
-                logging.debug(f"Could not read patient ID from {fp}: {e}")
-                patient_ids.append('UNKNOWN')
-        return patient_ids
\ No newline at end of file
+                logging.warning(f"Could not read DICOM file {fp}: {e}")
+            self.progress_updated.emit(int((idx + 1) / total_files * 20), 100, f"Reading {os.path.basename(fp)}")
+        return metadata
+
+    def _remove_partial_output(self):
+        try:
+            os.remove(self.output_path)
+        except OSError:
+            pass
@@ -0,0 +1,105 @@
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from fm_dicom.core.dicom_writer import read_for_edit
+from fm_dicom.core.zip_source import ensure_local
+
+
+def default_save_workers():
+    """Number of files read, edited and written concurrently by default"""
+    return min(8, (os.cpu_count() or 1) + 2)
+
+
+class TagSaveWorker(QThread):
+    """Worker thread that applies tag edits to many files with a pool of threads.
+
+    ``apply_edits(file_path, ds)`` modifies a dataset in place and returns
+    ``(changed, audit_entries)``. It runs on pool threads, so it must not
+    touch widgets; audit entries are handed back in the result for the GUI
+    thread to record. At most ``2 * max_workers`` files are in flight, which
+    keeps reads, edits and writes overlapping without holding every dataset
+    in memory at once.
+    """
+    progress_updated = pyqtSignal(int, int, str)  # completed, total, filename
+    save_complete = pyqtSignal(dict)  # result
+    save_failed = pyqtSignal(str)  # error_message
+
+    def __init__(self, filepaths, apply_edits, max_workers=None, enforce_file_format=False):
+        super().__init__()
+        self.filepaths = list(filepaths)
+        self.apply_edits = apply_edits
+        self.max_workers = max(1, max_workers or default_save_workers())
+        self.enforce_file_format = enforce_file_format
+        self.cancelled = False
+        self.result = None
+
+    def cancel(self):
+        """Stop starting new files; files already in flight are finished"""
+        self.cancelled = True
+
+    def _save_file(self, file_path):
+        if self.cancelled:
+            return False, []
+        # Only the header is read; pixel data is copied across unchanged
+        editable = read_for_edit(ensure_local(file_path))
+        changed, audit_entries = self.apply_edits(file_path, editable.dataset)
+        if changed:
+            editable.save(self.enforce_file_format)
+        return changed, audit_entries
+
+    def run(self):
+        try:
+            self.result = self._run_pool()
+            self.save_complete.emit(self.result)
+        except Exception as e:
+            logging.error(f"Tag save worker failed: {e}", exc_info=True)
+            self.save_failed.emit(str(e))
+
+    def _run_pool(self):
+        total = len(self.filepaths)
+        # One signal per file would flood the GUI thread on large selections
+        step = max(1, total // 200)
+        updated_files = []
+        failed_files = []
+        audit_entries = []
+        completed = 0
+        window = self.max_workers * 2
+        pending_paths = iter(self.filepaths)
+        in_flight = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="tag-save") as pool:
+            while True:
+                while len(in_flight) < window and not self.cancelled:
+                    file_path = next(pending_paths, None)
+                    if file_path is None:
+                        break
+                    in_flight[pool.submit(self._save_file, file_path)] = file_path
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    file_path = in_flight.pop(future)
+                    completed += 1
+                    try:
+                        changed, file_audit = future.result()
+                        if changed:
+                            updated_files.append(file_path)
+                            audit_entries.extend(file_audit)
+                    except Exception as e:
+                        logging.error(f"Failed to process file {file_path}: {e}", exc_info=True)
+                        failed_files.append(f"{os.path.basename(file_path)}: {str(e)}")
+                    if completed % step == 0 or completed == total:
+                        self.progress_updated.emit(completed, total, file_path)
+
+        return {
+            "total_files": total,
+            "updated": len(updated_files),
+            "updated_files": updated_files,
+            "failed_files": failed_files,
+            "audit_entries": audit_entries,
+            "cancelled": self.cancelled,
+        }
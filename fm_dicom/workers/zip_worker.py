@@ -38,4 +38,33 @@ class ZipExtractionWorker(QThread):
                 
         except Exception as e:
             error_msg = f"Failed to extract ZIP file: {str(e)}"
-            self.extraction_failed.emit(error_msg)
\ No newline at end of file
+            self.extraction_failed.emit(error_msg)
+
+class ZipHeaderScanWorker(QThread):
+    """Worker thread that reads DICOM headers straight from ZIP member streams"""
+    progress_updated = pyqtSignal(int, int, str)  # current, total, filename
+    scan_complete = pyqtSignal(list)  # list of (member_path, InstanceRecord)
+    scan_failed = pyqtSignal(str)  # error_message
+
+    def __init__(self, source):
+        super().__init__()
+        self.source = source
+
+    def run(self):
+        try:
+            total_files = len(self.source.member_paths)
+            # Large archives would flood the GUI thread with one signal per member
+            step = max(1, total_files // 200)
+            dicom_files = []
+            for i, (member_path, record) in enumerate(
+                self.source.iter_headers(self.isInterruptionRequested)
+            ):
+                if (i + 1) % step == 0:
+                    self.progress_updated.emit(i + 1, total_files, member_path)
+                if record is not None:
+                    dicom_files.append((member_path, record))
+
+            self.scan_complete.emit(dicom_files)
+
+        except Exception as e:
+            self.scan_failed.emit(f"Failed to read ZIP file: {str(e)}")
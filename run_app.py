@@ -34,4 +34,7 @@ def main():
         return 1
 
 if __name__ == "__main__":
+    # Required for the header parsing process pool in frozen (PyInstaller) builds
+    import multiprocessing
+    multiprocessing.freeze_support()
     sys.exit(main())
\ No newline at end of file
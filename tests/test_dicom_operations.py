@@ -9,6 +9,7 @@ from unittest.mock import Mock, patch, MagicMock
 import pytest
 import pydicom
 
+from fm_dicom.core.dicomdir_builder import DicomdirBuilder
 from fm_dicom.core.dicomdir_reader import DicomdirReader
 from fm_dicom.core.path_generator import DicomPathGenerator
 
@@ -177,6 +178,111 @@ class TestDicomdirReader:
         # Should return None
         assert file_path is None
 
+    def test_read_dicomdir_records_from_directory_records(self, dicomdir_reader, multiple_dicom_files, temp_dir):
+        """Test that records come from the DICOMDIR and missing files are dropped with one listing per directory."""
+        entries = [
+            (os.path.basename(path), DicomPathGenerator.read_metadata(path))
+            for path in multiple_dicom_files
+        ]
+        missing = dict(entries[0][1], SOPInstanceUID='1.2.3.999')
+        entries.append(('missing.dcm', missing))
+        builder = DicomdirBuilder("TEST")
+        builder.add_metadata(entries)
+        dicomdir_path = os.path.join(temp_dir, 'DICOMDIR')
+        builder.generate_dicomdir(dicomdir_path)
+
+        with patch('os.scandir', wraps=os.scandir) as scandir, \
+                patch('pydicom.dcmread', wraps=pydicom.dcmread) as dcmread:
+            records = dicomdir_reader.read_dicomdir(dicomdir_path, records=True)
+
+        dcmread.assert_called_once()
+        scandir.assert_called_once_with(temp_dir)
+        assert sorted(path for path, _ in records) == sorted(multiple_dicom_files)
+        by_path = dict(records)
+        for path in multiple_dicom_files:
+            ds = pydicom.dcmread(path)
+            record = by_path[path]
+            assert record.PatientID == ds.PatientID
+            assert record.StudyInstanceUID == ds.StudyInstanceUID
+            assert record.SeriesInstanceUID == ds.SeriesInstanceUID
+            assert record.SOPInstanceUID == ds.SOPInstanceUID
+            assert record.Modality == 'CT'
+            assert record.transfer_syntax_uid == pydicom.uid.ExplicitVRLittleEndian
+        assert sorted(dicomdir_reader.read_dicomdir(dicomdir_path)) == sorted(multiple_dicom_files)
+
+    def test_existing_files_ignores_case_where_the_platform_does(self, temp_dir):
+        """Test that file IDs match files with different case on case-insensitive platforms."""
+        from fm_dicom.core import dicomdir_reader as reader_module
+        with open(os.path.join(temp_dir, 'im0001.dcm'), 'wb') as f:
+            f.write(b'')
+        wanted = os.path.join(temp_dir, 'IM0001.DCM')
+        missing = os.path.join(temp_dir, 'IM0002.DCM')
+
+        # Windows: normcase folds case, so the directory listing matches
+        with patch('os.path.normcase', side_effect=str.lower), \
+                patch('os.path.exists', return_value=False) as exists:
+            assert reader_module._existing_files([wanted, missing]) == {wanted}
+        assert exists.call_count == 1  # Only the name the listing did not match
+
+        # macOS: normcase keeps case, unmatched names are checked one by one
+        with patch('os.path.exists', side_effect=lambda path: path == wanted):
+            assert reader_module._existing_files([wanted, missing]) == {wanted}
+
+    def test_read_dicomdir_decodes_specific_character_set(self, dicomdir_reader, sample_dicom_file, temp_dir):
+        """Test that record text is decoded with the DICOMDIR's character set."""
+        from pydicom.fileset import FileSet
+        ds = pydicom.dcmread(sample_dicom_file)
+        ds.SpecificCharacterSet = 'ISO_IR 192'
+        ds.PatientName = '山田^太郎'
+        ds.StudyTime = '120000'
+        ds.StudyID = '1'
+        file_set = FileSet()
+        file_set.add(ds)
+        output = os.path.join(temp_dir, 'fileset')
+        file_set.write(output)
+
+        records = dicomdir_reader.read_dicomdir(os.path.join(output, 'DICOMDIR'), records=True)
+
+        assert len(records) == 1
+        record = records[0][1]
+        assert record.PatientName == '山田^太郎'
+        assert record.PatientID == ds.PatientID
+
+    def test_read_dicomdir_without_offsets_uses_sequence_order(self, dicomdir_reader, temp_dir):
+        """Test that images inherit the preceding patient, study and series when offsets are unset."""
+        ds = pydicom.Dataset()
+        ds.OffsetOfTheFirstDirectoryRecordOfTheRootDirectoryEntity = 0
+        ds.DirectoryRecordSequence = pydicom.Sequence()
+        for p in range(2):
+            for record_type, values in (
+                ('PATIENT', {'PatientID': f'PID{p}'}),
+                ('STUDY', {'StudyInstanceUID': f'1.2.{p}'}),
+                ('SERIES', {'SeriesInstanceUID': f'1.2.{p}.1', 'Modality': 'MR'}),
+                ('IMAGE', {'ReferencedFileID': f'IMG{p}', 'ReferencedSOPInstanceUIDInFile': f'1.2.{p}.1.1'}),
+            ):
+                record = pydicom.Dataset()
+                record.OffsetOfTheNextDirectoryRecord = 0
+                record.OffsetOfReferencedLowerLevelDirectoryEntity = 0
+                record.DirectoryRecordType = record_type
+                for keyword, value in values.items():
+                    setattr(record, keyword, value)
+                ds.DirectoryRecordSequence.append(record)
+            with open(os.path.join(temp_dir, f'IMG{p}'), 'wb') as f:
+                f.write(b'')
+        ds.file_meta = pydicom.dataset.FileMetaDataset()
+        ds.file_meta.MediaStorageSOPClassUID = pydicom.uid.MediaStorageDirectoryStorage
+        ds.file_meta.MediaStorageSOPInstanceUID = "1.2.3.4.5"
+        ds.file_meta.TransferSyntaxUID = pydicom.uid.ExplicitVRLittleEndian
+        dicomdir_path = os.path.join(temp_dir, 'DICOMDIR')
+        ds.save_as(dicomdir_path, enforce_file_format=True)
+
+        records = dicomdir_reader.read_dicomdir(dicomdir_path, records=True)
+
+        assert [(r.PatientID, r.StudyInstanceUID, r.SeriesInstanceUID, r.SOPInstanceUID) for _, r in records] == [
+            ('PID0', '1.2.0', '1.2.0.1', '1.2.0.1.1'),
+            ('PID1', '1.2.1', '1.2.1.1', '1.2.1.1.1'),
+        ]
+
 
 class TestDicomPathGenerator:
     """Test DicomPathGenerator functionality."""
@@ -0,0 +1,147 @@
+"""
+Tests for header-only patching and atomic DICOM writes.
+"""
+
+import os
+import shutil
+from unittest.mock import patch
+
+import pytest
+import pydicom
+from pydicom.data import get_testdata_file
+
+from fm_dicom.core.dicom_writer import read_for_edit, save_dataset_atomic
+
+
+def _tail(file_path, offset):
+    with open(file_path, "rb") as f:
+        f.seek(offset)
+        return f.read()
+
+
+class TestReadForEdit:
+    """Test header-only reads and patched saves."""
+
+    def test_patch_keeps_pixel_data_bytes(self, sample_dicom_file):
+        """Test that editing a header copies the pixel data element unchanged."""
+        editable = read_for_edit(sample_dicom_file)
+        assert editable.header_only
+        assert "PixelData" not in editable.dataset
+        pixel_bytes = _tail(sample_dicom_file, editable.pixel_offset)
+
+        editable.dataset.PatientName = "Edited^Name^With^A^Longer^Value"
+        editable.save()
+
+        ds = pydicom.dcmread(sample_dicom_file)
+        assert ds.PatientName == "Edited^Name^With^A^Longer^Value"
+        assert ds.PatientID == "12345"
+        assert _tail(sample_dicom_file, read_for_edit(sample_dicom_file).pixel_offset) == pixel_bytes
+
+    def test_patch_encapsulated_pixel_data(self, temp_dir):
+        """Test that compressed pixel data fragments survive a header edit."""
+        file_path = os.path.join(temp_dir, "rle.dcm")
+        shutil.copy(get_testdata_file("SC_rgb_rle.dcm"), file_path)
+        original_pixels = pydicom.dcmread(file_path).PixelData
+
+        editable = read_for_edit(file_path)
+        assert editable.header_only
+        editable.dataset.PatientID = "PATCHED"
+        editable.save()
+
+        ds = pydicom.dcmread(file_path)
+        assert ds.PatientID == "PATCHED"
+        assert ds.PixelData == original_pixels
+
+    def test_save_does_not_read_pixel_data(self, sample_dicom_file):
+        """Test that a patched save never parses the full file."""
+        editable = read_for_edit(sample_dicom_file)
+        editable.dataset.PatientID = "NO-FULL-READ"
+
+        with patch("fm_dicom.core.dicom_writer.pydicom.dcmread") as mock_read:
+            editable.save()
+
+        mock_read.assert_not_called()
+        assert pydicom.dcmread(sample_dicom_file).PatientID == "NO-FULL-READ"
+
+    def test_edit_after_pixel_data_falls_back(self, sample_dicom_file):
+        """Test that tags added after the pixel data force a full rewrite."""
+        editable = read_for_edit(sample_dicom_file)
+        editable.dataset.PatientID = "FALLBACK"
+        editable.dataset.add_new((0x7FE1, 0x0010), "LO", "Private Creator")
+        editable.save()
+
+        ds = pydicom.dcmread(sample_dicom_file)
+        assert ds.PatientID == "FALLBACK"
+        assert ds[0x7FE1, 0x0010].value == "Private Creator"
+        assert len(ds.PixelData) == 512 * 512 * 2
+
+    def test_trailing_elements_are_read_in_full(self, sample_dicom_file):
+        """Test that files with elements after the pixel data are not patched."""
+        ds = pydicom.dcmread(sample_dicom_file)
+        ds.add_new((0x7FE1, 0x0010), "LO", "Private Creator")
+        ds.save_as(sample_dicom_file, enforce_file_format=True)
+
+        editable = read_for_edit(sample_dicom_file)
+        assert not editable.header_only
+        assert (0x7FE1, 0x0010) in editable.dataset
+
+        editable.dataset.remove_private_tags()
+        editable.save()
+        assert (0x7FE1, 0x0010) not in pydicom.dcmread(sample_dicom_file)
+
+    def test_file_without_preamble_is_read_in_full(self, sample_dicom_file, temp_dir):
+        """Test that raw datasets without file meta are rewritten in full."""
+        raw_path = os.path.join(temp_dir, "raw.dcm")
+        ds = pydicom.dcmread(sample_dicom_file)
+        del ds.file_meta
+        ds.save_as(raw_path, implicit_vr=True, little_endian=True)
+
+        editable = read_for_edit(raw_path, force=True)
+        assert not editable.header_only
+        editable.dataset.PatientID = "RAW"
+        editable.save()
+        assert pydicom.dcmread(raw_path, force=True).PatientID == "RAW"
+
+    def test_patch_keeps_incomplete_file_meta(self, temp_dir):
+        """Test that a patched save leaves sparse file meta as it was unless asked to enforce."""
+        ds = pydicom.Dataset()
+        ds.PatientID = "SPARSE"
+        ds.SOPClassUID = "1.2.840.10008.5.1.4.1.1.2"
+        ds.SOPInstanceUID = "1.2.3.4.5"
+        ds.PixelData = b"\0" * 16
+        # No Media Storage SOP Class/Instance UIDs or implementation UID
+        file_meta = pydicom.dataset.FileMetaDataset()
+        file_meta.TransferSyntaxUID = pydicom.uid.ExplicitVRLittleEndian
+        file_path = os.path.join(temp_dir, "sparse_meta.dcm")
+        pydicom.dataset.FileDataset(file_path, ds, file_meta=file_meta, preamble=b"\0" * 128).save_as(
+            file_path, implicit_vr=False, little_endian=True
+        )
+
+        editable = read_for_edit(file_path)
+        assert editable.header_only
+        editable.dataset.PatientID = "EDITED"
+        editable.save()
+
+        saved = pydicom.dcmread(file_path)
+        assert saved.PatientID == "EDITED"
+        assert "MediaStorageSOPInstanceUID" not in saved.file_meta
+
+        editable = read_for_edit(file_path)
+        editable.save(enforce_file_format=True)
+        assert pydicom.dcmread(file_path).file_meta.MediaStorageSOPInstanceUID == "1.2.3.4.5"
+
+
+class TestSaveDatasetAtomic:
+    """Test atomic dataset writes."""
+
+    def test_atomic_save_keeps_original_on_error(self, sample_dicom_file):
+        """Test that a failed write leaves the original file intact."""
+        original = open(sample_dicom_file, "rb").read()
+        ds = pydicom.dcmread(sample_dicom_file)
+
+        with patch.object(ds, "save_as", side_effect=OSError("disk full")):
+            with pytest.raises(OSError):
+                save_dataset_atomic(ds, sample_dicom_file)
+
+        assert open(sample_dicom_file, "rb").read() == original
+        assert os.listdir(os.path.dirname(sample_dicom_file)) == [os.path.basename(sample_dicom_file)]
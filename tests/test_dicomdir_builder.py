@@ -0,0 +1,107 @@
+"""
+Tests for DICOMDIR generation.
+"""
+
+import io
+import os
+
+import pydicom
+
+from fm_dicom.core.dicomdir_builder import DicomdirBuilder
+
+
+def _entries(patients=2, studies=2, series=2, images=3):
+    """(file_id, metadata) pairs for a synthetic file set"""
+    entries = []
+    for p in range(patients):
+        for st in range(studies):
+            for se in range(series):
+                for i in range(images):
+                    entries.append((f"DICOM/PAT{p}/STU{st}/SER{se}/IMG{i}", {
+                        'PatientID': f'PID{p}',
+                        'PatientName': f'Patient^{p}',
+                        'StudyInstanceUID': f'1.2.3.{p}.{st}',
+                        'StudyDate': f'2024010{st + 1}',
+                        'SeriesInstanceUID': f'1.2.3.{p}.{st}.{se}',
+                        'SeriesNumber': str(se + 1),
+                        'Modality': 'CT',
+                        'SOPClassUID': '1.2.840.10008.5.1.4.1.1.2',
+                        'SOPInstanceUID': f'1.2.3.{p}.{st}.{se}.{i}',
+                        # Reverse order, so records are sorted on write
+                        'InstanceNumber': str(images - i),
+                        'TransferSyntaxUID': pydicom.uid.ExplicitVRLittleEndian,
+                    }))
+    return entries
+
+
+def _generate(entries):
+    builder = DicomdirBuilder("TEST")
+    builder.add_metadata(entries)
+    output = io.BytesIO()
+    builder.generate_dicomdir(output)
+    output.seek(0)
+    return builder, pydicom.dcmread(output)
+
+
+def _children(records, offset):
+    """Records reached from ``offset`` by following the next-record chain"""
+    chain = []
+    while offset:
+        record = records[offset]
+        chain.append(record)
+        offset = record.OffsetOfTheNextDirectoryRecord
+    return chain
+
+
+class TestDicomdirBuilder:
+    """Test linking metadata into a DICOMDIR."""
+
+    def test_add_metadata_links_hierarchy(self):
+        """Test that instances are grouped by patient, study and series."""
+        builder = DicomdirBuilder()
+        builder.add_metadata(_entries())
+
+        assert len(builder.patients) == 2
+        assert len(builder.studies) == 4
+        assert len(builder.series) == 8
+        assert builder.image_count == 24
+        patient = builder.patients['PID1']
+        assert list(patient['studies']) == ['1.2.3.1.0', '1.2.3.1.1']
+        assert len(patient['studies']['1.2.3.1.0']['series']['1.2.3.1.0.1']['images']) == 3
+
+    def test_record_offsets_link_every_level(self):
+        """Test that the offsets written in one pass form the directory tree."""
+        _, ds = _generate(_entries())
+        records = {record.seq_item_tell: record for record in ds.DirectoryRecordSequence}
+        assert len(records) == 2 + 4 + 8 + 24
+
+        patients = _children(records, ds.OffsetOfTheFirstDirectoryRecordOfTheRootDirectoryEntity)
+        assert [p.PatientID for p in patients] == ['PID0', 'PID1']
+        assert ds.OffsetOfTheLastDirectoryRecordOfTheRootDirectoryEntity == patients[-1].seq_item_tell
+
+        for patient in patients:
+            studies = _children(records, patient.OffsetOfReferencedLowerLevelDirectoryEntity)
+            assert [s.DirectoryRecordType for s in studies] == ['STUDY', 'STUDY']
+            for study in studies:
+                series = _children(records, study.OffsetOfReferencedLowerLevelDirectoryEntity)
+                assert [s.SeriesNumber for s in series] == [1, 2]
+                for one_series in series:
+                    assert one_series.SeriesInstanceUID.startswith(study.StudyInstanceUID)
+                    images = _children(records, one_series.OffsetOfReferencedLowerLevelDirectoryEntity)
+                    assert [i.InstanceNumber for i in images] == [1, 2, 3]
+                    assert all(i.OffsetOfReferencedLowerLevelDirectoryEntity == 0 for i in images)
+                    assert all(i.ReferencedFileID[0] == 'DICOM' for i in images)
+
+    def test_generate_to_path(self, temp_dir):
+        """Test writing the DICOMDIR to a file path."""
+        builder = DicomdirBuilder("TEST")
+        builder.add_metadata(_entries(patients=1, studies=1, series=1, images=2))
+        path = os.path.join(temp_dir, 'DICOMDIR')
+
+        builder.generate_dicomdir(path)
+
+        ds = pydicom.dcmread(path)
+        assert ds.file_meta.MediaStorageSOPClassUID == '1.2.840.10008.1.3.10'
+        assert ds.FileSetID == 'TEST'
+        assert [r.DirectoryRecordType for r in ds.DirectoryRecordSequence] == ['PATIENT', 'STUDY', 'SERIES', 'IMAGE', 'IMAGE']
+        assert ds.DirectoryRecordSequence[-1].OffsetOfTheNextDirectoryRecord == 0
@@ -0,0 +1,137 @@
+"""
+Tests for export copy strategies.
+"""
+
+import os
+import errno
+import shutil
+from unittest.mock import patch
+
+import pytest
+
+from fm_dicom.core import file_copy
+from fm_dicom.core.file_copy import (
+    FileCopier, copy_files, MODE_AUTO, MODE_COPY, MODE_HARDLINK,
+    STRATEGY_COPY, STRATEGY_HARDLINK, STRATEGY_REFLINK, STRATEGY_COPY_FILE_RANGE,
+)
+
+
+def _read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+class TestFileCopier:
+    """Test strategy selection and fallback."""
+
+    def test_auto_copy_matches_source(self, sample_dicom_file, temp_dir):
+        """Test that the auto strategy produces an identical file with the source's mtime."""
+        dst = os.path.join(temp_dir, 'out.dcm')
+        copier = FileCopier(MODE_AUTO)
+
+        strategy = copier.copy(sample_dicom_file, dst)
+
+        assert strategy in (STRATEGY_REFLINK, STRATEGY_COPY_FILE_RANGE, STRATEGY_COPY)
+        assert _read(dst) == _read(sample_dicom_file)
+        assert int(os.stat(dst).st_mtime) == int(os.stat(sample_dicom_file).st_mtime)
+        assert copier.summary() == strategy
+
+    def test_unsupported_strategy_is_not_retried(self, multiple_dicom_files, temp_dir):
+        """Test that a refused reflink falls back and is skipped for later files."""
+        copier = FileCopier(MODE_AUTO)
+        refused = OSError(errno.EOPNOTSUPP, 'Operation not supported')
+        with patch.object(file_copy, '_reflink', side_effect=refused) as reflink, \
+                patch.object(file_copy, 'fcntl', create=True):
+            strategies = [
+                copier.copy(path, os.path.join(temp_dir, f'out_{i}.dcm'))
+                for i, path in enumerate(multiple_dicom_files)
+            ]
+
+        assert reflink.call_count == 1
+        assert STRATEGY_REFLINK not in strategies
+        for i, path in enumerate(multiple_dicom_files):
+            assert _read(os.path.join(temp_dir, f'out_{i}.dcm')) == _read(path)
+
+    @pytest.mark.skipif(not hasattr(os, 'copy_file_range'), reason="copy_file_range not available")
+    def test_short_copy_file_range_falls_back(self, sample_dicom_file, temp_dir):
+        """Test that copy_file_range stopping early does not leave a truncated copy."""
+        copier = FileCopier(MODE_AUTO)
+        destination = os.path.join(temp_dir, 'out.dcm')
+        real_copy_file_range = os.copy_file_range
+        calls = []
+
+        def short_copy(src_fd, dst_fd, count, *args):
+            # Copy one chunk, then report end of file as some FUSE mounts do
+            calls.append(count)
+            return real_copy_file_range(src_fd, dst_fd, 1024) if len(calls) == 1 else 0
+
+        with patch.object(file_copy, 'fcntl', None), \
+                patch.object(file_copy.os, 'copy_file_range', side_effect=short_copy):
+            strategy = copier.copy(sample_dicom_file, destination)
+
+        assert strategy == STRATEGY_COPY
+        assert _read(destination) == _read(sample_dicom_file)
+
+    def test_hardlink_mode_shares_the_file(self, sample_dicom_file, temp_dir):
+        """Test that opting in to hard links links files on the same filesystem."""
+        dst = os.path.join(temp_dir, 'linked.dcm')
+
+        assert FileCopier(MODE_HARDLINK).copy(sample_dicom_file, dst) == STRATEGY_HARDLINK
+        assert os.path.samefile(sample_dicom_file, dst)
+
+    def test_copy_mode_always_copies(self, sample_dicom_file, temp_dir):
+        """Test that the copy mode never links or clones."""
+        dst = os.path.join(temp_dir, 'copied.dcm')
+        with patch('shutil.copy2', wraps=shutil.copy2) as copy2:
+            assert FileCopier(MODE_COPY).copy(sample_dicom_file, dst) == STRATEGY_COPY
+        copy2.assert_called_once()
+
+    def test_copy_onto_itself_keeps_source(self, sample_dicom_file):
+        """Test that exporting a file onto itself fails without touching it."""
+        original = _read(sample_dicom_file)
+        with pytest.raises(shutil.SameFileError):
+            FileCopier(MODE_HARDLINK).copy(sample_dicom_file, sample_dicom_file)
+        assert _read(sample_dicom_file) == original
+
+
+class TestCopyFiles:
+    """Test the parallel copy pool."""
+
+    def test_copies_every_pair_and_reports_errors(self, multiple_dicom_files, temp_dir):
+        """Test that every pair is reported once, with failures as errors."""
+        out_dir = os.path.join(temp_dir, 'export')
+        os.makedirs(out_dir)
+        pairs = [(path, os.path.join(out_dir, os.path.basename(path))) for path in multiple_dicom_files]
+        pairs.append((os.path.join(temp_dir, 'missing.dcm'), os.path.join(out_dir, 'missing.dcm')))
+
+        results = list(copy_files(pairs, FileCopier(), workers=3))
+
+        assert len(results) == len(pairs)
+        failed = [src for src, _, _, error in results if error is not None]
+        assert failed == [os.path.join(temp_dir, 'missing.dcm')]
+        for src, dst in pairs[:-1]:
+            assert _read(dst) == _read(src)
+
+    def test_cancel_stops_new_copies(self, multiple_dicom_files, temp_dir):
+        """Test that no copies start once cancelled."""
+        pairs = [(path, os.path.join(temp_dir, f'c_{i}.dcm')) for i, path in enumerate(multiple_dicom_files)]
+
+        results = list(copy_files(pairs, FileCopier(), workers=2, cancelled=lambda: True))
+
+        assert results == []
+        assert not any(os.path.exists(dst) for _, dst in pairs)
+
+    def test_shared_destination_is_copied_in_order(self, temp_dir):
+        """Test that pairs writing the same destination never run concurrently."""
+        sources = []
+        for index, size in enumerate((3 * 1024 * 1024, 1024 * 1024)):
+            path = os.path.join(temp_dir, f'src_{index}')
+            with open(path, 'wb') as f:
+                f.write(bytes([index + 1]) * size)
+            sources.append(path)
+        dst = os.path.join(temp_dir, 'IM0001')
+
+        results = list(copy_files([(src, dst) for src in sources], FileCopier(), workers=4))
+
+        assert [src for src, _, _, _ in results] == sources
+        assert _read(dst) == _read(sources[-1])
@@ -10,6 +10,7 @@ import pytest
 import pydicom
 
 from fm_dicom.managers.file_manager import FileManager
+from fm_dicom.core.instance_record import InstanceRecord
 
 
 class TestFileManager:
@@ -142,10 +143,10 @@ class TestFileManager:
         # Should find all DICOM files but exclude ZIP and non-DICOM files
         assert len(dicom_files) == len(multiple_dicom_files)
         
-        # Verify each returned item is a tuple of (path, dataset)
-        for file_path, dataset in dicom_files:
+        # Verify each returned item is a tuple of (path, header record)
+        for file_path, record in dicom_files:
             assert isinstance(file_path, str)
-            assert isinstance(dataset, pydicom.Dataset)
+            assert isinstance(record, InstanceRecord)
             assert file_path in multiple_dicom_files
     
     def test_scan_for_individual_dicom_files_empty_directory(self, file_manager, temp_dir):
@@ -0,0 +1,108 @@
+"""
+Tests for the persistent DICOM header index.
+"""
+
+import os
+from unittest.mock import patch
+
+import pytest
+import pydicom
+
+from fm_dicom.core.header_index import (
+    HeaderIndex, NOT_DICOM, get_header_index, read_headers
+)
+from fm_dicom.core.instance_record import InstanceRecord
+
+
+class TestHeaderIndex:
+    """Test HeaderIndex functionality."""
+
+    @pytest.fixture
+    def header_index(self, temp_dir):
+        """Create a HeaderIndex backed by a temporary database."""
+        index = HeaderIndex(os.path.join(temp_dir, "index", "headers.sqlite3"))
+        yield index
+        index.close()
+
+    def test_lookup_empty(self, header_index, sample_dicom_file):
+        """Test that files never indexed are reported as misses."""
+        assert header_index.lookup_many([sample_dicom_file]) == {}
+
+    def test_read_header_then_lookup(self, header_index, sample_dicom_file):
+        """Test that a read header is served from the index afterwards."""
+        record = header_index.read_header(sample_dicom_file)
+        assert isinstance(record, InstanceRecord)
+
+        header = header_index.lookup(sample_dicom_file)
+        assert isinstance(header, InstanceRecord)
+        assert header.PatientID == "12345"
+        assert header.PatientName == "Test^Patient"
+        assert header.SOPInstanceUID == "1.2.3.4.5.6.7.8.11"
+        assert header.InstanceNumber == "1"
+        assert header.transfer_syntax_uid == pydicom.uid.ExplicitVRLittleEndian
+        assert header.file_size == os.path.getsize(sample_dicom_file)
+        # Tags missing from the file are missing from the record too
+        assert getattr(header, "StudyDescription", "No Study Description") == "No Study Description"
+
+    def test_lookup_does_not_open_file(self, header_index, sample_dicom_file):
+        """Test that index hits never parse the file."""
+        header_index.read_header(sample_dicom_file)
+
+        with patch("fm_dicom.core.header_index.pydicom.dcmread") as mock_read:
+            headers = read_headers([sample_dicom_file], header_index)
+
+        mock_read.assert_not_called()
+        assert len(headers) == 1
+        assert isinstance(headers[0][1], InstanceRecord)
+
+    def test_modified_file_is_stale(self, header_index, sample_dicom_file):
+        """Test that a changed size or mtime invalidates the entry."""
+        header_index.read_header(sample_dicom_file)
+
+        ds = pydicom.dcmread(sample_dicom_file)
+        ds.PatientID = "CHANGED-ID"
+        ds.save_as(sample_dicom_file, write_like_original=False)
+        stat = os.stat(sample_dicom_file)
+        os.utime(sample_dicom_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        assert header_index.lookup(sample_dicom_file) is None
+        headers = read_headers([sample_dicom_file], header_index)
+        assert headers[0][1].PatientID == "CHANGED-ID"
+
+    def test_non_dicom_files_are_remembered(self, header_index, temp_dir):
+        """Test that unreadable files are cached as non-DICOM."""
+        text_file = os.path.join(temp_dir, "readme.txt")
+        with open(text_file, "w") as f:
+            f.write("Not a DICOM file")
+
+        assert read_headers([text_file], header_index) == []
+        assert header_index.lookup(text_file) is NOT_DICOM
+
+    def test_persists_across_instances(self, temp_dir, multiple_dicom_files):
+        """Test that entries survive reopening the database."""
+        db_path = os.path.join(temp_dir, "headers.sqlite3")
+        first = HeaderIndex(db_path)
+        read_headers(multiple_dicom_files, first)
+        first.close()
+
+        second = HeaderIndex(db_path)
+        try:
+            hits = second.lookup_many(multiple_dicom_files)
+            assert set(hits) == set(multiple_dicom_files)
+        finally:
+            second.close()
+
+    def test_get_header_index_disabled(self, temp_dir):
+        """Test that the index can be switched off in the performance config."""
+        config = {"performance": {"use_header_index": False,
+                                  "header_index_path": os.path.join(temp_dir, "off.sqlite3")}}
+        assert get_header_index(config) is None
+
+    def test_get_header_index_configured_path(self, temp_dir):
+        """Test that the configured index path is used and shared."""
+        db_path = os.path.join(temp_dir, "configured.sqlite3")
+        config = {"performance": {"header_index_path": db_path}}
+        index = get_header_index(config)
+        assert index is not None
+        assert index.db_path == db_path
+        assert get_header_index(config) is index
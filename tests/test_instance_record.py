@@ -0,0 +1,58 @@
+"""
+Tests for compact per-instance header records.
+"""
+
+import pytest
+import pydicom
+
+from fm_dicom.core.instance_record import InstanceRecord, RECORD_TAGS
+
+
+class TestInstanceRecord:
+    """Test InstanceRecord functionality."""
+
+    def test_from_dataset(self, sample_dicom_file):
+        """Test building a record from a header Dataset."""
+        ds = pydicom.dcmread(sample_dicom_file, stop_before_pixels=True)
+        record = InstanceRecord.from_dataset(sample_dicom_file, ds, file_size=1234)
+
+        assert record.file_path == sample_dicom_file
+        assert record.file_size == 1234
+        assert record.PatientID == "12345"
+        assert record.PatientName == "Test^Patient"
+        assert record.InstanceNumber == "1"
+        assert record.transfer_syntax_uid == pydicom.uid.ExplicitVRLittleEndian
+
+    def test_missing_tags_behave_like_dataset(self, sample_dicom_file):
+        """Test that absent tags raise AttributeError so getattr defaults apply."""
+        ds = pydicom.dcmread(sample_dicom_file, stop_before_pixels=True)
+        record = InstanceRecord.from_dataset(sample_dicom_file, ds)
+
+        assert not hasattr(record, "SeriesDescription")
+        assert getattr(record, "SeriesDescription", "No Series Description") == "No Series Description"
+        assert record.values()["SeriesDescription"] is None
+
+    def test_from_dataset_returns_existing_record(self):
+        """Test that converting a record again is a no-op."""
+        record = InstanceRecord("/tmp/a.dcm", {"PatientID": "P1"})
+        assert InstanceRecord.from_dataset("/tmp/a.dcm", record) is record
+
+    def test_record_is_slotted(self):
+        """Test that records carry no per-instance __dict__."""
+        record = InstanceRecord("/tmp/a.dcm", {"PatientID": "P1"})
+        assert not hasattr(record, "__dict__")
+        with pytest.raises(AttributeError):
+            record.PixelData = b"\x00"
+
+    def test_shared_values_are_interned(self):
+        """Test that study-level strings are shared between records."""
+        study_uid = "".join(["1.2.3.", "4.5"])
+        first = InstanceRecord("/tmp/a.dcm", {"StudyInstanceUID": study_uid})
+        second = InstanceRecord("/tmp/b.dcm", {"StudyInstanceUID": "".join(["1.2.3.", "4.5"])})
+        assert first.StudyInstanceUID is second.StudyInstanceUID
+
+    def test_values_round_trip(self):
+        """Test that values() covers every recorded tag."""
+        values = {keyword: f"value-{keyword}" for keyword in RECORD_TAGS}
+        record = InstanceRecord("/tmp/a.dcm", values)
+        assert record.values() == values
@@ -0,0 +1,60 @@
+"""
+Tests for the per-remote presentation context negotiation cache.
+"""
+
+from fm_dicom.core.negotiation_cache import NegotiationCache
+
+CT = "1.2.840.10008.5.1.4.1.1.2"
+EXPLICIT = "1.2.840.10008.1.2.1"
+JPEG2000 = "1.2.840.10008.1.2.4.91"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestNegotiationCache:
+    """Test caching of accepted and rejected contexts."""
+
+    def test_outcomes_expire_after_ttl(self):
+        """Test that a stored outcome is returned until its TTL runs out."""
+        clock = FakeClock()
+        cache = NegotiationCache(clock=clock)
+        cache.store("PACS.local", 104, "PACS", CT, EXPLICIT, True, ttl=60)
+        cache.store("PACS.local", 104, "PACS", CT, JPEG2000, False, ttl=60)
+
+        assert cache.lookup("pacs.local", 104, "PACS", CT, EXPLICIT) is True
+        assert cache.lookup("pacs.local", 104, "PACS", CT, JPEG2000) is False
+
+        clock.now += 61
+        assert cache.lookup("pacs.local", 104, "PACS", CT, EXPLICIT) is None
+        assert len(cache) == 1
+
+    def test_lookup_all_needs_every_pair(self):
+        """Test that a partially known send is not served from the cache."""
+        cache = NegotiationCache()
+        cache.store("pacs", 104, "PACS", CT, EXPLICIT, True)
+
+        assert cache.lookup_all("pacs", 104, "PACS", [(CT, EXPLICIT)]) == {(CT, EXPLICIT): True}
+        assert cache.lookup_all("pacs", 104, "PACS", [(CT, EXPLICIT), (CT, JPEG2000)]) is None
+
+    def test_invalidate_only_affects_one_remote(self):
+        """Test that invalidating a remote keeps entries for other servers."""
+        cache = NegotiationCache()
+        cache.store("pacs", 104, "PACS", CT, EXPLICIT, True)
+        cache.store("pacs", 104, "OTHER", CT, EXPLICIT, True)
+
+        cache.invalidate("pacs", 104, "PACS")
+
+        assert cache.lookup("pacs", 104, "PACS", CT, EXPLICIT) is None
+        assert cache.lookup("pacs", 104, "OTHER", CT, EXPLICIT) is True
+
+    def test_zero_ttl_is_not_stored(self):
+        """Test that a TTL of zero disables caching."""
+        cache = NegotiationCache()
+        cache.store("pacs", 104, "PACS", CT, EXPLICIT, True, ttl=0)
+        assert len(cache) == 0
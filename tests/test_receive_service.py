@@ -0,0 +1,330 @@
+"""
+Tests for the background DICOM receive service.
+"""
+
+import os
+import time
+import shutil
+import socket
+import threading
+
+from io import BytesIO
+
+import pytest
+import pydicom
+from pydicom.filewriter import write_dataset
+
+from fm_dicom.network.ingest_writer import IngestWriter, write_file_atomic
+from fm_dicom.network.receive_service import DicomReceiveService, read_routing_header
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for(condition, qapp, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        qapp.processEvents()
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def _send(files, port):
+    from pynetdicom import AE
+    ae = AE(ae_title='FM_TEST')
+    # Files may be streamed as stored, so propose exactly their transfer syntax
+    ae.add_requested_context('1.2.840.10008.5.1.4.1.1.2', pydicom.uid.ExplicitVRLittleEndian)
+    assoc = ae.associate('127.0.0.1', port, ae_title='FM_DICOM')
+    assert assoc.is_established
+    statuses = [assoc.send_c_store(path).Status for path in files]
+    assoc.release()
+    return statuses
+
+
+@pytest.fixture
+def receive_service(temp_dir, qapp):
+    """Run a receive service on a free loopback port."""
+    port = _free_port()
+    service = DicomReceiveService({
+        'ae_title': 'FM_DICOM',
+        'bind_address': '127.0.0.1',
+        'port': port,
+        'receive_dir': os.path.join(temp_dir, 'ingress'),
+    })
+    completed = []
+    service.study_completed.connect(completed.append)
+    service.start()
+    assert _wait_for(lambda: service._server is not None, qapp)
+    yield service, port, completed
+    service.stop()
+
+
+class TestDicomReceiveService:
+    """Test receiving studies over a loopback association."""
+
+    def test_received_instances_are_written_and_completed(self, receive_service, multiple_dicom_files, qapp):
+        """Test that every instance is written unchanged and the study completes once."""
+        service, port, completed = receive_service
+
+        assert _send(multiple_dicom_files, port) == [0x0000] * len(multiple_dicom_files)
+        # Each fixture file belongs to its own study
+        assert _wait_for(lambda: len(completed) == len(multiple_dicom_files), qapp)
+
+        paths = [path for payload in completed for path in payload['file_paths']]
+        assert len(paths) == len(multiple_dicom_files)
+        received = {pydicom.dcmread(path).SOPInstanceUID: pydicom.dcmread(path) for path in paths}
+        for source_path in multiple_dicom_files:
+            source = pydicom.dcmread(source_path)
+            assert received[source.SOPInstanceUID] == source
+        assert service._writer.depth == 0
+
+    def test_completion_carries_instance_records(self, receive_service, multiple_dicom_files, qapp):
+        """Test that the completion payload holds a header record for every written file."""
+        from fm_dicom.core.instance_record import InstanceRecord
+        service, port, completed = receive_service
+
+        _send(multiple_dicom_files, port)
+        assert _wait_for(lambda: len(completed) == len(multiple_dicom_files), qapp)
+
+        for payload in completed:
+            assert [record.file_path for record in payload['records']] == payload['file_paths']
+            for record in payload['records']:
+                expected = InstanceRecord.from_dataset(record.file_path, pydicom.dcmread(record.file_path))
+                assert record.values() == expected.values()
+                assert record.transfer_syntax_uid == expected.transfer_syntax_uid
+                assert record.file_size == os.path.getsize(record.file_path)
+
+    def test_instances_are_stored_without_decoding(self, receive_service, sample_dicom_file, qapp, monkeypatch):
+        """Test that the dataset bytes are stored as received without decoding the whole dataset."""
+        from pynetdicom.events import Event
+        service, port, completed = receive_service
+
+        def fail(event):
+            raise AssertionError("received dataset was fully decoded")
+        monkeypatch.setattr(Event, 'dataset', property(fail))
+
+        assert _send([sample_dicom_file], port) == [0x0000]
+        assert _wait_for(lambda: len(completed) == 1, qapp)
+
+        received_path = completed[0]['file_paths'][0]
+        with open(sample_dicom_file, 'rb') as f:
+            source_bytes = f.read()
+        with open(received_path, 'rb') as f:
+            received_bytes = f.read()
+        source = pydicom.dcmread(sample_dicom_file)
+        received = pydicom.dcmread(received_path)
+        # Everything after the file meta group is byte for byte what was sent
+        dataset_bytes = source_bytes[132 + 12 + int.from_bytes(source_bytes[140:144], 'little'):]
+        assert received_bytes.endswith(dataset_bytes)
+        assert received.file_meta.TransferSyntaxUID == source.file_meta.TransferSyntaxUID
+        assert received == source
+        assert os.path.basename(received_path) == f"{source.SOPInstanceUID}.dcm"
+
+    def test_concurrent_associations_share_a_study(self, receive_service, sample_dicom_file, temp_dir, qapp):
+        """Test that a study sent over two associations at once completes once with every instance."""
+        from pynetdicom import AE
+        service, port, completed = receive_service
+        source = pydicom.dcmread(sample_dicom_file)
+        files = []
+        for index in range(6):
+            source.SOPInstanceUID = f"{source.StudyInstanceUID}.{index + 100}"
+            source.file_meta.MediaStorageSOPInstanceUID = source.SOPInstanceUID
+            path = os.path.join(temp_dir, f"same_study_{index}.dcm")
+            source.save_as(path, enforce_file_format=True)
+            files.append(path)
+
+        ae = AE(ae_title='FM_TEST')
+        ae.add_requested_context('1.2.840.10008.5.1.4.1.1.2', pydicom.uid.ExplicitVRLittleEndian)
+        associations = [ae.associate('127.0.0.1', port, ae_title='FM_DICOM') for _ in range(2)]
+        assert all(assoc.is_established for assoc in associations)
+        assert _wait_for(lambda: service.stats()['active_associations'] == 2, qapp)
+
+        statuses = []
+        threads = [
+            threading.Thread(target=lambda a=assoc, f=files[i::2]: statuses.extend(a.send_c_store(p).Status for p in f))
+            for i, assoc in enumerate(associations)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert statuses == [0x0000] * len(files)
+
+        stats = service.stats()
+        assert stats['instances_total'] == len(files)
+        assert stats['bytes_total'] > 0
+        assert stats['instances_per_s'] > 0
+
+        # The study stays open while the second sender is still connected
+        associations[0].release()
+        assert not _wait_for(lambda: completed, qapp, timeout=0.5)
+        associations[1].release()
+        assert _wait_for(lambda: len(completed) == 1, qapp)
+        assert not _wait_for(lambda: len(completed) > 1, qapp, timeout=0.3)
+
+        assert sorted(os.path.basename(p) for p in completed[0]['file_paths']) == sorted(
+            f"{pydicom.dcmread(p).SOPInstanceUID}.dcm" for p in files
+        )
+        assert service.stats()['active_associations'] == 0
+
+    def test_progress_is_batched_per_study(self, temp_dir, qapp):
+        """Test that progress is emitted once per flush with the aggregated count."""
+        service = DicomReceiveService({'receive_dir': os.path.join(temp_dir, 'ingress')})
+        progress = []
+        service.study_progress.connect(progress.append)
+        service._studies['1.2.3'] = {
+            'patient_label': 'Test (1)', 'study_description': 'Study', 'files': ['a.dcm'],
+            'instance_count': 5, 'reported_count': 0,
+        }
+
+        service._flush_progress()
+        service._flush_progress()
+        service._studies['1.2.3']['instance_count'] = 8
+        service._flush_progress()
+        qapp.processEvents()
+
+        assert [(p['instance_count'], p['new_instances']) for p in progress] == [(5, 5), (8, 3)]
+        assert progress[0]['written_count'] == 1
+
+    def test_full_queue_refuses_instance(self, temp_dir, multiple_dicom_files, qapp):
+        """Test that the C-STORE is refused when the ingest queue stays full."""
+        port = _free_port()
+        service = DicomReceiveService({
+            'bind_address': '127.0.0.1',
+            'port': port,
+            'receive_dir': os.path.join(temp_dir, 'ingress'),
+            'queue_timeout': 0.2,
+        })
+        # Writers are never started, so the queue cannot drain; one byte of
+        # room still admits a single instance into the empty queue
+        service._writer.start = lambda: None
+        service._writer.max_queue_bytes = 1
+        service.start()
+        try:
+            assert _wait_for(lambda: service._server is not None, qapp)
+            statuses = _send(multiple_dicom_files[:2], port)
+        finally:
+            service._server.shutdown()
+            service._server = None
+            service._stop_event.set()
+
+        assert statuses == [0x0000, 0xA700]
+
+    def test_spooled_instances_are_recovered_on_start(self, temp_dir, sample_dicom_file, qapp):
+        """Test that acknowledged instances left in the spool are moved into place."""
+        service = DicomReceiveService({'receive_dir': os.path.join(temp_dir, 'ingress')})
+        shutil.copy(sample_dicom_file, os.path.join(service.spool_dir, 'acked.spool'))
+        with open(os.path.join(service.spool_dir, 'torn.part'), 'wb') as f:
+            f.write(b'never acknowledged')
+
+        assert service.recover_spool() == 1
+
+        ds = pydicom.dcmread(sample_dicom_file)
+        recovered = os.path.join(
+            temp_dir, 'ingress', ds.StudyInstanceUID, ds.SeriesInstanceUID, f'{ds.SOPInstanceUID}.dcm'
+        )
+        with open(recovered, 'rb') as f, open(sample_dicom_file, 'rb') as original:
+            assert f.read() == original.read()
+        assert os.listdir(service.spool_dir) == []
+
+
+class TestReadRoutingHeader:
+    """Test the partial parse used to route received instances."""
+
+    def test_reads_only_routing_tags(self, sample_dicom_file):
+        """Test that routing tags are read and the rest of the dataset is skipped."""
+        source = pydicom.dcmread(sample_dicom_file)
+        raw = BytesIO()
+        write_dataset(pydicom.filebase.DicomFileLike(raw), source)
+        raw.seek(0)
+
+        ds = read_routing_header(raw, pydicom.uid.ExplicitVRLittleEndian)
+
+        assert ds.StudyInstanceUID == source.StudyInstanceUID
+        assert ds.SeriesInstanceUID == source.SeriesInstanceUID
+        assert ds.SOPInstanceUID == source.SOPInstanceUID
+        assert ds.PatientName == source.PatientName
+        assert ds.Modality == source.Modality
+        assert ds.InstanceNumber == source.InstanceNumber
+        assert 'Rows' not in ds
+        assert 'PixelData' not in ds
+        assert raw.tell() == 0
+
+    def test_deflated_datasets_are_not_parsed(self):
+        """Test that deflated datasets fall back to a full decode."""
+        assert read_routing_header(BytesIO(b''), pydicom.uid.DeflatedExplicitVRLittleEndian) is None
+
+
+class TestIngestWriter:
+    """Test the bounded ingest writer."""
+
+    def test_writes_and_reports_each_file(self, temp_dir):
+        """Test that queued data lands on disk and the callback fires."""
+        writer = IngestWriter(writer_threads=2)
+        writer.start()
+        done = []
+        event = threading.Event()
+
+        def on_done(path, error):
+            done.append((path, error))
+            if len(done) == 3:
+                event.set()
+
+        paths = [os.path.join(temp_dir, 'study', f'{index}.dcm') for index in range(3)]
+        for index, path in enumerate(paths):
+            assert writer.submit(path, bytes([index]) * 10, on_done)
+        assert event.wait(5)
+        writer.stop()
+
+        assert sorted(path for path, _ in done) == sorted(paths)
+        assert all(error is None for _, error in done)
+        assert open(paths[2], 'rb').read() == b'\x02' * 10
+        assert not [name for name in os.listdir(os.path.dirname(paths[0])) if name.endswith('.part')]
+        assert writer.queued_bytes == 0
+
+    def test_submit_times_out_when_queue_is_full(self, temp_dir):
+        """Test that backpressure gives up after the queue timeout."""
+        writer = IngestWriter(max_queue_bytes=100, queue_timeout=0.05)
+
+        assert writer.submit(os.path.join(temp_dir, 'a.dcm'), b'x' * 80)
+        assert not writer.submit(os.path.join(temp_dir, 'b.dcm'), b'x' * 80)
+        assert writer.depth == 1
+
+    def test_spooled_data_is_synced_before_submit_returns(self, temp_dir, monkeypatch):
+        """Test that a spooling writer has the data on disk before it reports success."""
+        synced = []
+        real_fsync = os.fsync
+        monkeypatch.setattr('fm_dicom.network.ingest_writer.os.fsync', lambda fd: (synced.append(fd), real_fsync(fd)))
+        spool_dir = os.path.join(temp_dir, 'spool')
+        os.makedirs(spool_dir)
+        writer = IngestWriter(writer_threads=1, spool_dir=spool_dir)
+        path = os.path.join(temp_dir, 'study', 'a.dcm')
+        done = threading.Event()
+
+        assert writer.submit(path, [b'head', b'tail'], lambda *_: done.set())
+
+        # Nothing has been written out yet, but the data is already in the spool
+        assert synced
+        spooled = os.listdir(spool_dir)
+        assert len(spooled) == 1 and spooled[0].endswith('.spool')
+        writer.start()
+        assert done.wait(5)
+        writer.stop()
+        assert open(path, 'rb').read() == b'headtail'
+        assert os.listdir(spool_dir) == []
+
+    def test_atomic_write_syncs_before_rename(self, temp_dir, monkeypatch):
+        """Test that the temporary file is fsynced before it replaces the target."""
+        calls = []
+        real_fsync, real_replace = os.fsync, os.replace
+        monkeypatch.setattr('fm_dicom.network.ingest_writer.os.fsync', lambda fd: (calls.append('fsync'), real_fsync(fd)))
+        monkeypatch.setattr('fm_dicom.network.ingest_writer.os.replace', lambda a, b: (calls.append('replace'), real_replace(a, b)))
+
+        write_file_atomic(os.path.join(temp_dir, 'a.dcm'), b'data')
+
+        assert calls == ['fsync', 'replace']
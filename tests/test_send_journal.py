@@ -0,0 +1,131 @@
+"""
+Tests for the persistent DICOM send journal.
+"""
+
+import os
+
+import pytest
+
+from fm_dicom.core.send_journal import (
+    STATUS_CANCELLED,
+    STATUS_FAILED,
+    STATUS_PENDING,
+    STATUS_REJECTED,
+    STATUS_SENT,
+    SendJournal,
+    backoff_delay,
+)
+
+PARAMS = ('FM_TEST', 'PACS', 'pacs.local', 104)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def journal(temp_dir, clock):
+    journal = SendJournal(os.path.join(temp_dir, 'journal.sqlite3'), base_delay=10, max_attempts=3, clock=clock)
+    yield journal
+    journal.close()
+
+
+class TestSendJournal:
+    """Test per-file send status tracking."""
+
+    def test_acknowledged_files_are_skipped(self, journal, multiple_dicom_files):
+        """Test that a resend only includes files the destination has not acknowledged."""
+        to_send, skipped = journal.begin(PARAMS, multiple_dicom_files)
+        assert to_send == multiple_dicom_files and skipped == []
+
+        journal.mark_sent(PARAMS, multiple_dicom_files[0])
+        to_send, skipped = journal.begin(PARAMS, multiple_dicom_files)
+
+        assert skipped == [multiple_dicom_files[0]]
+        assert to_send == multiple_dicom_files[1:]
+
+    def test_acknowledged_files_are_sent_when_not_skipping(self, journal, multiple_dicom_files):
+        """Test that an operator resend includes files the destination acknowledged."""
+        journal.begin(PARAMS, multiple_dicom_files)
+        journal.mark_sent(PARAMS, multiple_dicom_files[0])
+
+        to_send, skipped = journal.begin(PARAMS, multiple_dicom_files, skip_acknowledged=False)
+
+        assert to_send == multiple_dicom_files and skipped == []
+        assert journal.acknowledged(PARAMS, multiple_dicom_files) == []
+
+    def test_changed_file_is_sent_again(self, journal, multiple_dicom_files):
+        """Test that a file modified after it was acknowledged is resent."""
+        journal.begin(PARAMS, multiple_dicom_files[:1])
+        journal.mark_sent(PARAMS, multiple_dicom_files[0])
+        with open(multiple_dicom_files[0], 'ab') as f:
+            f.write(b'\0\0')
+
+        to_send, skipped = journal.begin(PARAMS, multiple_dicom_files[:1])
+
+        assert to_send == multiple_dicom_files[:1] and skipped == []
+
+    def test_other_destination_is_not_skipped(self, journal, multiple_dicom_files):
+        """Test that acknowledgements are per destination."""
+        journal.begin(PARAMS, multiple_dicom_files[:1])
+        journal.mark_sent(PARAMS, multiple_dicom_files[0])
+
+        to_send, _ = journal.begin(('FM_TEST', 'OTHER', 'pacs.local', 104), multiple_dicom_files[:1])
+
+        assert to_send == multiple_dicom_files[:1]
+
+    def test_failures_back_off_until_out_of_attempts(self, journal, clock, multiple_dicom_files):
+        """Test that retryable failures become due after an increasing delay."""
+        path = multiple_dicom_files[0]
+        journal.begin(PARAMS, [path])
+        journal.mark_failed(PARAMS, [path], "Association failed")
+
+        assert journal.status(PARAMS, path) == STATUS_FAILED
+        assert journal.due_retries() == {}
+        clock.now += backoff_delay(1, 10)
+        assert journal.due_retries() == {PARAMS: [path]}
+
+        # Retries keep their attempt count
+        journal.begin(PARAMS, [path], reset_attempts=False)
+        journal.mark_failed(PARAMS, [path], "Association failed")
+        clock.now += backoff_delay(1, 10)
+        assert journal.due_retries() == {}
+        clock.now += backoff_delay(2, 10)
+        assert journal.due_retries() == {PARAMS: [path]}
+
+        journal.begin(PARAMS, [path], reset_attempts=False)
+        journal.mark_failed(PARAMS, [path], "Association failed")
+        assert journal.status(PARAMS, path) == STATUS_REJECTED
+
+    def test_rejected_and_cancelled_files_are_not_retried(self, journal, multiple_dicom_files):
+        """Test that server refusals and cancelled files wait for the operator."""
+        journal.begin(PARAMS, multiple_dicom_files)
+        journal.mark_failed(PARAMS, multiple_dicom_files[:1], "Failed 0xA900", retryable=False)
+        journal.mark_cancelled(PARAMS, multiple_dicom_files[1:])
+
+        assert journal.status(PARAMS, multiple_dicom_files[0]) == STATUS_REJECTED
+        assert journal.status(PARAMS, multiple_dicom_files[1]) == STATUS_CANCELLED
+        assert journal.due_retries() == {}
+
+    def test_unfinished_send_is_due_after_reopen(self, journal, temp_dir, clock, multiple_dicom_files):
+        """Test that files still pending when the application stopped are resumed."""
+        journal.begin(PARAMS, multiple_dicom_files)
+        journal.mark_sent(PARAMS, multiple_dicom_files[0])
+        journal.flush()
+
+        reopened = SendJournal(journal.db_path, clock=clock)
+        try:
+            assert reopened.status(PARAMS, multiple_dicom_files[0]) == STATUS_SENT
+            assert reopened.status(PARAMS, multiple_dicom_files[1]) == STATUS_PENDING
+            assert reopened.due_retries() == {PARAMS: multiple_dicom_files[1:]}
+        finally:
+            reopened.close()
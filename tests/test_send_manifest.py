@@ -0,0 +1,98 @@
+"""
+Tests for the single-pass DICOM send manifest.
+"""
+
+import os
+from unittest.mock import patch
+
+import pydicom
+
+from fm_dicom.core.instance_record import InstanceRecord
+from fm_dicom.core.send_manifest import (
+    DEFAULT_TRANSFER_SYNTAX, SendManifest, SendManifestEntry, build_send_manifest
+)
+from fm_dicom.workers.dicom_send_worker import DicomSendWorker
+
+CT_IMAGE_STORAGE = "1.2.840.10008.5.1.4.1.1.2"
+JPEG_BASELINE = "1.2.840.10008.1.2.4.50"
+
+
+class TestBuildSendManifest:
+    """Test building manifests from records and headers."""
+
+    def test_from_headers(self, multiple_dicom_files):
+        """Test that files without records are read header-only."""
+        manifest = build_send_manifest(multiple_dicom_files)
+
+        assert len(manifest) == len(multiple_dicom_files)
+        entry = manifest.get(multiple_dicom_files[0])
+        assert entry.sop_class_uid == CT_IMAGE_STORAGE
+        assert entry.transfer_syntax_uid == pydicom.uid.ExplicitVRLittleEndian
+        assert entry.file_size == os.path.getsize(multiple_dicom_files[0])
+        assert manifest.unique_sop_classes() == [CT_IMAGE_STORAGE]
+
+    def test_from_records_does_not_open_files(self, multiple_dicom_files):
+        """Test that loaded records make header reads unnecessary."""
+        records = {
+            path: InstanceRecord(path, {"SOPClassUID": CT_IMAGE_STORAGE},
+                                 transfer_syntax_uid=JPEG_BASELINE, file_size=100)
+            for path in multiple_dicom_files
+        }
+
+        with patch("fm_dicom.core.send_manifest.read_dataset") as mock_read:
+            manifest = build_send_manifest(multiple_dicom_files, record_lookup=records.get)
+
+        mock_read.assert_not_called()
+        assert manifest.unique_transfer_syntaxes() == [JPEG_BASELINE]
+        assert manifest.total_bytes() == 100 * len(multiple_dicom_files)
+
+    def test_record_without_transfer_syntax_reads_file_meta(self, sample_dicom_file, temp_dir):
+        """Test that a record lacking a transfer syntax takes it from the file meta."""
+        no_meta = os.path.join(temp_dir, "no_meta.dcm")
+        ds = pydicom.dcmread(sample_dicom_file)
+        del ds.file_meta
+        ds.save_as(no_meta, implicit_vr=True, little_endian=True)
+        records = {
+            path: InstanceRecord(path, {"SOPClassUID": CT_IMAGE_STORAGE}, file_size=100)
+            for path in (sample_dicom_file, no_meta)
+        }
+
+        with patch("fm_dicom.core.send_manifest.read_dataset") as mock_read:
+            manifest = build_send_manifest([sample_dicom_file, no_meta], record_lookup=records.get)
+
+        mock_read.assert_not_called()
+        assert manifest.get(sample_dicom_file).transfer_syntax_uid == pydicom.uid.ExplicitVRLittleEndian
+        assert manifest.get(no_meta).transfer_syntax_uid == DEFAULT_TRANSFER_SYNTAX
+
+    def test_unreadable_files_are_left_out(self, sample_dicom_file, temp_dir):
+        """Test that files whose header cannot be read get no entry."""
+        text_file = os.path.join(temp_dir, "notes.txt")
+        with open(text_file, "w") as f:
+            f.write("Not a DICOM file")
+
+        manifest = build_send_manifest([sample_dicom_file, text_file])
+
+        assert sample_dicom_file in manifest
+        assert text_file not in manifest
+
+
+class TestSendWorkerManifest:
+    """Test that the send worker uses its manifest instead of re-reading headers."""
+
+    def test_transfer_syntax_passes_use_manifest(self, qapp):
+        """Test syntax discovery and conversion selection without file reads."""
+        manifest = SendManifest([
+            SendManifestEntry("/data/a.dcm", CT_IMAGE_STORAGE, JPEG_BASELINE),
+            SendManifestEntry("/data/b.dcm", CT_IMAGE_STORAGE, None),
+        ])
+        files = ["/data/a.dcm", "/data/b.dcm", "/data/missing.dcm"]
+        worker = DicomSendWorker(files, ("FM", "PACS", "localhost", 104), [CT_IMAGE_STORAGE],
+                                 manifest=manifest)
+
+        with patch("fm_dicom.workers.dicom_send_worker.pydicom.dcmread") as mock_read:
+            syntaxes = worker._extract_unique_transfer_syntaxes(files)
+            needing_conversion = worker._identify_files_needing_conversion(files, [JPEG_BASELINE])
+
+        mock_read.assert_not_called()
+        assert sorted(syntaxes) == sorted([JPEG_BASELINE, DEFAULT_TRANSFER_SYNTAX])
+        assert needing_conversion == ["/data/a.dcm", "/data/missing.dcm"]
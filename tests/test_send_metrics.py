@@ -0,0 +1,84 @@
+"""
+Tests for DICOM send throughput and latency metrics.
+"""
+
+import os
+import json
+
+from fm_dicom.core.send_metrics import (
+    MB,
+    SendMetrics,
+    append_metrics_log,
+    format_report,
+    percentile,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSendMetrics:
+    """Test send metric aggregation."""
+
+    def test_percentile_nearest_rank(self):
+        """Test nearest-rank percentiles on sorted values."""
+        values = [float(v) for v in range(1, 101)]
+        assert percentile(values, 0.50) == 50.0
+        assert percentile(values, 0.95) == 95.0
+        assert percentile(values, 0.99) == 99.0
+        assert percentile([], 0.5) is None
+
+    def test_report_aggregates_instances_and_associations(self):
+        """Test that the report sums bytes and summarises latency and setup times."""
+        clock = FakeClock()
+        metrics = SendMetrics(clock=clock)
+        metrics.record_association(0.2)
+        metrics.record_association(0.4)
+        metrics.record_association(1.0, established=False)
+        for index in range(10):
+            metrics.record_store(f"/data/img{index}.dcm", MB, 0.01 * (index + 1), 'ok')
+        clock.now += 2.0
+
+        report = metrics.report({'analysis_time': 0.5})
+
+        assert report['instances'] == 10
+        assert report['bytes'] == 10 * MB
+        assert report['mb_per_s'] == 5.0
+        assert report['latency_s']['p50'] == 0.05
+        assert report['latency_s']['max'] == 0.1
+        assert report['associations']['established'] == 2
+        assert report['associations']['failed'] == 1
+        assert abs(report['associations']['setup_mean_s'] - 0.3) < 1e-9
+        assert report['phases_s'] == {'analysis_time': 0.5}
+
+    def test_rolling_rate_only_counts_recent_stores(self):
+        """Test that old C-STOREs drop out of the rolling rate."""
+        clock = FakeClock()
+        metrics = SendMetrics(clock=clock, rolling_window=5.0)
+        metrics.record_store("a.dcm", 50 * MB, 0.1, 'ok')
+        clock.now += 10.0
+        metrics.record_store("b.dcm", 10 * MB, 0.1, 'ok')
+
+        assert metrics.rolling_mb_per_s() == 2.0
+
+    def test_metrics_log_appends_json_lines(self, temp_dir):
+        """Test that each report is appended as one JSON line."""
+        metrics = SendMetrics()
+        metrics.record_store("a.dcm", 1024, 0.02, 'ok')
+        log_path = os.path.join(temp_dir, 'logs', 'send_metrics.jsonl')
+
+        append_metrics_log(log_path, metrics.report(), destination="PACS@host:104",
+                           instances=metrics.per_instance())
+        append_metrics_log(log_path, metrics.report(), destination="PACS@host:104")
+
+        with open(log_path) as f:
+            entries = [json.loads(line) for line in f]
+        assert len(entries) == 2
+        assert entries[0]['destination'] == "PACS@host:104"
+        assert entries[0]['per_instance'] == [{'file': 'a.dcm', 'bytes': 1024, 'latency_s': 0.02, 'outcome': 'ok'}]
+        assert 'C-STORE latency' in format_report(entries[1])
@@ -0,0 +1,140 @@
+"""
+Tests for the threaded/process-pool DICOM header processor.
+"""
+
+import os
+import pickle
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import Mock, patch
+
+import pytest
+
+from fm_dicom.utils import threaded_processor
+from fm_dicom.core.header_index import HeaderIndex
+from fm_dicom.core.instance_record import InstanceRecord
+from fm_dicom.utils.threaded_processor import (
+    ThreadedDicomProcessor, read_header_metadata, read_header_batch,
+    BACKEND_PROCESS, BACKEND_THREAD
+)
+
+
+class TestHeaderMetadata:
+    """Test the picklable per-file parsing used by worker processes."""
+
+    def test_read_header_metadata(self, sample_dicom_file):
+        """Test metadata extraction from a valid file."""
+        file_path, success, metadata, error = read_header_metadata(
+            sample_dicom_file, ['PatientID', 'InstanceNumber', 'StudyDescription']
+        )
+
+        assert success
+        assert error is None
+        assert file_path == sample_dicom_file
+        assert metadata['PatientID'] == '12345'
+        assert metadata['InstanceNumber'] == '1'
+        assert 'StudyDescription' not in metadata
+        assert metadata['file_size'] == os.path.getsize(sample_dicom_file)
+        assert metadata['TransferSyntaxUID'] == '1.2.840.10008.1.2.1'
+
+        # Records must survive the trip back from a worker process
+        assert pickle.loads(pickle.dumps(metadata)) == metadata
+
+    def test_read_header_metadata_invalid(self, temp_dir):
+        """Test that non-DICOM files produce failure records."""
+        text_file = os.path.join(temp_dir, 'notes.txt')
+        with open(text_file, 'w') as f:
+            f.write('x' * 512)
+
+        _, success, metadata, error = read_header_metadata(text_file, ['PatientID'])
+
+        assert not success
+        assert error
+        assert metadata['file_size'] == 512
+
+    def test_read_header_batch(self, multiple_dicom_files):
+        """Test chunked parsing keeps input order."""
+        records = read_header_batch(multiple_dicom_files, ['PatientID'])
+        assert [record[0] for record in records] == multiple_dicom_files
+        assert [record[2]['PatientID'] for record in records] == ['ID000', 'ID001', 'ID002']
+
+
+class TestThreadedDicomProcessor:
+    """Test ThreadedDicomProcessor backend handling."""
+
+    @pytest.fixture
+    def header_index(self, temp_dir):
+        index = HeaderIndex(os.path.join(temp_dir, 'headers.sqlite3'))
+        yield index
+        index.close()
+
+    def test_unknown_backend_falls_back_to_threads(self, qapp):
+        """Test that an unknown backend name selects the thread backend."""
+        processor = ThreadedDicomProcessor(backend='gpu')
+        assert processor.backend == BACKEND_THREAD
+
+    def test_result_from_record_builds_light_header(self, qapp, sample_dicom_file, header_index):
+        """Test that process results carry an InstanceRecord, not a Dataset."""
+        processor = ThreadedDicomProcessor(backend=BACKEND_PROCESS, header_index=header_index)
+        record = read_header_metadata(sample_dicom_file, ['PatientID', 'SOPInstanceUID'])
+
+        result = processor._result_from_record(record)
+
+        assert result.success
+        assert isinstance(result.dataset, InstanceRecord)
+        assert result.dataset.SOPInstanceUID == '1.2.3.4.5.6.7.8.11'
+        # The parsed values were recorded in the header index
+        assert header_index.lookup(sample_dicom_file) is not None
+
+    def test_indexed_files_skip_parsing(self, qapp, multiple_dicom_files, header_index):
+        """Test that files already in the index are emitted without parsing."""
+        for file_path in multiple_dicom_files[:2]:
+            header_index.read_header(file_path)
+
+        processor = ThreadedDicomProcessor(header_index=header_index)
+        remaining = processor._process_indexed_files(multiple_dicom_files, ['PatientID'])
+
+        assert remaining == multiple_dicom_files[2:]
+        assert processor.processed_count == 2
+        queued = []
+        while not processor.results_queue.empty():
+            queued.append(processor.results_queue.get_nowait())
+        file_results = [data for kind, data in queued if kind == 'file']
+        assert [r.metadata['PatientID'] for r in file_results] == ['ID000', 'ID001']
+
+    def _queued_results(self, processor):
+        queued = []
+        while not processor.results_queue.empty():
+            queued.append(processor.results_queue.get_nowait())
+        return queued
+
+    def test_pool_that_cannot_start_falls_back_to_threads(self, qapp, multiple_dicom_files):
+        """Test that files are read on threads when the process pool cannot start."""
+        processor = ThreadedDicomProcessor(backend=BACKEND_PROCESS)
+        with patch.object(threaded_processor, 'get_process_pool', side_effect=OSError("no processes")):
+            processor._process_files_threaded(multiple_dicom_files, False, ['PatientID'])
+
+        queued = self._queued_results(processor)
+        file_results = [data for kind, data in queued if kind == 'file']
+        assert sorted(r.file_path for r in file_results) == sorted(multiple_dicom_files)
+        assert all(r.success for r in file_results)
+        assert queued[-1] == ('complete', None)
+
+    def test_broken_pool_rereads_unfinished_files_on_threads(self, qapp, multiple_dicom_files):
+        """Test that files pending in a broken pool are read on threads, not failed."""
+        def submit(*args):
+            broken = Future()
+            broken.set_exception(BrokenProcessPool("worker died"))
+            return broken
+
+        pool = Mock()
+        pool.submit.side_effect = submit
+        processor = ThreadedDicomProcessor(backend=BACKEND_PROCESS)
+        with patch.object(threaded_processor, 'get_process_pool', return_value=pool), \
+                patch.object(threaded_processor, 'shutdown_process_pool') as shutdown:
+            processor._process_files_threaded(multiple_dicom_files, False, ['PatientID'])
+
+        shutdown.assert_called_once()
+        file_results = [data for kind, data in self._queued_results(processor) if kind == 'file']
+        assert sorted(r.file_path for r in file_results) == sorted(multiple_dicom_files)
+        assert all(r.success for r in file_results)
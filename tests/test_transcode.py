@@ -0,0 +1,51 @@
+"""
+Tests for decompressing DICOM files before sending.
+"""
+
+import os
+
+import pydicom
+from pydicom.data import get_testdata_file
+from pydicom.uid import ExplicitVRLittleEndian
+
+from fm_dicom.core.transcode import expected_pixel_bytes, transcode_to_explicit_vr
+
+
+class TestTranscodeToExplicitVR:
+    """Test the process-pool transcoding function."""
+
+    def test_compressed_file_is_decompressed(self, temp_dir):
+        """Test that a JPEG 2000 file is written uncompressed with the same instance UID."""
+        src = get_testdata_file("JPEG2000.dcm")
+        dst = os.path.join(temp_dir, "converted.dcm")
+
+        result = transcode_to_explicit_vr(src, dst)
+
+        assert result == (src, dst, None)
+        converted = pydicom.dcmread(dst)
+        assert converted.file_meta.TransferSyntaxUID == ExplicitVRLittleEndian
+        assert converted.SOPInstanceUID == pydicom.dcmread(src).SOPInstanceUID
+        assert len(converted.PixelData) == expected_pixel_bytes(converted)
+
+    def test_uncompressed_file_is_left_alone(self, sample_dicom_file, temp_dir):
+        """Test that files that are not compressed produce no output."""
+        dst = os.path.join(temp_dir, "converted.dcm")
+
+        src, converted, reason = transcode_to_explicit_vr(sample_dicom_file, dst)
+
+        assert converted is None
+        assert "not compressed" in reason
+        assert not os.path.exists(dst)
+
+    def test_unreadable_file_reports_error(self, temp_dir):
+        """Test that a broken file is reported instead of raising."""
+        src = os.path.join(temp_dir, "broken.dcm")
+        with open(src, "wb") as f:
+            f.write(b"not dicom")
+        dst = os.path.join(temp_dir, "converted.dcm")
+
+        _, converted, reason = transcode_to_explicit_vr(src, dst)
+
+        assert converted is None
+        assert reason
+        assert not os.path.exists(dst)
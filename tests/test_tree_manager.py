@@ -6,9 +6,12 @@ import os
 from unittest.mock import Mock, patch, MagicMock
 import pytest
 import pydicom
-from PyQt6.QtWidgets import QTreeWidgetItem
+from PyQt6.QtWidgets import QTreeWidgetItem, QTreeWidget, QApplication
+from PyQt6.QtCore import Qt
 
-from fm_dicom.managers.tree_manager import TreeManager
+from fm_dicom.managers.tree_manager import TreeManager, TREE_PATH_ROLE
+from fm_dicom.core.instance_record import InstanceRecord
+from fm_dicom.core.header_index import get_header_index
 
 
 class TestTreeManager:
@@ -105,12 +108,17 @@ class TestTreeManager:
         
         # Verify methods were called
         tree_manager.tree.clear.assert_called_once()
-        tree_manager._build_hierarchy.assert_called_once_with(files)
+        tree_manager._build_hierarchy.assert_called_once()
         tree_manager._build_tree_structure.assert_called_once_with(mock_hierarchy)
         tree_manager.tree_populated.emit.assert_called_once_with(len(files))
         
+        # Header Datasets are replaced by compact records
+        built_files = tree_manager._build_hierarchy.call_args[0][0]
+        assert [path for path, _ in built_files] == multiple_dicom_files
+        assert all(isinstance(record, InstanceRecord) for _, record in built_files)
+        
         # Verify state was updated
-        assert tree_manager.loaded_files == files
+        assert tree_manager.loaded_files == built_files
         assert tree_manager.hierarchy == mock_hierarchy
     
     def test_populate_tree_cancelled(self, tree_manager):
@@ -385,10 +393,329 @@ class TestTreeManagerIntegration:
         
         # Verify complete workflow
         tree_manager.tree.clear.assert_called_once()
-        tree_manager._build_hierarchy.assert_called_once_with(files)
+        tree_manager._build_hierarchy.assert_called_once()
         tree_manager._build_tree_structure.assert_called_once_with(mock_hierarchy)
         tree_manager.tree_populated.emit.assert_called_once_with(len(files))
         
         # Verify final state
-        assert tree_manager.loaded_files == files
-        assert tree_manager.hierarchy == mock_hierarchy
\ No newline at end of file
+        built_files = tree_manager._build_hierarchy.call_args[0][0]
+        assert [path for path, _ in built_files] == [path for path, _ in files]
+        assert tree_manager.loaded_files == built_files
+        assert tree_manager.hierarchy == mock_hierarchy
+
+class TestTreeManagerIncrementalUpdate:
+    """Test in-place tree updates after files are rewritten."""
+
+    @pytest.fixture
+    def tree_manager(self, mock_main_window, temp_dir):
+        """Create a TreeManager backed by a real tree widget."""
+        mock_main_window.config = {
+            "performance": {"header_index_path": os.path.join(temp_dir, "headers.sqlite3")}
+        }
+        mock_main_window.tree = QTreeWidget()
+        mock_main_window.tree.setColumnCount(4)
+        mock_main_window.style = QApplication.style
+        mock_main_window._pending_ui_state = None
+        return TreeManager(mock_main_window)
+
+    @pytest.fixture
+    def populated(self, tree_manager, multiple_dicom_files):
+        """Build the tree from the sample files without the threaded path."""
+        files = [(path, pydicom.dcmread(path, stop_before_pixels=True)) for path in multiple_dicom_files]
+        hierarchy = tree_manager._build_hierarchy(files)
+        tree_manager.hierarchy = hierarchy
+        tree_manager.loaded_files = [
+            (path, tree_manager._hierarchy_entry(tree_manager.file_metadata[path], path)['record'])
+            for path in multiple_dicom_files
+        ]
+        tree_manager._build_tree_structure(hierarchy)
+        return tree_manager
+
+    def _rewrite(self, file_path, **values):
+        ds = pydicom.dcmread(file_path)
+        for keyword, value in values.items():
+            setattr(ds, keyword, value)
+        ds.save_as(file_path, write_like_original=False)
+
+    def test_relabel_moves_instance_and_prunes_parents(self, populated, multiple_dicom_files):
+        """Test that a changed patient moves the instance and drops the empty patient."""
+        tree = populated.tree
+        untouched = populated._item_for_labels(populated.file_metadata[multiple_dicom_files[1]][:1])
+        untouched.setExpanded(False)
+
+        self._rewrite(multiple_dicom_files[0], PatientID="ID001", PatientName="Test^Patient1")
+        populated.update_files([multiple_dicom_files[0]])
+
+        assert tree.topLevelItemCount() == 2
+        assert "Test^Patient0 (ID000)" not in populated.hierarchy
+        labels = populated.file_metadata[multiple_dicom_files[0]]
+        assert labels[0] == "Test^Patient1 (ID001)"
+        item = populated._item_for_labels(labels)
+        assert item.data(0, Qt.ItemDataRole.UserRole) == multiple_dicom_files[0]
+        # The destination patient node is reused, not rebuilt
+        assert populated._item_for_labels(labels[:1]) is untouched
+        assert len(populated.hierarchy["Test^Patient1 (ID001)"]) == 2
+
+        record = dict(populated.loaded_files)[multiple_dicom_files[0]]
+        assert record.PatientID == "ID001"
+        assert [path for path, _ in populated.loaded_files] == multiple_dicom_files
+
+    def test_unchanged_labels_keep_tree_items(self, populated, multiple_dicom_files):
+        """Test that a save without hierarchy changes leaves the tree items in place."""
+        labels = populated.file_metadata[multiple_dicom_files[2]]
+        item = populated._item_for_labels(labels)
+        populated._item_for_labels(labels[:1]).setExpanded(False)
+
+        self._rewrite(multiple_dicom_files[2], Modality="MR")
+        populated.update_files([multiple_dicom_files[2]])
+
+        assert populated._item_for_labels(labels) is item
+        assert not populated._item_for_labels(labels[:1]).isExpanded()
+        assert populated._hierarchy_entry(labels, multiple_dicom_files[2])['record'].Modality == "MR"
+
+    def test_instances_stay_sorted(self, populated, multiple_dicom_files):
+        """Test that a moved instance is inserted in instance number order."""
+        target = populated.file_metadata[multiple_dicom_files[1]]
+        series_uid = target[2].split("[")[-1].rstrip("]")
+        moves = {
+            multiple_dicom_files[0]: "5",
+            multiple_dicom_files[2]: "3",
+        }
+        for path, number in moves.items():
+            self._rewrite(
+                path,
+                PatientID="ID001", PatientName="Test^Patient1",
+                StudyInstanceUID="1.2.3.4.5.6.7.8.1", SeriesInstanceUID=series_uid,
+                InstanceNumber=number,
+            )
+        populated.update_files(list(moves))
+
+        series_item = populated._item_for_labels(target[:3])
+        populated._fetch_instances(series_item)
+        numbers = [
+            series_item.child(i).data(0, TREE_PATH_ROLE)[3].split()[1]
+            for i in range(series_item.childCount())
+        ]
+        assert numbers == ["1", "3", "5"]
+        assert populated.tree.topLevelItemCount() == 1
+
+    def test_insert_files_attaches_new_instances(self, populated, multiple_dicom_files, temp_dir):
+        """Test that received files are added without rebuilding existing nodes."""
+        labels = populated.file_metadata[multiple_dicom_files[1]]
+        patient_item = populated._item_for_labels(labels[:1])
+        ds = pydicom.dcmread(multiple_dicom_files[1])
+        ds.SOPInstanceUID = ds.SOPInstanceUID + ".99"
+        ds.InstanceNumber = "7"
+        received = os.path.join(temp_dir, "received.dcm")
+        ds.save_as(received, write_like_original=False)
+
+        with patch.object(populated, 'populate_tree') as populate_tree:
+            populated.insert_files([received])
+        populate_tree.assert_not_called()
+
+        new_labels = populated.file_metadata[received]
+        assert new_labels[:3] == labels[:3]
+        assert populated._item_for_labels(labels[:1]) is patient_item
+        assert populated._hierarchy_entry(new_labels, received)['sort_key'] == 7
+        assert [path for path, _ in populated.loaded_files] == multiple_dicom_files + [received]
+        assert populated.tree.topLevelItemCount() == 3
+
+    def test_insert_files_bisects_into_expanded_series(self, populated, multiple_dicom_files):
+        """Test that inserted rows land in sort order and are indexed by label path."""
+        labels = populated.file_metadata[multiple_dicom_files[1]]
+        series_item = populated._item_for_labels(labels[:3])
+        populated._fetch_instances(series_item)
+        ds = pydicom.dcmread(multiple_dicom_files[1], stop_before_pixels=True)
+        received = []
+        for number in (9, 4, 12, 2, 7):
+            ds.SOPInstanceUID = f"1.2.3.99.{number}"
+            ds.InstanceNumber = str(number)
+            path = f"/received/{number}.dcm"
+            received.append((path, InstanceRecord.from_dataset(path, ds, file_size=0)))
+
+        populated.insert_files(received)
+
+        numbers = [
+            int(series_item.child(i).data(0, TREE_PATH_ROLE)[3].split()[1])
+            for i in range(series_item.childCount())
+        ]
+        assert numbers == sorted(numbers)
+        assert len(numbers) == 6
+        for path, _ in received:
+            item = populated._items[populated.file_metadata[path]]
+            assert item.parent() is series_item
+            assert item.data(0, Qt.ItemDataRole.UserRole) == path
+
+    def test_pruned_rows_leave_the_index(self, populated, multiple_dicom_files):
+        """Test that moving the only instance of a patient drops its rows from the index."""
+        old_labels = populated.file_metadata[multiple_dicom_files[0]]
+        populated._fetch_all_instances()
+
+        self._rewrite(multiple_dicom_files[0], PatientID="ID001", PatientName="Test^Patient1")
+        populated.update_files([multiple_dicom_files[0]])
+
+        for depth in range(1, 5):
+            assert tuple(old_labels[:depth]) not in populated._items
+        new_labels = populated.file_metadata[multiple_dicom_files[0]]
+        assert populated._items[tuple(new_labels[:1])].parent() is None
+
+    def test_append_keeps_labels_of_loaded_files(self, tree_manager, multiple_dicom_files):
+        """Test that appending files keeps earlier files known to incremental updates."""
+        files = [(path, pydicom.dcmread(path, stop_before_pixels=True)) for path in multiple_dicom_files]
+        tree_manager.populate_tree(files[:2])
+        tree_manager.populate_tree(files[2:], append=True)
+
+        assert sorted(tree_manager.file_metadata) == sorted(multiple_dicom_files)
+
+        with patch.object(tree_manager, '_find_item_by') as find_item_by:
+            tree_manager.insert_files([multiple_dicom_files[0]])
+        find_item_by.assert_not_called()
+        assert [path for path, _ in tree_manager.loaded_files] == multiple_dicom_files
+
+    def test_insert_files_updates_known_files(self, populated, multiple_dicom_files):
+        """Test that inserting an already loaded file re-reads it in place."""
+        self._rewrite(multiple_dicom_files[0], Modality="MR")
+        populated.insert_files([multiple_dicom_files[0]])
+
+        labels = populated.file_metadata[multiple_dicom_files[0]]
+        assert populated._hierarchy_entry(labels, multiple_dicom_files[0])['record'].Modality == "MR"
+        assert [path for path, _ in populated.loaded_files] == multiple_dicom_files
+
+    def test_received_study_is_inserted_from_records(self, populated, multiple_dicom_files, temp_dir):
+        """Test that a completed receive is added from its records without reading the files."""
+        ds = pydicom.dcmread(multiple_dicom_files[0])
+        ds.PatientID = "ID900"
+        received = os.path.join(temp_dir, "received.dcm")
+        ds.save_as(received, write_like_original=False)
+        record = InstanceRecord.from_dataset(received, ds, file_size=os.path.getsize(received))
+
+        with patch('fm_dicom.managers.tree_manager.read_headers') as read_headers, \
+                patch('pydicom.dcmread') as dcmread:
+            populated.mark_inbound_complete({
+                'study_uid': ds.StudyInstanceUID,
+                'file_paths': [received],
+                'records': [record],
+            })
+        read_headers.assert_not_called()
+        dcmread.assert_not_called()
+
+        labels = populated.file_metadata[received]
+        assert labels[0] == "Test^Patient0 (ID900)"
+        assert populated._hierarchy_entry(labels, received)['record'] is record
+        # The index serves the header to the next load of the file
+        index = get_header_index(populated.main_window.config)
+        assert index.lookup(received).values() == record.values()
+
+    def test_unreadable_file_is_removed(self, populated, multiple_dicom_files):
+        """Test that a file that can no longer be read drops out of the tree."""
+        os.remove(multiple_dicom_files[0])
+        populated.update_files([multiple_dicom_files[0]])
+
+        assert multiple_dicom_files[0] not in populated.file_metadata
+        assert [path for path, _ in populated.loaded_files] == multiple_dicom_files[1:]
+        assert populated.tree.topLevelItemCount() == 2
+
+
+class TestTreeManagerLazyInstances:
+    """Test deferred creation of instance rows."""
+
+    @pytest.fixture
+    def tree_manager(self, mock_main_window, temp_dir):
+        """Create a TreeManager backed by a real tree widget."""
+        mock_main_window.config = {
+            "performance": {"header_index_path": os.path.join(temp_dir, "headers.sqlite3")}
+        }
+        mock_main_window.tree = QTreeWidget()
+        mock_main_window.tree.setColumnCount(4)
+        mock_main_window.style = QApplication.style
+        mock_main_window._pending_ui_state = None
+        return TreeManager(mock_main_window)
+
+    @pytest.fixture
+    def series_files(self, temp_dir):
+        """Create one series of five instances, numbered in reverse file order."""
+        files = []
+        for i in range(5):
+            ds = pydicom.Dataset()
+            ds.PatientName = "Lazy^Patient"
+            ds.PatientID = "LAZY"
+            ds.StudyInstanceUID = "1.2.3.9"
+            ds.SeriesInstanceUID = "1.2.3.9.1"
+            ds.SOPInstanceUID = f"1.2.3.9.1.{i}"
+            ds.SOPClassUID = "1.2.840.10008.5.1.4.1.1.2"
+            ds.InstanceNumber = str(5 - i)
+            ds.file_meta = pydicom.dataset.FileMetaDataset()
+            ds.file_meta.MediaStorageSOPClassUID = ds.SOPClassUID
+            ds.file_meta.MediaStorageSOPInstanceUID = ds.SOPInstanceUID
+            ds.file_meta.TransferSyntaxUID = pydicom.uid.ExplicitVRLittleEndian
+            file_path = os.path.join(temp_dir, f"lazy_{i}.dcm")
+            ds.save_as(file_path, enforce_file_format=True)
+            files.append(file_path)
+        return files
+
+    @pytest.fixture
+    def built(self, tree_manager, series_files):
+        files = [(path, pydicom.dcmread(path, stop_before_pixels=True)) for path in series_files]
+        tree_manager.hierarchy = tree_manager._build_hierarchy(files)
+        tree_manager.loaded_files = files
+        tree_manager._build_tree_structure(tree_manager.hierarchy)
+        return tree_manager
+
+    def _series_item(self, tree_manager):
+        return tree_manager.tree.topLevelItem(0).child(0).child(0)
+
+    def test_series_rows_are_deferred(self, built, series_files):
+        """Test that building the tree creates no instance rows."""
+        series_item = self._series_item(built)
+        assert series_item.childCount() == 0
+        assert series_item.childIndicatorPolicy() == QTreeWidgetItem.ChildIndicatorPolicy.ShowIndicator
+
+        # Selection flows still see every file, in instance order
+        paths = built._collect_instance_filepaths(built.tree.topLevelItem(0))
+        assert paths == list(reversed(series_files))
+        assert series_item.childCount() == 0
+
+    def test_expanding_series_creates_sorted_rows(self, built, series_files):
+        """Test that the first expansion populates the series."""
+        series_item = self._series_item(built)
+        series_item.setExpanded(True)
+
+        assert series_item.childCount() == 5
+        first = series_item.child(0)
+        assert first.data(0, Qt.ItemDataRole.UserRole) == series_files[-1]
+        assert first.data(0, TREE_PATH_ROLE) == built.file_metadata[series_files[-1]]
+
+        # A second expansion does not duplicate rows
+        series_item.setExpanded(False)
+        series_item.setExpanded(True)
+        assert series_item.childCount() == 5
+
+    def test_select_item_by_file_creates_rows(self, built, series_files):
+        """Test that selecting a file inside a collapsed series finds its row."""
+        assert built.select_item_by_file(series_files[2])
+        selected = built.tree.selectedItems()
+        assert [item.data(0, Qt.ItemDataRole.UserRole) for item in selected] == [series_files[2]]
+
+    def test_filter_matches_pending_instances(self, built):
+        """Test that the tree filter searches instance labels of collapsed series."""
+        built.filter_tree_items("1.2.3.9.1.3")
+        series_item = self._series_item(built)
+        visible = [
+            series_item.child(i).data(0, TREE_PATH_ROLE)[3]
+            for i in range(series_item.childCount())
+            if not series_item.child(i).isHidden()
+        ]
+        assert visible == ["Instance 2 [1.2.3.9.1.3]"]
+
+    def test_expand_all_creates_rows(self, built):
+        """Test that expand all populates collapsed series."""
+        built.expand_all()
+        assert self._series_item(built).childCount() == 5
+
+    def test_get_instance_record(self, built, series_files):
+        """Test that loaded header records are available without creating rows."""
+        record = built.get_instance_record(series_files[0])
+        assert record.SOPInstanceUID == "1.2.3.9.1.0"
+        assert record.transfer_syntax_uid == pydicom.uid.ExplicitVRLittleEndian
+        assert built.get_instance_record("/not/loaded.dcm") is None
+        assert self._series_item(built).childCount() == 0
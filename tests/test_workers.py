@@ -7,12 +7,15 @@ import tempfile
 import shutil
 from unittest.mock import Mock, patch, MagicMock
 import pytest
+import pydicom
 from PyQt6.QtCore import QThread, pyqtSignal
 
 from fm_dicom.workers.dicom_worker import DicomdirScanWorker
 from fm_dicom.workers.export_worker import ExportWorker
-from fm_dicom.workers.zip_worker import ZipExtractionWorker
+from fm_dicom.workers.zip_worker import ZipExtractionWorker, ZipHeaderScanWorker
+from fm_dicom.core.zip_source import ZipArchiveSource
 from fm_dicom.workers.dicom_send_worker import DicomSendWorker
+from fm_dicom.workers.tag_save_worker import TagSaveWorker
 
 
 class TestDicomdirScanWorker:
@@ -212,6 +215,92 @@ class TestExportWorker:
         # Should call DICOMDIR ZIP export method
         worker._export_dicomdir_zip.assert_called_once()
     
+    def test_directory_export_reports_copy_strategy(self, multiple_dicom_files, temp_dir, qapp):
+        """Test that the directory export copies every file and names the strategy used."""
+        output_path = os.path.join(temp_dir, 'export_dir')
+        worker = ExportWorker(multiple_dicom_files, "directory", output_path, copy_mode="copy")
+        completed = []
+        worker.export_complete.connect(lambda path, stats: completed.append(stats))
+
+        worker.run()
+        qapp.processEvents()
+
+        assert completed[0]['exported_count'] == len(multiple_dicom_files)
+        assert completed[0]['copy_strategy'] == 'copy'
+        assert completed[0]['copy_strategies'] == {'copy': len(multiple_dicom_files)}
+        assert sorted(os.listdir(output_path)) == sorted(os.path.basename(p) for p in multiple_dicom_files)
+
+    def test_directory_export_keeps_files_with_the_same_name(self, temp_dir, qapp):
+        """Test that sources sharing a file name are exported to distinct files intact."""
+        sources = []
+        for index, size in enumerate((3 * 1024 * 1024, 1024 * 1024)):
+            series_dir = os.path.join(temp_dir, f'series_{index}')
+            os.makedirs(series_dir)
+            path = os.path.join(series_dir, 'IM0001')
+            with open(path, 'wb') as f:
+                f.write(bytes([index + 1]) * size)
+            sources.append(path)
+        output_path = os.path.join(temp_dir, 'export_dir')
+        worker = ExportWorker(sources, "directory", output_path, copy_workers=4)
+        completed = []
+        worker.export_complete.connect(lambda path, stats: completed.append(stats))
+
+        worker.run()
+        qapp.processEvents()
+
+        assert completed[0]['exported_count'] == 2
+        assert sorted(os.listdir(output_path)) == ['IM0001', 'IM0001_1']
+        for source, name in zip(sources, ['IM0001', 'IM0001_1']):
+            with open(source, 'rb') as src, open(os.path.join(output_path, name), 'rb') as dst:
+                assert dst.read() == src.read()
+
+    def test_zip_export_compresses_members_in_parallel(self, multiple_dicom_files, temp_dir, qapp):
+        """Test that the ZIP export writes every file through the compression pool."""
+        import zipfile
+        output_path = os.path.join(temp_dir, 'export.zip')
+        worker = ExportWorker(multiple_dicom_files, "zip", output_path, zip_workers=2)
+        completed = []
+        worker.export_complete.connect(lambda path, stats: completed.append(stats))
+
+        worker.run()
+        qapp.processEvents()
+
+        assert completed[0]['exported_count'] == len(multiple_dicom_files)
+        assert completed[0]['deflated_count'] == len(multiple_dicom_files)
+        with zipfile.ZipFile(output_path) as zipf:
+            assert zipf.testzip() is None
+            assert zipf.namelist() == [os.path.basename(p) for p in multiple_dicom_files]
+
+    def test_dicomdir_zip_export_reads_each_file_once(self, multiple_dicom_files, temp_dir, qapp):
+        """Test that the DICOMDIR ZIP export streams members without re-reading headers."""
+        import zipfile
+        import pydicom
+        output_path = os.path.join(temp_dir, 'export_dicomdir.zip')
+        worker = ExportWorker(multiple_dicom_files, "dicomdir_zip", output_path)
+        completed = []
+        worker.export_complete.connect(lambda path, stats: completed.append(stats))
+
+        real_dcmread = pydicom.dcmread
+        with patch('pydicom.dcmread', side_effect=real_dcmread) as dcmread:
+            worker.run()
+        qapp.processEvents()
+
+        assert dcmread.call_count == len(multiple_dicom_files)
+        assert completed and completed[0]['exported_count'] == len(multiple_dicom_files)
+        assert completed[0]['patients'] == len(multiple_dicom_files)
+        with zipfile.ZipFile(output_path) as zipf:
+            names = zipf.namelist()
+            dicomdir = pydicom.dcmread(pydicom.filebase.DicomBytesIO(zipf.read('DICOMDIR')))
+            members = {
+                name: pydicom.dcmread(pydicom.filebase.DicomBytesIO(zipf.read(name)))
+                for name in names if name != 'DICOMDIR'
+            }
+        assert len(members) == len(multiple_dicom_files)
+        images = [r for r in dicomdir.DirectoryRecordSequence if r.DirectoryRecordType == 'IMAGE']
+        for record in images:
+            member = members['/'.join(record.ReferencedFileID)]
+            assert member.SOPInstanceUID == record.ReferencedSOPInstanceUIDInFile
+
     def test_run_invalid_export_type(self, multiple_dicom_files, temp_dir, qapp):
         """Test running with invalid export type."""
         worker = ExportWorker(multiple_dicom_files, "invalid_type", "/output/path")
@@ -315,6 +404,334 @@ class TestZipExtractionWorker:
             zip_worker.run()
 
 
+class TestZipHeaderScanWorker:
+    """Test ZipHeaderScanWorker functionality."""
+
+    def test_run_reads_headers_in_place(self, multiple_dicom_files, temp_dir, qapp):
+        """Test that DICOM members are reported without extracting them."""
+        import zipfile
+        zip_path = os.path.join(temp_dir, 'archive.zip')
+        with zipfile.ZipFile(zip_path, 'w') as zf:
+            for file_path in multiple_dicom_files:
+                zf.write(file_path, os.path.basename(file_path))
+            zf.writestr('notes.txt', 'Not a DICOM file')
+        staging_dir = os.path.join(temp_dir, 'staging')
+        os.makedirs(staging_dir)
+
+        source = ZipArchiveSource(zip_path, staging_dir)
+        worker = ZipHeaderScanWorker(source)
+        results = []
+        worker.scan_complete.connect(results.append)
+        worker.run()
+        source.close()
+
+        assert len(results) == 1
+        assert [os.path.basename(path) for path, _ in results[0]] == [
+            os.path.basename(path) for path in multiple_dicom_files
+        ]
+        assert os.listdir(staging_dir) == []
+
+    def test_run_with_exception(self, qapp):
+        """Test that read errors are reported through scan_failed."""
+        source = Mock()
+        source.member_paths = ['a']
+        source.iter_headers.side_effect = OSError('boom')
+        worker = ZipHeaderScanWorker(source)
+        errors = []
+        worker.scan_failed.connect(errors.append)
+        worker.run()
+        assert errors and 'boom' in errors[0]
+
+
+class TestTagSaveWorker:
+    """Test TagSaveWorker functionality."""
+
+    @staticmethod
+    def _set_patient_id(file_path, ds):
+        old_value = ds.PatientID
+        ds.PatientID = 'EDITED'
+        return True, [(file_path, old_value)]
+
+    def test_run_saves_all_files(self, multiple_dicom_files, qapp):
+        """Test that every file is edited and audit entries are returned."""
+        import pydicom
+        worker = TagSaveWorker(multiple_dicom_files, self._set_patient_id, max_workers=2)
+        results = []
+        worker.save_complete.connect(results.append)
+        worker.run()
+
+        result = results[0]
+        assert result['updated'] == len(multiple_dicom_files)
+        assert sorted(result['updated_files']) == sorted(multiple_dicom_files)
+        assert sorted(old for _, old in result['audit_entries']) == ['ID000', 'ID001', 'ID002']
+        assert not result['cancelled']
+        for file_path in multiple_dicom_files:
+            assert pydicom.dcmread(file_path).PatientID == 'EDITED'
+        # No temporary files are left next to the originals
+        assert sorted(os.listdir(os.path.dirname(multiple_dicom_files[0]))) == sorted(
+            os.path.basename(path) for path in multiple_dicom_files
+        )
+
+    def test_failed_files_are_reported(self, multiple_dicom_files, temp_dir, qapp):
+        """Test that unreadable files are listed without stopping the save."""
+        bad_file = os.path.join(temp_dir, 'broken.dcm')
+        with open(bad_file, 'w') as f:
+            f.write('not dicom')
+
+        worker = TagSaveWorker(multiple_dicom_files + [bad_file], self._set_patient_id)
+        worker.run()
+
+        assert worker.result['updated'] == len(multiple_dicom_files)
+        assert len(worker.result['failed_files']) == 1
+        assert 'broken.dcm' in worker.result['failed_files'][0]
+
+    def test_cancel_before_run(self, multiple_dicom_files, qapp):
+        """Test that a cancelled worker leaves files untouched."""
+        import pydicom
+        worker = TagSaveWorker(multiple_dicom_files, self._set_patient_id)
+        worker.cancel()
+        worker.run()
+
+        assert worker.result['cancelled']
+        assert worker.result['updated'] == 0
+        assert pydicom.dcmread(multiple_dicom_files[0]).PatientID == 'ID000'
+
+
+class TestDicomSendWorkerAssociations:
+    """Test sending over concurrent associations to a local Storage SCP."""
+
+    @pytest.fixture
+    def storage_scp(self):
+        """Run a Storage SCP on a free loopback port, recording what it receives."""
+        import threading
+        from pynetdicom import AE, evt, AllStoragePresentationContexts
+        from pynetdicom.sop_class import Verification
+
+        received = []
+        associations = set()
+        lock = threading.Lock()
+
+        def handle_store(event):
+            with lock:
+                received.append(event.dataset.SOPInstanceUID)
+                associations.add(id(event.assoc))
+            return 0x0000
+
+        ae = AE()
+        ae.supported_contexts = AllStoragePresentationContexts
+        ae.add_supported_context(Verification)
+        server = ae.start_server(('127.0.0.1', 0), block=False,
+                                 evt_handlers=[(evt.EVT_C_STORE, handle_store)])
+        yield server.server_address[1], received, associations
+        server.shutdown()
+
+    def test_parallel_associations_send_every_file(self, storage_scp, multiple_dicom_files, qapp):
+        """Test that files are spread over several associations and all arrive."""
+        port, received, associations = storage_scp
+        files = multiple_dicom_files * 4  # Same instances resent; the SCP just counts them
+        worker = DicomSendWorker(files, ('FM_TEST', 'ANY_SCP', '127.0.0.1', port),
+                                 ['1.2.840.10008.5.1.4.1.1.2'], max_associations=3)
+        progress = []
+        results = []
+        worker.progress_updated.connect(lambda *args: progress.append(args))
+        worker.send_complete.connect(lambda *args: results.append(args))
+        worker.run()
+        qapp.processEvents()
+
+        assert len(received) == len(files)
+        assert len(associations) == 3
+        success, warnings, failed, details, _, _ = results[0]
+        assert (success, warnings, failed) == (len(files), 0, 0)
+        # Progress from all associations is aggregated in order
+        assert [args[0] for args in progress] == list(range(1, len(files) + 1))
+
+    def test_files_are_streamed_from_disk(self, storage_scp, multiple_dicom_files, qapp):
+        """Test that matching transfer syntaxes are sent without decoding the files."""
+        from fm_dicom.core.send_manifest import build_send_manifest
+        port, received, _ = storage_scp
+        manifest = build_send_manifest(multiple_dicom_files)
+        worker = DicomSendWorker(multiple_dicom_files, ('FM_TEST', 'ANY_SCP', '127.0.0.1', port),
+                                 manifest.unique_sop_classes(), manifest=manifest, max_associations=2)
+
+        with patch('fm_dicom.workers.dicom_send_worker.pydicom.dcmread') as mock_read:
+            worker.run()
+
+        mock_read.assert_not_called()
+        assert sorted(worker.streamed_files) == sorted(multiple_dicom_files)
+        assert worker.timing_info['streamed_files'] == len(multiple_dicom_files)
+        assert sorted(received) == sorted(
+            pydicom.dcmread(path).SOPInstanceUID for path in multiple_dicom_files
+        )
+
+    def test_streaming_disabled_sends_datasets(self, storage_scp, multiple_dicom_files, qapp):
+        """Test that the decoded-dataset path is used when streaming is off."""
+        port, received, _ = storage_scp
+        worker = DicomSendWorker(multiple_dicom_files, ('FM_TEST', 'ANY_SCP', '127.0.0.1', port),
+                                 ['1.2.840.10008.5.1.4.1.1.2'], stream_from_file=False)
+        worker.run()
+
+        assert worker.streamed_files == []
+        assert len(received) == len(multiple_dicom_files)
+
+    def test_unreachable_server_fails_all_files(self, multiple_dicom_files, qapp):
+        """Test that files are reported failed when no association can be made."""
+        import socket
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+
+        worker = DicomSendWorker(multiple_dicom_files, ('FM_TEST', 'ANY_SCP', '127.0.0.1', port),
+                                 ['1.2.840.10008.5.1.4.1.1.2'], max_associations=2)
+        result = worker._attempt_send_with_formats(multiple_dicom_files)
+
+        success, warnings, failed, details = result
+        assert (success, warnings, failed) == (0, 0, len(multiple_dicom_files))
+        assert details and 'Association failed' in details[0]
+
+    def test_compressed_files_are_converted_while_sending(self, storage_scp, multiple_dicom_files, temp_dir, qapp):
+        """Test that rejected compressed files are decompressed and sent through a bounded spool."""
+        from pydicom.data import get_testdata_file
+        from fm_dicom.core.send_manifest import build_send_manifest
+        port, received, _ = storage_scp
+        compressed = []
+        for index in range(3):
+            path = os.path.join(temp_dir, f"jpeg2000_{index}.dcm")
+            shutil.copy(get_testdata_file("JPEG2000.dcm"), path)
+            compressed.append(path)
+        files = multiple_dicom_files + compressed
+        manifest = build_send_manifest(files)
+        worker = DicomSendWorker(files, ('FM_TEST', 'ANY_SCP', '127.0.0.1', port),
+                                 manifest.unique_sop_classes(), manifest=manifest,
+                                 max_associations=2, transcode_workers=1, spool_limit=1)
+        results = []
+        worker.send_complete.connect(lambda *args: results.append(args))
+
+        worker.run()
+        qapp.processEvents()
+
+        success, warnings, failed, details, converted_count, _ = results[0]
+        assert (success, failed, converted_count) == (len(files), 0, len(compressed))
+        assert len(received) == len(files)
+        assert worker._spool_dir is None
+        assert worker._spooled == {}
+
+    def test_repeat_send_uses_cached_negotiation(self, storage_scp, multiple_dicom_files, qapp):
+        """Test that a second send to the same server skips the compatibility probe."""
+        from fm_dicom.core.negotiation_cache import NegotiationCache
+        port, received, _ = storage_scp
+        cache = NegotiationCache()
+        send_params = ('FM_TEST', 'ANY_SCP', '127.0.0.1', port)
+        sop_classes = ['1.2.840.10008.5.1.4.1.1.2']
+
+        first = DicomSendWorker(multiple_dicom_files, send_params, sop_classes, negotiation_cache=cache)
+        first.run()
+        assert first.timing_info['negotiation_cached'] is False
+        assert len(cache) > 0
+
+        second = DicomSendWorker(multiple_dicom_files, send_params, sop_classes, negotiation_cache=cache)
+        with patch.object(second, '_associate', wraps=second._associate) as associate:
+            second.run()
+
+        assert second.timing_info['negotiation_cached'] is True
+        assert associate.call_count == 1  # Only the sending association
+        assert len(received) == 2 * len(multiple_dicom_files)
+
+    def test_journal_skips_acknowledged_files(self, storage_scp, multiple_dicom_files, temp_dir, qapp):
+        """Test that a resumed send to the same destination only sends unacknowledged files."""
+        from fm_dicom.core.send_journal import SendJournal
+        port, received, _ = storage_scp
+        journal = SendJournal(os.path.join(temp_dir, 'journal.sqlite3'))
+        send_params = ('FM_TEST', 'ANY_SCP', '127.0.0.1', port)
+        sop_classes = ['1.2.840.10008.5.1.4.1.1.2']
+
+        DicomSendWorker(multiple_dicom_files[:2], send_params, sop_classes, journal=journal).run()
+        assert len(received) == 2
+
+        results = []
+        worker = DicomSendWorker(multiple_dicom_files, send_params, None, journal=journal, resume=True)
+        worker.send_complete.connect(lambda *args: results.append(args))
+        worker.run()
+        qapp.processEvents()
+
+        assert len(received) == len(multiple_dicom_files)
+        assert worker.skipped_files == multiple_dicom_files[:2]
+        success, _, failed, details, _, timing = results[0]
+        assert (success, failed) == (len(multiple_dicom_files), 0)
+        assert timing['skipped_acknowledged'] == 2
+        journal.close()
+
+    def test_operator_send_resends_acknowledged_files(self, storage_scp, multiple_dicom_files, temp_dir):
+        """Test that a send that is not a resume or retry sends acknowledged files again."""
+        from fm_dicom.core.send_journal import SendJournal, STATUS_SENT
+        port, received, _ = storage_scp
+        journal = SendJournal(os.path.join(temp_dir, 'journal.sqlite3'))
+        send_params = ('FM_TEST', 'ANY_SCP', '127.0.0.1', port)
+        sop_classes = ['1.2.840.10008.5.1.4.1.1.2']
+
+        DicomSendWorker(multiple_dicom_files, send_params, sop_classes, journal=journal).run()
+        assert journal.acknowledged(send_params, multiple_dicom_files) == multiple_dicom_files
+
+        worker = DicomSendWorker(multiple_dicom_files, send_params, sop_classes, journal=journal)
+        worker.run()
+
+        assert worker.skipped_files == []
+        assert len(received) == 2 * len(multiple_dicom_files)
+        assert all(journal.status(send_params, fp) == STATUS_SENT for fp in multiple_dicom_files)
+        journal.close()
+
+    def test_journal_schedules_retry_when_association_fails(self, multiple_dicom_files, temp_dir):
+        """Test that files left unsent by a failed association are queued for retry."""
+        import socket
+        from fm_dicom.core.send_journal import SendJournal, STATUS_FAILED
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        journal = SendJournal(os.path.join(temp_dir, 'journal.sqlite3'), base_delay=0)
+        send_params = ('FM_TEST', 'ANY_SCP', '127.0.0.1', port)
+
+        worker = DicomSendWorker(multiple_dicom_files, send_params, ['1.2.840.10008.5.1.4.1.1.2'],
+                                 journal=journal)
+        journal.begin(send_params, multiple_dicom_files)
+        worker._attempt_send_with_formats(multiple_dicom_files)
+
+        assert all(journal.status(send_params, fp) == STATUS_FAILED for fp in multiple_dicom_files)
+        assert journal.due_retries() == {send_params: multiple_dicom_files}
+        journal.close()
+
+    def test_send_reports_metrics(self, storage_scp, multiple_dicom_files, temp_dir, qapp):
+        """Test that a send records per-instance bytes, latency and association setup."""
+        import json
+        port, _, _ = storage_scp
+        log_path = os.path.join(temp_dir, 'send_metrics.jsonl')
+        worker = DicomSendWorker(multiple_dicom_files, ('FM_TEST', 'ANY_SCP', '127.0.0.1', port),
+                                 ['1.2.840.10008.5.1.4.1.1.2'], max_associations=2, metrics_log=log_path)
+        worker.run()
+
+        report = worker.timing_info['metrics']
+        assert report['instances'] == len(multiple_dicom_files)
+        assert report['bytes'] == sum(os.path.getsize(fp) for fp in multiple_dicom_files)
+        assert report['latency_s']['p99'] is not None
+        assert report['associations']['established'] >= 2
+        assert 'send_time' in report['phases_s']
+        with open(log_path) as f:
+            entry = json.loads(f.readline())
+        assert len(entry['per_instance']) == len(multiple_dicom_files)
+
+    def test_context_rejection_invalidates_cache(self, multiple_dicom_files):
+        """Test that a rejected SOP class clears the cached outcomes for the server."""
+        from fm_dicom.core.negotiation_cache import NegotiationCache
+        cache = NegotiationCache()
+        cache.store('127.0.0.1', 11112, 'ANY_SCP', '1.2.840.10008.5.1.4.1.1.2', '1.2.840.10008.1.2.1', True)
+        worker = DicomSendWorker(multiple_dicom_files, ('FM_TEST', 'ANY_SCP', '127.0.0.1', 11112),
+                                 ['1.2.840.10008.5.1.4.1.1.2'], negotiation_cache=cache)
+        assoc = Mock(accepted_contexts=[])
+
+        outcome, _ = worker._store_file(assoc, multiple_dicom_files[0])
+
+        assert outcome == 'failed'
+        assert len(cache) == 0
+
+
 class TestDicomSendWorker:
     """Test DicomSendWorker functionality."""
     
@@ -0,0 +1,118 @@
+"""
+Tests for reading DICOM instances directly from ZIP archives.
+"""
+
+import os
+import zipfile
+from unittest.mock import patch
+
+import pytest
+import pydicom
+
+from fm_dicom.core.instance_record import InstanceRecord
+from fm_dicom.core.zip_source import (
+    ZipArchiveSource, register_source, unregister_source, source_for,
+    is_unmaterialised, ensure_local, ensure_local_files, read_dataset, read_member_header
+)
+
+
+class TestZipArchiveSource:
+    """Test ZipArchiveSource functionality."""
+
+    @pytest.fixture
+    def zip_path(self, temp_dir, multiple_dicom_files):
+        """Create a ZIP with DICOM files, a text file and a DICOMDIR entry."""
+        path = os.path.join(temp_dir, "archive.zip")
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+            for i, file_path in enumerate(multiple_dicom_files):
+                zf.write(file_path, f"study/series/IM{i}")
+            zf.writestr("study/readme.txt", "Not a DICOM file")
+            zf.writestr("DICOMDIR", "dummy dicomdir content")
+            zf.writestr("../escape.dcm", "outside")
+        return path
+
+    @pytest.fixture
+    def source(self, zip_path, temp_dir):
+        """Create a registered source with its own staging directory."""
+        staging_dir = os.path.join(temp_dir, "staging")
+        os.makedirs(staging_dir)
+        source = ZipArchiveSource(zip_path, staging_dir)
+        register_source(source)
+        yield source
+        unregister_source(staging_dir)
+
+    def test_member_paths_stay_in_staging_dir(self, source):
+        """Test that members map into the staging dir and escaping names are skipped."""
+        assert len(source.member_paths) == 5
+        for path in source.member_paths:
+            assert path.startswith(source.staging_dir + os.sep)
+
+    def test_iter_headers_without_extracting(self, source):
+        """Test that headers are parsed from member streams only."""
+        headers = [(path, record) for path, record in source.iter_headers() if record is not None]
+
+        assert len(headers) == 3
+        assert all(isinstance(record, InstanceRecord) for _, record in headers)
+        assert [record.PatientID for _, record in headers] == ["ID000", "ID001", "ID002"]
+        assert headers[0][1].file_size > 0
+        # Nothing was written to the staging directory
+        assert os.listdir(source.staging_dir) == []
+
+    def test_read_dataset_from_member(self, source):
+        """Test that full datasets are read in place for display."""
+        path = os.path.join(source.staging_dir, "study", "series", "IM1")
+        assert source_for(path) is source
+        assert is_unmaterialised(path)
+
+        ds = read_dataset(path)
+        assert ds.PatientID == "ID001"
+        assert read_member_header(path).SOPInstanceUID == ds.SOPInstanceUID
+        assert not os.path.exists(path)
+
+    def test_failed_materialise_leaves_no_partial_file(self, source):
+        """Test that a failed member write removes its partial file and can be retried."""
+        path = os.path.join(source.staging_dir, "study", "series", "IM0")
+
+        with patch("fm_dicom.core.zip_source.shutil.copyfileobj", side_effect=OSError("disk full")):
+            with pytest.raises(OSError):
+                source.materialize(path)
+
+        assert os.listdir(os.path.dirname(path)) == []
+        assert source.materialize(path) == path
+
+    def test_ensure_local_materialises_once(self, source, multiple_dicom_files):
+        """Test that members are written to disk on demand with identical bytes."""
+        path = os.path.join(source.staging_dir, "study", "series", "IM0")
+
+        assert ensure_local(path) == path
+        assert not is_unmaterialised(path)
+        with open(path, "rb") as extracted, open(multiple_dicom_files[0], "rb") as original:
+            assert extracted.read() == original.read()
+
+        # Materialised members are read from disk from now on
+        ds = pydicom.dcmread(path)
+        ds.PatientID = "EDITED"
+        ds.save_as(path)
+        assert read_dataset(path).PatientID == "EDITED"
+        assert read_member_header(path) is None
+        ensure_local(path)
+        assert read_dataset(path).PatientID == "EDITED"
+
+    def test_ordinary_files_are_untouched(self, source, sample_dicom_file):
+        """Test that helpers are no-ops for files outside any archive."""
+        assert source_for(sample_dicom_file) is None
+        assert ensure_local_files([sample_dicom_file]) == [sample_dicom_file]
+        assert read_member_header(sample_dicom_file) is None
+        assert read_dataset(sample_dicom_file).PatientID == "12345"
+
+    def test_unregister_closes_source(self, zip_path, temp_dir):
+        """Test that unregistering forgets the archive."""
+        staging_dir = os.path.join(temp_dir, "other")
+        os.makedirs(staging_dir)
+        source = ZipArchiveSource(zip_path, staging_dir)
+        register_source(source)
+        path = source.member_paths[0]
+
+        unregister_source(staging_dir)
+
+        assert source_for(path) is None
@@ -0,0 +1,137 @@
+"""
+Tests for parallel ZIP writing of exports.
+"""
+
+import os
+import zipfile
+
+import pytest
+import pydicom
+
+from fm_dicom.core.zip_writer import (
+    ParallelZipWriter, member_compression, transfer_syntax_of,
+    COMPRESSION_AUTO, COMPRESSION_DEFLATE, COMPRESSION_STORE,
+)
+
+JPEG2000 = '1.2.840.10008.1.2.4.90'
+
+
+class TestMemberCompression:
+    """Test the per-member store/deflate decision."""
+
+    def test_auto_stores_compressed_transfer_syntaxes(self):
+        """Test that encapsulated pixel data is stored and native data deflated."""
+        assert member_compression(JPEG2000) == zipfile.ZIP_STORED
+        assert member_compression('1.2.840.10008.1.2.5') == zipfile.ZIP_STORED
+        assert member_compression(pydicom.uid.ExplicitVRLittleEndian) == zipfile.ZIP_DEFLATED
+        assert member_compression(None) == zipfile.ZIP_DEFLATED
+
+    def test_explicit_modes_override_transfer_syntax(self):
+        """Test that deflate and store modes apply to every member."""
+        assert member_compression(JPEG2000, COMPRESSION_DEFLATE) == zipfile.ZIP_DEFLATED
+        assert member_compression(pydicom.uid.ExplicitVRLittleEndian, COMPRESSION_STORE) == zipfile.ZIP_STORED
+
+    def test_transfer_syntax_read_from_file_meta(self, sample_dicom_file, temp_dir):
+        """Test reading the transfer syntax from the file meta header only."""
+        assert transfer_syntax_of(sample_dicom_file) == pydicom.uid.ExplicitVRLittleEndian
+        not_dicom = os.path.join(temp_dir, 'notes.txt')
+        with open(not_dicom, 'w') as f:
+            f.write('not DICOM')
+        assert transfer_syntax_of(not_dicom) is None
+
+
+class TestParallelZipWriter:
+    """Test writing members through the compression pool."""
+
+    def test_members_written_in_order_and_valid(self, multiple_dicom_files, sample_dicom_file, temp_dir):
+        """Test that pooled members keep their order and round-trip through zipfile."""
+        output = os.path.join(temp_dir, 'export.zip')
+        files = multiple_dicom_files + [sample_dicom_file]
+        done = []
+        with zipfile.ZipFile(output, 'w') as zipf:
+            writer = ParallelZipWriter(zipf, COMPRESSION_AUTO, workers=2)
+            for index, path in enumerate(files):
+                # The last member claims an encapsulated transfer syntax
+                syntax = JPEG2000 if path == sample_dicom_file else None
+                done.extend(writer.add(path, f'member_{index}.dcm', transfer_syntax=syntax))
+            done.extend(writer.finish())
+
+        assert [arcname for arcname, _, _ in done] == [f'member_{i}.dcm' for i in range(len(files))]
+        assert all(error is None for _, error, _ in done)
+        assert writer.stored == 1
+        assert writer.deflated == len(multiple_dicom_files)
+
+        with zipfile.ZipFile(output) as zipf:
+            assert zipf.testzip() is None
+            infos = zipf.infolist()
+            assert [info.filename for info in infos] == [f'member_{i}.dcm' for i in range(len(files))]
+            assert infos[-1].compress_type == zipfile.ZIP_STORED
+            assert infos[0].compress_type == zipfile.ZIP_DEFLATED
+            for index, path in enumerate(files):
+                with open(path, 'rb') as f:
+                    assert zipf.read(f'member_{index}.dcm') == f.read()
+
+    def test_missing_file_is_reported(self, sample_dicom_file, temp_dir):
+        """Test that an unreadable member is reported without stopping the archive."""
+        output = os.path.join(temp_dir, 'export.zip')
+        with zipfile.ZipFile(output, 'w') as zipf:
+            writer = ParallelZipWriter(zipf, COMPRESSION_DEFLATE, workers=2)
+            writer.add(os.path.join(temp_dir, 'missing.dcm'), 'missing.dcm')
+            writer.add(sample_dicom_file, 'present.dcm')
+            done = writer.finish()
+
+        assert done[0][0] == 'missing.dcm' and done[0][1] is not None
+        assert done[1] == ('present.dcm', None, zipfile.ZIP_DEFLATED)
+        with zipfile.ZipFile(output) as zipf:
+            assert zipf.namelist() == ['present.dcm']
+            assert zipf.testzip() is None
+
+    @pytest.mark.parametrize('compression, compress_type', [
+        (COMPRESSION_STORE, zipfile.ZIP_STORED),
+        (COMPRESSION_DEFLATE, zipfile.ZIP_DEFLATED),
+    ])
+    def test_precompressed_members_pass_testzip(self, multiple_dicom_files, temp_dir,
+                                                compression, compress_type):
+        """Test that members written through ZipFile internals form a valid archive.
+
+        Pins the private ``ZipFile`` state ``_write_compressed`` updates: a
+        regular member written after the pooled ones, and a later append,
+        must land after them without corrupting the central directory.
+        """
+        output = os.path.join(temp_dir, 'export.zip')
+        with zipfile.ZipFile(output, 'w') as zipf:
+            writer = ParallelZipWriter(zipf, compression, workers=2)
+            for index, path in enumerate(multiple_dicom_files):
+                writer.add(path, f'member_{index}.dcm')
+            done = writer.finish()
+            zipf.writestr('after.txt', b'written by zipfile')
+        with zipfile.ZipFile(output, 'a') as zipf:
+            zipf.writestr('appended.txt', b'appended later')
+
+        assert all(error is None for _, error, _ in done)
+        with zipfile.ZipFile(output) as zipf:
+            assert zipf.testzip() is None
+            infos = zipf.infolist()
+            assert [info.filename for info in infos[-2:]] == ['after.txt', 'appended.txt']
+            for index, path in enumerate(multiple_dicom_files):
+                assert infos[index].compress_type == compress_type
+                with open(path, 'rb') as f:
+                    assert zipf.read(f'member_{index}.dcm') == f.read()
+
+    def test_buffered_bytes_are_bounded(self, multiple_dicom_files, temp_dir):
+        """Test that members are written once the in-flight bytes would exceed the bound."""
+        largest = max(os.path.getsize(path) for path in multiple_dicom_files)
+        output = os.path.join(temp_dir, 'export.zip')
+        with zipfile.ZipFile(output, 'w') as zipf:
+            # Plenty of workers, so only the byte bound limits the queue
+            writer = ParallelZipWriter(zipf, COMPRESSION_DEFLATE, workers=8, max_buffered=2 * largest)
+            for index, path in enumerate(multiple_dicom_files * 3):
+                writer.add(path, f'member_{index}.dcm')
+                assert writer._buffered <= 2 * largest
+                assert len(writer._pending) <= 2
+            writer.finish()
+            assert writer._buffered == 0
+
+        with zipfile.ZipFile(output) as zipf:
+            assert zipf.testzip() is None
+            assert len(zipf.namelist()) == len(multiple_dicom_files) * 3